@@ -188,6 +188,8 @@ class GroupManager(object):
             return None
 
     def _notify_listeners(self, action, group, *args, **kwargs):
+        Permissions.invalidate()
+
         method = "on_group_{}".format(action)
         for listener in self._group_change_listeners:
             try:
@@ -315,6 +317,7 @@ class FilebasedGroupManager(GroupManager):
 
                 for group in self._groups.values():
                     group._subgroups = self._to_groups(*group._subgroups)
+                Permissions.invalidate()
 
                 if self._dirty:
                     self._save()
@@ -562,6 +565,8 @@ class Group(object):
         self._changeable = changeable
         self._toggleable = toggleable
 
+        self._needs = (None, None)
+
     def as_dict(self):
         from octoprint.access.permissions import OctoPrintPermission
 
@@ -628,6 +633,8 @@ class Group(object):
                 self._permissions.append(permission)
                 dirty = True
 
+        if dirty:
+            Permissions.invalidate()
         return dirty
 
     def remove_permissions_from_group(self, permissions):
@@ -647,6 +654,8 @@ class Group(object):
                 self._permissions.remove(permission)
                 dirty = True
 
+        if dirty:
+            Permissions.invalidate()
         return dirty
 
     def add_subgroups_to_group(self, subgroups):
@@ -670,6 +679,8 @@ class Group(object):
                 self._subgroups.append(group)
                 dirty = True
 
+        if dirty:
+            Permissions.invalidate()
         return dirty
 
     def remove_subgroups_from_group(self, subgroups):
@@ -689,6 +700,8 @@ class Group(object):
                 self._subgroups.remove(group)
                 dirty = True
 
+        if dirty:
+            Permissions.invalidate()
         return dirty
 
     def change_default(self, default):
@@ -715,20 +728,27 @@ class Group(object):
 
     @property
     def needs(self):
-        needs = set()
-        needs.add(GroupNeed(self.key))
+        # cached until permissions or groups change, see Permissions.invalidate
+        revision, needs = getattr(self, "_needs", (None, None))
+        if revision == Permissions.revision:
+            return needs
+
+        revision = Permissions.revision
+        needs = {GroupNeed(self.key)}
         for p in self.permissions:
-            needs = needs.union(p.needs)
+            needs.update(p.needs)
         for g in self.subgroups:
-            needs = needs.union(g.needs)
+            needs.update(g.needs)
 
+        needs = frozenset(needs)
+        self._needs = (revision, needs)
         return needs
 
     def has_permission(self, permission):
         if Permissions.ADMIN.get_name() in self._permissions:
             return True
 
-        return permission.needs.issubset(self.needs)
+        return permission.needs <= self.needs
 
     def __repr__(self):
         return (
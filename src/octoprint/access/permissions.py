@@ -216,6 +216,12 @@ class PluginPermissionDecorator(Permission):
 class PermissionsMetaClass(type):
     permissions = OrderedDict()
 
+    revision = 0
+    """
+    Increased whenever permissions are registered or the permissions of groups or users change, invalidating
+    the needs cached by :class:`~octoprint.access.groups.Group` and :class:`~octoprint.access.users.User`.
+    """
+
     def __new__(mcs, name, bases, args):
         cls = type.__new__(mcs, name, bases, args)
 
@@ -233,6 +239,7 @@ class PermissionsMetaClass(type):
                 raise PermissionAlreadyExists(key)
             value.key = key
             cls.permissions[key] = value
+            cls.invalidate()
 
     def __getattr__(cls, key):
         permission = cls.permissions.get(key)
@@ -245,6 +252,10 @@ class PermissionsMetaClass(type):
     def all(cls):
         return list(cls.permissions.values())
 
+    def invalidate(cls):
+        """Invalidates the needs cached by all groups and users."""
+        PermissionsMetaClass.revision += 1
+
     def filter(cls, cb):
         return list(filter(cb, cls.all()))
 
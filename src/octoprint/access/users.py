@@ -8,6 +8,7 @@ import hashlib
 import io
 import logging
 import os
+import threading
 import uuid
 
 # noinspection PyCompatibility
@@ -22,7 +23,13 @@ from werkzeug.local import LocalProxy
 from octoprint.access.groups import Group, GroupChangeListener
 from octoprint.access.permissions import OctoPrintPermission, Permissions
 from octoprint.settings import settings as s
-from octoprint.util import atomic_write, deprecated, generate_api_key
+from octoprint.util import (
+    api_key_digest,
+    api_key_matches,
+    atomic_write,
+    deprecated,
+    generate_api_key,
+)
 from octoprint.util import get_fully_qualified_classname as fqcn
 from octoprint.util import monotonic_time, to_bytes
 
@@ -304,6 +311,9 @@ class UserManager(GroupChangeListener, object):
                 )
 
     def _trigger_on_user_modified(self, user):
+        Permissions.invalidate()
+        clear_validated_apikeys()
+
         if isinstance(user, basestring):
             # user id
             users = []
@@ -512,6 +522,7 @@ class FilebasedUserManager(UserManager):
         self._userfile = path
 
         self._users = {}
+        self._users_by_apikey = {}
         self._dirty = False
 
         self._customized = None
@@ -578,6 +589,8 @@ class FilebasedUserManager(UserManager):
                                 self._users[name]
                             )
 
+            self._index_api_keys()
+
             if self._dirty:
                 self._save()
 
@@ -585,6 +598,13 @@ class FilebasedUserManager(UserManager):
         else:
             self._customized = False
 
+    def _index_api_keys(self):
+        self._users_by_apikey = {
+            api_key_digest(user._apikey): name
+            for name, user in self._users.items()
+            if isinstance(user, User) and user._apikey
+        }
+
     def _save(self, force=False):
         if not self._dirty and not force:
             return
@@ -623,6 +643,7 @@ class FilebasedUserManager(UserManager):
 
     def _refresh_groups(self, user):
         user._groups = self._to_groups(*map(lambda g: g.key, user.groups))
+        Permissions.invalidate()
 
     def add_user(
         self,
@@ -653,6 +674,7 @@ class FilebasedUserManager(UserManager):
             groups,
             apikey=apikey,
         )
+        self._index_api_keys()
         self._dirty = True
         self._save()
 
@@ -838,6 +860,7 @@ class FilebasedUserManager(UserManager):
 
         user = self._users[username]
         user._apikey = generate_api_key()
+        self._index_api_keys()
         self._dirty = True
         self._save()
         return user._apikey
@@ -848,6 +871,7 @@ class FilebasedUserManager(UserManager):
 
         user = self._users[username]
         user._apikey = None
+        self._index_api_keys()
         self._dirty = True
         self._save()
 
@@ -858,8 +882,10 @@ class FilebasedUserManager(UserManager):
             raise UnknownUser(username)
 
         del self._users[username]
+        self._index_api_keys()
         self._dirty = True
         self._save()
+        clear_validated_apikeys()
 
     def find_user(self, userid=None, apikey=None, session=None):
         user = UserManager.find_user(self, userid=userid, session=session)
@@ -873,9 +899,9 @@ class FilebasedUserManager(UserManager):
             return self._users[userid]
 
         elif apikey is not None:
-            for user in self._users.values():
-                if apikey == user._apikey:
-                    return user
+            user = self._users.get(self._users_by_apikey.get(api_key_digest(apikey)))
+            if user is not None and api_key_matches(apikey, user._apikey):
+                return user
             return None
 
         else:
@@ -1006,6 +1032,61 @@ class FilebasedUserManager(UserManager):
     )(has_been_customized)
 
 
+##~~ API key validation cache
+
+
+class ValidatedApiKeyCache(object):
+    """
+    Results of the ``octoprint.accesscontrol.keyvalidator`` hooks by digest of the validated API key,
+    positive as well as negative ones.
+
+    Holds at most ``size`` results, expired ones are evicted first once it's full.
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._entries = {}
+        self._mutex = threading.Lock()
+
+    def get(self, digest, now):
+        """
+        Returns:
+            tuple: ``(True, result)`` if a result for ``digest`` valid at ``now`` is cached,
+                ``(False, None)`` otherwise
+        """
+        with self._mutex:
+            cached = self._entries.get(digest)
+        if cached is not None and cached[0] > now:
+            return True, cached[1]
+        return False, None
+
+    def put(self, digest, result, now, ttl):
+        with self._mutex:
+            if len(self._entries) >= self._size:
+                # don't let random keys grow the cache without bounds
+                for key, (expires, _) in list(self._entries.items()):
+                    if expires <= now:
+                        del self._entries[key]
+                if len(self._entries) >= self._size:
+                    self._entries.clear()
+            self._entries[digest] = (now + ttl, result)
+
+    def clear(self):
+        with self._mutex:
+            self._entries.clear()
+
+
+validated_apikeys = ValidatedApiKeyCache(1000)
+
+
+def clear_validated_apikeys():
+    """
+    Drops all cached results of the ``octoprint.accesscontrol.keyvalidator`` hooks, e.g. because
+    the users they refer to changed.
+    """
+    validated_apikeys.clear()
+
+
 ##~~ Exceptions
 
 
@@ -1120,6 +1201,8 @@ class User(UserMixin):
         self._groups = groups
         self._apikey = apikey
 
+        self._needs = (None, None)
+
         if settings is None:
             settings = {}
 
@@ -1220,6 +1303,8 @@ class User(UserMixin):
                 self._permissions.append(permission)
                 dirty = True
 
+        if dirty:
+            Permissions.invalidate()
         return dirty
 
     def remove_permissions_from_user(self, permissions):
@@ -1235,6 +1320,8 @@ class User(UserMixin):
                 self._permissions.remove(permission)
                 dirty = True
 
+        if dirty:
+            Permissions.invalidate()
         return dirty
 
     def add_groups_to_user(self, groups):
@@ -1250,6 +1337,8 @@ class User(UserMixin):
                 self._groups.append(group)
                 dirty = True
 
+        if dirty:
+            Permissions.invalidate()
         return dirty
 
     def remove_groups_from_user(self, groups):
@@ -1265,6 +1354,8 @@ class User(UserMixin):
                 self._groups.remove(group)
                 dirty = True
 
+        if dirty:
+            Permissions.invalidate()
         return dirty
 
     @property
@@ -1291,20 +1382,28 @@ class User(UserMixin):
 
     @property
     def needs(self):
+        # cached until permissions or groups change, see Permissions.invalidate
+        revision, needs = getattr(self, "_needs", (None, None))
+        if revision == Permissions.revision:
+            return needs
+
+        revision = Permissions.revision
         needs = set()
 
         for permission in self.permissions:
             if permission is not None:
-                needs = needs.union(permission.needs)
+                needs.update(permission.needs)
 
         for group in self.groups:
             if group is not None:
-                needs = needs.union(group.needs)
+                needs.update(group.needs)
 
+        needs = frozenset(needs)
+        self._needs = (revision, needs)
         return needs
 
     def has_permission(self, permission):
-        return self.has_needs(*permission.needs)
+        return permission.needs <= self.needs
 
     def has_needs(self, *needs):
         return set(needs).issubset(self.needs)
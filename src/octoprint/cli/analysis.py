@@ -78,6 +78,12 @@ def util():
 @click.option("--bed-z", "bedz", type=float, default=0)
 @click.option("--progress", "progress", is_flag=True)
 @click.option("--layers", "layers", is_flag=True)
+@click.option(
+    "--fast",
+    "fast",
+    is_flag=True,
+    help="Only estimate the results from slicer comments and samples of the file.",
+)
 @click.argument("path", type=click.Path())
 def gcode_command(
     path,
@@ -92,6 +98,7 @@ def gcode_command(
     bedz,
     progress,
     layers,
+    fast,
 ):
     """Runs a GCODE file analysis."""
 
@@ -129,16 +136,27 @@ def gcode_command(
 
     interpreter = gcode(progress_callback=progress_callback, incl_layers=layers)
 
-    interpreter.load(
-        path,
-        speedx=speedx,
-        speedy=speedy,
-        offsets=offsets,
-        throttle=throttle_callback,
-        max_extruders=maxt,
-        g90_extruder=g90_extruder,
-        bed_z=bedz,
-    )
+    if fast:
+        interpreter.estimate(
+            path,
+            speedx=speedx,
+            speedy=speedy,
+            offsets=offsets,
+            max_extruders=maxt,
+            g90_extruder=g90_extruder,
+            bed_z=bedz,
+        )
+    else:
+        interpreter.load(
+            path,
+            speedx=speedx,
+            speedy=speedy,
+            offsets=offsets,
+            throttle=throttle_callback,
+            max_extruders=maxt,
+            g90_extruder=g90_extruder,
+            bed_z=bedz,
+        )
 
     click.echo("DONE:{}s".format(monotonic_time() - start_time))
 
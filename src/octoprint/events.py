@@ -20,6 +20,7 @@ import threading
 
 import octoprint.plugin
 from octoprint.settings import settings
+from octoprint.util import monotonic_time
 
 # singleton
 _instance = None
@@ -66,6 +67,7 @@ class Events(object):
     UPDATED_FILES = "UpdatedFiles"
     METADATA_ANALYSIS_STARTED = "MetadataAnalysisStarted"
     METADATA_ANALYSIS_FINISHED = "MetadataAnalysisFinished"
+    METADATA_ANALYSIS_PROVISIONAL = "MetadataAnalysisProvisional"
     METADATA_STATISTICS_UPDATED = "MetadataStatisticsUpdated"
 
     FILE_ADDED = "FileAdded"
@@ -161,9 +163,195 @@ def eventManager():
     return _instance
 
 
+class _SubscriberStats(object):
+    def __init__(self):
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def record(self, latency):
+        self.delivered += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def as_dict(self):
+        return {
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "latency": {
+                "average": self.latency_total / self.delivered if self.delivered else 0.0,
+                "max": self.latency_max,
+            },
+        }
+
+
+def _subscriber_name(callback):
+    owner = getattr(callback, "__self__", None)
+    name = getattr(callback, "__name__", type(callback).__name__)
+    if owner is not None:
+        return "{}.{}.{}".format(type(owner).__module__, type(owner).__name__, name)
+    return "{}.{}".format(getattr(callback, "__module__", None), name)
+
+
+def _deliver(logger, name, callback, event, payload, fired, stats):
+    logger.debug("Sending event %s to %s", event, name)
+    try:
+        callback(event, payload)
+    except Exception:
+        logger.exception(
+            "Got an exception while sending event {} (Payload: {!r}) to {}".format(
+                event, payload, name
+            )
+        )
+    stats.record(monotonic_time() - fired)
+
+
+class EventLane(object):
+    """
+    Delivers events to a single subscriber on its own thread, through a queue holding at most ``size`` events,
+    so a slow subscriber can't hold up the event bus and the other subscribers.
+
+    What happens to an event arriving while the queue is full depends on ``policy``:
+
+    ``drop_oldest``
+        The oldest queued event is dropped in favor of the new one.
+    ``drop_newest``
+        The new event is dropped.
+    ``coalesce``
+        If an event of the same type is still queued, its payload is replaced by the new one, whether the queue
+        is full or not. Otherwise the oldest queued event is dropped if needed. For subscribers only interested
+        in the latest state, e.g. of position or progress updates.
+
+    Arguments:
+        name (str): name of the subscriber, for logging and metrics
+        callback (callable): called with event and payload for every delivered event
+        size (int): maximum number of queued events
+        policy (str): one of :attr:`POLICIES`
+    """
+
+    DROP_OLDEST = "drop_oldest"
+    DROP_NEWEST = "drop_newest"
+    COALESCE = "coalesce"
+    POLICIES = (DROP_OLDEST, DROP_NEWEST, COALESCE)
+
+    def __init__(self, name, callback, size=100, policy=DROP_OLDEST):
+        if policy not in self.POLICIES:
+            raise ValueError("Unknown event lane policy: {}".format(policy))
+        if size < 1:
+            raise ValueError("Event lane size must be at least 1")
+
+        self._logger = logging.getLogger(__name__)
+
+        self.name = name
+        self.callback = callback
+        self.stats = _SubscriberStats()
+
+        self._size = size
+        self._policy = policy
+
+        self._queue = collections.deque()
+        self._queued_by_event = {}
+        self._condition = threading.Condition()
+        self._stopped = False
+
+        self._worker = threading.Thread(
+            target=self._work, name="EventLane for {}".format(name)
+        )
+        self._worker.daemon = True
+        self._worker.start()
+
+    @property
+    def depth(self):
+        """Number of currently queued events."""
+        with self._condition:
+            return len(self._queue)
+
+    def put(self, event, payload, fired=None):
+        if fired is None:
+            fired = monotonic_time()
+
+        with self._condition:
+            if self._stopped:
+                return
+
+            if self._policy == self.COALESCE:
+                queued = self._queued_by_event.get(event)
+                if queued is not None:
+                    queued[1] = payload
+                    self.stats.coalesced += 1
+                    return
+
+            if len(self._queue) >= self._size:
+                self.stats.dropped += 1
+                if self._policy == self.DROP_NEWEST:
+                    return
+                self._forget(self._queue.popleft())
+
+            entry = [event, payload, fired]
+            self._queue.append(entry)
+            if self._policy == self.COALESCE:
+                self._queued_by_event[event] = entry
+            self._condition.notify()
+
+    def stop(self):
+        """Stops the lane once all queued events are delivered."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def join(self, timeout=None):
+        self._worker.join(timeout)
+        return self._worker.is_alive()
+
+    def _forget(self, entry):
+        if self._queued_by_event.get(entry[0]) is entry:
+            del self._queued_by_event[entry[0]]
+
+    def _work(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if not self._queue:
+                    return
+                entry = self._queue.popleft()
+                self._forget(entry)
+
+            event, payload, fired = entry
+            _deliver(
+                self._logger, self.name, self.callback, event, payload, fired, self.stats
+            )
+
+
+class _PluginSubscribers(object):
+    """Event handler plugins by event, computed on first use of each event."""
+
+    def __init__(self, revision, plugins):
+        self.revision = revision
+        self._plugins = plugins
+        self._by_event = {}
+
+    def __call__(self, event):
+        subscribers = self._by_event.get(event)
+        if subscribers is None:
+            subscribers = self._by_event[event] = [
+                (identifier, plugin, lane)
+                for identifier, plugin, events, lane in self._plugins
+                if events is None or event in events
+            ]
+        return subscribers
+
+
 class EventManager(object):
     """
     Handles receiving events and dispatching them to subscribers
+
+    Subscribers are called one after the other on the event bus's thread, unless they use an :class:`EventLane`
+    (see :meth:`subscribe` and :meth:`~octoprint.plugin.EventHandlerPlugin.get_event_lane`). Delivery metrics per
+    subscriber are available through :meth:`subscriber_metrics`.
     """
 
     def __init__(self):
@@ -177,6 +365,11 @@ class EventManager(object):
         self._queue = queue.Queue()
         self._held_back = queue.Queue()
 
+        self._listener_lanes = {}
+        self._plugin_lanes = {}
+        self._plugin_subscribers = None
+        self._stats = collections.defaultdict(_SubscriberStats)
+
         self._worker = threading.Thread(target=self._work)
         self._worker.daemon = True
         self._worker.start()
@@ -184,7 +377,7 @@ class EventManager(object):
     def _work(self):
         try:
             while not self._shutdown_signaled:
-                event, payload = self._queue.get(True)
+                event, payload, fired = self._queue.get(True)
                 if event == Events.SHUTDOWN:
                     # we've got the shutdown event here, stop event loop processing after this has been processed
                     self._logger.info(
@@ -192,30 +385,135 @@ class EventManager(object):
                     )
                     self._shutdown_signaled = True
 
-                eventListeners = self._registeredListeners[event]
+                eventListeners = list(self._registeredListeners.get(event, ()))
                 self._logger_fire.debug(
                     "Firing event: {} (Payload: {!r})".format(event, payload)
                 )
 
                 for listener in eventListeners:
-                    self._logger.debug("Sending action to {!r}".format(listener))
-                    try:
-                        listener(event, payload)
-                    except Exception:
-                        self._logger.exception(
-                            "Got an exception while sending event {} (Payload: {!r}) to {}".format(
-                                event, payload, listener
-                            )
-                        )
+                    lane = self._listener_lanes.get(listener)
+                    if lane is not None:
+                        lane.put(event, payload, fired)
+                        continue
+
+                    name = _subscriber_name(listener)
+                    _deliver(
+                        self._logger,
+                        name,
+                        listener,
+                        event,
+                        payload,
+                        fired,
+                        self._stats[name],
+                    )
 
-                octoprint.plugin.call_plugin(
-                    octoprint.plugin.types.EventHandlerPlugin,
-                    "on_event",
-                    args=(event, payload),
-                )
+                self._dispatch_to_plugins(event, payload, fired)
             self._logger.info("Event loop shut down")
         except Exception:
             self._logger.exception("Ooops, the event bus worker loop crashed")
+        finally:
+            for lane in self._lanes():
+                lane.stop()
+
+    def _dispatch_to_plugins(self, event, payload, fired):
+        try:
+            manager = octoprint.plugin.plugin_manager()
+            subscribers = self._get_plugin_subscribers(manager)
+        except Exception:
+            self._logger.exception(
+                "Error while determining the event handler plugins for {}".format(event)
+            )
+            return
+
+        calls = 0
+        for identifier, plugin, lane in subscribers(event):
+            calls += 1
+            if lane is not None:
+                lane.put(event, payload, fired)
+                continue
+
+            name = "plugin:" + identifier
+            _deliver(
+                self._logger,
+                name,
+                plugin.on_event,
+                event,
+                payload,
+                fired,
+                self._stats[name],
+            )
+
+        manager.count_dispatch([octoprint.plugin.types.EventHandlerPlugin], calls)
+
+    def _get_plugin_subscribers(self, manager):
+        revision = manager.implementations_revision
+        subscribers = self._plugin_subscribers
+        if subscribers is not None and subscribers.revision == revision:
+            return subscribers
+
+        plugins = []
+        lanes = {}
+        for plugin in manager.get_implementations(
+            octoprint.plugin.types.EventHandlerPlugin
+        ):
+            identifier = getattr(plugin, "_identifier", None)
+            if identifier is None:
+                continue
+
+            events = None
+            lane = None
+            try:
+                subscribed = plugin.get_subscribed_events()
+                if subscribed is not None:
+                    events = frozenset(subscribed)
+
+                config = plugin.get_event_lane()
+                if config is not None:
+                    lane = self._plugin_lanes.get(identifier)
+                    if lane is None or lane.callback != plugin.on_event:
+                        lane = EventLane(
+                            "plugin:" + identifier, plugin.on_event, **config
+                        )
+                    lanes[identifier] = lane
+            except Exception:
+                self._logger.exception(
+                    "Error while determining event subscriptions of plugin {}, sending it all events".format(
+                        identifier
+                    ),
+                    extra={"plugin": identifier},
+                )
+
+            plugins.append((identifier, plugin, events, lane))
+
+        for identifier, lane in self._plugin_lanes.items():
+            if lanes.get(identifier) is not lane:
+                lane.stop()
+        self._plugin_lanes = lanes
+
+        self._plugin_subscribers = _PluginSubscribers(revision, plugins)
+        return self._plugin_subscribers
+
+    def _lanes(self):
+        return list(self._listener_lanes.values()) + list(self._plugin_lanes.values())
+
+    def subscriber_metrics(self):
+        """
+        Returns delivery metrics for every subscriber that received events so far: the number of delivered,
+        dropped and coalesced events, the average and maximum latency in seconds between firing an event and
+        the subscriber returning from handling it, and whether it has an :class:`EventLane` as well as its
+        current queue depth.
+
+        Returns:
+            dict: the metrics by subscriber name, plugins are named ``plugin:<identifier>``
+        """
+        result = {}
+        for name, stats in list(self._stats.items()):
+            result[name] = stats.as_dict()
+            result[name].update(lane=False, depth=0)
+        for lane in self._lanes():
+            result[lane.name] = lane.stats.as_dict()
+            result[lane.name].update(lane=True, depth=lane.depth)
+        return result
 
     def fire(self, event, payload=None):
         """
@@ -253,17 +551,26 @@ class EventManager(object):
         else:
             q = self._held_back
 
-        q.put((event, payload))
+        q.put((event, payload, monotonic_time()))
 
-    def subscribe(self, event, callback):
+    def subscribe(self, event, callback, lane=None):
         """
         Subscribe a listener to an event -- pass in the event name (as a string) and the callback object
+
+        If ``lane`` is set to a dict with the ``size`` and ``policy`` arguments of an :class:`EventLane`, events
+        are delivered to the callback through such a lane instead of on the event bus's thread. The lane is
+        shared by all events the callback is subscribed to and configured on its first subscription.
         """
 
         if callback in self._registeredListeners[event]:
             # callback is already subscribed to the event
             return
 
+        if lane is not None and callback not in self._listener_lanes:
+            self._listener_lanes[callback] = EventLane(
+                _subscriber_name(callback), callback, **lane
+            )
+
         self._registeredListeners[event].append(callback)
         self._logger.debug(
             "Subscribed listener {!r} for event {}".format(callback, event)
@@ -280,9 +587,25 @@ class EventManager(object):
             # not registered
             pass
 
+        if callback in self._listener_lanes and not any(
+            callback in listeners for listeners in self._registeredListeners.values()
+        ):
+            self._listener_lanes.pop(callback).stop()
+
     def join(self, timeout=None):
+        deadline = monotonic_time() + timeout if timeout is not None else None
+
         self._worker.join(timeout)
-        return self._worker.is_alive()
+        if self._worker.is_alive():
+            return True
+
+        for lane in self._lanes():
+            remaining = (
+                max(0.0, deadline - monotonic_time()) if deadline is not None else None
+            )
+            if lane.join(remaining):
+                return True
+        return False
 
 
 class GenericEventListener(object):
@@ -694,6 +694,11 @@ class FileManager(object):
             )
         return result
 
+    def query_files(self, destination, path=None, recursive=True, **kwargs):
+        return self._storage(destination).query_files(
+            path=path, recursive=recursive, **kwargs
+        )
+
     def add_file(
         self,
         destination,
@@ -1070,6 +1075,20 @@ class FileManager(object):
                 absolute_path,
                 printer_profile,
                 analysis,
+                hash=self._file_hash(destination, path),
             )
         else:
             return None
+
+    def _file_hash(self, destination, path):
+        try:
+            metadata = self._storage(destination).get_metadata(path)
+        except Exception:
+            self._logger.exception(
+                "Error while fetching metadata of {}:{}".format(destination, path)
+            )
+            return None
+
+        if isinstance(metadata, dict):
+            return metadata.get("hash")
+        return None
@@ -6,6 +6,7 @@ __license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agp
 __copyright__ = "Copyright (C) 2014 The OctoPrint Project - Released under terms of the AGPLv3 License"
 
 import copy
+import io
 import logging
 
 try:
@@ -14,6 +15,7 @@ except ImportError:
     import Queue as queue
 
 import collections
+import multiprocessing
 import os
 import threading
 import time
@@ -24,6 +26,7 @@ from octoprint.util import dict_merge
 from octoprint.util import get_fully_qualified_classname as fqcn
 from octoprint.util import monotonic_time
 from octoprint.util.platform import CLOSE_FDS
+from octoprint.util.version import get_octoprint_version_string
 
 EMPTY_RESULT = {
     "_empty": True,
@@ -43,7 +46,7 @@ EMPTY_RESULT = {
 class QueueEntry(
     collections.namedtuple(
         "QueueEntry",
-        "name, path, type, location, absolute_path, printer_profile, analysis",
+        "name, path, type, location, absolute_path, printer_profile, analysis, hash",
     )
 ):
     """
@@ -59,8 +62,33 @@ class QueueEntry(
         absolute_path (str): Absolute path on disk through which to access the file.
         printer_profile (PrinterProfile): :class:`PrinterProfile` which to use for analysis.
         analysis (dict): :class:`GcodeAnalysisQueue` results from prior analysis, or ``None`` if there is none.
+        hash (str): Hash of the file's content if known, used to look up results in the :class:`AnalysisCache`.
+            Optional, defaults to ``None``.
     """
 
+    def __new__(
+        cls,
+        name,
+        path,
+        type,
+        location,
+        absolute_path,
+        printer_profile,
+        analysis,
+        hash=None,
+    ):
+        return super(QueueEntry, cls).__new__(
+            cls,
+            name,
+            path,
+            type,
+            location,
+            absolute_path,
+            printer_profile,
+            analysis,
+            hash,
+        )
+
     def __str__(self):
         return "{location}:{path}".format(location=self.location, path=self.path)
 
@@ -79,20 +107,35 @@ class AnalysisQueue(object):
     By invoking :meth:`register_finish_callback` it is possible to register oneself as a callback to be invoked each
     time the analysis of a queue entry finishes. The call parameters will be the finished queue entry as the first
     and the analysis result as the second parameter. It is also possible to remove the registration again by invoking
-    :meth:`unregister_finish_callback`.
+    :meth:`unregister_finish_callback`. Callbacks registered through :meth:`register_progress_callback` are invoked
+    with the queue entry and its progress in percent whenever the progress of a running analysis changes.
+
+    Queues may publish a provisional result for an entry before its analysis finishes. It is passed to the callbacks
+    registered through :meth:`register_provisional_callback` and fired as ``MetadataAnalysisProvisional`` event, the
+    finish callbacks only ever get the final result. Provisional results are never cached.
 
     :meth:`enqueue` allows enqueuing :class:`QueueEntry` instances to analyze. If the :attr:`QueueEntry.type` is unknown
     (no specific child class of :class:`AbstractAnalysisQueue` is registered for it), nothing will happen. Otherwise the
     entry will be enqueued with the type specific analysis queue.
+
+    If an :class:`AnalysisCache` is provided, results are stored in it and entries with a known content hash are
+    first looked up in it. On a hit the finish callbacks are invoked right away and the entry isn't enqueued.
     """
 
-    def __init__(self, queue_factories):
+    def __init__(self, queue_factories, cache=None):
         self._logger = logging.getLogger(__name__)
         self._callbacks = []
+        self._progress_callbacks = []
+        self._provisional_callbacks = []
+        self._cache = cache
 
         self._queues = {}
         for key, queue_factory in queue_factories.items():
             self._queues[key] = queue_factory(self._analysis_finished)
+            if hasattr(self._queues[key], "set_progress_callback"):
+                self._queues[key].set_progress_callback(self._analysis_progress)
+            if hasattr(self._queues[key], "set_provisional_callback"):
+                self._queues[key].set_provisional_callback(self._analysis_provisional)
 
     def register_finish_callback(self, callback):
         self._callbacks.append(callback)
@@ -100,6 +143,18 @@ class AnalysisQueue(object):
     def unregister_finish_callback(self, callback):
         self._callbacks.remove(callback)
 
+    def register_progress_callback(self, callback):
+        self._progress_callbacks.append(callback)
+
+    def unregister_progress_callback(self, callback):
+        self._progress_callbacks.remove(callback)
+
+    def register_provisional_callback(self, callback):
+        self._provisional_callbacks.append(callback)
+
+    def unregister_provisional_callback(self, callback):
+        self._provisional_callbacks.remove(callback)
+
     def enqueue(self, entry, high_priority=False):
         if entry is None:
             return False
@@ -107,6 +162,12 @@ class AnalysisQueue(object):
         if entry.type not in self._queues:
             return False
 
+        result = self._cached_result(entry)
+        if result is not None:
+            self._logger.info("Using cached analysis result for {}".format(entry))
+            self._analysis_finished(entry, result, cache=False)
+            return True
+
         self._queues[entry.type].enqueue(entry, high_priority=high_priority)
         return True
 
@@ -131,7 +192,73 @@ class AnalysisQueue(object):
         for q in self._queues.values():
             q.resume()
 
-    def _analysis_finished(self, entry, result):
+    def _cache_key(self, entry):
+        if self._cache is None or not entry.hash:
+            return None
+
+        try:
+            key_data = self._queues[entry.type].cache_key_data(entry)
+        except Exception:
+            self._logger.exception(
+                "Error while determining the analysis cache key for {}".format(entry)
+            )
+            return None
+
+        if key_data is None:
+            return None
+        return AnalysisCache.key(entry.type, entry.hash, key_data)
+
+    def _cached_result(self, entry):
+        key = self._cache_key(entry)
+        if key is None:
+            return None
+
+        result = self._cache.get(key)
+        if result is not None and entry.analysis and isinstance(entry.analysis, dict):
+            # same as the analysis queues do with fresh results
+            result = dict_merge(result, entry.analysis)
+        return result
+
+    def _analysis_progress(self, entry, progress):
+        for callback in self._progress_callbacks:
+            try:
+                callback(entry, progress)
+            except Exception:
+                self._logger.exception(
+                    "Error while pushing analysis progress to callback {}".format(
+                        callback
+                    ),
+                    extra={"callback": fqcn(callback)},
+                )
+
+    def _analysis_provisional(self, entry, result):
+        for callback in self._provisional_callbacks:
+            try:
+                callback(entry, result)
+            except Exception:
+                self._logger.exception(
+                    "Error while pushing provisional analysis data to callback {}".format(
+                        callback
+                    ),
+                    extra={"callback": fqcn(callback)},
+                )
+        eventManager().fire(
+            Events.METADATA_ANALYSIS_PROVISIONAL,
+            {
+                "name": entry.name,
+                "path": entry.path,
+                "origin": entry.location,
+                "result": result,
+            },
+        )
+
+    def _analysis_finished(self, entry, result, cache=True):
+        if cache and result and not entry.analysis:
+            # only cache pure analysis results, not those merged with prior analysis data
+            key = self._cache_key(entry)
+            if key is not None:
+                self._cache.put(key, result)
+
         for callback in self._callbacks:
             try:
                 callback(entry, result)
@@ -151,20 +278,180 @@ class AnalysisQueue(object):
         )
 
 
+class AnalysisCache(object):
+    """
+    Persistent cache of analysis results, keyed by file content and everything else influencing the result (see
+    :meth:`AbstractAnalysisQueue.cache_key_data`).
+
+    Each result is stored as a JSON file in ``folder``. The least recently used results are evicted once there are
+    more than ``size`` of them.
+
+    Arguments:
+        folder (str): Folder to store the cached results in, will be created if necessary.
+        size (int): Maximum number of results to keep.
+    """
+
+    def __init__(self, folder, size):
+        self._logger = logging.getLogger(__name__)
+        self._folder = folder
+        self._size = size
+
+        self._mutex = threading.RLock()
+        self._index = collections.OrderedDict()
+        self._load_index()
+
+    @classmethod
+    def key(cls, analysis_type, file_hash, key_data):
+        """
+        Creates the cache key for a file of type ``analysis_type`` with content hash ``file_hash`` and the queue's
+        ``key_data``. Results of other OctoPrint versions don't match.
+        """
+        import hashlib
+        import json
+
+        data = json.dumps(
+            [get_octoprint_version_string(), analysis_type, file_hash, key_data],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        with self._mutex:
+            return len(self._index)
+
+    def __contains__(self, key):
+        with self._mutex:
+            return key in self._index
+
+    def get(self, key):
+        """
+        Returns the cached result for ``key``, or ``None`` if there is none.
+        """
+        import json
+
+        with self._mutex:
+            if key not in self._index:
+                return None
+
+            path = self._path(key)
+            try:
+                with io.open(path, "rt", encoding="utf-8") as f:
+                    result = json.load(f)
+                os.utime(path, None)
+            except Exception:
+                self._logger.exception(
+                    "Error while reading cached analysis result from {}".format(path)
+                )
+                self._remove(key)
+                return None
+
+            self._index[key] = self._index.pop(key)
+            return result
+
+    def put(self, key, result):
+        """
+        Stores ``result`` for ``key``, evicting the least recently used results if the cache is full.
+        """
+        from octoprint.util import atomic_write
+        from octoprint.util.json import dump
+
+        try:
+            data = dump(result)
+        except (TypeError, ValueError):
+            self._logger.warning(
+                "Analysis result can't be serialized, not caching it: {!r}".format(result)
+            )
+            return
+
+        with self._mutex:
+            try:
+                if not os.path.isdir(self._folder):
+                    os.makedirs(self._folder)
+                with atomic_write(self._path(key), mode="wt", max_permissions=0o666) as f:
+                    f.write(data)
+            except Exception:
+                self._logger.exception("Error while writing to the analysis cache")
+                return
+
+            self._index.pop(key, None)
+            self._index[key] = True
+
+            while len(self._index) > self._size:
+                oldest = next(iter(self._index))
+                self._remove(oldest)
+
+    def clear(self):
+        with self._mutex:
+            for key in list(self._index):
+                self._remove(key)
+
+    def _load_index(self):
+        if not os.path.isdir(self._folder):
+            return
+
+        entries = []
+        for name in os.listdir(self._folder):
+            if not name.endswith(".json"):
+                continue
+            try:
+                mtime = os.stat(os.path.join(self._folder, name)).st_mtime
+            except OSError:
+                continue
+            entries.append((mtime, name[: -len(".json")]))
+
+        for _, key in sorted(entries):
+            self._index[key] = True
+
+        while len(self._index) > self._size:
+            self._remove(next(iter(self._index)))
+
+    def _remove(self, key):
+        from octoprint.util import silent_remove
+
+        self._index.pop(key, None)
+        silent_remove(self._path(key))
+
+    def _path(self, key):
+        return os.path.join(self._folder, key + ".json")
+
+
+class _AnalysisJob(object):
+    """State of a running analysis, one per analysis thread of an :class:`AbstractAnalysisQueue`."""
+
+    def __init__(self, entry, high_priority):
+        self.entry = entry
+        self.high_priority = high_priority
+        self.progress = None
+        self.reported_progress = None
+        self.aborted = False
+        self.reenqueue = True
+        self.worker = None
+        self.done = threading.Event()
+
+
 class AbstractAnalysisQueue(object):
     """
     The :class:`AbstractAnalysisQueue` is the parent class of all specific analysis queues such as the
     :class:`GcodeAnalysisQueue`. It offers methods to enqueue new entries to analyze and pausing and resuming analysis
     processing.
 
+    Queues that set :attr:`CONCURRENT` analyze up to ``concurrency`` entries at once, each in its own thread. All
+    others analyze one entry after the other.
+
     Arguments:
         finished_callback (callable): Callback that will be called upon finishing analysis of an entry in the queue.
             The callback will be called with the analyzed entry as the first argument and the analysis result as
             returned from the queue implementation as the second parameter.
+        concurrency (int): Number of entries to analyze at once, only used if :attr:`CONCURRENT` is set.
 
     .. automethod:: _do_analysis
 
     .. automethod:: _do_abort
+
+    .. automethod:: _abort_job
+
+    .. automethod:: _publish_provisional
     """
 
     LOW_PRIO = 100
@@ -172,34 +459,121 @@ class AbstractAnalysisQueue(object):
     HIGH_PRIO = 50
     HIGH_PRIO_ABORTED = 0
 
-    def __init__(self, finished_callback):
+    CONCURRENT = False
+    """
+    Whether :meth:`_do_analysis` may run for several entries at once. ``self._current`` and
+    ``self._current_progress`` refer to the entry analyzed by the calling thread, sub classes setting this need
+    to implement :meth:`_abort_job`.
+    """
+
+    def __init__(self, finished_callback, concurrency=1):
         self._logger = logging.getLogger(__name__)
 
         self._finished_callback = finished_callback
+        self._progress_callback = None
+        self._provisional_callback = None
 
         self._active = threading.Event()
         self._active.set()
 
-        self._done = threading.Event()
-        self._done.clear()
+        self._queue = queue.PriorityQueue()
 
-        self._currentFile = None
-        self._currentProgress = None
+        self._local = threading.local()
+        self._jobs = []
+        self._jobs_mutex = threading.Lock()
 
-        self._queue = queue.PriorityQueue()
-        self._current = None
-        self._current_highprio = False
+        if not self.CONCURRENT or not concurrency or concurrency < 1:
+            concurrency = 1
+
+        self._workers = []
+        for number in range(concurrency):
+            worker = threading.Thread(
+                target=self._work,
+                name="{} worker {}".format(self.__class__.__name__, number + 1),
+            )
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+        self._worker = self._workers[0]
+
+    @property
+    def concurrency(self):
+        return len(self._workers)
+
+    @property
+    def _current_job(self):
+        return getattr(self._local, "job", None)
+
+    @property
+    def _current(self):
+        job = self._current_job
+        return job.entry if job is not None else None
+
+    @property
+    def _current_highprio(self):
+        job = self._current_job
+        return job.high_priority if job is not None else False
+
+    @property
+    def _current_progress(self):
+        job = self._current_job
+        return job.progress if job is not None else None
+
+    @_current_progress.setter
+    def _current_progress(self, value):
+        job = self._current_job
+        if job is None:
+            return
+
+        job.progress = value
+        if value is None or self._progress_callback is None:
+            return
+
+        progress = int(value)
+        if progress == job.reported_progress:
+            return
+        job.reported_progress = progress
+
+        try:
+            self._progress_callback(job.entry, progress)
+        except Exception:
+            self._logger.exception(
+                "Error while reporting analysis progress of {}".format(job.entry)
+            )
+
+    def set_progress_callback(self, callback):
+        """
+        Sets a callback to call with the entry and its progress in percent as an :class:`int` whenever the progress
+        of a running analysis changes.
+        """
+        self._progress_callback = callback
+
+    def set_provisional_callback(self, callback):
+        """
+        Sets a callback to call with the entry and a provisional result, which queues may publish through
+        :meth:`_publish_provisional` while the analysis of an entry is still running.
+        """
+        self._provisional_callback = callback
+
+    def _publish_provisional(self, result):
+        entry = self._current
+        if entry is None or self._provisional_callback is None:
+            return
 
-        self._worker = threading.Thread(target=self._work)
-        self._worker.daemon = True
-        self._worker.start()
+        try:
+            self._provisional_callback(entry, result)
+        except Exception:
+            self._logger.exception(
+                "Error while publishing provisional analysis result of {}".format(entry)
+            )
 
     def enqueue(self, entry, high_priority=False):
         """
         Enqueues an ``entry`` for analysis by the queue.
 
         If ``high_priority`` is True (defaults to False), the entry will be prioritized and hence processed before
-        other entries in the queue with normal priority.
+        other entries in the queue with normal priority. If all analysis threads are busy, a running analysis with
+        normal priority is aborted in its favor.
 
         Arguments:
             entry (QueueEntry): The :class:`QueueEntry` to analyze.
@@ -228,29 +602,27 @@ class AbstractAnalysisQueue(object):
             prio = self.__class__.LOW_PRIO
 
         self._queue.put((prio, entry, high_priority))
-        if high_priority and self._current is not None and not self._current_highprio:
-            self._logger.debug("Aborting current analysis in favor of high priority one")
-            self._do_abort()
+        if high_priority:
+            with self._jobs_mutex:
+                jobs = list(self._jobs)
+            low_priority = [job for job in jobs if not job.high_priority]
+            if len(jobs) >= len(self._workers) and low_priority:
+                self._logger.debug(
+                    "Aborting analysis of {} in favor of high priority one".format(
+                        low_priority[-1].entry
+                    )
+                )
+                self._abort_job(low_priority[-1])
 
     def dequeue(self, location, path):
-        if (
-            self._current is not None
-            and self._current.location == location
-            and self._current.path == path
-        ):
-            self._do_abort(reenqueue=False)
-            self._done.wait()
-            self._done.clear()
+        self._abort_and_wait(
+            lambda entry: entry.location == location and entry.path == path
+        )
 
     def dequeue_folder(self, location, path):
-        if (
-            self._current is not None
-            and self._current.location == location
-            and self._current.path.startswith(path + "/")
-        ):
-            self._do_abort(reenqueue=False)
-            self._done.wait()
-            self._done.clear()
+        self._abort_and_wait(
+            lambda entry: entry.location == location and entry.path.startswith(path + "/")
+        )
 
     def pause(self):
         """
@@ -259,11 +631,15 @@ class AbstractAnalysisQueue(object):
 
         self._logger.debug("Pausing analysis")
         self._active.clear()
-        if self._current is not None:
+
+        with self._jobs_mutex:
+            jobs = list(self._jobs)
+        if jobs:
             self._logger.debug(
                 "Aborting running analysis, will restart when analyzer is resumed"
             )
-            self._do_abort()
+            for job in jobs:
+                self._abort_job(job)
 
     def resume(self):
         """
@@ -273,6 +649,14 @@ class AbstractAnalysisQueue(object):
         self._logger.debug("Resuming analyzer")
         self._active.set()
 
+    def _abort_and_wait(self, matches):
+        with self._jobs_mutex:
+            jobs = [job for job in self._jobs if matches(job.entry)]
+        for job in jobs:
+            self._abort_job(job, reenqueue=False)
+        for job in jobs:
+            job.done.wait()
+
     def _work(self):
         while True:
             (priority, entry, high_priority) = self._queue.get()
@@ -283,8 +667,6 @@ class AbstractAnalysisQueue(object):
 
             try:
                 self._analyze(entry, high_priority=high_priority)
-                self._queue.task_done()
-                self._done.set()
             except AnalysisAborted as ex:
                 if ex.reenqueue:
                     self._queue.put(
@@ -297,18 +679,20 @@ class AbstractAnalysisQueue(object):
                         )
                     )
                 self._logger.debug("Running analysis of entry {} aborted".format(entry))
+            except Exception:
+                self._logger.exception("Error while analyzing entry {}".format(entry))
+            finally:
                 self._queue.task_done()
-                self._done.set()
-            else:
-                time.sleep(1.0)
 
     def _analyze(self, entry, high_priority=False):
         path = entry.absolute_path
         if path is None or not os.path.exists(path):
             return
 
-        self._current = entry
-        self._current_highprio = high_priority
+        job = _AnalysisJob(entry, high_priority)
+        with self._jobs_mutex:
+            self._jobs.append(job)
+        self._local.job = job
         self._current_progress = 0
 
         try:
@@ -332,14 +716,28 @@ class AbstractAnalysisQueue(object):
                     entry, monotonic_time() - start_time
                 )
             )
-            self._finished_callback(self._current, result)
+            self._finished_callback(entry, result)
         except RuntimeError as exc:
-            self._logger.error(
-                "Analysis for {} ran into error: {}".format(self._current, exc)
-            )
+            self._logger.error("Analysis for {} ran into error: {}".format(entry, exc))
         finally:
-            self._current = None
-            self._current_progress = None
+            self._local.job = None
+            with self._jobs_mutex:
+                self._jobs.remove(job)
+            job.done.set()
+
+    def cache_key_data(self, entry):
+        """
+        Returns everything besides the file's content that influences the analysis result of ``entry``, e.g. printer
+        profile parameters and settings, as a JSON serializable structure. The :class:`AnalysisCache` keys results by
+        it. May be overridden by sub classes, the default of ``None`` disables caching of the queue's results.
+
+        Arguments:
+            entry (QueueEntry): The entry to return the cache key data for.
+
+        Returns:
+            object: The data to use for the cache key, or ``None`` if results must not be cached.
+        """
+        return None
 
     def _do_analysis(self, high_priority=False):
         """
@@ -361,6 +759,17 @@ class AbstractAnalysisQueue(object):
         """
         pass
 
+    def _abort_job(self, job, reenqueue=True):
+        """
+        Aborts the running analysis ``job``, called from a thread other than the one analyzing it. The analysis is
+        expected to raise :class:`AnalysisAborted` with the given ``reenqueue`` flag. Defaults to :meth:`_do_abort`,
+        which is enough for queues analyzing a single entry at a time. Queues setting :attr:`CONCURRENT` need to
+        override it.
+        """
+        job.aborted = True
+        job.reenqueue = reenqueue
+        self._do_abort(reenqueue=reenqueue)
+
 
 class GcodeAnalysisQueue(AbstractAnalysisQueue):
     """
@@ -402,20 +811,46 @@ class GcodeAnalysisQueue(AbstractAnalysisQueue):
          * Depth of the printed model along the Y axis, in mm
        - * ``dimensions.height``
          * Height of the printed model along the Z axis, in mm
+
+    For files of at least ``gcodeAnalysis.fastEstimateMinSize`` bytes a quick estimate based on slicer comments
+    and samples of the file (see :meth:`octoprint.util.gcodeInterpreter.gcode.estimate`) is published as
+    provisional result before the full analysis starts.
     """
 
-    def __init__(self, finished_callback):
-        AbstractAnalysisQueue.__init__(self, finished_callback)
+    CONCURRENT = True
 
-        self._aborted = False
-        self._reenqueue = False
+    def __init__(self, finished_callback):
+        concurrency = settings().getInt(["gcodeAnalysis", "concurrency"])
+        if not concurrency or concurrency < 1:
+            concurrency = _default_concurrency()
+
+        self._worker_pool = None
+        workers = settings().getInt(["gcodeAnalysis", "workers"])
+        if workers and workers > 0:
+            self._worker_pool = GcodeAnalysisWorkerPool(max(workers, concurrency))
+
+        AbstractAnalysisQueue.__init__(self, finished_callback, concurrency=concurrency)
+
+    def cache_key_data(self, entry):
+        from octoprint.util.gcodeInterpreter import ANALYSIS_VERSION, gcode
+
+        return {
+            "version": ANALYSIS_VERSION,
+            # the engines may differ in rounding
+            "vectorized": gcode().vectorized,
+            "maxExtruders": settings().getInt(["gcodeAnalysis", "maxExtruders"]),
+            "g90InfluencesExtruder": settings().getBoolean(
+                ["feature", "g90InfluencesExtruder"]
+            ),
+            "bedZ": settings().getFloat(["gcodeAnalysis", "bedZ"]),
+            "speedX": entry.printer_profile["axes"]["x"]["speed"],
+            "speedY": entry.printer_profile["axes"]["y"]["speed"],
+            "offsets": [
+                list(offset) for offset in entry.printer_profile["extruder"]["offsets"]
+            ],
+        }
 
     def _do_analysis(self, high_priority=False):
-        import sys
-
-        import sarge
-        import yaml
-
         if self._current.analysis and all(
             map(
                 lambda x: x in self._current.analysis,
@@ -438,89 +873,47 @@ class GcodeAnalysisQueue(AbstractAnalysisQueue):
             speedy = self._current.printer_profile["axes"]["y"]["speed"]
             offsets = self._current.printer_profile["extruder"]["offsets"]
 
-            command = [
-                sys.executable,
-                "-m",
-                "octoprint",
-                "analysis",
-                "gcode",
-                "--speed-x={}".format(speedx),
-                "--speed-y={}".format(speedy),
-                "--max-t={}".format(max_extruders),
-                "--throttle={}".format(throttle),
-                "--throttle-lines={}".format(throttle_lines),
-                "--bed-z={}".format(bed_z),
-            ]
-            for offset in offsets[1:]:
-                command += ["--offset", str(offset[0]), str(offset[1])]
-            if g90_extruder:
-                command += ["--g90-extruder"]
-            command.append(self._current.absolute_path)
-
-            self._logger.info("Invoking analysis command: {}".format(" ".join(command)))
-
-            self._aborted = False
-            p = sarge.run(
-                command, close_fds=CLOSE_FDS, async_=True, stdout=sarge.Capture()
-            )
-
-            while len(p.commands) == 0:
-                # somewhat ugly... we can't use wait_events because
-                # the events might not be all set if an exception
-                # by sarge is triggered within the async process
-                # thread
-                time.sleep(0.01)
-
-            # by now we should have a command, let's wait for its
-            # process to have been prepared
-            p.commands[0].process_ready.wait()
-
-            if not p.commands[0].process:
-                # the process might have been set to None in case of any exception
-                raise RuntimeError(
-                    "Error while trying to run command {}".format(" ".join(command))
+            fast_min_size = settings().getInt(["gcodeAnalysis", "fastEstimateMinSize"])
+            if (
+                fast_min_size
+                and fast_min_size > 0
+                and self._provisional_callback is not None
+                and os.path.getsize(self._current.absolute_path) >= fast_min_size
+            ):
+                self._estimate(
+                    self._current.absolute_path,
+                    speedx=speedx,
+                    speedy=speedy,
+                    offsets=offsets,
+                    max_extruders=max_extruders,
+                    g90_extruder=g90_extruder,
+                    bed_z=bed_z,
                 )
 
-            try:
-                # let's wait for stuff to finish
-                while p.returncode is None:
-                    if self._aborted:
-                        # oh, we shall abort, let's do so!
-                        p.commands[0].terminate()
-                        raise AnalysisAborted(reenqueue=self._reenqueue)
-
-                    # else continue
-                    p.commands[0].poll()
-            finally:
-                p.close()
-
-            output = p.stdout.text
-            self._logger.debug("Got output: {!r}".format(output))
-
-            result = {}
-            if "ERROR:" in output:
-                _, error = output.split("ERROR:")
-                raise RuntimeError(error.strip())
-            elif "EMPTY:" in output:
-                self._logger.info("Result is empty, no extrusions found")
-                result = copy.deepcopy(EMPTY_RESULT)
-            elif "RESULTS:" not in output:
-                raise RuntimeError("No analysis result found")
+            if self._worker_pool is not None:
+                result = self._analyze_in_worker(
+                    self._current.absolute_path,
+                    throttle=throttle,
+                    throttle_lines=throttle_lines,
+                    speedx=speedx,
+                    speedy=speedy,
+                    offsets=offsets,
+                    max_extruders=max_extruders,
+                    g90_extruder=g90_extruder,
+                    bed_z=bed_z,
+                )
             else:
-                _, output = output.split("RESULTS:")
-                analysis = yaml.safe_load(output)
-
-                result["printingArea"] = analysis["printing_area"]
-                result["dimensions"] = analysis["dimensions"]
-                if analysis["total_time"]:
-                    result["estimatedPrintTime"] = analysis["total_time"] * 60
-                if analysis["extrusion_length"]:
-                    result["filament"] = {}
-                    for i in range(len(analysis["extrusion_length"])):
-                        result["filament"]["tool%d" % i] = {
-                            "length": analysis["extrusion_length"][i],
-                            "volume": analysis["extrusion_volume"][i],
-                        }
+                result = self._analyze_in_subprocess(
+                    self._current.absolute_path,
+                    throttle=throttle,
+                    throttle_lines=throttle_lines,
+                    speedx=speedx,
+                    speedy=speedy,
+                    offsets=offsets,
+                    max_extruders=max_extruders,
+                    g90_extruder=g90_extruder,
+                    bed_z=bed_z,
+                )
 
             if self._current.analysis and isinstance(self._current.analysis, dict):
                 return dict_merge(result, self._current.analysis)
@@ -529,6 +922,494 @@ class GcodeAnalysisQueue(AbstractAnalysisQueue):
         finally:
             self._gcode = None
 
+    def _estimate(
+        self,
+        path,
+        speedx=None,
+        speedy=None,
+        offsets=None,
+        max_extruders=None,
+        g90_extruder=False,
+        bed_z=None,
+    ):
+        from octoprint.util.gcodeInterpreter import gcode
+
+        tool_offsets = [(0, 0)] + [tuple(offset) for offset in offsets[1:]]
+
+        start_time = monotonic_time()
+        try:
+            interpreter = gcode()
+            interpreter.estimate(
+                path,
+                speedx=speedx,
+                speedy=speedy,
+                offsets=tool_offsets,
+                max_extruders=max_extruders,
+                g90_extruder=g90_extruder,
+                bed_z=bed_z,
+            )
+            analysis = interpreter.get_result()
+        except Exception:
+            self._logger.exception("Error while estimating analysis of {}".format(path))
+            return
+
+        if not any(analysis["extrusion_length"]):
+            # nothing worth publishing, the full analysis will tell
+            return
+
+        self._logger.info(
+            "Estimated analysis of {}, needed {:.2f}s".format(
+                path, monotonic_time() - start_time
+            )
+        )
+
+        result = _analysis_result(analysis)
+        if self._current.analysis and isinstance(self._current.analysis, dict):
+            result = dict_merge(result, self._current.analysis)
+        self._publish_provisional(result)
+
+    def _analyze_in_worker(
+        self,
+        path,
+        throttle=None,
+        throttle_lines=None,
+        speedx=None,
+        speedy=None,
+        offsets=None,
+        max_extruders=None,
+        g90_extruder=False,
+        bed_z=None,
+    ):
+        # same offset handling as "octoprint analysis gcode": the first tool never
+        # has an offset, missing ones are padded with zeros
+        tool_offsets = [(0, 0)] + [tuple(offset) for offset in offsets[1:]]
+        if len(tool_offsets) < max_extruders:
+            tool_offsets += [(0, 0)] * (max_extruders - len(tool_offsets))
+
+        job = {
+            "path": path,
+            "throttle": throttle,
+            "throttle_lines": throttle_lines,
+            "speedx": speedx,
+            "speedy": speedy,
+            "offsets": tool_offsets,
+            "max_extruders": max_extruders,
+            "g90_extruder": g90_extruder,
+            "bed_z": bed_z,
+        }
+
+        def on_progress(progress):
+            self._current_progress = progress
+
+        current = self._current_job
+        worker = self._worker_pool.acquire()
+        try:
+            current.worker = worker
+            if current.aborted:
+                raise AnalysisAborted(reenqueue=current.reenqueue)
+
+            self._logger.info(
+                "Handing analysis of {} to analysis worker {}".format(path, worker.pid)
+            )
+            kind, payload = worker.analyze(job, progress_callback=on_progress)
+        finally:
+            current.worker = None
+            self._worker_pool.release(worker)
+
+        if kind == "aborted" or current.aborted:
+            # also covers an abort that came in right before the job reached the worker
+            raise AnalysisAborted(reenqueue=current.reenqueue)
+        elif kind == "error":
+            raise RuntimeError(payload)
+        elif kind == "empty":
+            self._logger.info("Result is empty, no extrusions found")
+            return copy.deepcopy(EMPTY_RESULT)
+        else:
+            return payload
+
+    def _analyze_in_subprocess(
+        self,
+        path,
+        throttle=None,
+        throttle_lines=None,
+        speedx=None,
+        speedy=None,
+        offsets=None,
+        max_extruders=None,
+        g90_extruder=False,
+        bed_z=None,
+    ):
+        import sys
+
+        import sarge
+        import yaml
+
+        command = [
+            sys.executable,
+            "-m",
+            "octoprint",
+            "analysis",
+            "gcode",
+            "--speed-x={}".format(speedx),
+            "--speed-y={}".format(speedy),
+            "--max-t={}".format(max_extruders),
+            "--throttle={}".format(throttle),
+            "--throttle-lines={}".format(throttle_lines),
+            "--bed-z={}".format(bed_z),
+        ]
+        for offset in offsets[1:]:
+            command += ["--offset", str(offset[0]), str(offset[1])]
+        if g90_extruder:
+            command += ["--g90-extruder"]
+        command.append(path)
+
+        self._logger.info("Invoking analysis command: {}".format(" ".join(command)))
+
+        p = sarge.run(command, close_fds=CLOSE_FDS, async_=True, stdout=sarge.Capture())
+
+        while len(p.commands) == 0:
+            # somewhat ugly... we can't use wait_events because
+            # the events might not be all set if an exception
+            # by sarge is triggered within the async process
+            # thread
+            time.sleep(0.01)
+
+        # by now we should have a command, let's wait for its
+        # process to have been prepared
+        p.commands[0].process_ready.wait()
+
+        if not p.commands[0].process:
+            # the process might have been set to None in case of any exception
+            raise RuntimeError(
+                "Error while trying to run command {}".format(" ".join(command))
+            )
+
+        current = self._current_job
+        try:
+            # let's wait for stuff to finish
+            while p.returncode is None:
+                if current.aborted:
+                    # oh, we shall abort, let's do so!
+                    p.commands[0].terminate()
+                    raise AnalysisAborted(reenqueue=current.reenqueue)
+
+                # else continue
+                p.commands[0].poll()
+        finally:
+            p.close()
+
+        output = p.stdout.text
+        self._logger.debug("Got output: {!r}".format(output))
+
+        if "ERROR:" in output:
+            _, error = output.split("ERROR:")
+            raise RuntimeError(error.strip())
+        elif "EMPTY:" in output:
+            self._logger.info("Result is empty, no extrusions found")
+            return copy.deepcopy(EMPTY_RESULT)
+        elif "RESULTS:" not in output:
+            raise RuntimeError("No analysis result found")
+        else:
+            _, output = output.split("RESULTS:")
+            return _analysis_result(yaml.safe_load(output))
+
     def _do_abort(self, reenqueue=True):
-        self._aborted = True
-        self._reenqueue = reenqueue
+        with self._jobs_mutex:
+            jobs = list(self._jobs)
+        for job in jobs:
+            self._abort_job(job, reenqueue=reenqueue)
+
+    def _abort_job(self, job, reenqueue=True):
+        job.aborted = True
+        job.reenqueue = reenqueue
+
+        worker = job.worker
+        if worker is not None:
+            worker.abort()
+
+
+def _default_concurrency():
+    """One analysis per CPU core, leaving one core for the server and the printer communication."""
+    try:
+        return max(1, multiprocessing.cpu_count() - 1)
+    except NotImplementedError:
+        return 1
+
+
+def _analysis_result(analysis):
+    """
+    Converts the result of :meth:`octoprint.util.gcodeInterpreter.gcode.get_result` into the
+    structure documented on :class:`GcodeAnalysisQueue`.
+    """
+    result = {
+        "printingArea": analysis["printing_area"],
+        "dimensions": analysis["dimensions"],
+    }
+    if analysis["total_time"]:
+        result["estimatedPrintTime"] = analysis["total_time"] * 60
+    if analysis["extrusion_length"]:
+        result["filament"] = {}
+        for i in range(len(analysis["extrusion_length"])):
+            result["filament"]["tool%d" % i] = {
+                "length": analysis["extrusion_length"][i],
+                "volume": analysis["extrusion_volume"][i],
+            }
+    return result
+
+
+def _gcode_analysis_worker(connection, abort):
+    """
+    Main loop of a :class:`GcodeAnalysisWorker` process.
+
+    Receives jobs from ``connection`` until it is closed or ``None`` is received. For each
+    job, ``("progress", percentage)`` messages are sent while the file is processed,
+    followed by exactly one of ``("result", result)``, ``("empty", None)``,
+    ``("error", message)`` or ``("aborted", None)`` once it is done. Setting ``abort``
+    aborts the running job.
+    """
+    while True:
+        try:
+            job = connection.recv()
+        except (EOFError, OSError):
+            break
+
+        if job is None:
+            break
+
+        message = _run_gcode_analysis_job(connection, abort, job)
+        try:
+            connection.send(message)
+        except OSError:
+            break
+
+
+def _run_gcode_analysis_job(connection, abort, job):
+    from octoprint.cli.analysis import empty_result, validate_result
+    from octoprint.util.gcodeInterpreter import AnalysisAborted as InterpreterAborted
+    from octoprint.util.gcodeInterpreter import gcode
+
+    throttle = job.get("throttle")
+    throttle_lines = job.get("throttle_lines") or 1
+
+    def progress_callback(progress):
+        if abort.is_set():
+            interpreter.abort()
+        # the interpreter reports fractions while reading and 100.0 once done
+        if progress <= 1.0:
+            progress *= 100.0
+        connection.send(("progress", progress))
+
+    def throttle_callback(line, read_bytes):
+        if line % throttle_lines == 0:
+            if abort.is_set():
+                interpreter.abort()
+            time.sleep(throttle)
+
+    interpreter = gcode(progress_callback=progress_callback)
+    try:
+        interpreter.load(
+            job["path"],
+            throttle=throttle_callback if throttle else None,
+            speedx=job["speedx"],
+            speedy=job["speedy"],
+            offsets=job["offsets"],
+            max_extruders=job["max_extruders"],
+            g90_extruder=job["g90_extruder"],
+            bed_z=job["bed_z"],
+        )
+    except InterpreterAborted:
+        return "aborted", None
+    except Exception as exc:
+        return "error", "{}: {}".format(exc.__class__.__name__, exc)
+
+    analysis = interpreter.get_result()
+    if empty_result(analysis):
+        return "empty", None
+    elif not validate_result(analysis):
+        return (
+            "error",
+            "Invalid analysis result, please create a bug report in OctoPrint's "
+            "issue tracker and be sure to also include the GCODE file with which "
+            "this happened",
+        )
+    else:
+        return "result", _analysis_result(analysis)
+
+
+def _multiprocessing_context():
+    try:
+        # don't fork the server with all its threads, start a fresh interpreter
+        return multiprocessing.get_context("spawn")
+    except AttributeError:
+        # Python 2
+        return multiprocessing
+
+
+class GcodeAnalysisWorker(object):
+    """
+    A persistent process running GCODE analysis jobs in the interpreter it started once,
+    talking to it through a pipe.
+
+    Arguments:
+        context: The :mod:`multiprocessing` context to create the process with.
+        abort_timeout (float): How long to wait for the worker to acknowledge an abort
+            before terminating it, in seconds.
+    """
+
+    def __init__(self, context, abort_timeout=5.0):
+        self._abort_timeout = abort_timeout
+
+        self._connection, child_connection = context.Pipe()
+        self._abort = context.Event()
+        self._process = context.Process(
+            target=_gcode_analysis_worker,
+            args=(child_connection, self._abort),
+            name="GcodeAnalysisWorker",
+        )
+        self._process.daemon = True
+        self._process.start()
+        child_connection.close()
+
+    @property
+    def pid(self):
+        return self._process.pid
+
+    @property
+    def alive(self):
+        return self._process.is_alive()
+
+    def analyze(self, job, progress_callback=None):
+        """
+        Runs ``job`` on the worker and blocks until it's done.
+
+        Returns:
+            tuple: The final message of the worker, ``(kind, payload)``, see
+                :func:`_gcode_analysis_worker`. If the worker doesn't acknowledge an
+                abort in time, it is terminated and ``("aborted", None)`` returned.
+
+        Raises:
+            RuntimeError: The worker process died.
+        """
+        self._abort.clear()
+        self._connection.send(job)
+
+        aborted = None
+        while True:
+            if aborted is None and self._abort.is_set():
+                aborted = monotonic_time()
+            elif aborted is not None and monotonic_time() - aborted > self._abort_timeout:
+                self.terminate()
+                return "aborted", None
+
+            if not self._connection.poll(0.1):
+                if not self.alive:
+                    raise RuntimeError(
+                        "Analysis worker {} died unexpectedly".format(self.pid)
+                    )
+                continue
+
+            try:
+                kind, payload = self._connection.recv()
+            except (EOFError, OSError):
+                self.terminate()
+                raise RuntimeError(
+                    "Analysis worker {} died unexpectedly".format(self.pid)
+                )
+
+            if kind == "progress":
+                if callable(progress_callback):
+                    progress_callback(payload)
+                continue
+
+            return kind, payload
+
+    def abort(self):
+        self._abort.set()
+
+    def close(self, timeout=1.0):
+        try:
+            self._connection.send(None)
+        except OSError:
+            pass
+        self._process.join(timeout)
+        self.terminate()
+
+    def terminate(self):
+        if self._process.is_alive():
+            self._process.terminate()
+            self._process.join()
+        self._connection.close()
+
+
+class GcodeAnalysisWorkerPool(object):
+    """
+    A pool of up to ``size`` :class:`GcodeAnalysisWorker` processes. Workers are started on
+    first use and are then kept around for all following analysis jobs, dead ones get
+    replaced.
+
+    Arguments:
+        size (int): Maximum number of worker processes.
+    """
+
+    def __init__(self, size):
+        self._logger = logging.getLogger(__name__)
+        self._size = size
+        self._context = _multiprocessing_context()
+
+        self._idle = []
+        self._started = 0
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        return self._size
+
+    def acquire(self):
+        """
+        Returns an idle worker, starting a new one if the pool isn't full yet and blocking
+        until one is released otherwise.
+        """
+        with self._condition:
+            while not self._idle and self._started >= self._size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._started += 1
+
+        try:
+            worker = GcodeAnalysisWorker(self._context)
+        except Exception:
+            with self._condition:
+                self._started -= 1
+                self._condition.notify()
+            raise
+        self._logger.info("Started analysis worker {}".format(worker.pid))
+        return worker
+
+    def release(self, worker):
+        """
+        Returns ``worker`` to the pool, or drops it if its process is no longer running.
+        """
+        alive = worker.alive
+        if not alive:
+            self._logger.info("Analysis worker {} is gone".format(worker.pid))
+            worker.terminate()
+
+        with self._condition:
+            if alive:
+                self._idle.append(worker)
+            else:
+                self._started -= 1
+            self._condition.notify()
+
+    def shutdown(self):
+        """
+        Stops all idle workers.
+        """
+        with self._condition:
+            workers = self._idle
+            self._idle = []
+            self._started -= len(workers)
+
+        for worker in workers:
+            worker.close()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import logging
+import os
+import threading
+
+import watchdog.events
+
+from octoprint.util import is_hidden_path
+
+try:
+    from os import walk
+except ImportError:
+    from scandir import walk
+
+
+def _folder_modified(path):
+    return os.stat(path).st_mtime
+
+
+class ChangeTracker(watchdog.events.FileSystemEventHandler):
+    """
+    Tracks changes below ``basefolder`` and keeps a monotonically increasing generation counter
+    for every folder in it, which increases whenever something in the folder's subtree changes.
+    Allows to cheaply check whether anything in a subtree has changed since the last check,
+    without walking it.
+
+    Changes are picked up through the OS's file system notifications (e.g. inotify) if available.
+    If those are not available or if ``polling`` is set, the modification timestamps of all
+    folders are instead polled every ``interval`` seconds in a background thread. Changes
+    made by the storage itself can be reported right away through :meth:`changed`.
+
+    Arguments:
+        basefolder (str): the folder to track
+        polling (bool): whether to poll instead of using file system notifications
+        interval (float): poll interval in seconds
+        modified (callable): returns the modification timestamp of a folder while polling,
+            defaults to the folder's ``st_mtime``
+        callback (callable): called with the path and whether it's a directory for every
+            detected change
+    """
+
+    def __init__(
+        self, basefolder, polling=False, interval=2.0, modified=None, callback=None
+    ):
+        watchdog.events.FileSystemEventHandler.__init__(self)
+        self._logger = logging.getLogger(__name__)
+
+        self._basefolder = os.path.normpath(basefolder)
+        self._polling = polling
+        self._interval = interval
+        self._modified = modified if modified is not None else _folder_modified
+        self._callback = callback
+
+        self._mutex = threading.Lock()
+        self._sequence = 0
+        self._generations = {}
+
+        self._observer = None
+        self._poller = None
+        self._stop = threading.Event()
+
+    @property
+    def active(self):
+        return self._observer is not None or self._poller is not None
+
+    @property
+    def polling(self):
+        return self._poller is not None
+
+    def start(self):
+        if self.active:
+            return
+
+        self._stop.clear()
+        if not self._polling:
+            from watchdog.observers import Observer
+
+            try:
+                observer = Observer()
+                observer.schedule(self, self._basefolder, recursive=True)
+                observer.start()
+            except Exception:
+                self._logger.exception(
+                    "Could not watch {} for changes, falling back to polling".format(
+                        self._basefolder
+                    )
+                )
+            else:
+                self._observer = observer
+                return
+
+        self._poller = threading.Thread(
+            target=self._poll,
+            args=(self._snapshot(),),
+            name="ChangeTracker poller for {}".format(self._basefolder),
+        )
+        self._poller.daemon = True
+        self._poller.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
+
+    def generation(self, path=None):
+        """
+        Returns:
+            int: the current generation of the subtree of folder ``path``, ``basefolder`` if ``None``
+        """
+        if path is None:
+            path = self._basefolder
+        with self._mutex:
+            return self._generations.get(os.path.normpath(path), 0)
+
+    def changed(self, path, is_directory=True):
+        """
+        Increases the generation of ``path`` (if it's a folder) and all its parent folders up
+        to ``basefolder``.
+        """
+        path = os.path.normpath(path)
+        if not is_directory:
+            path = os.path.dirname(path)
+
+        with self._mutex:
+            self._sequence += 1
+            while path.startswith(self._basefolder + os.sep):
+                self._generations[path] = self._sequence
+                path = os.path.dirname(path)
+            self._generations[self._basefolder] = self._sequence
+
+    ##~~ file system notifications
+
+    def on_any_event(self, event):
+        paths = [event.src_path]
+        if event.event_type == watchdog.events.EVENT_TYPE_MOVED:
+            paths.append(event.dest_path)
+
+        for path in paths:
+            self._notify(path, event.is_directory)
+
+    def _notify(self, path, is_directory):
+        self.changed(path, is_directory=is_directory)
+        if callable(self._callback):
+            try:
+                self._callback(path, is_directory)
+            except Exception:
+                self._logger.exception(
+                    "Error while calling change callback for {}".format(path)
+                )
+
+    ##~~ polling
+
+    def _poll(self, snapshot):
+        while not self._stop.wait(self._interval):
+            current = self._snapshot()
+            for path in set(snapshot.keys()) | set(current.keys()):
+                if snapshot.get(path) != current.get(path):
+                    self._notify(path, True)
+            snapshot = current
+
+    def _snapshot(self):
+        result = {}
+        for root, dirs, _ in walk(self._basefolder):
+            dirs[:] = [d for d in dirs if not is_hidden_path(d)]
+            try:
+                result[root] = self._modified(root)
+            except OSError:
+                # vanished while walking
+                pass
+        return result
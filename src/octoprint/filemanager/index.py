@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    display TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER,
+    date INTEGER,
+    hash TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+CREATE TABLE IF NOT EXISTS folders (
+    path TEXT PRIMARY KEY,
+    modified REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS info (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+ORDER_COLUMNS = {
+    "name": "name",
+    "display": "display COLLATE NOCASE",
+    "path": "path",
+    "date": "date",
+    "size": "size",
+}
+
+
+def _depth(path):
+    if not path:
+        return 0
+    return path.count("/") + 1
+
+
+def _subtree(path, column="path"):
+    """
+    SQL condition and parameters matching all paths below ``path``, using a range
+    on the primary key instead of ``LIKE`` so no escaping is needed and the index
+    can be used.
+    """
+    if not path:
+        return "1", ()
+    return "({column} >= ? AND {column} < ?)".format(column=column), (
+        path + "/",
+        path + "0",  # "0" is the character right after "/"
+    )
+
+
+class FileIndex(object):
+    """
+    Persistent index of the files and folders of a :class:`~octoprint.filemanager.storage.LocalFileStorage`,
+    stored in a single SQLite database.
+
+    Every entry is stored with the node data ``list_files`` returns for it (metadata like
+    hash, analysis, history and statistics included) as well as the columns needed for
+    filtering and sorting. For every indexed folder the modification timestamp of the
+    folder and its ``.metadata.json`` at indexing time is kept, which allows to answer
+    recursive ``last_modified`` requests and to find changed folders when reconciling
+    the index with the file system.
+
+    Paths are storage paths (``/`` separated, relative to the storage's base folder),
+    the base folder itself is ``""``.
+
+    Arguments:
+        path (str): path of the database file
+        basefolder (str): base folder of the indexed storage, the index is cleared if this
+            changes between runs
+    """
+
+    def __init__(self, path, basefolder):
+        self._logger = logging.getLogger(__name__)
+        self._path = path
+        self._mutex = threading.RLock()
+        self._revision = 0
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.isolation_level = None
+        try:
+            self._initialize(basefolder)
+        except sqlite3.DatabaseError:
+            self._logger.exception(
+                "Error while initializing file index at {}, recreating it".format(path)
+            )
+            self._connection.close()
+            os.remove(path)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.isolation_level = None
+            self._initialize(basefolder)
+
+    def _initialize(self, basefolder):
+        with self._mutex:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+
+            version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._connection.executescript(
+                    "DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS folders; DROP TABLE IF EXISTS info;"
+                )
+            self._connection.executescript(SCHEMA)
+            self._connection.execute("PRAGMA user_version={}".format(SCHEMA_VERSION))
+
+            row = self._connection.execute(
+                "SELECT value FROM info WHERE key = 'basefolder'"
+            ).fetchone()
+            if row is None or row[0] != basefolder:
+                with self._transaction() as cursor:
+                    cursor.execute("DELETE FROM entries")
+                    cursor.execute("DELETE FROM folders")
+                    cursor.execute(
+                        "INSERT OR REPLACE INTO info (key, value) VALUES ('basefolder', ?)",
+                        (basefolder,),
+                    )
+
+    @property
+    def revision(self):
+        """Counter increased on every change to the index, for caching query results."""
+        return self._revision
+
+    def close(self):
+        with self._mutex:
+            self._connection.close()
+
+    @contextmanager
+    def _transaction(self):
+        with self._mutex:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN")
+            try:
+                yield cursor
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            else:
+                cursor.execute("COMMIT")
+            finally:
+                self._revision += 1
+
+    ##~~ updates
+
+    def replace_folder(self, folder, modified, nodes):
+        """
+        Replaces the indexed contents of ``folder`` (non recursively) with ``nodes``.
+
+        Sub folders that are no longer contained in ``folder`` are removed from the index
+        including their contents.
+
+        Arguments:
+            folder (str): storage path of the folder
+            modified (float): modification timestamp of the folder and its metadata
+            nodes (iterable): file and folder nodes as produced by the storage's folder scan
+
+        Returns:
+            list: names of contained sub folders that are not yet indexed
+        """
+        rows = []
+        for node in nodes:
+            rows.append(
+                (
+                    node["path"],
+                    folder,
+                    _depth(node["path"]),
+                    node["name"],
+                    node.get("display", node["name"]),
+                    node["type"],
+                    node.get("size"),
+                    node.get("date"),
+                    node.get("hash"),
+                    json.dumps(node),
+                )
+            )
+        new_folders = {
+            node["path"]: node["name"] for node in nodes if node["type"] == "folder"
+        }
+
+        with self._transaction() as cursor:
+            old_folders = {
+                row[0]
+                for row in cursor.execute(
+                    "SELECT path FROM entries WHERE parent = ? AND type = 'folder'",
+                    (folder,),
+                )
+            }
+            for removed in old_folders - set(new_folders):
+                self._remove_folder(cursor, removed)
+
+            cursor.execute("DELETE FROM entries WHERE parent = ?", (folder,))
+            cursor.executemany(
+                "INSERT OR REPLACE INTO entries (path, parent, depth, name, display, type, size, date, hash, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            cursor.execute(
+                "INSERT OR REPLACE INTO folders (path, modified) VALUES (?, ?)",
+                (folder, modified),
+            )
+
+            unknown = []
+            for path, name in new_folders.items():
+                if (
+                    cursor.execute(
+                        "SELECT 1 FROM folders WHERE path = ?", (path,)
+                    ).fetchone()
+                    is None
+                ):
+                    unknown.append(name)
+            return unknown
+
+    def remove_folder(self, folder):
+        """Removes ``folder`` and everything below it from the index."""
+        with self._transaction() as cursor:
+            self._remove_folder(cursor, folder)
+
+    def _remove_folder(self, cursor, folder):
+        condition, params = _subtree(folder)
+        cursor.execute(
+            "DELETE FROM entries WHERE path = ? OR " + condition, (folder,) + params
+        )
+        cursor.execute(
+            "DELETE FROM folders WHERE path = ? OR " + condition, (folder,) + params
+        )
+
+    def clear(self):
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM entries")
+            cursor.execute("DELETE FROM folders")
+
+    ##~~ queries
+
+    def folders(self):
+        """
+        Returns:
+            dict: modification timestamps of all indexed folders, by storage path
+        """
+        with self._mutex:
+            return dict(self._connection.execute("SELECT path, modified FROM folders"))
+
+    def has_folder(self, folder):
+        with self._mutex:
+            return (
+                self._connection.execute(
+                    "SELECT 1 FROM folders WHERE path = ?", (folder,)
+                ).fetchone()
+                is not None
+            )
+
+    def last_modified(self, folder):
+        """
+        Returns:
+            float: the most recent modification timestamp of ``folder`` and its sub folders,
+                ``None`` if ``folder`` is not indexed
+        """
+        condition, params = _subtree(folder)
+        with self._mutex:
+            return self._connection.execute(
+                "SELECT MAX(modified) FROM folders WHERE path = ? OR " + condition,
+                (folder,) + params,
+            ).fetchone()[0]
+
+    def nodes(self, folder, depth=None):
+        """
+        Yields ``(parent, node)`` for all entries below ``folder``, ordered so that
+        folders are returned before their contents.
+
+        Arguments:
+            folder (str): storage path of the folder
+            depth (int): maximum depth relative to ``folder``, ``None`` for no limit
+        """
+        condition, params = _subtree(folder)
+        query = "SELECT parent, data FROM entries WHERE " + condition
+        if depth is not None:
+            query += " AND depth <= ?"
+            params += (_depth(folder) + depth,)
+        query += " ORDER BY depth"
+
+        with self._mutex:
+            rows = self._connection.execute(query, params).fetchall()
+        for parent, data in rows:
+            yield parent, json.loads(data)
+
+    def folder_sizes(self, folder):
+        """
+        Returns:
+            dict: accumulated size of all files in ``folder`` and each of its sub folders,
+                by storage path
+        """
+        condition, params = _subtree(folder)
+        with self._mutex:
+            rows = self._connection.execute(
+                "SELECT parent, SUM(size) FROM entries WHERE type != 'folder' AND "
+                + condition
+                + " GROUP BY parent",
+                params,
+            ).fetchall()
+
+        sizes = {}
+        for parent, size in rows:
+            size = size or 0
+            while True:
+                sizes[parent] = sizes.get(parent, 0) + size
+                if parent == folder or not parent:
+                    break
+                parent = parent.rpartition("/")[0]
+        return sizes
+
+    def query(
+        self,
+        folder="",
+        recursive=True,
+        types=None,
+        search=None,
+        order_by="name",
+        reverse=False,
+        limit=None,
+        offset=0,
+    ):
+        """
+        Flat, filtered and paged query over the indexed files.
+
+        Arguments:
+            folder (str): storage path of the folder to query
+            recursive (bool): whether to include files in sub folders
+            types (list): file types (first element of the type path, e.g. ``machinecode``) to include,
+                ``None`` for all
+            search (str): case insensitive substring to look for in the display name
+            order_by (str): one of ``name``, ``display``, ``path``, ``date`` or ``size``
+            reverse (bool): whether to sort descending
+            limit (int): maximum number of files to return, ``None`` for no limit
+            offset (int): number of files to skip
+
+        Returns:
+            list: the matching file nodes
+        """
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError("Can't order by {}".format(order_by))
+
+        if recursive:
+            condition, params = _subtree(folder)
+        else:
+            condition, params = "parent = ?", (folder,)
+        conditions = ["type != 'folder'", condition]
+
+        if types:
+            conditions.append("type IN ({})".format(", ".join("?" * len(types))))
+            params += tuple(types)
+        if search:
+            conditions.append("instr(lower(display), ?) > 0")
+            params += (search.lower(),)
+
+        query = "SELECT data FROM entries WHERE {} ORDER BY {}{}, path".format(
+            " AND ".join(conditions),
+            ORDER_COLUMNS[order_by],
+            " DESC" if reverse else "",
+        )
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params += (limit if limit is not None else -1, offset)
+
+        with self._mutex:
+            rows = self._connection.execute(query, params).fetchall()
+        return [json.loads(row[0]) for row in rows]
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+
+from octoprint.util import atomic_write, to_bytes
+
+SNAPSHOT_FILE = ".metadata.json"
+JOURNAL_FILE = ".metadata.journal"
+
+
+@contextmanager
+def _no_lock(path):
+    yield
+
+
+def _snapshot_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+class MetadataJournal(object):
+    """
+    Persists the metadata of the folders of a :class:`~octoprint.filemanager.storage.LocalFileStorage`.
+
+    The metadata of every folder is kept as a compact snapshot in ``.metadata.json`` and a journal of
+    the entries changed since in ``.metadata.journal``, one JSON object per line. Changing an entry
+    only appends its new value to the journal instead of rewriting the whole snapshot. Once the journal
+    grows larger than both the snapshot and :attr:`COMPACT_MIN_SIZE`, it is folded back into the
+    snapshot. The journal starts with the hash of the snapshot it applies to, so a journal left behind
+    by an interrupted compaction or a snapshot replaced by something else (e.g. an older version or a
+    restored backup) is ignored.
+
+    If ``interval`` is set, writes are queued and flushed by a background thread at most ``interval``
+    seconds later, repeated changes to the same folder in between are coalesced into one write. Otherwise
+    every write goes to disk right away.
+
+    Arguments:
+        interval (float): maximum delay in seconds before queued writes are flushed, ``None`` to write
+            synchronously
+        lock (callable): returns a context manager guarding the metadata files of the given folder
+    """
+
+    COMPACT_MIN_SIZE = 64 * 1024
+    """Journal size in bytes below which it is never compacted, regardless of the snapshot's size."""
+
+    def __init__(self, interval=None, lock=None):
+        self._logger = logging.getLogger(__name__)
+
+        self._interval = interval
+        self._lock = lock if lock is not None else _no_lock
+
+        self._mutex = threading.Lock()
+        self._flush_mutex = threading.RLock()
+        self._pending = {}
+        self._snapshots = {}
+        self._journaled = set()
+
+        self._flusher = None
+        self._stop = threading.Event()
+
+    @property
+    def pending(self):
+        """Folders with changes not yet written to disk."""
+        with self._mutex:
+            return set(self._pending.keys())
+
+    def load(self, path):
+        """
+        Reads the metadata of folder ``path`` from its snapshot and journal.
+
+        Returns:
+            dict: the metadata, ``None`` if there is none or the snapshot couldn't be read
+        """
+        snapshot_path = os.path.join(path, SNAPSHOT_FILE)
+        journal_path = os.path.join(path, JOURNAL_FILE)
+
+        with self._flush_mutex, self._lock(path):
+            if not os.path.exists(snapshot_path):
+                return None
+
+            with io.open(snapshot_path, "rb") as f:
+                data = f.read()
+            snapshot = _snapshot_hash(data)
+            try:
+                metadata = json.loads(data.decode("utf-8"))
+            except Exception:
+                self._logger.exception(
+                    "Error while reading {} from {}".format(SNAPSHOT_FILE, path)
+                )
+                return None
+            self._snapshots[path] = snapshot
+
+            if not isinstance(metadata, dict) or not os.path.exists(journal_path):
+                return metadata
+
+            with io.open(journal_path, "rt", encoding="utf-8") as f:
+                lines = f.readlines()
+
+        try:
+            header = json.loads(lines[0]) if lines else None
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get("snapshot") != snapshot:
+            self._logger.warning(
+                "Ignoring {} in {}, it doesn't belong to the current {}".format(
+                    JOURNAL_FILE, path, SNAPSHOT_FILE
+                )
+            )
+            return metadata
+
+        for line in lines[1:]:
+            try:
+                change = json.loads(line)
+            except ValueError:
+                # incomplete last line after a crash
+                self._logger.warning(
+                    "Skipping invalid line in {} in {}".format(JOURNAL_FILE, path)
+                )
+                continue
+
+            if change.get("deleted"):
+                metadata.pop(change["name"], None)
+            else:
+                metadata[change["name"]] = change["data"]
+
+        self._journaled.add(path)
+        return metadata
+
+    def write(self, path, metadata, changed=None):
+        """
+        Persists ``metadata`` as the new metadata of folder ``path``.
+
+        Arguments:
+            path (str): the folder
+            metadata (dict): the complete metadata of the folder, must not be modified afterwards
+            changed (iterable): names of the entries that were changed or removed, ``None`` to rewrite
+                the snapshot
+        """
+        self._queue(path, metadata, changed)
+
+        if self._interval is None:
+            self.flush(path)
+        else:
+            self._start_flusher()
+
+    def discard(self, path):
+        """Drops queued writes for folder ``path`` and everything below it, e.g. when deleting it."""
+        with self._mutex:
+            for folder in self._below(path):
+                del self._pending[folder]
+        with self._flush_mutex:
+            for folder in list(self._snapshots.keys()):
+                if folder == path or folder.startswith(path + os.sep):
+                    del self._snapshots[folder]
+            self._journaled = {
+                folder
+                for folder in self._journaled
+                if folder != path and not folder.startswith(path + os.sep)
+            }
+
+    def flush(self, path=None, compact=False):
+        """
+        Writes queued changes to disk.
+
+        Arguments:
+            path (str): only write changes for this folder and everything below it, ``None`` for all
+            compact (bool): whether to fold all journals written to into their snapshots afterwards
+        """
+        with self._flush_mutex:
+            with self._mutex:
+                folders = self._below(path) if path is not None else self._pending.keys()
+                pending = [
+                    (folder, self._pending.pop(folder)) for folder in list(folders)
+                ]
+
+            for folder, (metadata, changed) in pending:
+                try:
+                    self._write(folder, metadata, changed if not compact else None)
+                except Exception:
+                    self._logger.exception(
+                        "Error while writing {} to {}, will retry".format(
+                            SNAPSHOT_FILE, folder
+                        )
+                    )
+                    self._queue(folder, metadata, changed, requeue=True)
+
+            if compact:
+                for folder in list(self._journaled):
+                    if (
+                        path is not None
+                        and folder != path
+                        and not folder.startswith(path + os.sep)
+                    ):
+                        continue
+                    try:
+                        metadata = self.load(folder)
+                        if metadata is not None:
+                            self._compact(folder, metadata)
+                    except Exception:
+                        self._logger.exception(
+                            "Error while compacting {} in {}".format(JOURNAL_FILE, folder)
+                        )
+
+    def stop(self):
+        """Stops the background flusher and writes everything to disk, compacting all journals."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush(compact=True)
+
+    def _queue(self, path, metadata, changed, requeue=False):
+        with self._mutex:
+            entry = self._pending.get(path)
+            if entry is None:
+                entry = self._pending[path] = [metadata, set()]
+            elif not requeue:
+                # a requeued write is older than anything queued since
+                entry[0] = metadata
+            if changed is None or entry[1] is None:
+                entry[1] = None
+            else:
+                entry[1].update(changed)
+
+    def _below(self, path):
+        return [
+            folder
+            for folder in self._pending
+            if folder == path or folder.startswith(path + os.sep)
+        ]
+
+    def _start_flusher(self):
+        with self._mutex:
+            if self._flusher is not None:
+                return
+            self._stop.clear()
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="MetadataJournal flusher"
+            )
+            self._flusher.daemon = True
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self._interval):
+            self.flush()
+
+    def _write(self, path, metadata, changed):
+        if not os.path.isdir(path):
+            # folder got removed in the meantime
+            self._snapshots.pop(path, None)
+            self._journaled.discard(path)
+            return
+
+        snapshot_path = os.path.join(path, SNAPSHOT_FILE)
+        journal_path = os.path.join(path, JOURNAL_FILE)
+
+        with self._lock(path):
+            if changed is None or not os.path.exists(snapshot_path):
+                self._compact(path, metadata)
+                return
+            if not changed:
+                return
+
+            snapshot = self._snapshots.get(path)
+            if snapshot is None:
+                with io.open(snapshot_path, "rb") as f:
+                    snapshot = self._snapshots[path] = _snapshot_hash(f.read())
+
+            lines = []
+            if not os.path.exists(journal_path):
+                lines.append(json.dumps({"snapshot": snapshot}))
+            for name in sorted(changed):
+                if name in metadata:
+                    lines.append(json.dumps({"name": name, "data": metadata[name]}))
+                else:
+                    lines.append(json.dumps({"name": name, "deleted": True}))
+
+            with io.open(journal_path, "ab") as f:
+                f.write(to_bytes("\n".join(lines) + "\n"))
+            self._journaled.add(path)
+
+            if os.stat(journal_path).st_size > max(
+                os.stat(snapshot_path).st_size, self.COMPACT_MIN_SIZE
+            ):
+                self._compact(path, metadata)
+
+    def _compact(self, path, metadata):
+        data = to_bytes(json.dumps(metadata, separators=(",", ":")))
+
+        with self._lock(path):
+            with atomic_write(os.path.join(path, SNAPSHOT_FILE), mode="wb") as f:
+                f.write(data)
+            self._snapshots[path] = _snapshot_hash(data)
+
+            journal_path = os.path.join(path, JOURNAL_FILE)
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+            self._journaled.discard(path)
@@ -23,6 +23,7 @@ from contextlib import contextmanager
 from past.builtins import basestring
 
 import octoprint.filemanager
+from octoprint.filemanager.journal import JOURNAL_FILE, MetadataJournal
 from octoprint.util import atomic_write, is_hidden_path, time_this, to_bytes, to_unicode
 from octoprint.util.files import sanitize_filename
 
@@ -213,6 +214,7 @@ class StorageInterface(object):
         links=None,
         allow_overwrite=False,
         display=None,
+        digest=None,
     ):
         """
         Adds the file ``file_object`` as ``path``
@@ -225,6 +227,8 @@ class StorageInterface(object):
         :param bool allow_overwrite:   if set to True no error will be raised if the file already exists and the existing file
                                        and its metadata will just be silently overwritten
         :param unicode display:        display name of the file
+        :param string digest:          SHA1 hex digest of the file's contents if already known, saves reading the file again
+                                       to hash it. If not provided, the ``digest`` of ``file_object`` is used if it has one.
         :return: the sanitized name of the file to be used for future references to it
         """
         raise NotImplementedError()
@@ -463,12 +467,21 @@ class LocalFileStorage(StorageInterface):
     The ``LocalFileStorage`` is a storage implementation which holds all files, folders and metadata on disk.
 
     Metadata is managed inside ``.metadata.json`` files in the respective folders, indexed by the sanitized filenames
-    stored within the folder. Metadata access is managed through an LRU cache to minimize access overhead.
+    stored within the folder, with changes to single entries journaled to ``.metadata.journal`` files next to them
+    (see :class:`~octoprint.filemanager.journal.MetadataJournal`). Metadata access is managed through an LRU cache to
+    minimize access overhead.
 
     This storage type implements :func:`path_on_disk`.
     """
 
-    def __init__(self, basefolder, create=False, really_universal=False):
+    def __init__(
+        self,
+        basefolder,
+        create=False,
+        really_universal=False,
+        index_path=None,
+        metadata_flush_interval=None,
+    ):
         """
         Initializes a ``LocalFileStorage`` instance under the given ``basefolder``, creating the necessary folder
         if necessary and ``create`` is set to ``True``.
@@ -476,6 +489,10 @@ class LocalFileStorage(StorageInterface):
         :param string basefolder:     the path to the folder under which to create the storage
         :param bool create:           ``True`` if the folder should be created if it doesn't exist yet, ``False`` otherwise
         :param bool really_universal: ``True`` if the file names should be forced to really universal, ``False`` otherwise
+        :param string index_path:     path of the database file to keep a :class:`~octoprint.filemanager.index.FileIndex`
+                                      of the storage in, ``None`` to scan the folders on every listing instead
+        :param float metadata_flush_interval: maximum delay in seconds before metadata changes are written to disk,
+                                      ``None`` to write them right away
         """
         self._logger = logging.getLogger(__name__)
 
@@ -498,9 +515,32 @@ class LocalFileStorage(StorageInterface):
         self._persisted_metadata_locks = {}
 
         self._metadata_cache = pylru.lrucache(100)
+        self._metadata_journal = MetadataJournal(
+            interval=metadata_flush_interval, lock=self._get_persisted_metadata_lock
+        )
         self._filelist_cache = {}
         self._filelist_cache_mutex = threading.RLock()
 
+        self._index = None
+        self._index_mutex = threading.RLock()
+        self._index_dirty = set()
+        self._index_dirty_mutex = threading.Lock()
+        self._index_cache = pylru.lrucache(20)
+
+        self._tracker = None
+        self._last_modified_cache = {}
+        if index_path is not None:
+            from octoprint.filemanager.index import FileIndex
+
+            try:
+                self._index = FileIndex(index_path, self.basefolder)
+            except Exception:
+                self._logger.exception(
+                    "Error while opening file index at {}, falling back to folder scans".format(
+                        index_path
+                    )
+                )
+
         self._old_metadata = None
         self._initialize_metadata()
 
@@ -524,6 +564,7 @@ class LocalFileStorage(StorageInterface):
 
             # make sure the metadata is initialized as far as possible
             self._list_folder(self.basefolder)
+            self.reconcile()
 
             # rename the old metadata file
             self._old_metadata = None
@@ -534,6 +575,10 @@ class LocalFileStorage(StorageInterface):
             except Exception:
                 self._logger.exception("Could not rename old metadata.yaml file")
 
+        elif self._index is not None:
+            # bring the index up to date with what happened while we weren't running
+            self.reconcile()
+
         else:
             # make sure the metadata is initialized as far as possible
             self._list_folder(self.basefolder)
@@ -589,17 +634,174 @@ class LocalFileStorage(StorageInterface):
         else:
             path = os.path.join(self.basefolder, path)
 
-        def last_modified_for_path(p):
-            metadata = os.path.join(p, ".metadata.json")
-            if os.path.exists(metadata):
-                return max(os.stat(p).st_mtime, os.stat(metadata).st_mtime)
-            else:
-                return os.stat(p).st_mtime
+        if not recursive:
+            return self._folder_modified(path)
+
+        if self._tracker is None or not self._tracker.active:
+            return self._last_modified_recursively(path)
+
+        # nothing changed in the subtree since we last looked? Then there's no need to walk it
+        generation = self._tracker.generation(path)
+        cached = self._last_modified_cache.get(path)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        last_modified = self._last_modified_recursively(path)
+        self._last_modified_cache[path] = (generation, last_modified)
+        return last_modified
+
+    def _last_modified_recursively(self, path):
+        if self._index is not None:
+            self._update_index()
+            last_modified = self._index.last_modified(self.path_in_storage(path))
+            if last_modified is not None:
+                return last_modified
+
+        return max(self._folder_modified(root) for root, _, _ in walk(path))
+
+    def track_changes(self, polling=False):
+        """
+        Starts tracking changes to the storage's folders, made through the storage or externally.
+        While tracking, recursive :func:`last_modified` requests for unchanged subtrees are answered
+        from memory instead of walking the subtree, and the file index (if used) picks up external
+        changes as they happen.
+
+        :param bool polling: ``True`` to poll the folders for changes instead of relying on file system
+                             notifications (which is also the fallback if those are unavailable)
+        """
+        from octoprint.filemanager.changes import ChangeTracker
+
+        if self._tracker is not None:
+            return
+
+        tracker = ChangeTracker(
+            self.basefolder,
+            polling=polling,
+            modified=self._folder_modified,
+            callback=self._on_external_change,
+        )
+        tracker.start()
+        self._tracker = tracker
+
+    def flush_metadata(self):
+        """
+        Writes all queued metadata changes to disk and folds the metadata journals back into the
+        ``.metadata.json`` files, e.g. before shutting down.
+        """
+        self._metadata_journal.stop()
+
+    def stop_tracking_changes(self):
+        if self._tracker is None:
+            return
+
+        self._tracker.stop()
+        self._tracker = None
+        self._last_modified_cache.clear()
+
+    def reconcile(self, full=False):
+        """
+        Brings the file index up to date with changes made to the storage's folders outside
+        of OctoPrint, e.g. by copying files into the uploads folder directly. Folders whose
+        modification timestamp differs from the indexed one are rescanned, folders that
+        vanished are removed from the index. Does nothing if no index is used.
+
+        :param bool full: rescan all folders, not only changed ones. Needed to pick up files that were
+                          modified in place, since that doesn't change their folder's timestamp.
+        """
+        if self._index is None:
+            return
+
+        with self._index_mutex:
+            indexed = self._index.folders()
+            found = set()
+            for root, dirs, _ in walk(self.basefolder):
+                dirs[:] = [d for d in dirs if not is_hidden_path(d)]
+
+                folder = self.path_in_storage(root)
+                found.add(folder)
+                if full or indexed.get(folder) != self._folder_modified(root):
+                    self._mark_changed(root)
+
+            for folder in set(indexed.keys()) - found:
+                self._index.remove_folder(folder)
 
-        if recursive:
-            return max(last_modified_for_path(root) for root, _, _ in walk(path))
+            self._update_index()
+
+    def query_files(
+        self,
+        path=None,
+        recursive=True,
+        types=None,
+        search=None,
+        order_by="name",
+        reverse=False,
+        limit=None,
+        offset=0,
+    ):
+        """
+        Flat, filtered and paged listing of the files (no folders) in ``path``. Served from the file index
+        if one is used, otherwise built from :func:`list_files`.
+
+        :param string path:     storage path of the folder to query, ``None`` for the whole storage
+        :param bool recursive:  whether to include files in sub folders
+        :param list types:      file types to include (e.g. ``["machinecode"]``), ``None`` for all
+        :param string search:   case insensitive substring to look for in the files' display names
+        :param string order_by: one of ``name``, ``display``, ``path``, ``date`` or ``size``
+        :param bool reverse:    ``True`` to sort descending
+        :param int limit:       maximum number of files to return, ``None`` for no limit
+        :param int offset:      number of files to skip
+        :return: a list of file nodes as contained in the result of :func:`list_files`
+        """
+        if path:
+            path = self.sanitize_path(to_unicode(path))
         else:
-            return last_modified_for_path(path)
+            path = self.basefolder
+
+        if self._index is not None:
+            self._update_index()
+            return self._index.query(
+                folder=self.path_in_storage(path),
+                recursive=recursive,
+                types=types,
+                search=search,
+                order_by=order_by,
+                reverse=reverse,
+                limit=limit,
+                offset=offset,
+            )
+
+        from octoprint.filemanager.index import ORDER_COLUMNS
+
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError("Can't order by {}".format(order_by))
+
+        def flatten(nodes):
+            for node in nodes.values():
+                if node["type"] == "folder":
+                    for child in flatten(node.get("children", {})):
+                        yield child
+                else:
+                    yield node
+
+        files = [
+            node
+            for node in flatten(
+                self.list_files(path=self.path_in_storage(path), recursive=recursive)
+            )
+            if (not types or node["type"] in types)
+            and (not search or search.lower() in node["display"].lower())
+        ]
+
+        def sort_key(node):
+            value = node.get(order_by)
+            if order_by == "display":
+                value = value.lower()
+            return value is not None, value, node["path"]
+
+        files.sort(key=sort_key, reverse=reverse)
+        if limit is not None:
+            return files[offset : offset + limit]
+        return files[offset:]
 
     def file_in_path(self, path, filepath):
         filepath = self.sanitize_path(filepath)
@@ -659,7 +861,18 @@ class LocalFileStorage(StorageInterface):
                     result[key] = node
             return result
 
-        result = self._list_folder(path, base=base, force_refresh=force_refresh)
+        if self._index is not None:
+            if force_refresh:
+                self.reconcile(full=True)
+            if recursive:
+                depth = None
+            elif level > 0:
+                depth = 2
+            else:
+                depth = 1
+            result = self._list_index(path, depth=depth)
+        else:
+            result = self._list_folder(path, base=base, force_refresh=force_refresh)
         if not recursive:
             if level > 0:
                 result = strip_grandchildren(result)
@@ -686,6 +899,7 @@ class LocalFileStorage(StorageInterface):
                 )
         else:
             os.mkdir(folder_path)
+            self._mark_changed(path)
 
         if display_name != name:
             metadata = self._get_metadata_entry(path, name, default={})
@@ -703,7 +917,7 @@ class LocalFileStorage(StorageInterface):
 
         empty = True
         for entry in scandir(folder_path):
-            if entry.name == ".metadata.json" or entry.name == ".metadata.yaml":
+            if entry.name in (".metadata.json", ".metadata.yaml", JOURNAL_FILE):
                 continue
             empty = False
             break
@@ -716,6 +930,7 @@ class LocalFileStorage(StorageInterface):
 
         import shutil
 
+        self._metadata_journal.discard(folder_path)
         shutil.rmtree(folder_path)
 
         self._remove_metadata_entry(path, name)
@@ -814,6 +1029,7 @@ class LocalFileStorage(StorageInterface):
             source, destination, must_not_equal=True
         )
 
+        self._metadata_journal.flush(source_data["fullpath"])
         try:
             shutil.copytree(source_data["fullpath"], destination_data["fullpath"])
         except Exception as e:
@@ -828,6 +1044,7 @@ class LocalFileStorage(StorageInterface):
                 cause=e,
             )
 
+        self._mark_changed(destination_data["path"])
         self._set_display_metadata(destination_data, source_data=source_data)
 
         return self.path_in_storage(destination_data["fullpath"])
@@ -842,6 +1059,7 @@ class LocalFileStorage(StorageInterface):
             self._set_display_metadata(destination_data)
             return self.path_in_storage(destination_data["fullpath"])
 
+        self._metadata_journal.flush(source_data["fullpath"])
         try:
             shutil.move(source_data["fullpath"], destination_data["fullpath"])
         except Exception as e:
@@ -856,6 +1074,9 @@ class LocalFileStorage(StorageInterface):
                 cause=e,
             )
 
+        self._mark_changed(
+            source_data["path"], source_data["fullpath"], destination_data["path"]
+        )
         self._set_display_metadata(destination_data, source_data=source_data)
         self._remove_metadata_entry(source_data["path"], source_data["name"])
         self._delete_metadata(source_data["fullpath"])
@@ -870,6 +1091,7 @@ class LocalFileStorage(StorageInterface):
         links=None,
         allow_overwrite=False,
         display=None,
+        digest=None,
     ):
         display_path, display_name = self.canonicalize(path)
         path = self.sanitize_path(display_path)
@@ -908,8 +1130,11 @@ class LocalFileStorage(StorageInterface):
         # save the file
         file_object.save(file_path)
 
-        # save the file's hash to the metadata of the folder
-        file_hash = self._create_hash(file_path)
+        # save the file's hash to the metadata of the folder, hashing the file only if
+        # that didn't already happen while it was received
+        if digest is None:
+            digest = getattr(file_object, "digest", None)
+        file_hash = digest if digest else self._create_hash(file_path)
         metadata = self._get_metadata_entry(path, name, default={})
         metadata_dirty = False
         if "hash" not in metadata or metadata["hash"] != file_hash:
@@ -941,6 +1166,7 @@ class LocalFileStorage(StorageInterface):
 
         # touch the file to set last access and modification time to now
         os.utime(file_path, None)
+        self._mark_changed(path)
 
         return self.path_in_storage((path, name))
 
@@ -963,6 +1189,7 @@ class LocalFileStorage(StorageInterface):
                 "Could not delete {name} in {path}".format(**locals()), cause=e
             )
 
+        self._mark_changed(path)
         self._remove_metadata_entry(path, name)
 
     def copy_file(self, source, destination):
@@ -984,6 +1211,7 @@ class LocalFileStorage(StorageInterface):
                 cause=e,
             )
 
+        self._mark_changed(destination_data["path"])
         self._copy_metadata_entry(
             source_data["path"],
             source_data["name"],
@@ -1018,6 +1246,7 @@ class LocalFileStorage(StorageInterface):
                 cause=e,
             )
 
+        self._mark_changed(source_data["path"], destination_data["path"])
         self._copy_metadata_entry(
             source_data["path"],
             source_data["name"],
@@ -1097,7 +1326,7 @@ class LocalFileStorage(StorageInterface):
             metadata_dirty = True
 
         if metadata_dirty:
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=[name])
 
     def remove_additional_metadata(self, path, key):
         path, name = self.sanitize(path)
@@ -1111,7 +1340,7 @@ class LocalFileStorage(StorageInterface):
 
         metadata = self._copied_metadata(metadata, name)
         del metadata[name][key]
-        self._save_metadata(path, metadata)
+        self._save_metadata(path, metadata, changed=[name])
 
     def split_path(self, path):
         path = to_unicode(path)
@@ -1264,7 +1493,7 @@ class LocalFileStorage(StorageInterface):
 
         metadata[name]["history"].append(data)
         self._calculate_stats_from_history(name, path, metadata=metadata, save=False)
-        self._save_metadata(path, metadata)
+        self._save_metadata(path, metadata, changed=[name])
 
     def _update_history(self, name, path, index, data):
         metadata = self._get_metadata(path)
@@ -1277,7 +1506,7 @@ class LocalFileStorage(StorageInterface):
         try:
             metadata[name]["history"][index].update(data)
             self._calculate_stats_from_history(name, path, metadata=metadata, save=False)
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=[name])
         except IndexError:
             pass
 
@@ -1292,7 +1521,7 @@ class LocalFileStorage(StorageInterface):
         try:
             del metadata[name]["history"][index]
             self._calculate_stats_from_history(name, path, metadata=metadata, save=False)
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=[name])
         except IndexError:
             pass
 
@@ -1366,7 +1595,7 @@ class LocalFileStorage(StorageInterface):
         metadata[name]["statistics"] = statistics
 
         if save:
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=[name])
 
     def _get_links(self, name, path, searched_rel):
         metadata = self._get_metadata(path)
@@ -1390,6 +1619,7 @@ class LocalFileStorage(StorageInterface):
             file_type = file_type[0]
 
         metadata = self._copied_metadata(self._get_metadata(path), name)
+        changed = {name}
         metadata_dirty = False
 
         if "hash" not in metadata[name]:
@@ -1413,14 +1643,13 @@ class LocalFileStorage(StorageInterface):
                     continue
 
                 # fetch hash of target file
-                if data["name"] in metadata and "hash" in metadata[data["name"]]:
+                metadata[data["name"]] = copy.deepcopy(metadata.get(data["name"], {}))
+                changed.add(data["name"])
+                if "hash" in metadata[data["name"]]:
                     hash = metadata[data["name"]]["hash"]
                 else:
                     hash = self._create_hash(ref_path)
-                    if data["name"] not in metadata:
-                        metadata[data["name"]] = {"hash": hash, "links": []}
-                    else:
-                        metadata[data["name"]]["hash"] = hash
+                    metadata[data["name"]]["hash"] = hash
 
                 if "hash" in data and not data["hash"] == hash:
                     # file doesn't have the correct hash, we won't create the link
@@ -1454,10 +1683,11 @@ class LocalFileStorage(StorageInterface):
                 metadata_dirty = True
 
         if metadata_dirty:
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=changed)
 
     def _remove_links(self, name, path, links):
         metadata = self._copied_metadata(self._get_metadata(path), name)
+        changed = {name}
         metadata_dirty = False
 
         hash = metadata[name].get("hash", self._create_hash(os.path.join(path, name)))
@@ -1476,6 +1706,7 @@ class LocalFileStorage(StorageInterface):
                         ):
                             metadata[data["name"]] = copy.deepcopy(metadata[data["name"]])
                             metadata[data["name"]]["links"].remove(link)
+                            changed.add(data["name"])
                             metadata_dirty = True
 
             if "links" in metadata[name]:
@@ -1496,7 +1727,7 @@ class LocalFileStorage(StorageInterface):
                     metadata_dirty = True
 
         if metadata_dirty:
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=changed)
 
     @time_this(
         logtarget=__name__ + ".timings",
@@ -1526,161 +1757,269 @@ class LocalFileStorage(StorageInterface):
                     nodes[key] = value
             return nodes
 
+        with self._filelist_cache_mutex:
+            cache = self._filelist_cache.get(path)
+            lm = self.last_modified(path, recursive=True)
+            if not force_refresh and cache and cache[0] >= lm:
+                return enrich_folders(cache[1])
+
+            result = self._scan_folder(path, base=base)
+            self._filelist_cache[path] = (
+                lm,
+                result,
+            )
+            return enrich_folders(result)
+
+    def _scan_folder(self, path, base=""):
+        """
+        Scans the contents of the folder ``path`` (non recursively), sanitizing entry names and adding basic
+        metadata for files that don't have any yet. Returns the file and folder nodes (the latter without
+        ``children`` and ``size``) by name.
+        """
         metadata_dirty = False
         try:
-            with self._filelist_cache_mutex:
-                cache = self._filelist_cache.get(path)
-                lm = self.last_modified(path, recursive=True)
-                if not force_refresh and cache and cache[0] >= lm:
-                    return enrich_folders(cache[1])
-
-                metadata = self._get_metadata(path)
-                if not metadata:
-                    metadata = {}
+            metadata = self._get_metadata(path)
+            if not metadata:
+                metadata = {}
 
-                result = {}
+            result = {}
 
-                for entry in scandir(path):
-                    if is_hidden_path(entry.name):
-                        # no hidden files and folders
-                        continue
+            for entry in scandir(path):
+                if is_hidden_path(entry.name):
+                    # no hidden files and folders
+                    continue
 
-                    try:
-                        entry_name = entry_display = entry.name
-                        entry_path = entry.path
-                        entry_is_file = entry.is_file()
-                        entry_is_dir = entry.is_dir()
-                        entry_stat = entry.stat()
-                    except Exception:
-                        # error while trying to fetch file metadata, that might be thanks to file already having
-                        # been moved or deleted - ignore it and continue
-                        continue
+                try:
+                    entry_name = entry_display = entry.name
+                    entry_path = entry.path
+                    entry_is_file = entry.is_file()
+                    entry_is_dir = entry.is_dir()
+                    entry_stat = entry.stat()
+                except Exception:
+                    # error while trying to fetch file metadata, that might be thanks to file already having
+                    # been moved or deleted - ignore it and continue
+                    continue
 
-                    try:
-                        new_entry_name, new_entry_path = self._sanitize_entry(
-                            entry_name, path, entry_path
-                        )
-                        if entry_name != new_entry_name or entry_path != new_entry_path:
-                            entry_display = to_unicode(entry_name)
-                            entry_name = new_entry_name
-                            entry_path = new_entry_path
-                            entry_stat = os.stat(entry_path)
-                    except Exception:
-                        # error while trying to rename the file, we'll continue here and ignore it
-                        continue
+                try:
+                    new_entry_name, new_entry_path = self._sanitize_entry(
+                        entry_name, path, entry_path
+                    )
+                    if entry_name != new_entry_name or entry_path != new_entry_path:
+                        entry_display = to_unicode(entry_name)
+                        entry_name = new_entry_name
+                        entry_path = new_entry_path
+                        entry_stat = os.stat(entry_path)
+                except Exception:
+                    # error while trying to rename the file, we'll continue here and ignore it
+                    continue
 
-                    path_in_location = entry_name if not base else base + entry_name
+                path_in_location = entry_name if not base else base + entry_name
 
-                    try:
-                        # file handling
-                        if entry_is_file:
-                            type_path = octoprint.filemanager.get_file_type(entry_name)
-                            if not type_path:
-                                # only supported extensions
-                                continue
-                            else:
-                                file_type = type_path[0]
-
-                            if entry_name in metadata and isinstance(
-                                metadata[entry_name], dict
+                try:
+                    # file handling
+                    if entry_is_file:
+                        type_path = octoprint.filemanager.get_file_type(entry_name)
+                        if not type_path:
+                            # only supported extensions
+                            continue
+                        else:
+                            file_type = type_path[0]
+
+                        if entry_name in metadata and isinstance(
+                            metadata[entry_name], dict
+                        ):
+                            entry_metadata = metadata[entry_name]
+                            if (
+                                "display" not in entry_metadata
+                                and entry_display != entry_name
                             ):
-                                entry_metadata = metadata[entry_name]
-                                if (
-                                    "display" not in entry_metadata
-                                    and entry_display != entry_name
-                                ):
-                                    if not metadata_dirty:
-                                        metadata = self._copied_metadata(
-                                            metadata, entry_name
-                                        )
-                                    metadata[entry_name]["display"] = entry_display
-                                    entry_metadata["display"] = entry_display
-                                    metadata_dirty = True
-                            else:
                                 if not metadata_dirty:
                                     metadata = self._copied_metadata(metadata, entry_name)
-                                entry_metadata = self._add_basic_metadata(
-                                    path,
-                                    entry_name,
-                                    display_name=entry_display,
-                                    save=False,
-                                    metadata=metadata,
-                                )
+                                metadata[entry_name]["display"] = entry_display
+                                entry_metadata["display"] = entry_display
                                 metadata_dirty = True
-
-                            extended_entry_data = {}
-                            extended_entry_data.update(entry_metadata)
-                            extended_entry_data["name"] = entry_name
-                            extended_entry_data["display"] = entry_metadata.get(
-                                "display", entry_name
+                        else:
+                            if not metadata_dirty:
+                                metadata = self._copied_metadata(metadata, entry_name)
+                            entry_metadata = self._add_basic_metadata(
+                                path,
+                                entry_name,
+                                display_name=entry_display,
+                                save=False,
+                                metadata=metadata,
                             )
-                            extended_entry_data["path"] = path_in_location
-                            extended_entry_data["type"] = file_type
-                            extended_entry_data["typePath"] = type_path
-                            stat = entry_stat
-                            if stat:
-                                extended_entry_data["size"] = stat.st_size
-                                extended_entry_data["date"] = int(stat.st_mtime)
-
-                            result[entry_name] = extended_entry_data
-
-                        # folder recursion
-                        elif entry_is_dir:
-                            if entry_name in metadata and isinstance(
-                                metadata[entry_name], dict
+                            metadata[entry_name] = entry_metadata
+                            metadata_dirty = True
+
+                        extended_entry_data = {}
+                        extended_entry_data.update(entry_metadata)
+                        extended_entry_data["name"] = entry_name
+                        extended_entry_data["display"] = entry_metadata.get(
+                            "display", entry_name
+                        )
+                        extended_entry_data["path"] = path_in_location
+                        extended_entry_data["type"] = file_type
+                        extended_entry_data["typePath"] = type_path
+                        stat = entry_stat
+                        if stat:
+                            extended_entry_data["size"] = stat.st_size
+                            extended_entry_data["date"] = int(stat.st_mtime)
+
+                        result[entry_name] = extended_entry_data
+
+                    # folder recursion
+                    elif entry_is_dir:
+                        if entry_name in metadata and isinstance(
+                            metadata[entry_name], dict
+                        ):
+                            entry_metadata = metadata[entry_name]
+                            if (
+                                "display" not in entry_metadata
+                                and entry_display != entry_name
                             ):
-                                entry_metadata = metadata[entry_name]
-                                if (
-                                    "display" not in entry_metadata
-                                    and entry_display != entry_name
-                                ):
-                                    if not metadata_dirty:
-                                        metadata = self._copied_metadata(
-                                            metadata, entry_name
-                                        )
-                                    metadata[entry_name]["display"] = entry_display
-                                    entry_metadata["display"] = entry_display
-                                    metadata_dirty = True
-                            elif entry_name != entry_display:
                                 if not metadata_dirty:
                                     metadata = self._copied_metadata(metadata, entry_name)
-                                entry_metadata = self._add_basic_metadata(
-                                    path,
-                                    entry_name,
-                                    display_name=entry_display,
-                                    save=False,
-                                    metadata=metadata,
-                                )
+                                metadata[entry_name]["display"] = entry_display
+                                entry_metadata["display"] = entry_display
                                 metadata_dirty = True
-                            else:
-                                entry_metadata = {}
-
-                            entry_data = {
-                                "name": entry_name,
-                                "display": entry_metadata.get("display", entry_name),
-                                "path": path_in_location,
-                                "type": "folder",
-                                "typePath": ["folder"],
-                            }
-
-                            result[entry_name] = entry_data
-                    except Exception:
-                        # So something went wrong somewhere while processing this file entry - log that and continue
-                        self._logger.exception(
-                            "Error while processing entry {}".format(entry_path)
-                        )
-                        continue
+                        elif entry_name != entry_display:
+                            if not metadata_dirty:
+                                metadata = self._copied_metadata(metadata, entry_name)
+                            entry_metadata = self._add_basic_metadata(
+                                path,
+                                entry_name,
+                                display_name=entry_display,
+                                save=False,
+                                metadata=metadata,
+                            )
+                            metadata[entry_name] = entry_metadata
+                            metadata_dirty = True
+                        else:
+                            entry_metadata = {}
+
+                        entry_data = {
+                            "name": entry_name,
+                            "display": entry_metadata.get("display", entry_name),
+                            "path": path_in_location,
+                            "type": "folder",
+                            "typePath": ["folder"],
+                        }
+
+                        result[entry_name] = entry_data
+                except Exception:
+                    # So something went wrong somewhere while processing this file entry - log that and continue
+                    self._logger.exception(
+                        "Error while processing entry {}".format(entry_path)
+                    )
+                    continue
 
-                self._filelist_cache[path] = (
-                    lm,
-                    result,
-                )
-                return enrich_folders(result)
+            return result
         finally:
             # save metadata
             if metadata_dirty:
                 self._save_metadata(path, metadata)
 
+    def _folder_modified(self, path):
+        modified = os.stat(path).st_mtime
+        for name in (".metadata.json", JOURNAL_FILE):
+            metadata = os.path.join(path, name)
+            if os.path.exists(metadata):
+                modified = max(modified, os.stat(metadata).st_mtime)
+        return modified
+
+    def _list_index(self, path, depth=None):
+        def copy_folders(nodes):
+            nodes = copy.copy(nodes)
+            for key, value in nodes.items():
+                if value["type"] == "folder":
+                    value = copy.copy(value)
+                    value["children"] = copy_folders(value["children"])
+                    nodes[key] = value
+            return nodes
+
+        self._update_index()
+
+        folder = self.path_in_storage(path)
+        with self._index_mutex:
+            revision = self._index.revision
+            cached = self._index_cache.get((folder, depth))
+            if cached is not None and cached[0] == revision:
+                return copy_folders(cached[1])
+
+            sizes = self._index.folder_sizes(folder)
+
+            children = {folder: {}}
+            for parent, node in self._index.nodes(folder, depth=depth):
+                siblings = children.get(parent)
+                if siblings is None:
+                    continue
+                if node["type"] == "folder":
+                    node["children"] = children[node["path"]] = {}
+                    node["size"] = sizes.get(node["path"], 0)
+                siblings[node["name"]] = node
+
+            self._index_cache[(folder, depth)] = (revision, children[folder])
+            return copy_folders(children[folder])
+
+    def _mark_changed(self, *paths):
+        if self._tracker is not None:
+            for path in paths:
+                self._tracker.changed(path)
+
+        if self._index is None:
+            return
+
+        with self._index_dirty_mutex:
+            self._index_dirty.update(paths)
+
+    def _on_external_change(self, path, is_directory):
+        if self._index is None:
+            return
+
+        path = os.path.normpath(path)
+        if path == self.basefolder:
+            dirty = [path]
+        else:
+            parts = os.path.relpath(path, self.basefolder).split(os.sep)
+            if parts[0] == os.pardir or any(is_hidden_path(p) for p in parts[:-1]):
+                # outside of the storage or inside a hidden folder
+                return
+
+            dirty = [os.path.dirname(path)]
+            if is_directory and not is_hidden_path(path):
+                dirty.append(path)
+
+        with self._index_dirty_mutex:
+            self._index_dirty.update(dirty)
+
+    def _update_index(self):
+        """Rescans all folders marked as dirty since the last update and writes them to the index."""
+        with self._index_mutex:
+            with self._index_dirty_mutex:
+                pending = sorted(self._index_dirty, key=len)
+                self._index_dirty = set()
+
+            while pending:
+                path = pending.pop(0)
+                try:
+                    pending += self._index_folder(path)
+                except Exception:
+                    self._logger.exception(
+                        "Error while updating file index for {}".format(path)
+                    )
+
+    def _index_folder(self, path):
+        folder = self.path_in_storage(path)
+        if not os.path.isdir(path):
+            self._index.remove_folder(folder)
+            return []
+
+        result = self._scan_folder(path, base=folder + "/" if folder else "")
+        unknown = self._index.replace_folder(
+            folder, self._folder_modified(path), result.values()
+        )
+        return [os.path.join(path, name) for name in unknown]
+
     def _add_basic_metadata(
         self,
         path,
@@ -1728,7 +2067,7 @@ class LocalFileStorage(StorageInterface):
         metadata[entry] = entry_data
 
         if save:
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=[entry])
 
         return entry_data
 
@@ -1757,10 +2096,11 @@ class LocalFileStorage(StorageInterface):
                 return
 
             metadata = copy.copy(metadata)
+            changed = {name}
 
             if "hash" in metadata[name]:
                 hash = metadata[name]["hash"]
-                for m in metadata.values():
+                for key, m in metadata.items():
                     if "links" not in m:
                         continue
                     links_hash = (
@@ -1769,16 +2109,20 @@ class LocalFileStorage(StorageInterface):
                         and "rel" in link
                         and (link["rel"] == "model" or link["rel"] == "machinecode")
                     )
-                    m["links"] = [link for link in m["links"] if not links_hash(link)]
+                    links = [link for link in m["links"] if not links_hash(link)]
+                    if len(links) != len(m["links"]):
+                        metadata[key] = m = copy.copy(m)
+                        m["links"] = links
+                        changed.add(key)
 
             del metadata[name]
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=changed)
 
     def _update_metadata_entry(self, path, name, data):
         with self._get_metadata_lock(path):
             metadata = copy.copy(self._get_metadata(path))
             metadata[name] = data
-            self._save_metadata(path, metadata)
+            self._save_metadata(path, metadata, changed=[name])
 
     def _copy_metadata_entry(
         self,
@@ -1813,20 +2157,16 @@ class LocalFileStorage(StorageInterface):
 
         self._migrate_metadata(path)
 
-        metadata_path = os.path.join(path, ".metadata.json")
+        # make sure we don't read anything older than what's still queued
+        self._metadata_journal.flush(path)
 
         metadata = None
-        with self._get_persisted_metadata_lock(path):
-            if os.path.exists(metadata_path):
-                with io.open(metadata_path, "rt", encoding="utf-8") as f:
-                    try:
-                        metadata = json.load(f)
-                    except Exception:
-                        self._logger.exception(
-                            "Error while reading .metadata.json from {path}".format(
-                                **locals()
-                            )
-                        )
+        try:
+            metadata = self._metadata_journal.load(path)
+        except Exception:
+            self._logger.exception(
+                "Error while reading metadata from {path}".format(**locals())
+            )
 
         def valid_json(value):
             try:
@@ -1856,31 +2196,27 @@ class LocalFileStorage(StorageInterface):
         else:
             return {}
 
-    def _save_metadata(self, path, metadata):
-        import json
-
+    def _save_metadata(self, path, metadata, changed=None):
+        """
+        Replaces the metadata of folder ``path`` with ``metadata``. If the names of the ``changed`` entries are
+        provided, only those are persisted, otherwise the whole file is rewritten.
+        """
         with self._get_metadata_lock(path):
             self._metadata_cache[path] = metadata
 
-        with self._get_persisted_metadata_lock(path):
-            metadata_path = os.path.join(path, ".metadata.json")
-            try:
-                with atomic_write(metadata_path, mode="wb") as f:
-                    f.write(
-                        to_bytes(json.dumps(metadata, indent=2, separators=(",", ": ")))
-                    )
-            except Exception:
-                self._logger.exception(
-                    "Error while writing .metadata.json to {path}".format(**locals())
-                )
+        self._metadata_journal.write(path, metadata, changed=changed)
+
+        self._mark_changed(path)
 
     def _delete_metadata(self, path):
         with self._get_metadata_lock(path):
             if path in self._metadata_cache:
                 del self._metadata_cache[path]
 
+        self._metadata_journal.discard(path)
+
         with self._get_persisted_metadata_lock(path):
-            metadata_files = (".metadata.json", ".metadata.yaml")
+            metadata_files = (".metadata.json", ".metadata.yaml", JOURNAL_FILE)
             for metadata_file in metadata_files:
                 metadata_path = os.path.join(path, metadata_file)
                 if os.path.exists(metadata_path):
@@ -22,6 +22,12 @@ class AbstractFileWrapper(object):
 
     DEFAULT_PERMISSIONS = 0o664
 
+    digest = None
+    """
+    SHA1 hex digest of the file's contents if known (e.g. because it was computed while receiving or
+    saving the file), ``None`` otherwise.
+    """
+
     def __init__(self, filename):
         self.filename = filename
 
@@ -55,12 +61,14 @@ class DiskFileWrapper(AbstractFileWrapper):
         filename (str): The file's name
         path (str): The file's absolute path
         move (boolean): Whether to move the file upon saving (True, default) or copying.
+        digest (str): SHA1 hex digest of the file's contents, if already known
     """
 
-    def __init__(self, filename, path, move=True):
+    def __init__(self, filename, path, move=True, digest=None):
         AbstractFileWrapper.__init__(self, filename)
         self.path = path
         self.move = move
+        self.digest = digest
 
     def save(self, path, permissions=None):
         import shutil
@@ -86,6 +94,8 @@ class StreamWrapper(AbstractFileWrapper):
         *streams: One or more :py:class:`io.IOBase` streams to process one after another to save to storage.
     """
 
+    CHUNK_SIZE = 64 * 1024
+
     def __init__(self, filename, *streams):
         if not len(streams) > 0:
             raise ValueError("Need at least one stream to wrap")
@@ -96,13 +106,18 @@ class StreamWrapper(AbstractFileWrapper):
     def save(self, path, permissions=None):
         """
         Will dump the contents of all streams provided during construction into the target file, in the order they were
-        provided.
+        provided. The contents are hashed on the way, the hash is available as :attr:`digest` afterwards.
         """
+        import hashlib
         import shutil
 
+        sha1 = hashlib.sha1()
         with atomic_write(path, mode="wb") as dest:
+            writer = HashingWriter(dest, sha1)
             for source in self.streams:
-                shutil.copyfileobj(source, dest)
+                shutil.copyfileobj(source, writer, self.CHUNK_SIZE)
+        self.digest = sha1.hexdigest()
+
         if permissions is None:
             permissions = self.DEFAULT_PERMISSIONS & ~UMASK
         os.chmod(path, permissions)
@@ -118,6 +133,25 @@ class StreamWrapper(AbstractFileWrapper):
             return self.streams[0]
 
 
+class HashingWriter(object):
+    """
+    Minimal writable wrapper around ``stream`` that feeds everything written through it into ``hash``
+    before passing it on.
+
+    Arguments:
+        stream: The stream to write to
+        hash: A :mod:`hashlib` hash object to update
+    """
+
+    def __init__(self, stream, hash):
+        self.stream = stream
+        self.hash = hash
+
+    def write(self, data):
+        self.hash.update(data)
+        return self.stream.write(data)
+
+
 class MultiStream(io.RawIOBase):
     """
     A stream implementation which when read reads from multiple streams, one after the other, basically concatenating
@@ -258,15 +258,17 @@ def call_plugin(
 
     logger = logging.getLogger(__name__)
 
-    plugins = plugin_manager().get_implementations(
-        *types, sorting_context=sorting_context
-    )
+    manager = plugin_manager()
+    plugins = manager.get_implementations(*types, sorting_context=sorting_context)
+
+    calls = 0
     for plugin in plugins:
         if not hasattr(plugin, "_identifier"):
             continue
 
         if hasattr(plugin, method):
-            logger.debug("Calling {} on {}".format(method, plugin._identifier))
+            calls += 1
+            logger.debug("Calling %s on %s", method, plugin._identifier)
             try:
                 result = getattr(plugin, method)(*args, **kwargs)
                 if callback:
@@ -279,6 +281,8 @@ def call_plugin(
                 if error_callback:
                     error_callback(plugin._identifier, plugin, exc)
 
+    manager.count_dispatch(types, calls)
+
 
 class PluginSettings(object):
     """
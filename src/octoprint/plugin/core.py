@@ -30,6 +30,7 @@ import io
 import logging
 import os
 import sys
+import threading
 from collections import OrderedDict, defaultdict, namedtuple
 
 import pkg_resources
@@ -882,6 +883,13 @@ class PluginManager(object):
         self.plugin_implementations_by_type = defaultdict(list)
 
         self._plugin_hooks = defaultdict(list)
+        self._hooks_revision = 0
+
+        self._implementations_revision = 0
+        self._sorted_implementations = {}
+
+        self._dispatch_counts = defaultdict(lambda: {"dispatches": 0, "calls": 0})
+        self._dispatch_mutex = threading.Lock()
 
         self.implementation_injects = {}
         self.implementation_inject_factories = []
@@ -941,6 +949,42 @@ class PluginManager(object):
             for key, value in self._plugin_hooks.items()
         }
 
+    @property
+    def hooks_revision(self):
+        """
+        Returns:
+                (int) revision of the registered hooks, increases whenever handlers are added or removed
+        """
+        return self._hooks_revision
+
+    @property
+    def implementations_revision(self):
+        """
+        Returns:
+                (int) revision of the registered implementations, increases whenever implementations are added or removed
+        """
+        return self._implementations_revision
+
+    @property
+    def dispatch_counts(self):
+        """
+        Returns:
+                (dict) number of dispatches through :func:`octoprint.plugin.call_plugin` and of resulting implementation
+                calls so far, by name of the implementation type
+        """
+        with self._dispatch_mutex:
+            return {key: dict(value) for key, value in self._dispatch_counts.items()}
+
+    def count_dispatch(self, types, calls):
+        """
+        Records a dispatch to ``calls`` implementations of ``types`` for :attr:`dispatch_counts`.
+        """
+        with self._dispatch_mutex:
+            for t in types:
+                counts = self._dispatch_counts[t.__name__]
+                counts["dispatches"] += 1
+                counts["calls"] += calls
+
     def find_plugins(self, existing=None, ignore_uninstalled=True, incl_all_found=False):
         added, found = self._find_plugins(
             existing=existing, ignore_uninstalled=ignore_uninstalled
@@ -1689,6 +1733,7 @@ class PluginManager(object):
                 self.plugin_implementations_by_type[mixin].append(
                     (name, plugin.implementation)
                 )
+                self._implementations_revision += 1
                 if not getattr(plugin.implementation, "__timing_wrapped", False):
                     for method in filter(
                         lambda a: not a.startswith("_") and callable(getattr(mixin, a)),
@@ -1739,6 +1784,7 @@ class PluginManager(object):
                     self.plugin_implementations_by_type[mixin].remove(
                         (name, plugin.implementation)
                     )
+                    self._implementations_revision += 1
                 except ValueError:
                     # that's ok, the plugin was just not registered for the type
                     pass
@@ -2126,6 +2172,8 @@ class PluginManager(object):
         """
         Get all mixin implementations that implement *all* of the provided ``types``.
 
+        The sorted result is cached per ``types`` and ``sorting_context`` until implementations are added or removed.
+
         Arguments:
             types (one or more type): The types a mixin implementation needs to implement in order to be returned.
 
@@ -2135,17 +2183,26 @@ class PluginManager(object):
 
         sorting_context = kwargs.get("sorting_context", None)
 
+        key = (types, sorting_context)
+        revision = self._implementations_revision
+        cached = self._sorted_implementations.get(key)
+        if cached is None or cached[0] != revision:
+            cached = (revision, self._sort_implementations(types, sorting_context))
+            self._sorted_implementations[key] = cached
+        return list(cached[1])
+
+    def _sort_implementations(self, types, sorting_context):
         result = None
 
         for t in types:
-            implementations = self.plugin_implementations_by_type[t]
+            implementations = self.plugin_implementations_by_type.get(t, [])
             if result is None:
                 result = set(implementations)
             else:
                 result = result.intersection(implementations)
 
         if result is None:
-            return []
+            return ()
 
         def sort_func(impl):
             sorting_value = None
@@ -2178,7 +2235,7 @@ class PluginManager(object):
                 sv(impl[0]),
             )
 
-        return [impl[1] for impl in sorted(result, key=sort_func)]
+        return tuple(impl[1] for impl in sorted(result, key=sort_func))
 
     def get_filtered_implementations(self, f, *types, **kwargs):
         """
@@ -2268,6 +2325,7 @@ class PluginManager(object):
             self._plugin_hooks[hook],
             key=lambda x: (x[0] is None, sv(x[0]), sv(x[1]), sv(x[2])),
         )
+        self._hooks_revision += 1
 
     def _get_callback_and_order(self, hook):
         if callable(hook):
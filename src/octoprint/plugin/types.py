@@ -1937,8 +1937,47 @@ class EventHandlerPlugin(OctoPrintPlugin):
 
     This mixin is especially interesting for plugins which want to react on things like print jobs finishing, timelapse
     videos rendering etc.
+
+    Plugins only interested in some events should say so through :func:`get_subscribed_events`, they will then only
+    be called for those. Plugins that might take a while to process events can request their own delivery lane through
+    :func:`get_event_lane`, so they don't hold up event processing for everyone else.
     """
 
+    # noinspection PyMethodMayBeStatic
+    def get_subscribed_events(self):
+        """
+        Called by OctoPrint to determine which events to deliver to :func:`on_event`. Evaluated again whenever plugins
+        are enabled or disabled.
+
+        Returns:
+            list: The names of the events to receive, or ``None`` (the default) to receive all events.
+        """
+        return None
+
+    # noinspection PyMethodMayBeStatic
+    def get_event_lane(self):
+        """
+        Called by OctoPrint to determine whether to deliver events to :func:`on_event` on the event bus's thread
+        (the default) or through a lane of their own with its own thread and a bounded queue.
+
+        Return a ``dict`` with the following optional keys to request a lane, an empty one for a lane with the
+        default settings:
+
+        size
+            Maximum number of queued events, defaults to 100.
+        policy
+            What to do if an event arrives while the queue is full: ``drop_oldest`` (the default) drops the oldest
+            queued event, ``drop_newest`` the arriving one. ``coalesce`` replaces the payload of an event of the same
+            type if one is still queued, even if the queue isn't full yet, and otherwise drops the oldest one. Meant for
+            plugins that only care about the latest state, e.g. of ``ZChange`` or ``PrintProgress`` style events.
+
+        Events delivered through a lane may arrive after events fired later were already processed by others.
+
+        Returns:
+            dict: The lane configuration, or ``None`` to not use a lane.
+        """
+        return None
+
     # noinspection PyMethodMayBeStatic
     def on_event(self, event, payload):
         """
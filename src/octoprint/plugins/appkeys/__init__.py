@@ -14,9 +14,17 @@ import octoprint.plugin
 from octoprint.access import ADMIN_GROUP
 from octoprint.access.permissions import Permissions
 from octoprint.server import NO_CONTENT, admin_permission, current_user
+from octoprint.access.users import clear_validated_apikeys
 from octoprint.server.util.flask import no_firstrun_access, restricted_access
 from octoprint.settings import valid_boolean_trues
-from octoprint.util import ResettableTimer, atomic_write, generate_api_key, monotonic_time
+from octoprint.util import (
+    ResettableTimer,
+    api_key_digest,
+    api_key_matches,
+    atomic_write,
+    generate_api_key,
+    monotonic_time,
+)
 
 CUTOFF_TIME = 10 * 60  # 10min
 POLL_TIMEOUT = 5  # 5 seconds
@@ -105,6 +113,7 @@ class AppKeysPlugin(
         self._ready_lock = threading.RLock()
 
         self._keys = defaultdict(list)
+        self._keys_by_digest = {}
         self._keys_lock = threading.RLock()
 
         self._key_path = None
@@ -405,6 +414,7 @@ class AppKeysPlugin(
 
             key = ActiveKey(app_name, self._generate_key(), user_id)
             self._keys[user_id].append(key)
+            self._keys_by_digest[api_key_digest(key.api_key)] = key
             self._save_keys()
             return key.api_key
 
@@ -412,14 +422,16 @@ class AppKeysPlugin(
         with self._keys_lock:
             for user_id, data in self._keys.items():
                 self._keys[user_id] = list(filter(lambda x: x.api_key != api_key, data))
+            self._keys_by_digest.pop(api_key_digest(api_key), None)
             self._save_keys()
+        clear_validated_apikeys()
 
     def _user_for_api_key(self, api_key):
-        with self._keys_lock:
-            for user_id, data in self._keys.items():
-                if any(filter(lambda x: x.api_key == api_key, data)):
-                    return self._user_manager.find_user(userid=user_id)
-        return None
+        # called for every request authenticated by an API key, so no lock and no scanning
+        key = self._keys_by_digest.get(api_key_digest(api_key))
+        if key is None or not api_key_matches(api_key, key.api_key):
+            return None
+        return self._user_manager.find_user(userid=key.user_id)
 
     def _api_keys_for_user(self, user_id):
         with self._keys_lock:
@@ -460,6 +472,12 @@ class AppKeysPlugin(
                     ActiveKey.for_internal(x, user_id) for x in persisted_keys
                 ]
             self._keys = keys
+            self._keys_by_digest = {
+                api_key_digest(key.api_key): key
+                for user_keys in keys.values()
+                for key in user_keys
+            }
+        clear_validated_apikeys()
 
     def _save_keys(self):
         with self._keys_lock:
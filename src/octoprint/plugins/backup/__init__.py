@@ -32,6 +32,8 @@ except ImportError:
     zlib = None
 
 
+import collections
+import hashlib
 import io
 import json
 import logging
@@ -43,6 +45,7 @@ import threading
 import time
 import traceback
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 import flask
 import requests
@@ -56,10 +59,43 @@ from octoprint.util.text import sanitize
 
 UNKNOWN_PLUGINS_FILE = "unknown_plugins_from_restore.json"
 
+MANIFEST_FILE = "manifest.json"
+
 BACKUP_DATE_TIME_FMT = "%Y%m%d-%H%M%S"
 
 MAX_UPLOAD_SIZE = 1024 * 1024 * 1024  # 1GB
 
+STORED_EXTENSIONS = (
+    ".3mf",
+    ".7z",
+    ".avi",
+    ".bz2",
+    ".gif",
+    ".gz",
+    ".h264",
+    ".jpeg",
+    ".jpg",
+    ".mkv",
+    ".mov",
+    ".mp4",
+    ".mpg",
+    ".png",
+    ".rar",
+    ".tgz",
+    ".ufp",
+    ".webm",
+    ".webp",
+    ".xz",
+    ".zip",
+)
+"""Already compressed file types, stored in backups instead of deflated."""
+
+PREFETCH_SIZE = 1024 * 1024  # 1MB
+"""Files up to this size are read and hashed by the worker threads ahead of the writer."""
+
+PREFETCH_WINDOW = 16
+"""Maximum number of files read ahead of the writer."""
+
 
 class BackupPlugin(
     octoprint.plugin.SettingsPlugin,
@@ -107,7 +143,7 @@ class BackupPlugin(
     ##~~ SettingsPlugin
 
     def get_settings_defaults(self):
-        return {"restore_unsupported": False}
+        return {"restore_unsupported": False, "incremental": False}
 
     ##~~ AssetPlugin
 
@@ -182,9 +218,10 @@ class BackupPlugin(
 
         data = flask.request.json
         exclude = data.get("exclude", [])
+        incremental = data.get("incremental")
         filename = self._build_backup_filename(settings=self._settings)
 
-        self._start_backup(exclude, filename)
+        self._start_backup(exclude, filename, incremental=incremental)
 
         response = flask.jsonify(started=True, name=filename)
         response.status_code = 201
@@ -194,7 +231,15 @@ class BackupPlugin(
     @no_firstrun_access
     @Permissions.PLUGIN_BACKUP_ACCESS.require(403)
     def delete_backup(self, filename):
-        self._delete_backup(filename)
+        try:
+            self._delete_backup(filename)
+        except BackupInUse as exc:
+            flask.abort(
+                409,
+                description="Backup is still needed by incremental backups {}".format(
+                    ", ".join(exc.dependents)
+                ),
+            )
 
         return NO_CONTENT
 
@@ -407,7 +452,7 @@ class BackupPlugin(
         return [("POST", r"/restore", MAX_UPLOAD_SIZE)]
 
     # Exported plugin helpers
-    def create_backup_helper(self, exclude=None, filename=None):
+    def create_backup_helper(self, exclude=None, filename=None, incremental=None):
         """
         .. versionadded:: 1.6.0
 
@@ -435,13 +480,15 @@ class BackupPlugin(
         :param list exclude: Names of data folders to exclude, defaults to None
         :param str filename: Name of backup to be created, if None (default) the backup
             name will be auto-generated. This should use a ``.zip`` extension.
+        :param bool incremental: Whether to only store files changed since the last backup,
+            if None (default) the plugin's ``incremental`` setting decides.
         """
         if exclude is None:
             exclude = []
         if not isinstance(exclude, list):
             exclude = list(exclude)
 
-        self._start_backup(exclude, filename=filename)
+        self._start_backup(exclude, filename=filename, incremental=incremental)
 
     def delete_backup_helper(self, filename):
         """
@@ -473,6 +520,7 @@ class BackupPlugin(
             for example the name from the events or other helpers.
 
         :param str filename: The name of the backup to delete
+        :raises BackupInUse: if incremental backups still need files from the backup
         """
         self._delete_backup(filename)
 
@@ -494,7 +542,13 @@ class BackupPlugin(
             default=None,
             help="Specify full path to backup file to be created",
         )
-        def backup_command(exclude, path):
+        @click.option(
+            "--incremental/--full",
+            default=None,
+            help="Only store files changed since the last backup in the same folder, or "
+            "store all files. Defaults to the plugin's 'incremental' setting.",
+        )
+        def backup_command(exclude, path, incremental):
             """
             Creates a new backup.
             """
@@ -512,6 +566,9 @@ class BackupPlugin(
             if not os.path.isdir(datafolder):
                 os.makedirs(datafolder)
 
+            if incremental is None:
+                incremental = settings.get_boolean(["incremental"])
+
             click.echo("Creating backup at {}, please wait...".format(filename))
             self._create_backup(
                 filename,
@@ -519,6 +576,7 @@ class BackupPlugin(
                 settings=settings,
                 plugin_manager=cli_group.plugin_manager,
                 datafolder=datafolder,
+                incremental=incremental,
             )
             click.echo("Done.")
             click.echo("Backup located at {}".format(os.path.join(datafolder, filename)))
@@ -658,9 +716,11 @@ class BackupPlugin(
 
     ##~~ helpers
 
-    def _start_backup(self, exclude, filename=None):
+    def _start_backup(self, exclude, filename=None, incremental=None):
         if filename is None:
             filename = self._build_backup_filename(settings=self._settings)
+        if incremental is None:
+            incremental = self._settings.get_boolean(["incremental"])
 
         def on_backup_start(name, temporary_path, exclude):
             self._logger.info(
@@ -710,6 +770,7 @@ class BackupPlugin(
                 "on_backup_start": on_backup_start,
                 "on_backup_done": on_backup_done,
                 "on_backup_error": on_backup_error,
+                "incremental": incremental,
             },
         )
         thread.daemon = True
@@ -728,6 +789,10 @@ class BackupPlugin(
             and os.path.exists(full_path)
             and not is_hidden_path(full_path)
         ):
+            dependents = self._get_dependent_backups(backup_folder, filename)
+            if dependents:
+                raise BackupInUse(filename, dependents)
+
             try:
                 os.remove(full_path)
             except Exception:
@@ -744,11 +809,13 @@ class BackupPlugin(
             if not entry.name.endswith(".zip"):
                 continue
 
+            metadata = self._read_backup_metadata(entry.path)
             backups.append(
                 {
                     "name": entry.name,
                     "date": entry.stat().st_mtime,
                     "size": entry.stat().st_size,
+                    "requires": metadata.get("requires", []) if metadata else [],
                     "url": flask.url_for("index")
                     + "plugin/backup/download/"
                     + entry.name,
@@ -756,6 +823,45 @@ class BackupPlugin(
             )
         return backups
 
+    @classmethod
+    def _read_backup_metadata(cls, path, name="metadata.json"):
+        try:
+            with zipfile.ZipFile(path, "r") as zip:
+                return json.loads(zip.read(name))
+        except Exception:
+            return None
+
+    @classmethod
+    def _get_dependent_backups(cls, folder, filename):
+        dependents = []
+        for entry in scandir(folder):
+            if entry.name == filename or not entry.name.endswith(".zip"):
+                continue
+            if is_hidden_path(entry.path) or not entry.is_file():
+                continue
+
+            metadata = cls._read_backup_metadata(entry.path)
+            if metadata and filename in metadata.get("requires", []):
+                dependents.append(entry.name)
+        return sorted(dependents)
+
+    @classmethod
+    def _get_incremental_base(cls, folder, filename):
+        """Returns name and manifest of the most recent backup in ``folder`` with a manifest."""
+        entries = [
+            entry
+            for entry in scandir(folder)
+            if entry.name != filename
+            and entry.name.endswith(".zip")
+            and not is_hidden_path(entry.path)
+            and entry.is_file()
+        ]
+        for entry in sorted(entries, key=lambda x: x.stat().st_mtime, reverse=True):
+            manifest = cls._read_backup_metadata(entry.path, name=MANIFEST_FILE)
+            if manifest is not None:
+                return entry.name, manifest
+        return None, None
+
     def _get_unknown_plugins(self):
         data_file = os.path.join(self.get_plugin_data_folder(), UNKNOWN_PLUGINS_FILE)
         if os.path.exists(data_file):
@@ -827,20 +933,97 @@ class BackupPlugin(
             thread.start()
 
     @classmethod
-    def _get_disk_size(cls, path, ignored=None):
+    def _collect_files(cls, source, target, files, ignored=None):
+        """Adds ``(path, arcname, stat)`` of all files below ``source`` to ``files``."""
         if ignored is None:
             ignored = []
 
-        if path in ignored:
-            return 0
+        if source in ignored:
+            return
 
-        total = 0
-        for entry in scandir(path):
-            if entry.is_dir():
-                total += cls._get_disk_size(entry.path, ignored=ignored)
-            elif entry.is_file():
-                total += entry.stat().st_size
-        return total
+        if os.path.isdir(source):
+            for entry in scandir(source):
+                if entry.path in ignored:
+                    continue
+                if entry.is_dir():
+                    cls._collect_files(
+                        entry.path, target + "/" + entry.name, files, ignored=ignored
+                    )
+                elif entry.is_file():
+                    files.append((entry.path, target + "/" + entry.name, entry.stat()))
+        elif os.path.isfile(source):
+            files.append((source, target, os.stat(source)))
+
+    @classmethod
+    def _write_to_zip(cls, zip, source, arcname, stat, data=None):
+        """Writes the file to ``zip``, returns the hash of its contents or ``None`` if it's gone."""
+        if zlib and not arcname.lower().endswith(STORED_EXTENSIONS):
+            compress_type = zipfile.ZIP_DEFLATED
+        else:
+            compress_type = zipfile.ZIP_STORED
+
+        if data is not None:
+            zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(stat.st_mtime)[:6])
+            zinfo.external_attr = (stat.st_mode & 0xFFFF) << 16
+            zinfo.compress_type = compress_type
+            zip.writestr(zinfo, data)
+            return _hash(data)
+
+        try:
+            if sys.version_info < (3, 6):
+                digest = _hash_file(source)
+                zip.write(source, arcname=arcname, compress_type=compress_type)
+                return digest
+
+            zinfo = zipfile.ZipInfo.from_file(source, arcname=arcname)
+            zinfo.compress_type = compress_type
+            f = io.open(source, "rb")
+        except (IOError, OSError):  # noqa: B014
+            return None
+
+        # hash while writing instead of reading the file twice
+        digest = hashlib.sha1()
+        with f, zip.open(zinfo, mode="w") as dest:
+            for chunk in iter(lambda: f.read(64 * 1024), b""):
+                digest.update(chunk)
+                dest.write(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def _restore_referenced_files(cls, zip, name, manifest, temp, datafolder):
+        """Restores the files of an incremental backup stored in other backups."""
+        abstemp = os.path.abspath(temp)
+        archives = {name: zip}
+        try:
+            for arcname, entry in manifest.get("files", {}).items():
+                backup = entry.get("backup")
+                if backup is None:
+                    continue
+
+                target = os.path.abspath(os.path.join(temp, arcname))
+                if not target.startswith(abstemp + os.sep):
+                    continue
+
+                archive = archives.get(backup)
+                if archive is None:
+                    if os.path.basename(backup) != backup:
+                        raise ValueError("Invalid backup name: {}".format(backup))
+                    archive = archives[backup] = zipfile.ZipFile(
+                        os.path.join(datafolder, backup), "r"
+                    )
+
+                folder = os.path.dirname(target)
+                if not os.path.isdir(folder):
+                    os.makedirs(folder)
+
+                with archive.open(entry.get("source", arcname)) as src:
+                    with io.open(target, "wb") as dest:
+                        shutil.copyfileobj(src, dest)
+                os.utime(target, (entry["mtime"], entry["mtime"]))
+        finally:
+            for archive in archives.values():
+                if archive is not zip:
+                    archive.close()
 
     @classmethod
     def _free_space(cls, path, size):
@@ -925,6 +1108,7 @@ class BackupPlugin(
         on_backup_start=None,
         on_backup_done=None,
         on_backup_error=None,
+        incremental=False,
     ):
         if logger is None:
             logger = logging.getLogger(__name__)
@@ -982,107 +1166,170 @@ class BackupPlugin(
                 for folder in default_settings["folder"].keys()
             ]
 
-            # check how many bytes we are about to backup
-            size = os.stat(configfile).st_size
+            # collect everything we are about to backup
+            files = []
+            cls._collect_files(
+                configfile,
+                "basedir/config.yaml",
+                files,
+                ignored=[
+                    own_folder,
+                ],
+            )
             for folder in default_settings["folder"].keys():
                 if folder in exclude or folder in exclude_by_default:
                     continue
-                size += cls._get_disk_size(
+                cls._collect_files(
                     settings.global_get_basefolder(folder),
+                    "basedir/" + folder.replace("_", "/"),
+                    files,
                     ignored=[
                         own_folder,
-                    ],
+                    ]
+                    + additional_excludes,
                 )
-            size += cls._get_disk_size(
+            cls._collect_files(
                 basedir,
+                "basedir",
+                files,
                 ignored=defaults
                 + [
                     own_folder,
-                ],
+                ]
+                + additional_excludes,
             )
 
+            # files unchanged since the base backup are taken from wherever it has them
+            base_name = base_manifest = None
+            if incremental:
+                base_name, base_manifest = cls._get_incremental_base(datafolder, name)
+            base_files = base_manifest.get("files", {}) if base_manifest else {}
+
+            manifest = {}
+            known = {}
+            changed = []
+            for source, arcname, stat in files:
+                entry = base_files.get(arcname)
+                if (
+                    entry is not None
+                    and entry.get("size") == stat.st_size
+                    and entry.get("mtime") == stat.st_mtime
+                ):
+                    manifest[arcname] = _reference(entry, base_name, arcname)
+                else:
+                    changed.append((source, arcname, stat))
+            for arcname, entry in base_files.items():
+                known.setdefault(entry.get("hash"), _reference(entry, base_name, arcname))
+
             # since we can't know the compression ratio beforehand, we assume we need the same amount of space
+            size = sum(stat.st_size for _, _, stat in changed)
             if not cls._free_space(os.path.dirname(temporary_path), size):
                 raise InsufficientSpace()
 
-            compression = zipfile.ZIP_DEFLATED if zlib else zipfile.ZIP_STORED
-
             if callable(on_backup_start):
                 on_backup_start(name, temporary_path, exclude)
 
-            with zipfile.ZipFile(
-                temporary_path, mode="w", compression=compression, allowZip64=True
-            ) as zip:
+            # with a base, large files need to be hashed before writing to check for duplicates
+            hash_large_files = bool(base_files)
 
-                def add_to_zip(source, target, ignored=None):
-                    if ignored is None:
-                        ignored = []
+            missing = object()
 
-                    if source in ignored:
-                        return
-
-                    if os.path.isdir(source):
-                        for entry in scandir(source):
-                            add_to_zip(
-                                entry.path,
-                                os.path.join(target, entry.name),
-                                ignored=ignored,
+            def prefetch(item):
+                source, _, stat = item
+                try:
+                    if stat.st_size <= PREFETCH_SIZE:
+                        with io.open(source, "rb") as f:
+                            data = f.read()
+                        return data, _hash(data)
+                    elif hash_large_files:
+                        return None, _hash_file(source)
+                except (IOError, OSError):  # noqa: B014
+                    # removed since it was collected, e.g. a temporary file
+                    return missing, None
+                return None, None
+
+            executor = ThreadPoolExecutor(max_workers=_worker_count())
+            try:
+                with zipfile.ZipFile(
+                    temporary_path,
+                    mode="w",
+                    compression=zipfile.ZIP_DEFLATED if zlib else zipfile.ZIP_STORED,
+                    allowZip64=True,
+                ) as zip:
+                    for (source, arcname, stat), (data, digest) in _prefetched(
+                        executor, prefetch, changed, PREFETCH_WINDOW
+                    ):
+                        if data is missing:
+                            logger.warning(
+                                "Skipping {}, it was removed while creating the backup".format(
+                                    source
+                                )
                             )
-                    elif os.path.isfile(source):
-                        zip.write(source, arcname=target)
-
-                # add metadata
-                metadata = {
-                    "version": get_octoprint_version_string(),
-                    "excludes": exclude,
-                }
-                zip.writestr("metadata.json", json.dumps(metadata))
-
-                # backup current config file
-                add_to_zip(
-                    configfile,
-                    "basedir/config.yaml",
-                    ignored=[
-                        own_folder,
-                    ],
-                )
-
-                # backup configured folder paths
-                for folder in default_settings["folder"].keys():
-                    if folder in exclude or folder in exclude_by_default:
-                        continue
+                            continue
+
+                        entry = known.get(digest) if digest is not None else None
+                        if entry is None:
+                            digest = cls._write_to_zip(zip, source, arcname, stat, data)
+                            if digest is None:
+                                logger.warning(
+                                    "Skipping {}, it was removed while creating the backup".format(
+                                        source
+                                    )
+                                )
+                                continue
+                            entry = {
+                                "size": stat.st_size,
+                                "mtime": stat.st_mtime,
+                                "hash": digest,
+                            }
+                            if incremental:
+                                # a full backup must contain every file as a member of its own
+                                known.setdefault(digest, _reference(entry, name, arcname))
+                        else:
+                            entry = dict(entry, size=stat.st_size, mtime=stat.st_mtime)
+                        manifest[arcname] = entry
 
-                    add_to_zip(
-                        settings.global_get_basefolder(folder),
-                        "basedir/" + folder.replace("_", "/"),
-                        ignored=[
-                            own_folder,
-                        ]
-                        + additional_excludes,
+                    requires = sorted(
+                        {
+                            entry["backup"]
+                            for entry in manifest.values()
+                            if entry.get("backup") not in (None, name)
+                        }
                     )
 
-                # backup anything else that might be lying around in our basedir
-                add_to_zip(
-                    basedir,
-                    "basedir",
-                    ignored=defaults
-                    + [
-                        own_folder,
-                    ]
-                    + additional_excludes,
-                )
-
-                # add list of installed plugins
-                helpers = plugin_manager.get_helpers(
-                    "pluginmanager", "generate_plugins_json"
-                )
-                if helpers and "generate_plugins_json" in helpers:
-                    plugins = helpers["generate_plugins_json"](
-                        settings=settings, plugin_manager=plugin_manager
+                    # add metadata
+                    metadata = {
+                        "version": get_octoprint_version_string(),
+                        "excludes": exclude,
+                        "name": name,
+                        "requires": requires,
+                    }
+                    zip.writestr("metadata.json", json.dumps(metadata))
+                    zip.writestr(MANIFEST_FILE, json.dumps({"files": manifest}))
+
+                    # add list of installed plugins
+                    helpers = plugin_manager.get_helpers(
+                        "pluginmanager", "generate_plugins_json"
                     )
+                    if helpers and "generate_plugins_json" in helpers:
+                        plugins = helpers["generate_plugins_json"](
+                            settings=settings, plugin_manager=plugin_manager
+                        )
 
-                    if len(plugins):
-                        zip.writestr("plugin_list.json", json.dumps(plugins))
+                        if len(plugins):
+                            zip.writestr("plugin_list.json", json.dumps(plugins))
+            finally:
+                executor.shutdown(wait=True)
+
+            if requires:
+                logger.info(
+                    "Stored {} of {} files, taking the others from {}".format(
+                        len(manifest)
+                        - sum(1 for entry in manifest.values() if "backup" in entry),
+                        len(manifest),
+                        ", ".join(requires),
+                    )
+                )
 
             shutil.move(temporary_path, final_path)
 
@@ -1164,6 +1411,25 @@ class BackupPlugin(
                         on_restore_failed(path)
                     return False
 
+                # incremental backups need the backups they take files from
+                requires = metadata.get("requires", [])
+                missing = [
+                    backup
+                    for backup in requires
+                    if datafolder is None
+                    or not os.path.isfile(os.path.join(datafolder, backup))
+                ]
+                if missing:
+                    if callable(on_invalid_backup):
+                        on_invalid_backup(
+                            "Backup is incremental and needs missing backups {}".format(
+                                ", ".join(missing)
+                            )
+                        )
+                    if callable(on_restore_failed):
+                        on_restore_failed(path)
+                    return False
+
                 # unzip to temporary folder
                 temp = tempfile.mkdtemp()
                 try:
@@ -1184,6 +1450,21 @@ class BackupPlugin(
                             else:
                                 os.utime(abspath, (date_time, date_time))
 
+                    if MANIFEST_FILE in zip.namelist():
+                        if requires and callable(on_log_progress):
+                            on_log_progress(
+                                "Restoring unchanged files from {}...".format(
+                                    ", ".join(requires)
+                                )
+                            )
+                        cls._restore_referenced_files(
+                            zip,
+                            metadata.get("name"),
+                            json.loads(zip.read(MANIFEST_FILE)),
+                            temp,
+                            datafolder,
+                        )
+
                     # set time on folders
                     for abspath, date_time in dirs.items():
                         os.utime(abspath, (date_time, date_time))
@@ -1404,6 +1685,61 @@ class InsufficientSpace(Exception):
     pass
 
 
+class BackupInUse(Exception):
+    def __init__(self, name, dependents):
+        Exception.__init__(
+            self,
+            "Backup {} is still needed by {}".format(name, ", ".join(dependents)),
+        )
+        self.name = name
+        self.dependents = dependents
+
+
+def _hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def _hash_file(path):
+    digest = hashlib.sha1()
+    with io.open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reference(entry, backup, arcname):
+    """Manifest entry for a file stored as ``arcname`` in ``backup`` or the backup it refers to."""
+    return {
+        "size": entry.get("size"),
+        "mtime": entry.get("mtime"),
+        "hash": entry.get("hash"),
+        "backup": entry.get("backup", backup),
+        "source": entry.get("source", arcname),
+    }
+
+
+def _worker_count():
+    import multiprocessing
+
+    try:
+        return max(1, min(4, multiprocessing.cpu_count()))
+    except NotImplementedError:
+        return 1
+
+
+def _prefetched(executor, fn, items, window):
+    """Yields ``(item, fn(item))`` in order, with up to ``window`` items processed ahead."""
+    pending = collections.deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= window:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
 def _register_custom_events(*args, **kwargs):
     return ["backup_created"]
 
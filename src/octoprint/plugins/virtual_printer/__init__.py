@@ -35,6 +35,7 @@ class VirtualPrinterPlugin(
             "sendWait": True,
             "waitInterval": 1.0,
             "rxBuffer": 64,
+            "rxBufferOverflow": "block",
             "commandBuffer": 4,
             "supportM112": True,
             "echoOnM117": True,
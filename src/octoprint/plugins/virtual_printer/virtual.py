@@ -91,6 +91,7 @@ class VirtualPrinter(object):
         self._write_timeout = write_timeout
 
         self._rx_buffer_size = self._settings.get_int(["rxBuffer"])
+        self._rx_buffer_overflow = self._settings.get(["rxBufferOverflow"])
 
         self.incoming = CharCountingQueue(self._rx_buffer_size, name="RxBuffer")
         self.outgoing = queue.Queue()
@@ -2055,6 +2056,13 @@ class VirtualPrinter(object):
                 self._kill()
                 return len(data)
 
+            if self._rx_buffer_overflow == "drop" and not self.incoming.will_it_fit(data):
+                # like a firmware's real receive buffer we can't hold the sender back, so
+                # what doesn't fit gets lost
+                self._seriallog.info("<<< {} (dropped, RX buffer full)".format(u_data))
+                self._send("Error:RX buffer overflow, dropped {} bytes".format(len(data)))
+                return len(data)
+
             try:
                 written = self.incoming.put(
                     data, timeout=self._write_timeout, partial=True
@@ -2352,5 +2360,9 @@ class CharCountingQueue(queue.Queue):
         self._size -= self._len(item)
         return item
 
+    def will_it_fit(self, item):
+        with self.mutex:
+            return self._will_it_fit(item)
+
     def _will_it_fit(self, item):
         return self.maxsize - self._qsize() >= self._len(item)
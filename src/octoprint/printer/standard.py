@@ -83,6 +83,7 @@ class Printer(PrinterInterface, comm.MachineComPrintCallback):
 
         self._log = deque([], 300)
         self._logBacklog = []
+        self._comm_log = None
 
         self._state = None
 
@@ -151,6 +152,7 @@ class Printer(PrinterInterface, comm.MachineComPrintCallback):
             on_add_message=self._sendAddMessageCallbacks,
             on_get_progress=self._updateProgressDataCallback,
             on_get_resends=self._updateResendDataCallback,
+            on_get_logs=self._readCommunicationLogCallback,
         )
         self._stateMonitor.reset(
             state=self._dict(
@@ -1215,6 +1217,15 @@ class Printer(PrinterInterface, comm.MachineComPrintCallback):
             ratio=int(self._comm.resend_ratio * 100),
         )
 
+    def _readCommunicationLogCallback(self):
+        comm_log = self._comm_log
+        if comm_log is None:
+            return []
+
+        lines = comm_log.read()
+        self._log.extend(lines)
+        return lines
+
     def _addTemperatureData(self, tools=None, bed=None, chamber=None, custom=None):
         if tools is None:
             tools = {}
@@ -1452,6 +1463,14 @@ class Printer(PrinterInterface, comm.MachineComPrintCallback):
         """
         self._addLog(to_unicode(message, "utf-8", errors="replace"))
 
+    def on_comm_log_available(self, comm_log):
+        """
+        Callback method for the comm object, called when there are new entries in the
+        communication log. They get read and formatted with the next state update.
+        """
+        self._comm_log = comm_log
+        self._stateMonitor.trigger_log_update()
+
     def on_comm_temperature_update(self, tools, bed, chamber, custom=None):
         if custom is None:
             custom = {}
@@ -1942,6 +1961,7 @@ class StateMonitor(object):
         on_add_message=None,
         on_get_progress=None,
         on_get_resends=None,
+        on_get_logs=None,
     ):
         self._interval = interval
         self._update_callback = on_update
@@ -1950,6 +1970,7 @@ class StateMonitor(object):
         self._on_add_message = on_add_message
         self._on_get_progress = on_get_progress
         self._on_get_resends = on_get_resends
+        self._on_get_logs = on_get_logs
 
         self._state = None
         self._job_data = None
@@ -1960,11 +1981,13 @@ class StateMonitor(object):
 
         self._progress_dirty = False
         self._resends_dirty = False
+        self._logs_dirty = False
 
         self._change_event = threading.Event()
         self._state_lock = threading.Lock()
         self._progress_lock = threading.Lock()
         self._resends_lock = threading.Lock()
+        self._logs_lock = threading.Lock()
 
         self._last_update = monotonic_time()
         self._worker = threading.Thread(target=self._work)
@@ -2007,6 +2030,13 @@ class StateMonitor(object):
             self._resends_dirty = True
         self._change_event.set()
 
+    def trigger_log_update(self):
+        with self._logs_lock:
+            self._logs_dirty = True
+        with self._resends_lock:
+            self._resends_dirty = True
+        self._change_event.set()
+
     def add_message(self, message):
         self._on_add_message(message)
         self._change_event.set()
@@ -2058,6 +2088,8 @@ class StateMonitor(object):
                 if additional_wait_time > 0:
                     time.sleep(additional_wait_time)
 
+                self._flush_logs()
+
                 with self._state_lock:
                     data = self.get_current_data()
                     self._update_callback(data)
@@ -2070,6 +2102,16 @@ class StateMonitor(object):
                 "to include logs!)"
             )
 
+    def _flush_logs(self):
+        with self._logs_lock:
+            if not self._logs_dirty:
+                return
+            self._logs_dirty = False
+
+        if callable(self._on_get_logs):
+            for log in self._on_get_logs():
+                self._on_add_log(log)
+
     def get_current_data(self):
         with self._progress_lock:
             if self._progress_dirty:
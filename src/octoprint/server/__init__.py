@@ -398,14 +398,33 @@ class Server(object):
                     "Error while processing analysis queues from {}".format(name),
                     extra={"plugin": name},
                 )
+        analysis_cache = None
+        analysis_cache_size = self._settings.getInt(["gcodeAnalysis", "cacheSize"])
+        if analysis_cache_size and analysis_cache_size > 0:
+            analysis_cache = octoprint.filemanager.analysis.AnalysisCache(
+                os.path.join(self._settings.getBaseFolder("data"), "analysis_cache"),
+                analysis_cache_size,
+            )
         analysisQueue = octoprint.filemanager.analysis.AnalysisQueue(
-            analysis_queue_factories
+            analysis_queue_factories, cache=analysis_cache
         )
 
         slicingManager = octoprint.slicing.SlicingManager(
             self._settings.getBaseFolder("slicingProfiles"), printerProfileManager
         )
 
+        file_index_path = None
+        if self._settings.getBoolean(["feature", "fileIndex"]):
+            file_index_path = os.path.join(
+                self._settings.getBaseFolder("data"), "file_index.db"
+            )
+
+        metadata_flush_interval = self._settings.getFloat(
+            ["feature", "metadataFlushInterval"]
+        )
+        if not metadata_flush_interval or metadata_flush_interval <= 0:
+            metadata_flush_interval = None
+
         storage_managers = {}
         storage_managers[
             octoprint.filemanager.FileDestinations.LOCAL
@@ -414,8 +433,16 @@ class Server(object):
             really_universal=self._settings.getBoolean(
                 ["feature", "enforceReallyUniversalFilenames"]
             ),
+            index_path=file_index_path,
+            metadata_flush_interval=metadata_flush_interval,
         )
 
+        uploads_tracking = self._settings.get(["feature", "uploadsTracking"])
+        if uploads_tracking in ("auto", "polling"):
+            storage_managers[octoprint.filemanager.FileDestinations.LOCAL].track_changes(
+                polling=uploads_tracking == "polling"
+            )
+
         fileManager = octoprint.filemanager.FileManager(
             analysisQueue,
             slicingManager,
@@ -428,6 +455,10 @@ class Server(object):
                 self._settings.getBaseFolder("data"), "preemptive_cache_config.yaml"
             )
         )
+        util.flask.get_view_cache().set_limits(
+            threshold=self._settings.getInt(["devel", "cache", "entries"]) or None,
+            max_size=self._settings.getInt(["devel", "cache", "maxSize"]) or None,
+        )
 
         JsonEncoding.add_encoder(users.User, lambda obj: obj.as_dict())
         JsonEncoding.add_encoder(groups.Group, lambda obj: obj.as_dict())
@@ -645,6 +676,9 @@ class Server(object):
 
         enable_cors = settings().getBoolean(["api", "allowCrossOrigin"])
 
+        self._broadcaster = util.sockjs.PrinterStateBroadcaster(
+            printer, eventManager, pluginManager
+        )
         self._router = SockJSRouter(
             self._create_socket_connection,
             "/sockjs",
@@ -659,6 +693,7 @@ class Server(object):
         upload_suffixes = {
             "name": self._settings.get(["server", "uploads", "nameSuffix"]),
             "path": self._settings.get(["server", "uploads", "pathSuffix"]),
+            "sha1": self._settings.get(["server", "uploads", "sha1Suffix"]),
         }
 
         def mime_type_guesser(path):
@@ -978,13 +1013,31 @@ class Server(object):
 
         removed_headers = ["Server"]
 
+        wsgi_executor = None
+        wsgi_threads = self._settings.getInt(["server", "wsgi", "threads"])
+        if wsgi_threads:
+            from concurrent.futures import ThreadPoolExecutor
+
+            wsgi_executor = ThreadPoolExecutor(
+                max_workers=wsgi_threads, thread_name_prefix="WsgiWorker"
+            )
+            self._logger.info(
+                "Handling requests on {} worker threads".format(wsgi_threads)
+            )
+
         server_routes.append(
             (
                 r".*",
                 util.tornado.UploadStorageFallbackHandler,
                 {
                     "fallback": util.tornado.WsgiInputContainer(
-                        app.wsgi_app, headers=headers, removed_headers=removed_headers
+                        app.wsgi_app,
+                        headers=headers,
+                        removed_headers=removed_headers,
+                        executor=wsgi_executor,
+                        stream_threshold=self._settings.getInt(
+                            ["server", "wsgi", "streamThreshold"]
+                        ),
                     ),
                     "file_prefix": "octoprint-file-upload-",
                     "file_suffix": ".tmp",
@@ -1230,6 +1283,12 @@ class Server(object):
             self._logger.info("Shutting down...")
             observer.stop()
             observer.join()
+            storage_managers[
+                octoprint.filemanager.FileDestinations.LOCAL
+            ].stop_tracking_changes()
+            storage_managers[
+                octoprint.filemanager.FileDestinations.LOCAL
+            ].flush_metadata()
             eventManager.fire(events.Events.SHUTDOWN)
 
             self._logger.info("Calling on_shutdown on plugins")
@@ -1291,6 +1350,7 @@ class Server(object):
             pluginManager,
             connectivityChecker,
             session,
+            broadcaster=self._broadcaster,
         )
 
     def _check_for_root(self):
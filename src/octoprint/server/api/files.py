@@ -8,6 +8,7 @@ __copyright__ = "Copyright (C) 2014 The OctoPrint Project - Released under terms
 import hashlib
 import logging
 import os
+import re
 import threading
 
 import psutil
@@ -49,6 +50,8 @@ _file_cache_mutex = threading.RLock()
 
 _DATA_FORMAT_VERSION = "v2"
 
+_QUERY_PARAMETERS = ("search", "type", "order", "reverse", "limit", "offset")
+
 
 def _clear_file_cache():
     with _file_cache_mutex:
@@ -101,7 +104,13 @@ def _create_lastmodified(path, recursive):
             return None
 
 
-def _create_etag(path, filter, recursive, lm=None):
+def _query_parameters():
+    return sorted(
+        (key, request.values[key]) for key in _QUERY_PARAMETERS if key in request.values
+    )
+
+
+def _create_etag(path, filter, recursive, lm=None, query=None):
     if lm is None:
         lm = _create_lastmodified(path, recursive)
 
@@ -117,6 +126,8 @@ def _create_etag(path, filter, recursive, lm=None):
     hash_update(str(lm))
     hash_update(str(filter))
     hash_update(str(recursive))
+    if query:
+        hash_update(repr(query))
 
     path = path[len("/api/files") :]
     if path.startswith("/"):
@@ -224,6 +235,7 @@ def runFilesTest():
         request.values.get("filter", False),
         request.values.get("recursive", False),
         lm=lm,
+        query=_query_parameters(),
     ),
     lastmodified_factory=lambda: _create_lastmodified(
         request.path, request.values.get("recursive", False)
@@ -239,9 +251,12 @@ def readGcodeFilesForOrigin(origin):
     recursive = request.values.get("recursive", "false") in valid_boolean_trues
     force = request.values.get("force", "false") in valid_boolean_trues
 
-    files = _getFileList(
-        origin, filter=filter, recursive=recursive, allow_from_cache=not force
-    )
+    if origin == FileDestinations.LOCAL and _query_parameters():
+        files = _queryFileList(origin, recursive=recursive)
+    else:
+        files = _getFileList(
+            origin, filter=filter, recursive=recursive, allow_from_cache=not force
+        )
 
     if origin == FileDestinations.LOCAL:
         usage = psutil.disk_usage(
@@ -370,99 +385,122 @@ def _getFileList(
                 )
                 _file_cache[cache_key] = (files, lastmodified)
 
-        def analyse_recursively(files, path=None):
-            if path is None:
-                path = ""
+        files = _analyse_recursively(files)
 
-            result = []
-            for file_or_folder in files:
-                # make a shallow copy in order to not accidentally modify the cached data
-                file_or_folder = dict(file_or_folder)
+    return files
 
-                file_or_folder["origin"] = FileDestinations.LOCAL
 
-                if file_or_folder["type"] == "folder":
-                    if "children" in file_or_folder:
-                        file_or_folder["children"] = analyse_recursively(
-                            file_or_folder["children"].values(),
-                            path + file_or_folder["name"] + "/",
-                        )
+def _queryFileList(origin, recursive=False):
+    types = request.values.get("type")
+    if types:
+        types = types.split(",")
+
+    try:
+        limit = request.values.get("limit")
+        if limit is not None:
+            limit = int(limit)
+        offset = int(request.values.get("offset", 0))
+    except ValueError:
+        abort(400, description="limit and offset must be integers")
+
+    try:
+        files = fileManager.query_files(
+            origin,
+            recursive=recursive,
+            types=types,
+            search=request.values.get("search"),
+            order_by=request.values.get("order", "name"),
+            reverse=request.values.get("reverse", "false") in valid_boolean_trues,
+            limit=limit,
+            offset=offset,
+        )
+    except ValueError:
+        abort(400, description="order is invalid")
 
-                    file_or_folder["refs"] = {
-                        "resource": url_for(
-                            ".readGcodeFile",
-                            target=FileDestinations.LOCAL,
-                            filename=path + file_or_folder["name"],
-                            _external=True,
-                        )
-                    }
-                else:
-                    if (
-                        "analysis" in file_or_folder
-                        and octoprint.filemanager.valid_file_type(
-                            file_or_folder["name"], type="gcode"
-                        )
-                    ):
-                        file_or_folder["gcodeAnalysis"] = file_or_folder["analysis"]
-                        del file_or_folder["analysis"]
+    return _analyse_recursively(files)
 
-                    if (
-                        "history" in file_or_folder
-                        and octoprint.filemanager.valid_file_type(
-                            file_or_folder["name"], type="gcode"
-                        )
-                    ):
-                        # convert print log
-                        history = file_or_folder["history"]
-                        del file_or_folder["history"]
-                        success = 0
-                        failure = 0
-                        last = None
-                        for entry in history:
-                            success += 1 if "success" in entry and entry["success"] else 0
-                            failure += (
-                                1 if "success" in entry and not entry["success"] else 0
-                            )
-                            if not last or (
-                                "timestamp" in entry
-                                and "timestamp" in last
-                                and entry["timestamp"] > last["timestamp"]
-                            ):
-                                last = entry
-                        if last:
-                            prints = {
-                                "success": success,
-                                "failure": failure,
-                                "last": {
-                                    "success": last["success"],
-                                    "date": last["timestamp"],
-                                },
-                            }
-                            if "printTime" in last:
-                                prints["last"]["printTime"] = last["printTime"]
-                            file_or_folder["prints"] = prints
-
-                    file_or_folder["refs"] = {
-                        "resource": url_for(
-                            ".readGcodeFile",
-                            target=FileDestinations.LOCAL,
-                            filename=file_or_folder["path"],
-                            _external=True,
-                        ),
-                        "download": url_for("index", _external=True)
-                        + "downloads/files/"
-                        + FileDestinations.LOCAL
-                        + "/"
-                        + urlquote(file_or_folder["path"]),
-                    }
 
-                result.append(file_or_folder)
+def _analyse_recursively(files, path=None):
+    if path is None:
+        path = ""
 
-            return result
+    result = []
+    for file_or_folder in files:
+        # make a shallow copy in order to not accidentally modify the cached data
+        file_or_folder = dict(file_or_folder)
 
-        files = analyse_recursively(files)
+        file_or_folder["origin"] = FileDestinations.LOCAL
 
-    return files
+        if file_or_folder["type"] == "folder":
+            if "children" in file_or_folder:
+                file_or_folder["children"] = _analyse_recursively(
+                    file_or_folder["children"].values(),
+                    path + file_or_folder["name"] + "/",
+                )
+
+            file_or_folder["refs"] = {
+                "resource": url_for(
+                    ".readGcodeFile",
+                    target=FileDestinations.LOCAL,
+                    filename=path + file_or_folder["name"],
+                    _external=True,
+                )
+            }
+        else:
+            if "analysis" in file_or_folder and octoprint.filemanager.valid_file_type(
+                file_or_folder["name"], type="gcode"
+            ):
+                file_or_folder["gcodeAnalysis"] = file_or_folder["analysis"]
+                del file_or_folder["analysis"]
+
+            if "history" in file_or_folder and octoprint.filemanager.valid_file_type(
+                file_or_folder["name"], type="gcode"
+            ):
+                # convert print log
+                history = file_or_folder["history"]
+                del file_or_folder["history"]
+                success = 0
+                failure = 0
+                last = None
+                for entry in history:
+                    success += 1 if "success" in entry and entry["success"] else 0
+                    failure += 1 if "success" in entry and not entry["success"] else 0
+                    if not last or (
+                        "timestamp" in entry
+                        and "timestamp" in last
+                        and entry["timestamp"] > last["timestamp"]
+                    ):
+                        last = entry
+                if last:
+                    prints = {
+                        "success": success,
+                        "failure": failure,
+                        "last": {
+                            "success": last["success"],
+                            "date": last["timestamp"],
+                        },
+                    }
+                    if "printTime" in last:
+                        prints["last"]["printTime"] = last["printTime"]
+                    file_or_folder["prints"] = prints
+
+            file_or_folder["refs"] = {
+                "resource": url_for(
+                    ".readGcodeFile",
+                    target=FileDestinations.LOCAL,
+                    filename=file_or_folder["path"],
+                    _external=True,
+                ),
+                "download": url_for("index", _external=True)
+                + "downloads/files/"
+                + FileDestinations.LOCAL
+                + "/"
+                + urlquote(file_or_folder["path"]),
+            }
+
+        result.append(file_or_folder)
+
+    return result
 
 
 def _verifyFileExists(origin, filename):
@@ -495,6 +533,13 @@ def _isBusy(target, path):
     )
 
 
+_sha1_regex = re.compile(r"^[0-9a-fA-F]{40}$")
+
+
+def _valid_sha1(value):
+    return _sha1_regex.match(value) is not None
+
+
 @api.route("/files/<string:target>", methods=["POST"])
 @no_firstrun_access
 @Permissions.FILES_UPLOAD.require(403)
@@ -506,12 +551,23 @@ def uploadGcodeFile(target):
     input_upload_path = (
         input_name + "." + settings().get(["server", "uploads", "pathSuffix"])
     )
+    input_upload_sha1 = (
+        input_name + "." + settings().get(["server", "uploads", "sha1Suffix"])
+    )
     if input_upload_name in request.values and input_upload_path in request.values:
         if target not in [FileDestinations.LOCAL, FileDestinations.SDCARD]:
             abort(404)
 
+        # digest computed while the upload was streamed to disk, saves hashing it again. Only
+        # taken from the form, where it can't be set by the client
+        digest = request.form.get(input_upload_sha1)
+        if digest is not None:
+            digest = digest.lower() if _valid_sha1(digest) else None
+
         upload = octoprint.filemanager.util.DiskFileWrapper(
-            request.values[input_upload_name], request.values[input_upload_path]
+            request.values[input_upload_name],
+            request.values[input_upload_path],
+            digest=digest,
         )
 
         # Store any additional user data the caller may have passed.
@@ -241,6 +241,7 @@ def getSettings():
                 ["serial", "disableSdPrintingDetection"]
             ),
             "ackMax": s.getInt(["serial", "ackMax"]),
+            "rxBufferSize": s.getInt(["serial", "rxBufferSize"]),
             "maxTimeoutsIdle": s.getInt(["serial", "maxCommunicationTimeouts", "idle"]),
             "maxTimeoutsPrinting": s.getInt(
                 ["serial", "maxCommunicationTimeouts", "printing"]
@@ -885,6 +886,8 @@ def _saveSettings(data):
             )
         if "ackMax" in data["serial"]:
             s.setInt(["serial", "ackMax"], data["serial"]["ackMax"])
+        if "rxBufferSize" in data["serial"]:
+            s.setInt(["serial", "rxBufferSize"], data["serial"]["rxBufferSize"])
         if "logPositionOnPause" in data["serial"]:
             s.setBoolean(
                 ["serial", "logPositionOnPause"], data["serial"]["logPositionOnPause"]
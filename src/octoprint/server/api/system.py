@@ -19,8 +19,13 @@ from octoprint.logging import prefix_multilines
 from octoprint.plugin import plugin_manager
 from octoprint.server import NO_CONTENT
 from octoprint.server.api import api
-from octoprint.server.util.flask import get_remote_address, no_firstrun_access
+from octoprint.server.util.flask import (
+    get_remote_address,
+    get_view_cache,
+    no_firstrun_access,
+)
 from octoprint.settings import settings as s
+from octoprint.util.comm import command_parser_stats
 from octoprint.util.platform import CLOSE_FDS
 
 
@@ -64,6 +69,20 @@ def getSystemInfo():
     return jsonify(systeminfo=systeminfo)
 
 
+@api.route("/system/cache", methods=["GET"])
+@no_firstrun_access
+@Permissions.SYSTEM.require(403)
+def getCacheStats():
+    return jsonify(cache=get_view_cache().stats, commands=command_parser_stats())
+
+
+@api.route("/system/dispatches", methods=["GET"])
+@no_firstrun_access
+@Permissions.SYSTEM.require(403)
+def getDispatchCounts():
+    return jsonify(dispatches=plugin_manager().dispatch_counts)
+
+
 def _usageForFolders():
     data = {}
     for folder_name in s().get(["folder"]).keys():
@@ -17,9 +17,16 @@ import flask_login
 import octoprint.server
 import octoprint.timelapse
 import octoprint.vendor.flask_principal as flask_principal
+from octoprint.access.users import validated_apikeys
 from octoprint.plugin import plugin_manager
 from octoprint.settings import settings
-from octoprint.util import deprecated, to_unicode
+from octoprint.util import (
+    api_key_digest,
+    api_key_matches,
+    deprecated,
+    monotonic_time,
+    to_unicode,
+)
 
 from . import flask, sockjs, tornado, watchdog  # noqa: F401
 
@@ -204,7 +211,7 @@ def optionsAllowOrigin(request):
 
 def get_user_for_apikey(apikey):
     if apikey is not None:
-        if apikey == settings().get(["api", "key"]):
+        if api_key_matches(apikey, settings().get(["api", "key"])):
             # master key was used
             return octoprint.server.userManager.api_user_factory()
 
@@ -213,21 +220,46 @@ def get_user_for_apikey(apikey):
             # user key was used
             return user
 
-        apikey_hooks = plugin_manager().get_hooks("octoprint.accesscontrol.keyvalidator")
-        for name, hook in apikey_hooks.items():
-            try:
-                user = hook(apikey)
-                if user is not None:
-                    return user
-            except Exception:
-                logging.getLogger(__name__).exception(
-                    "Error running api key validator "
-                    "for plugin {} and key {}".format(name, apikey),
-                    extra={"plugin": name},
-                )
+        return _validate_apikey(apikey)
     return None
 
 
+def _validate_apikey(apikey):
+    """
+    Runs ``apikey`` through the ``octoprint.accesscontrol.keyvalidator`` hooks.
+
+    Results, positive as well as negative, are cached for ``api.keyValidatorCacheTtl`` seconds.
+    """
+    ttl = settings().getFloat(["api", "keyValidatorCacheTtl"])
+    digest = api_key_digest(apikey)
+    now = monotonic_time()
+
+    if ttl:
+        cached, result = validated_apikeys.get(digest, now)
+        if cached:
+            return result
+
+    result = None
+    apikey_hooks = plugin_manager().get_hooks("octoprint.accesscontrol.keyvalidator")
+    for name, hook in apikey_hooks.items():
+        try:
+            user = hook(apikey)
+            if user is not None:
+                result = user
+                break
+        except Exception:
+            logging.getLogger(__name__).exception(
+                "Error running api key validator "
+                "for plugin {} and key {}".format(name, apikey),
+                extra={"plugin": name},
+            )
+
+    if ttl:
+        validated_apikeys.put(digest, result, now, ttl)
+
+    return result
+
+
 def get_user_for_remote_user_header(request):
     if not settings().getBoolean(["accessControl", "trustRemoteUser"]):
         return None
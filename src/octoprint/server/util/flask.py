@@ -7,10 +7,12 @@ __author__ = "Gina Häußge <osd@foosel.net>"
 __license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
 __copyright__ = "Copyright (C) 2014 The OctoPrint Project - Released under terms of the AGPLv3 License"
 
+import collections
 import functools
 import io
 import logging
 import os
+import pickle
 import threading
 import time
 
@@ -733,56 +735,100 @@ def passive_login():
 
 class LessSimpleCache(BaseCache):
     """
-    Slightly improved version of :class:`SimpleCache`.
+    LRU cache with per entry timeouts for rendered views.
+
+    Entries are kept in order of their last use. Once more than ``threshold`` entries or more than
+    ``max_size`` bytes are cached, the least recently used entries are evicted. Expired entries are
+    dropped when they are encountered.
+
+    Fully buffered :class:`flask.Response` objects are stored as their encoded body, status and headers
+    and a fresh response is created from those on every hit. Immutable values like ``bytes`` are stored
+    as they are, anything else gets pickled. Only the bookkeeping happens under the lock, decoding
+    doesn't.
 
     Setting ``default_timeout`` or ``timeout`` to ``-1`` will have no timeout be applied at all.
     """
 
-    def __init__(self, threshold=500, default_timeout=300):
+    _PLAIN = "plain"
+    _RESPONSE = "response"
+    _PICKLED = "pickled"
+
+    def __init__(self, threshold=500, default_timeout=300, max_size=None):
         BaseCache.__init__(self, default_timeout=default_timeout)
         self._mutex = threading.RLock()
-        self._cache = {}
+        self._cache = collections.OrderedDict()
         self._bypassed = set()
-        self.clear = self._cache.clear
         self._threshold = threshold
+        self._max_size = max_size
 
-    def _prune(self):
-        if self.over_threshold():
-            now = time.time()
-            for idx, (key, (expires, _)) in enumerate(self._cache.items()):
-                if expires is not None and expires <= now or idx % 3 == 0:
-                    with self._mutex:
-                        self._cache.pop(key, None)
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
 
-    def get(self, key):
-        import pickle
+    def set_limits(self, threshold=None, max_size=None):
+        """Sets the maximum number of entries and bytes to keep, ``None`` for no limit."""
+        with self._mutex:
+            self._threshold = threshold
+            self._max_size = max_size
+            self._prune()
 
-        now = time.time()
+    @property
+    def stats(self):
         with self._mutex:
-            expires, value = self._cache.get(key, (0, None))
-        if expires is None or expires > now:
-            return pickle.loads(value)
+            return {
+                "entries": len(self._cache),
+                "size": self._size,
+                "threshold": self._threshold,
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "bypassed": len(self._bypassed),
+            }
 
-    def set(self, key, value, timeout=None):
-        import pickle
+    def get(self, key):
+        with self._mutex:
+            entry = self._lookup(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            _move_to_end(self._cache, key)
+        return self._decode(entry)
 
+    def set(self, key, value, timeout=None):
+        expires = self.calculate_timeout(timeout=timeout)
+        kind, data, size = self._encode(value)
         with self._mutex:
+            self._remove(key)
+            self._cache[key] = (expires, kind, data, size)
+            self._size += size
+            self._bypassed.discard(key)
             self._prune()
-            self._cache[key] = (
-                self.calculate_timeout(timeout=timeout),
-                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
-            )
-            if key in self._bypassed:
-                self._bypassed.remove(key)
+        return True
 
     def add(self, key, value, timeout=None):
         with self._mutex:
-            self.set(key, value, timeout=None)
-            self._cache.setdefault(key, self._cache[key])
+            if self._lookup(key) is not None:
+                return False
+            return self.set(key, value, timeout=timeout)
 
     def delete(self, key):
         with self._mutex:
-            self._cache.pop(key, None)
+            return self._remove(key)
+
+    def has(self, key):
+        with self._mutex:
+            return self._lookup(key) is not None
+
+    def clear(self):
+        with self._mutex:
+            self._cache.clear()
+            self._size = 0
+        return True
 
     def calculate_timeout(self, timeout=None):
         if timeout is None:
@@ -792,10 +838,65 @@ class LessSimpleCache(BaseCache):
         return time.time() + timeout
 
     def over_threshold(self):
-        if self._threshold is None:
-            return False
         with self._mutex:
-            return len(self._cache) > self._threshold
+            return (
+                self._threshold is not None and len(self._cache) > self._threshold
+            ) or (self._max_size is not None and self._size > self._max_size)
+
+    def _lookup(self, key):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+
+        expires = entry[0]
+        if expires is not None and expires <= time.time():
+            self._remove(key)
+            self._expirations += 1
+            return None
+
+        return entry
+
+    def _remove(self, key):
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return False
+        self._size -= entry[3]
+        return True
+
+    def _prune(self):
+        while self._cache and self.over_threshold():
+            _, entry = self._cache.popitem(last=False)
+            self._size -= entry[3]
+            self._evictions += 1
+
+    def _encode(self, value):
+        if (
+            isinstance(value, flask.Response)
+            and not value.is_streamed
+            and not value.direct_passthrough
+        ):
+            body = value.get_data()
+            headers = tuple(value.headers.items())
+            size = len(body) + sum(len(k) + len(v) for k, v in headers)
+            return self._RESPONSE, (type(value), body, value.status, headers), size
+
+        if value is None or isinstance(value, (bool, int, long, float)):
+            return self._PLAIN, value, 0
+
+        if isinstance(value, (bytes, basestring)):
+            return self._PLAIN, value, len(value)
+
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return self._PICKLED, data, len(data)
+
+    def _decode(self, entry):
+        _, kind, data, _ = entry
+        if kind == self._RESPONSE:
+            cls, body, status, headers = data
+            return cls(body, status=status, headers=list(headers))
+        elif kind == self._PICKLED:
+            return pickle.loads(data)
+        return data
 
     def __getitem__(self, key):
         return self.get(key)
@@ -807,8 +908,7 @@ class LessSimpleCache(BaseCache):
         return self.delete(key)
 
     def __contains__(self, key):
-        with self._mutex:
-            return key in self._cache
+        return self.has(key)
 
     def set_bypassed(self, key):
         with self._mutex:
@@ -819,9 +919,22 @@ class LessSimpleCache(BaseCache):
             return key in self._bypassed
 
 
+def _move_to_end(ordered_dict, key):
+    try:
+        ordered_dict.move_to_end(key)
+    except AttributeError:
+        # Python 2
+        ordered_dict[key] = ordered_dict.pop(key)
+
+
 _cache = LessSimpleCache()
 
 
+def get_view_cache():
+    """Returns the :class:`LessSimpleCache` used by :func:`cached`."""
+    return _cache
+
+
 def cached(
     timeout=5 * 60,
     key=lambda: "view:%s" % flask.request.path,
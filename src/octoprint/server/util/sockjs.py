@@ -10,6 +10,7 @@ import threading
 import time
 
 import wrapt
+from tornado.ioloop import IOLoop
 
 import octoprint.access.users
 import octoprint.events
@@ -72,6 +73,184 @@ class JsonEncodingSessionWrapper(wrapt.ObjectProxy):
         )
 
 
+class EncodedFrames(object):
+    """
+    JSON frames encoded during one broadcast to all :class:`PrinterStateConnection` instances.
+
+    Every frame is encoded once per message variant and then shared by all connections sending that
+    variant. The variant key identifies the message's content through the identity of the objects it's
+    built from, so those are kept referenced until the broadcast is done.
+    """
+
+    def __init__(self):
+        self.time = time.time()
+        self.encoded = 0
+        self.shared = 0
+
+        self._frames = {}
+        self._memo = {}
+
+    def get(self, variant, message):
+        """
+        Returns:
+            str: the encoded frame of ``message``, encoded only for the first connection sending
+                ``variant``
+        """
+        entry = self._frames.get(variant)
+        if entry is None:
+            entry = self._frames[variant] = (message, json_dump(message))
+            self.encoded += 1
+        else:
+            self.shared += 1
+        return entry[1]
+
+    def memo(self, key, factory):
+        """Returns the result of ``factory``, computed only once per broadcast for ``key``."""
+        if key not in self._memo:
+            self._memo[key] = factory()
+        return self._memo[key]
+
+
+class PrinterStateBroadcaster(octoprint.printer.PrinterCallback):
+    """
+    Fans printer state updates, events and plugin messages out to all open
+    :class:`PrinterStateConnection` instances.
+
+    Instead of every connection registering itself with the printer, the event bus and the plugin
+    manager, the broadcaster registers once and hands every message to the connections together with
+    an :class:`EncodedFrames` instance. Emit hooks, permissions and payload processors are still
+    applied per connection, but connections ending up with the same message share its JSON frame.
+    The printer also only has to copy its current data once per update instead of once per
+    connection.
+    """
+
+    def __init__(self, printer, eventManager, pluginManager):
+        self._logger = logging.getLogger(__name__)
+
+        self._printer = printer
+        self._eventManager = eventManager
+        self._pluginManager = pluginManager
+
+        self._mutex = threading.RLock()
+        self._open = ()
+        self._registered = ()
+
+        self._initial_mutex = threading.Lock()
+        self._initial = None
+
+        self._stats = {"broadcasts": 0, "encoded": 0, "shared": 0}
+
+    @property
+    def stats(self):
+        """Number of broadcasts and of frames encoded and shared in them."""
+        return dict(self._stats)
+
+    def open(self, connection):
+        """Adds ``connection`` to the receivers of plugin messages."""
+        with self._mutex:
+            if connection in self._open:
+                return
+            if not self._open:
+                self._pluginManager.register_message_receiver(self.on_plugin_message)
+            self._open += (connection,)
+
+    def close(self, connection):
+        with self._mutex:
+            if connection not in self._open:
+                return
+            self._open = tuple(c for c in self._open if c is not connection)
+            if not self._open:
+                self._pluginManager.unregister_message_receiver(self.on_plugin_message)
+
+    def register(self, connection):
+        """Adds ``connection`` to the receivers of printer updates and events."""
+        with self._mutex:
+            if connection in self._registered:
+                return
+            if not self._registered:
+                self._printer.register_callback(self)
+                for event in octoprint.events.all_events():
+                    self._eventManager.subscribe(event, self._on_event)
+            self._registered += (connection,)
+
+    def unregister(self, connection):
+        with self._mutex:
+            if connection not in self._registered:
+                return
+            self._registered = tuple(c for c in self._registered if c is not connection)
+            if not self._registered:
+                self._printer.unregister_callback(self)
+                for event in octoprint.events.all_events():
+                    self._eventManager.unsubscribe(event, self._on_event)
+
+    def send_initial(self, connection):
+        """Sends the printer's initial data to ``connection`` only."""
+        with self._initial_mutex:
+            self._initial = connection
+            try:
+                self._printer.send_initial_callback(self)
+            finally:
+                self._initial = None
+
+    def on_printer_send_initial_data(self, data):
+        if self._initial is not None:
+            self._initial.on_printer_send_initial_data(data)
+
+    def on_printer_send_current_data(self, data):
+        self._broadcast(
+            self._registered,
+            lambda connection, frames: connection.on_printer_send_current_data(
+                data, frames=frames
+            ),
+        )
+
+    def on_printer_add_log(self, data):
+        for connection in self._registered:
+            connection.on_printer_add_log(data)
+
+    def on_printer_add_message(self, data):
+        for connection in self._registered:
+            connection.on_printer_add_message(data)
+
+    def on_printer_add_temperature(self, data):
+        for connection in self._registered:
+            connection.on_printer_add_temperature(data)
+
+    def on_plugin_message(self, plugin, data, permissions=None):
+        self._broadcast(
+            self._open,
+            lambda connection, frames: connection.on_plugin_message(
+                plugin, data, permissions=permissions, frames=frames
+            ),
+        )
+
+    def _on_event(self, event, payload):
+        self._broadcast(
+            self._registered,
+            lambda connection, frames: connection.sendEvent(
+                event, payload=payload, frames=frames
+            ),
+        )
+
+    def _broadcast(self, connections, send):
+        if not connections:
+            return
+
+        frames = EncodedFrames()
+        for connection in connections:
+            try:
+                send(connection, frames)
+            except Exception:
+                self._logger.exception(
+                    "Error while broadcasting to client {}".format(connection)
+                )
+
+        with self._mutex:
+            self._stats["broadcasts"] += 1
+            self._stats["encoded"] += frames.encoded
+            self._stats["shared"] += frames.shared
+
+
 class PrinterStateConnection(
     octoprint.vendor.sockjs.tornado.SockJSConnection,
     octoprint.printer.PrinterCallback,
@@ -123,6 +302,7 @@ class PrinterStateConnection(
         pluginManager,
         connectivityChecker,
         session,
+        broadcaster=None,
     ):
         if isinstance(session, octoprint.vendor.sockjs.tornado.session.Session):
             session = JsonEncodingSessionWrapper(session)
@@ -149,6 +329,7 @@ class PrinterStateConnection(
         self._eventManager = eventManager
         self._pluginManager = pluginManager
         self._connectivityChecker = connectivityChecker
+        self._broadcaster = broadcaster
 
         self._remoteAddress = None
         self._user = self._userManager.anonymous_user_factory()
@@ -158,8 +339,12 @@ class PrinterStateConnection(
         self._base_rate_limit = 0.5
 
         self._held_back_current = None
+        self._held_back_scheduled = False
         self._held_back_mutex = threading.RLock()
 
+        # connections are created on the IOLoop, which also flushes held back updates
+        self._ioloop = IOLoop.current()
+
         self._register_hooks = self._pluginManager.get_hooks(
             "octoprint.server.sockjs.register"
         )
@@ -185,7 +370,10 @@ class PrinterStateConnection(
             return "Unconnected {!r}".format(self)
 
     def on_open(self, info):
-        self._pluginManager.register_message_receiver(self.on_plugin_message)
+        if self._broadcaster is not None:
+            self._broadcaster.open(self)
+        else:
+            self._pluginManager.register_message_receiver(self.on_plugin_message)
         self._remoteAddress = self._get_remote_address(info)
         self._logger.info("New connection from client: %s" % self._remoteAddress)
 
@@ -252,7 +440,10 @@ class PrinterStateConnection(
 
         self._on_logout()
         self._remoteAddress = None
-        self._pluginManager.unregister_message_receiver(self.on_plugin_message)
+        if self._broadcaster is not None:
+            self._broadcaster.close(self)
+        else:
+            self._pluginManager.unregister_message_receiver(self.on_plugin_message)
 
     def on_message(self, message):
         try:
@@ -313,28 +504,32 @@ class PrinterStateConnection(
                     )
                 )
 
-    def on_printer_send_current_data(self, data):
+    def on_printer_send_current_data(self, data, frames=None):
         if not self._user.has_permission(Permissions.STATUS):
             return
 
-        # make sure we rate limit the updates according to our throttle factor
+        # make sure we rate limit the updates according to our throttle factor, only the latest held
+        # back update is kept and sent by the IOLoop once the throttle interval is over
         with self._held_back_mutex:
-            if self._held_back_current is not None:
-                self._held_back_current.cancel()
-                self._held_back_current = None
-
             now = time.time()
             delta = (
                 self._last_current + self._base_rate_limit * self._throttle_factor - now
             )
             if delta > 0:
-                self._held_back_current = threading.Timer(
-                    delta, lambda: self.on_printer_send_current_data(data)
-                )
-                self._held_back_current.start()
+                self._held_back_current = data
+                if not self._held_back_scheduled:
+                    self._held_back_scheduled = True
+                    self._ioloop.add_callback(
+                        self._ioloop.call_later, delta, self._flush_held_back_current
+                    )
                 return
 
-        self._last_current = now
+            self._held_back_current = None
+            self._last_current = now
+
+        if frames is None:
+            # held back or not broadcast, nothing to share the frame with
+            frames = EncodedFrames()
 
         # add current temperature, log and message backlogs to sent data
         with self._temperatureBacklogMutex:
@@ -349,6 +544,40 @@ class PrinterStateConnection(
             messages = self._messageBacklog
             self._messageBacklog = []
 
+        busy_files = frames.memo("busyFiles", lambda: self._get_busy_files(data))
+
+        # data is shared by all connections, so it must not be modified
+        payload = dict(data)
+        payload.update(
+            {
+                "serverTime": frames.time,
+                "temps": temperatures,
+                "logs": logs,
+                "messages": messages,
+                "busyFiles": busy_files,
+            }
+        )
+
+        # the backlogs contain the very same entries if they received the same updates
+        variant = (
+            "current",
+            id(data),
+            tuple(map(id, temperatures)),
+            tuple(map(id, logs)),
+            tuple(map(id, messages)),
+        )
+        self._emit("current", payload=payload, frames=frames, variant=variant)
+
+    def _flush_held_back_current(self):
+        with self._held_back_mutex:
+            data = self._held_back_current
+            self._held_back_current = None
+            self._held_back_scheduled = False
+
+        if data is not None:
+            self.on_printer_send_current_data(data)
+
+    def _get_busy_files(self, data):
         busy_files = [
             {"origin": v[0], "path": v[1]} for v in self._fileManager.get_busy_files()
         ]
@@ -368,24 +597,14 @@ class PrinterStateConnection(
                     "path": data["job"]["file"]["path"],
                 }
             )
-
-        data.update(
-            {
-                "serverTime": time.time(),
-                "temps": temperatures,
-                "logs": logs,
-                "messages": messages,
-                "busyFiles": busy_files,
-            }
-        )
-        self._emit("current", payload=data)
+        return busy_files
 
     def on_printer_send_initial_data(self, data):
         data_to_send = dict(data)
         data_to_send["serverTime"] = time.time()
         self._emit("history", payload=data_to_send)
 
-    def sendEvent(self, type, payload=None):
+    def sendEvent(self, type, payload=None, frames=None):
         permissions = self._event_permissions.get(type, self._event_permissions["*"])
         permissions = [x(self._user) if callable(x) else x for x in permissions]
         if not self._user or not all(
@@ -399,7 +618,12 @@ class PrinterStateConnection(
         for processor in processors:
             payload = processor(self._user, payload)
 
-        self._emit("event", payload={"type": type, "payload": payload})
+        self._emit(
+            "event",
+            payload={"type": type, "payload": payload},
+            frames=frames,
+            variant=("event", type, id(payload)),
+        )
 
     def sendTimelapseConfig(self, timelapseConfig):
         self._emit("timelapse", payload=timelapseConfig)
@@ -422,9 +646,13 @@ class PrinterStateConnection(
     def sendRenderProgress(self, progress):
         self._emit("renderProgress", {"progress": progress})
 
-    def on_plugin_message(self, plugin, data, permissions=None):
+    def on_plugin_message(self, plugin, data, permissions=None, frames=None):
         self._emit(
-            "plugin", payload={"plugin": plugin, "data": data}, permissions=permissions
+            "plugin",
+            payload={"plugin": plugin, "data": data},
+            permissions=permissions,
+            frames=frames,
+            variant=("plugin", plugin, id(data)),
         )
 
     def on_printer_add_log(self, data):
@@ -499,17 +727,19 @@ class PrinterStateConnection(
         if not self._user.has_permission(Permissions.STATUS):
             return
 
-        # printer
-        self._printer.register_callback(self)
-        self._printer.send_initial_callback(self)
+        # printer & events
+        if self._broadcaster is not None:
+            self._broadcaster.register(self)
+            self._broadcaster.send_initial(self)
+        else:
+            self._printer.register_callback(self)
+            self._printer.send_initial_callback(self)
+            for event in octoprint.events.all_events():
+                self._eventManager.subscribe(event, self._onEvent)
 
         # files
         self._fileManager.register_slicingprogress_callback(self)
 
-        # events
-        for event in octoprint.events.all_events():
-            self._eventManager.subscribe(event, self._onEvent)
-
         # timelapse
         octoprint.timelapse.register_callback(self)
         octoprint.timelapse.notify_callback(self, timelapse=octoprint.timelapse.current)
@@ -530,11 +760,17 @@ class PrinterStateConnection(
     def _unregister(self):
         """Unregister this socket from the system"""
 
-        self._printer.unregister_callback(self)
+        if self._broadcaster is not None:
+            self._broadcaster.unregister(self)
+        else:
+            self._printer.unregister_callback(self)
+            for event in octoprint.events.all_events():
+                self._eventManager.unsubscribe(event, self._onEvent)
         self._fileManager.unregister_slicingprogress_callback(self)
         octoprint.timelapse.unregister_callback(self)
-        for event in octoprint.events.all_events():
-            self._eventManager.unsubscribe(event, self._onEvent)
+
+        with self._held_back_mutex:
+            self._held_back_current = None
 
     def _reregister(self):
         """Unregister and register again"""
@@ -544,7 +780,7 @@ class PrinterStateConnection(
     def _sendReauthRequired(self, reason):
         self._emit("reauthRequired", payload={"reason": reason})
 
-    def _emit(self, type, payload=None, permissions=None):
+    def _emit(self, type, payload=None, permissions=None, frames=None, variant=None):
         proceed = True
         for name, hook in self._emit_hooks.items():
             try:
@@ -586,11 +822,19 @@ class PrinterStateConnection(
                         )
             return
 
-        self._do_emit(type, payload)
+        self._do_emit(type, payload, frames=frames, variant=variant)
 
-    def _do_emit(self, type, payload):
+    def _do_emit(self, type, payload, frames=None, variant=None):
         try:
-            self.send({type: payload})
+            if (
+                frames is not None
+                and variant is not None
+                and self.session.send_expects_json
+            ):
+                if not self.session.is_closed:
+                    self.session.send_jsonified(frames.get(variant, {type: payload}))
+            else:
+                self.send({type: payload})
         except Exception as e:
             if self._logger.isEnabledFor(logging.DEBUG):
                 self._logger.exception(
@@ -5,6 +5,7 @@ __author__ = "Gina Häußge <osd@foosel.net>"
 __license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
 __copyright__ = "Copyright (C) 2014 The OctoPrint Project - Released under terms of the AGPLv3 License"
 
+import hashlib
 import logging
 import mimetypes
 import os
@@ -18,6 +19,7 @@ import tornado.http1connection
 import tornado.httpclient
 import tornado.httpserver
 import tornado.httputil
+import tornado.ioloop
 import tornado.iostream
 import tornado.tcpserver
 import tornado.util
@@ -215,10 +217,16 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
         Content-Type: text/plain; charset=utf-8
 
         349182
+        ------WebKitFormBoundarypYiSUx63abAmhT5C
+        Content-Disposition: form-data; name="file.sha1"
+        Content-Type: text/plain; charset=utf-8
+
+        4a8e4c6bc9ef6b0bd7ba0a6d9e5fe14bb3fb6e62
         ------WebKitFormBoundarypYiSUx63abAmhT5C--
 
     The underlying application can then access the contained files via their respective paths and just move them
-    where necessary.
+    where necessary. The SHA1 digest of the file's contents is computed while the data is streamed to disk, so the
+    file doesn't need to be read again to hash it.
     """
 
     BODY_METHODS = ("POST", "PATCH", "PUT")
@@ -235,7 +243,9 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
         self._file_suffix = file_suffix
         self._path = path
 
-        self._suffixes = {key: key for key in ("name", "path", "content_type", "size")}
+        self._suffixes = {
+            key: key for key in ("name", "path", "content_type", "size", "sha1")
+        }
         for suffix_type, suffix in suffixes.items():
             if suffix_type in self._suffixes and suffix is not None:
                 self._suffixes[suffix_type] = suffix
@@ -305,9 +315,16 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
                         400, log_message="No multipart boundary supplied"
                     )
         else:
-            self._fallback(self.request, b"")
+            result = self._fallback(self.request, b"")
+            if result is not None:
+                return self._finish_after(result)
             self._finished = True
 
+    @tornado.gen.coroutine
+    def _finish_after(self, result):
+        yield result
+        self._finished = True
+
     def data_received(self, chunk):
         """
         Called by Tornado on receiving a chunk of the request body. If request is a multipart request, takes care of
@@ -451,6 +468,7 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
         * ``content_type``: content type of the part
         * ``file``: file handle for the temporary file (mode "wb", not deleted on close, will be deleted however after
           handling of the request has finished in :func:`_handle_method`)
+        * ``sha1``: SHA1 hash object, updated with the received data
 
         Structure of ``data`` parts:
 
@@ -480,6 +498,7 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
                 "path": tornado.escape.utf8(handle.name),
                 "content_type": tornado.escape.utf8(content_type),
                 "file": handle,
+                "sha1": hashlib.sha1(),
             }
 
         else:
@@ -498,6 +517,7 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
         """
         if "file" in part:
             part["file"].write(data)
+            part["sha1"].update(data)
         else:
             part["data"] += data
 
@@ -521,10 +541,16 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
         logged parts, turning ``file`` parts into new ``data`` parts.
         """
 
+        # form fields named like the ones we generate for contained files, sent by the client, must
+        # neither override them nor pose as them if there is no file
+        generated = tuple(
+            b"." + octoprint.util.to_bytes(suffix) for suffix in self._suffixes.values()
+        )
+
         self._new_body = b""
         for name, part in self._parts.items():
             if "filename" in part:
-                # add form fields for filename, path, size and content_type for all files contained in the request
+                # add form fields for filename, path, size, sha1 and content_type for all files contained in the request
                 if "path" not in part:
                     continue
 
@@ -532,6 +558,7 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
                     "name": part["filename"],
                     "path": part["path"],
                     "size": str(os.stat(part["path"]).st_size),
+                    "sha1": part["sha1"].hexdigest(),
                 }
                 if "content_type" in part:
                     parameters["content_type"] = part["content_type"]
@@ -551,6 +578,14 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
                     self._new_body += b"\r\n"
                     self._new_body += octoprint.util.to_bytes(p) + b"\r\n"
             elif "data" in part:
+                if name.endswith(generated):
+                    self._logger.warning(
+                        "Ignoring form field {} that would pose as file data".format(
+                            octoprint.util.to_unicode(name)
+                        )
+                    )
+                    continue
+
                 self._new_body += b"--%s\r\n" % self._multipart_boundary
                 value = part["data"]
                 self._new_body += b'Content-Disposition: form-data; name="%s"\r\n' % name
@@ -560,6 +595,7 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
                 self._new_body += value + b"\r\n"
         self._new_body += b"--%s--\r\n" % self._multipart_boundary
 
+    @tornado.gen.coroutine
     def _handle_method(self, *args, **kwargs):
         """
         Takes care of defining the new request body if necessary and forwarding
@@ -585,7 +621,11 @@ class UploadStorageFallbackHandler(RequestlessExceptionLoggingMixin, CorsSupport
 
         try:
             # call the configured fallback with request and body to use
-            self._fallback(self.request, body)
+            result = self._fallback(self.request, body)
+            if result is not None:
+                # the fallback writes and finishes the response on its own
+                yield result
+                self._finished = True
             self._headers_written = True
         finally:
             # make sure the temporary files are removed again
@@ -668,12 +708,25 @@ class WsgiInputContainer(object):
 
     The implementation logic is basically the same as ``tornado.wsgi.WSGIContainer`` but the ``__call__`` and ``environ``
     methods have been adjusted to allow for an optionally supplied ``body`` argument which is then used for ``wsgi.input``.
+
+    If an ``executor`` (e.g. a ``concurrent.futures.ThreadPoolExecutor``) is supplied, the WSGI application is called
+    and its response iterated on the executor instead of the IOLoop, so a slow request doesn't block everything else
+    served by the IOLoop. Responses of up to ``stream_threshold`` bytes are then buffered and sent with a
+    ``Content-Length`` like before, larger responses are streamed to the client in chunks of that size.
     """
 
     def __init__(
-        self, wsgi_application, headers=None, forced_headers=None, removed_headers=None
+        self,
+        wsgi_application,
+        headers=None,
+        forced_headers=None,
+        removed_headers=None,
+        executor=None,
+        stream_threshold=64 * 1024,
     ):
         self.wsgi_application = wsgi_application
+        self.executor = executor
+        self.stream_threshold = stream_threshold
 
         if headers is None:
             headers = {}
@@ -692,8 +745,13 @@ class WsgiInputContainer(object):
 
         :param request: the ``tornado.httpserver.HTTPServerRequest`` to derive the WSGI environment from
         :param body: an optional body  to use as ``wsgi.input`` instead of ``request.body``, can be a string or a stream
+        :return: ``None`` if the response has already been written, otherwise a ``Future`` resolving once it has been
+            written when running on an ``executor``
         """
 
+        if self.executor is not None:
+            return self._call_in_executor(request, body)
+
         data = {}
         response = []
 
@@ -711,6 +769,77 @@ class WsgiInputContainer(object):
         finally:
             if hasattr(app_response, "close"):
                 app_response.close()
+
+        status_code, start_line, header_obj = self._prepare_response(data, body)
+        body = tornado.escape.utf8(body)
+        request.connection.write_headers(start_line, header_obj, chunk=body)
+        request.connection.finish()
+        self._log(status_code, request)
+
+    @tornado.gen.coroutine
+    def _call_in_executor(self, request, body):
+        ioloop = tornado.ioloop.IOLoop.current()
+
+        data = {}
+        response = []
+
+        def start_response(status, response_headers, exc_info=None):
+            data["status"] = status
+            data["headers"] = response_headers
+            return response.append
+
+        environ = WsgiInputContainer.environ(request, body)
+        environ["wsgi.multithread"] = True
+
+        app_response = yield ioloop.run_in_executor(
+            self.executor, self.wsgi_application, environ, start_response
+        )
+        try:
+            chunks = iter(app_response)
+            read, done = yield ioloop.run_in_executor(
+                self.executor, _read_chunks, chunks, self.stream_threshold
+            )
+            response.extend(read)
+
+            if done:
+                body = b"".join(response)
+                status_code, start_line, header_obj = self._prepare_response(data, body)
+                request.connection.write_headers(
+                    start_line, header_obj, chunk=tornado.escape.utf8(body)
+                )
+                request.connection.finish()
+                self._log(status_code, request)
+                return
+
+            # too large to buffer, stream it
+            status_code, start_line, header_obj = self._prepare_response(data, None)
+            yield request.connection.write_headers(
+                start_line, header_obj, chunk=tornado.escape.utf8(b"".join(response))
+            )
+            try:
+                while not done:
+                    read, done = yield ioloop.run_in_executor(
+                        self.executor, _read_chunks, chunks, self.stream_threshold
+                    )
+                    if read:
+                        yield request.connection.write(
+                            tornado.escape.utf8(b"".join(read))
+                        )
+            except Exception:
+                # headers are out already, all we can do is drop the connection
+                logging.getLogger(__name__).exception(
+                    "Error while streaming response for {}".format(request.uri)
+                )
+                request.connection.close()
+                return
+
+            request.connection.finish()
+            self._log(status_code, request)
+        finally:
+            if hasattr(app_response, "close"):
+                yield ioloop.run_in_executor(self.executor, app_response.close)
+
+    def _prepare_response(self, data, body):
         if not data:
             raise Exception("WSGI app did not call start_response")
 
@@ -718,10 +847,9 @@ class WsgiInputContainer(object):
         status_code = int(status_code)
         headers = data["headers"]
         header_set = {k.lower() for (k, v) in headers}
-        body = tornado.escape.utf8(body)
         if status_code != 304:
-            if "content-length" not in header_set:
-                headers.append(("Content-Length", str(len(body))))
+            if "content-length" not in header_set and body is not None:
+                headers.append(("Content-Length", str(len(tornado.escape.utf8(body)))))
             if "content-type" not in header_set:
                 headers.append(("Content-Type", "text/html; charset=UTF-8"))
 
@@ -741,9 +869,7 @@ class WsgiInputContainer(object):
         header_obj = tornado.httputil.HTTPHeaders()
         for key, value in headers:
             header_obj.add(key, value)
-        request.connection.write_headers(start_line, header_obj, chunk=body)
-        request.connection.finish()
-        self._log(status_code, request)
+        return status_code, start_line, header_obj
 
     @staticmethod
     def environ(request, body=None):
@@ -817,6 +943,18 @@ class WsgiInputContainer(object):
         log_method("%d %s %.2fms", status_code, summary, request_time)
 
 
+def _read_chunks(iterator, size):
+    """Reads from ``iterator`` until more than ``size`` bytes have been read or it is exhausted."""
+    chunks = []
+    length = 0
+    for chunk in iterator:
+        chunks.append(chunk)
+        length += len(chunk)
+        if length > size:
+            return chunks, False
+    return chunks, True
+
+
 # ~~ customized HTTP1Connection implementation
 
 
@@ -173,6 +173,7 @@ default_settings = {
         "sendM112OnError": True,
         "disableSdPrintingDetection": False,
         "ackMax": 1,
+        "rxBufferSize": 0,
         "sanityCheckTools": True,
         "notifySuppressedCommands": "warn",
         "capabilities": {
@@ -215,6 +216,7 @@ default_settings = {
             "maxSize": 1 * 1024 * 1024 * 1024,  # 1GB
             "nameSuffix": "name",
             "pathSuffix": "path",
+            "sha1Suffix": "sha1",
         },
         "maxSize": 100 * 1024,  # 100 KB
         "commands": {
@@ -243,6 +245,7 @@ default_settings = {
         "ipCheck": {"enabled": True, "trustedSubnets": []},
         "allowFraming": False,
         "cookies": {"secure": False, "samesite": None},
+        "wsgi": {"threads": 0, "streamThreshold": 64 * 1024},
     },
     "webcam": {
         "webcamEnabled": True,
@@ -278,6 +281,10 @@ default_settings = {
         "throttle_lines": 100,
         "runAt": "idle",  # 'never', 'idle', 'always'
         "bedZ": 0.0,
+        "workers": 1,
+        "concurrency": None,
+        "cacheSize": 1000,
+        "fastEstimateMinSize": 2 * 1024 * 1024,
     },
     "feature": {
         "temperatureGraph": True,
@@ -291,6 +298,9 @@ default_settings = {
         "autoUppercaseBlacklist": ["M117", "M118"],
         "g90InfluencesExtruder": False,
         "enforceReallyUniversalFilenames": False,
+        "fileIndex": False,
+        "uploadsTracking": "auto",  # 'auto', 'polling', 'off'
+        "metadataFlushInterval": 1.0,
     },
     "folder": {
         "uploads": None,
@@ -430,7 +440,12 @@ default_settings = {
     },
     "slicing": {"enabled": True, "defaultSlicer": None, "defaultProfiles": None},
     "events": {"enabled": True, "subscriptions": []},
-    "api": {"key": None, "allowCrossOrigin": False, "apps": {}},
+    "api": {
+        "key": None,
+        "allowCrossOrigin": False,
+        "apps": {},
+        "keyValidatorCacheTtl": 10.0,
+    },
     "terminalFilters": [
         {
             "name": "Suppress temperature messages",
@@ -471,7 +486,12 @@ default_settings = {
     },
     "devel": {
         "stylesheet": "css",
-        "cache": {"enabled": True, "preemptive": True},
+        "cache": {
+            "enabled": True,
+            "preemptive": True,
+            "entries": 500,
+            "maxSize": 16 * 1024 * 1024,
+        },
         "webassets": {
             "bundle": True,
             "clean_on_startup": True,
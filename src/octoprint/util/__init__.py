@@ -12,6 +12,8 @@ __license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agp
 import collections
 import contextlib
 import copy
+import hashlib
+import hmac
 import io
 import logging
 import os
@@ -1754,5 +1756,21 @@ def generate_api_key():
     return "".join("%02X" % z for z in bytes(uuid.uuid4().bytes))
 
 
+def api_key_digest(api_key):
+    """
+    Returns the SHA256 hex digest of ``api_key``.
+
+    API keys are indexed by their digest, so looking one up doesn't compare it against the stored keys.
+    """
+    return hashlib.sha256(to_bytes(api_key)).hexdigest()
+
+
+def api_key_matches(api_key, expected):
+    """Compares ``api_key`` against ``expected`` in constant time."""
+    if api_key is None or expected is None:
+        return False
+    return hmac.compare_digest(to_bytes(api_key), to_bytes(expected))
+
+
 def map_boolean(value, true_text, false_text):
     return true_text if value else false_text
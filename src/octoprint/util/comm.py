@@ -10,10 +10,13 @@ The code in this file is based on Cura.util.machineCom from the Cura project fro
 (https://github.com/daid/Cura).
 """
 
+import codecs
 import contextlib
 import copy
 import fnmatch
 import glob
+import io
+import itertools
 import os
 import re
 import threading
@@ -27,6 +30,7 @@ except ImportError:
 import logging
 from collections import deque
 
+import pylru
 import serial
 import wrapt
 from past.builtins import basestring
@@ -43,7 +47,6 @@ from octoprint.util import (
     ResettableTimer,
     TypeAlreadyInQueue,
     TypedQueue,
-    bom_aware_open,
     chunks,
     filter_non_ascii,
     filter_non_utf8,
@@ -188,6 +191,16 @@ regex_firmware_splitter = re.compile(r"(^|\s+)([A-Z][A-Z0-9_]*):")
 regex_resend_linenumber = re.compile(r"(N|N:)?(?P<n>%s)" % regex_int_pattern)
 """Regex to use for request line numbers in resend requests"""
 
+_gcode_handler_regex = re.compile(
+    r"^_gcode_(?P<gcode>.+)_(?P<phase>queuing|queued|sending|sent)$"
+)
+"""Regex matching the names of gcode specific command phase handlers of MachineCom."""
+
+_command_phase_handler_regex = re.compile(
+    r"^_command_phase_(?P<phase>queuing|queued|sending|sent)$"
+)
+"""Regex matching the names of general command phase handlers of MachineCom."""
+
 
 def serialList():
     if os.name == "nt":
@@ -483,6 +496,11 @@ class MachineCom(object):
 
     DETECTION_RETRIES = 3
 
+    _command_phases = ("queuing", "queued", "sending", "sent")
+
+    # how many entries the communication log holds until they are read
+    _comm_log_size = 1000
+
     def __init__(
         self, port=None, baudrate=None, callbackObject=None, printerProfileManager=None
     ):
@@ -608,6 +626,8 @@ class MachineCom(object):
         self._lastCommError = None
         self._lastResendNumber = None
         self._currentResendCount = 0
+        self._stale_resend_line = None
+        self._stale_resend_requests = 0
 
         self._currentConsecutiveResendNumber = None
         self._currentConsecutiveResendCount = 0
@@ -635,8 +655,10 @@ class MachineCom(object):
 
         self._resendActive = False
 
-        terminal_log_size = settings().getInt(["serial", "terminalLogSize"])
-        self._terminal_log = deque([], min(20, terminal_log_size))
+        self._terminal_log_size = min(
+            20, settings().getInt(["serial", "terminalLogSize"])
+        )
+        self._comm_log = CommunicationLog(self._comm_log_size)
 
         self._disconnect_on_errors = settings().getBoolean(
             ["serial", "disconnectOnErrors"]
@@ -667,6 +689,15 @@ class MachineCom(object):
         self._clear_to_send = CountedEvent(
             name="comm.clear_to_send", minimum=None, maximum=self._ack_max
         )
+
+        # windowed mode: stream as long as the firmware's receive buffer has space left
+        # instead of waiting for the ok of each line
+        rx_buffer_size = settings().getInt(["serial", "rxBufferSize"])
+        self._rx_window = (
+            ReceiveBufferWindow(rx_buffer_size)
+            if rx_buffer_size and rx_buffer_size > 0
+            else None
+        )
         self._send_queue = SendQueue()
         self._temperature_timer = None
         self._sd_status_timer = None
@@ -689,18 +720,12 @@ class MachineCom(object):
         # hooks
         self._pluginManager = octoprint.plugin.plugin_manager()
 
-        self._gcode_hooks = {
-            "queuing": self._pluginManager.get_hooks(
-                "octoprint.comm.protocol.gcode.queuing"
-            ),
-            "queued": self._pluginManager.get_hooks(
-                "octoprint.comm.protocol.gcode.queued"
-            ),
-            "sending": self._pluginManager.get_hooks(
-                "octoprint.comm.protocol.gcode.sending"
-            ),
-            "sent": self._pluginManager.get_hooks("octoprint.comm.protocol.gcode.sent"),
-        }
+        self._gcode_hooks = {}
+        self._command_phase_hooks = {}
+        self._command_phase_dispatch = {}
+        self._command_phase_revision = None
+        self._refresh_command_phase_dispatch()
+
         self._received_message_hooks = self._pluginManager.get_hooks(
             "octoprint.comm.protocol.gcode.received"
         )
@@ -889,15 +914,23 @@ class MachineCom(object):
         self._log(prefix + message)
 
     def _log(self, message):
-        message = to_unicode(message)
+        self._record_log(CommunicationLog.INFO, to_unicode(message))
+
+    def _record_log(self, direction, data):
+        entry, notify = self._comm_log.record(direction, data)
 
-        self._terminal_log.append(message)
-        self._callback.on_comm_log(message)
-        self._serialLogger.debug(message)
+        if self._serialLogger.isEnabledFor(logging.DEBUG):
+            self._serialLogger.debug(format_communication_log_entry(entry))
+
+        if notify:
+            self._callback.on_comm_log_available(self._comm_log)
 
     def _to_logfile_with_terminal(self, message=None, level=logging.INFO):
         log = "Last lines in terminal:\n" + "\n".join(
-            map(lambda x: "| {}".format(x), list(self._terminal_log))
+            map(
+                lambda x: "| {}".format(x),
+                self._comm_log.tail(self._terminal_log_size),
+            )
         )
         if message is not None:
             log = message + "\n| " + log
@@ -1172,6 +1205,9 @@ class MachineCom(object):
         def deactivate_monitoring_and_send_queue():
             self._monitoring_active = False
             self._send_queue_active = False
+            if self._rx_window is not None:
+                # wake up the send loop if it's waiting for space in the receive buffer
+                self._rx_window.reset()
 
         if self._serial is not None:
             if not is_error and self._state in self.OPERATIONAL_STATES:
@@ -2458,6 +2494,10 @@ class MachineCom(object):
                 if line.startswith("ok") or (
                     self.isPrinting() and supportWait and line == "wait"
                 ):
+                    if line == "wait" and self._rx_window is not None:
+                        # the firmware is idle, so its receive buffer is empty
+                        self._rx_window.reset()
+
                     # ok only considered handled if it's alone on the line, might be
                     # a response to an M105 or an M114
                     self._handle_ok()
@@ -3131,6 +3171,8 @@ class MachineCom(object):
 
         self._ok_timeout = self._get_new_communication_timeout()
         self._clear_to_send.set()
+        if self._rx_window is not None:
+            self._rx_window.release()
 
         # reset long running commands, persisted current tools and heatup counters on ok
 
@@ -3157,6 +3199,11 @@ class MachineCom(object):
         if self._state not in self.OPERATIONAL_STATES:
             return
 
+        if self._rx_window is not None:
+            # we haven't heard from the printer in a while, so whatever oks we are still
+            # waiting for got lost and the receive buffer has long been processed
+            self._rx_window.reset()
+
         general_message = "Configure long running commands or increase communication timeout if that happens regularly on specific commands or long moves."
 
         # figure out which consecutive timeout maximum we have to use
@@ -3586,6 +3633,8 @@ class MachineCom(object):
         # hold queue processing, clear queues and acknowledgements, reset line number and last lines
         with self._send_queue.blocked():
             self._clear_to_send.reset()
+            if self._rx_window is not None:
+                self._rx_window.reset()
             with self._command_queue.blocked():
                 self._command_queue.clear()
             self._send_queue.clear()
@@ -3800,6 +3849,8 @@ class MachineCom(object):
                 # first hook to succeed wins, but any can pass on to the next
                 self._serial = serial_obj
                 self._clear_to_send.reset()
+                if self._rx_window is not None:
+                    self._rx_window.reset()
                 return True
 
         return False
@@ -3962,11 +4013,7 @@ class MachineCom(object):
             ret = ret.decode("latin1")
 
         if ret != "":
-            try:
-                self._log("Recv: {}".format(sanitize_ascii(ret)))
-            except ValueError as e:
-                self._log("WARN: While reading last line: {}".format(e))
-                self._log("Recv: {!r}".format(ret))
+            self._record_log(CommunicationLog.RECV, ret)
 
             if null_pos >= 0:
                 self._logger.warning("Received line:")
@@ -4083,102 +4130,121 @@ class MachineCom(object):
         self._reevaluate_resend_ratio()
 
         try:
-            lineToResend = parse_resend_line(line)
-            if lineToResend is None:
-                return False
+            # make sure the send loop doesn't send a new line while we evaluate the request
+            with self._line_mutex:
+                lineToResend = parse_resend_line(line)
+                if lineToResend is None:
+                    return False
 
-            if self._resendDelta is None and lineToResend == self._current_line == 1:
-                # We probably just handled a resend and this request originates from lines sent before that
-                self._logger.info(
-                    "Got a resend request for line 1 which is also our current line. It looks "
-                    "like we just handled a reset and this is a left over of this"
-                )
-                return False
+                if (
+                    self._rx_window is not None
+                    and self._stale_resend_requests > 0
+                    and lineToResend == self._stale_resend_line
+                ):
+                    # windowed mode: this was triggered by one of the lines that were still in the
+                    # printer's receive buffer when it requested the resend, we already handle that
+                    self._stale_resend_requests -= 1
+                    return True
 
-            elif self._resendDelta is None and lineToResend == self._current_line:
-                # We don't expect to have an active resend request and the printer is requesting a resend of
-                # a line we haven't yet sent.
-                #
-                # This means the printer got a line from us with N = self._current_line - 1 but had already
-                # acknowledged that. This can happen if the last line was resent due to a timeout during
-                # an active (prior) resend request.
-                #
-                # We will ignore this resend request and just continue normally.
-                self._logger.info(
-                    "Ignoring resend request for line %d == current line, we haven't sent that yet so "
-                    "the printer got N-1 twice from us, probably due to a timeout"
-                    % lineToResend
-                )
-                return False
+                if self._resendDelta is None and lineToResend == self._current_line == 1:
+                    # We probably just handled a resend and this request originates from lines sent before that
+                    self._logger.info(
+                        "Got a resend request for line 1 which is also our current line. It looks "
+                        "like we just handled a reset and this is a left over of this"
+                    )
+                    return False
 
-            lastCommError = self._lastCommError
-            self._lastCommError = None
+                elif self._resendDelta is None and lineToResend == self._current_line:
+                    # We don't expect to have an active resend request and the printer is requesting a resend of
+                    # a line we haven't yet sent.
+                    #
+                    # This means the printer got a line from us with N = self._current_line - 1 but had already
+                    # acknowledged that. This can happen if the last line was resent due to a timeout during
+                    # an active (prior) resend request.
+                    #
+                    # We will ignore this resend request and just continue normally.
+                    self._logger.info(
+                        "Ignoring resend request for line %d == current line, we haven't sent that yet so "
+                        "the printer got N-1 twice from us, probably due to a timeout"
+                        % lineToResend
+                    )
+                    return False
 
-            resendDelta = self._current_line - lineToResend
+                lastCommError = self._lastCommError
+                self._lastCommError = None
 
-            if (
-                lastCommError is not None
-                and (
-                    "line number" in lastCommError.lower()
-                    or "expected line" in lastCommError.lower()
-                )
-                and lineToResend == self._lastResendNumber
-                and self._resendDelta is not None
-                and self._currentResendCount < resendDelta
-            ):
-                self._logger.info(
-                    "Ignoring resend request for line %d, that still originates from lines we sent "
-                    "before we got the first resend request" % lineToResend
-                )
-                self._currentResendCount += 1
-                return True
+                resendDelta = self._current_line - lineToResend
 
-            if self._currentConsecutiveResendNumber == lineToResend:
-                self._currentConsecutiveResendCount += 1
-                if self._currentConsecutiveResendCount >= self._maxConsecutiveResends:
-                    # printer keeps requesting the same line again and again, something is severely broken here
-                    error_text = "Printer keeps requesting line {} again and again, communication stuck".format(
-                        lineToResend
+                if (
+                    lastCommError is not None
+                    and (
+                        "line number" in lastCommError.lower()
+                        or "expected line" in lastCommError.lower()
                     )
-                    self._log(error_text)
-                    self._logger.warning(error_text)
-                    self._trigger_error(error_text, "resend_loop")
-            else:
-                self._currentConsecutiveResendNumber = lineToResend
-                self._currentConsecutiveResendCount = 0
+                    and lineToResend == self._lastResendNumber
+                    and self._resendDelta is not None
+                    and self._currentResendCount < resendDelta
+                ):
+                    self._logger.info(
+                        "Ignoring resend request for line %d, that still originates from lines we sent "
+                        "before we got the first resend request" % lineToResend
+                    )
+                    self._currentResendCount += 1
+                    return True
 
-            self._resendActive = True
-            self._resendDelta = resendDelta
-            self._lastResendNumber = lineToResend
-            self._currentResendCount = 0
+                if self._currentConsecutiveResendNumber == lineToResend:
+                    self._currentConsecutiveResendCount += 1
+                    if self._currentConsecutiveResendCount >= self._maxConsecutiveResends:
+                        # printer keeps requesting the same line again and again, something is severely broken here
+                        error_text = "Printer keeps requesting line {} again and again, communication stuck".format(
+                            lineToResend
+                        )
+                        self._log(error_text)
+                        self._logger.warning(error_text)
+                        self._trigger_error(error_text, "resend_loop")
+                else:
+                    self._currentConsecutiveResendNumber = lineToResend
+                    self._currentConsecutiveResendCount = 0
 
-            self._resendCheckPossibility(lineToResend)
+                self._resendActive = True
+                self._resendDelta = resendDelta
+                self._lastResendNumber = lineToResend
+                self._currentResendCount = 0
 
-            # if we log resends, make sure we don't log more resends than the set rate within a window
-            #
-            # this it to prevent the log from getting flooded for extremely bad communication issues
-            if self._log_resends:
-                now = monotonic_time()
-                new_rate_window = (
-                    self._log_resends_rate_start is None
-                    or self._log_resends_rate_start + self._log_resends_rate_frame < now
-                )
-                in_rate = self._log_resends_rate_count < self._log_resends_max
+                if self._rx_window is not None:
+                    # windowed mode: every line we sent after the requested one is still in the
+                    # printer's receive buffer and will trigger a resend request of its own
+                    self._stale_resend_line = lineToResend
+                    self._stale_resend_requests = self._rx_window.lines - 1
 
-                if new_rate_window or in_rate:
-                    if new_rate_window:
-                        self._log_resends_rate_start = now
-                        self._log_resends_rate_count = 0
+                self._resendCheckPossibility(lineToResend)
 
-                    self._to_logfile_with_terminal(
-                        "Got a resend request from the printer: requested line = {}, "
-                        "current line = {}".format(lineToResend, self._current_line)
+                # if we log resends, make sure we don't log more resends than the set rate within a window
+                #
+                # this it to prevent the log from getting flooded for extremely bad communication issues
+                if self._log_resends:
+                    now = monotonic_time()
+                    new_rate_window = (
+                        self._log_resends_rate_start is None
+                        or self._log_resends_rate_start + self._log_resends_rate_frame
+                        < now
                     )
-                    self._log_resends_rate_count += 1
+                    in_rate = self._log_resends_rate_count < self._log_resends_max
 
-            self._send_queue.resend_active = True
+                    if new_rate_window or in_rate:
+                        if new_rate_window:
+                            self._log_resends_rate_start = now
+                            self._log_resends_rate_count = 0
 
-            return True
+                        self._to_logfile_with_terminal(
+                            "Got a resend request from the printer: requested line = {}, "
+                            "current line = {}".format(lineToResend, self._current_line)
+                        )
+                        self._log_resends_rate_count += 1
+
+                self._send_queue.resend_active = True
+
+                return True
         finally:
             if self._trigger_ok_after_resend == "always":
                 self._handle_ok()
@@ -4400,7 +4466,7 @@ class MachineCom(object):
             self._logger.debug("Type already in send queue: " + e.type)
             return False
 
-    def _use_up_clear(self, gcode):
+    def _use_up_clear(self, gcode, command=None, linenumber=None, wait=True):
         # we only need to use up a clear if the command we just sent was either a gcode command or if we also
         # require ack's for unknown commands
         eats_clear = self._unknownCommandsNeedAck
@@ -4408,11 +4474,37 @@ class MachineCom(object):
             eats_clear = True
 
         if eats_clear:
+            if self._rx_window is not None and command is not None:
+                # windowed mode: instead of waiting for the ok of the previous line, wait until this line fits
+                # into the firmware's receive buffer - the ok for it will release it again
+                self._rx_window.reserve(
+                    self._line_size(command, gcode, linenumber=linenumber), wait=wait
+                )
+                return False
+
             # if we need to use up a clear, do that now
             self._clear_to_send.clear()
 
         return eats_clear
 
+    def _line_size(self, command, gcode, linenumber=None):
+        # number of bytes the command will take up in the firmware's receive buffer, incl. the newline
+        size = len(command) + 1
+        if linenumber is not None or self._needs_checksum(gcode):
+            if linenumber is None:
+                linenumber = self._current_line
+            # "N<linenumber> " and "*<checksum>", the checksum has at most three digits
+            size += len(str(linenumber)) + 6
+        return size
+
+    def _fill_receive_buffer(self):
+        # windowed mode: enqueue the next line right away, the send loop will hold it back
+        # until it fits into the firmware's receive buffer
+        if self._resendDelta is not None:
+            self._resendNextCommand()
+        else:
+            self._continue_sending()
+
     def _send_loop(self):
         """
         The send loop is responsible of sending commands in ``self._send_queue`` over the line, if it is cleared for
@@ -4463,8 +4555,10 @@ class MachineCom(object):
                     if linenumber is not None:
                         # line number predetermined - this only happens for resends, so we'll use the number and
                         # send directly without any processing (since that already took place on the first sending!)
-                        self._use_up_clear(gcode)
+                        self._use_up_clear(gcode, command=command, linenumber=linenumber)
                         self._do_send_with_checksum(command.encode("ascii"), linenumber)
+                        if self._rx_window is not None:
+                            self._fill_receive_buffer()
 
                     else:
                         if not processed:
@@ -4520,9 +4614,27 @@ class MachineCom(object):
                             continue
 
                         # now comes the part where we increase line numbers and send stuff - no turning back now
-                        used_up_clear = self._use_up_clear(gcode)
-                        self._do_send(command, gcode=gcode)
-                        if not used_up_clear:
+                        used_up_clear = self._use_up_clear(gcode, command=command)
+                        with self._line_mutex:
+                            if (
+                                self._rx_window is not None
+                                and self._send_queue.resend_active
+                            ):
+                                # a resend request came in while we were waiting for space in the
+                                # receive buffer, the requested lines have to go out first, so we
+                                # put this one back - it has already been through the sending phase
+                                self._rx_window.cancel()
+                                self._send_queue.prepend(
+                                    (command, None, command_type, on_sent, True, tags),
+                                    item_type=command_type,
+                                )
+                                continue
+
+                            self._do_send(command, gcode=gcode)
+                        if self._rx_window is not None:
+                            # windowed mode, keep the firmware's receive buffer filled
+                            self._fill_receive_buffer()
+                        elif not used_up_clear:
                             # If we didn't use up a clear we need to tickle the read queue - there might
                             # not be a reply to this command, so our _monitor loop will stay waiting until
                             # timeout. We definitely do not want that, so we tickle the queue manually here
@@ -4588,25 +4700,37 @@ class MachineCom(object):
             tags=tags,
         )
 
-        if (self.isStreaming() and self.isPrinting()) or phase not in (
-            "queuing",
-            "queued",
-            "sending",
-            "sent",
-        ):
+        if (
+            self.isStreaming() and self.isPrinting()
+        ) or phase not in self._command_phases:
             return results
 
+        hooks, gcode_handler, command_phase_handler = self._command_phase_pipeline(
+            phase, gcode
+        )
+
         # send it through the phase specific handlers provided by plugins
-        for name, hook in self._gcode_hooks[phase].items():
+        all_hooks = self._command_phase_hooks[phase]
+        rewritten = False
+        index = 0
+        while index < len(hooks):
+            position, name, hook, handled_gcodes = hooks[index]
+            index += 1
+
             new_results = []
-            for command, command_type, gcode, subcode, tags in results:
+            for entry in results:
+                command, command_type, entry_gcode, subcode, tags = entry
+                if handled_gcodes is not None and entry_gcode not in handled_gcodes:
+                    new_results.append(entry)
+                    continue
+
                 try:
                     hook_results = hook(
                         self,
                         phase,
                         command,
                         command_type,
-                        gcode,
+                        entry_gcode,
                         subcode=subcode,
                         tags=tags,
                     )
@@ -4621,10 +4745,16 @@ class MachineCom(object):
                         extra={"plugin": name},
                     )
                 else:
+                    if hook_results is None:
+                        # nothing changed, no need to normalize
+                        new_results.append(entry)
+                        continue
+
+                    rewritten = True
                     normalized = _normalize_command_handler_result(
                         command,
                         command_type,
-                        gcode,
+                        entry_gcode,
                         subcode,
                         tags,
                         hook_results,
@@ -4649,7 +4779,7 @@ class MachineCom(object):
                             ),
                             extra={"plugin": name},
                         )
-                        new_results.append((command, command_type, gcode, subcode, tags))
+                        new_results.append(entry)
                     else:
                         new_results += normalized
             if not new_results:
@@ -4657,24 +4787,44 @@ class MachineCom(object):
                 return []
             results = new_results
 
+            if (
+                rewritten
+                and hooks is not all_hooks
+                and any(entry[2] != gcode for entry in results)
+            ):
+                # the gcode got rewritten, so the remaining hooks have to be matched
+                # against the new gcode(s) instead of the precomputed pipeline
+                hooks = all_hooks
+                index = position + 1
+
         # if it's a gcode command send it through the specific handler if it exists
         new_results = []
         modified = False
-        for command, command_type, gcode, subcode, tags in results:
-            if gcode is not None:
-                gcode_handler = "_gcode_" + gcode + "_" + phase
-                if hasattr(self, gcode_handler):
-                    handler_results = getattr(self, gcode_handler)(
-                        command, cmd_type=command_type, subcode=subcode, tags=tags
-                    )
+        for entry in results:
+            command, command_type, entry_gcode, subcode, tags = entry
+            if entry_gcode == gcode:
+                handler = gcode_handler
+            else:
+                handler = self._gcode_handlers.get((phase, entry_gcode))
+
+            if handler is not None:
+                handler_results = handler(
+                    command, cmd_type=command_type, subcode=subcode, tags=tags
+                )
+                if handler_results is None:
+                    new_results.append(entry)
+                else:
                     new_results += _normalize_command_handler_result(
-                        command, command_type, gcode, subcode, tags, handler_results
+                        command,
+                        command_type,
+                        entry_gcode,
+                        subcode,
+                        tags,
+                        handler_results,
                     )
-                    modified = True
-                else:
-                    new_results.append((command, command_type, gcode, subcode, tags))
+                modified = True
             else:
-                new_results.append((command, command_type, gcode, subcode, tags))
+                new_results.append(entry)
 
         if modified:
             if not new_results:
@@ -4684,25 +4834,104 @@ class MachineCom(object):
                 results = new_results
 
         # send it through the phase specific command handler if it exists
-        command_phase_handler = "_command_phase_" + phase
-        if hasattr(self, command_phase_handler):
+        if command_phase_handler is not None:
             new_results = []
-            for command, command_type, gcode, subcode, tags in results:
-                handler_results = getattr(self, command_phase_handler)(
+            for command, command_type, entry_gcode, subcode, tags in results:
+                handler_results = command_phase_handler(
                     command,
                     cmd_type=command_type,
-                    gcode=gcode,
+                    gcode=entry_gcode,
                     subcode=subcode,
                     tags=tags,
                 )
-                new_results += _normalize_command_handler_result(
-                    command, command_type, gcode, subcode, tags, handler_results
-                )
+                if handler_results is None:
+                    new_results.append(
+                        (command, command_type, entry_gcode, subcode, tags)
+                    )
+                else:
+                    new_results += _normalize_command_handler_result(
+                        command,
+                        command_type,
+                        entry_gcode,
+                        subcode,
+                        tags,
+                        handler_results,
+                    )
             results = new_results
 
         # finally return whatever we resulted on
         return results
 
+    def _refresh_command_phase_dispatch(self):
+        """
+        (Re)builds the handler lookups used by :meth:`_process_command_phase` from the currently
+        registered ``octoprint.comm.protocol.gcode.<phase>`` hooks and the ``_gcode_<gcode>_<phase>``
+        and ``_command_phase_<phase>`` methods, and clears the dispatch table.
+        """
+        gcode_hooks = {}
+        command_phase_hooks = {}
+        for phase in self._command_phases:
+            hooks = self._pluginManager.get_hooks(
+                "octoprint.comm.protocol.gcode." + phase
+            )
+            gcode_hooks[phase] = hooks
+            command_phase_hooks[phase] = [
+                (position, name, hook, _handled_gcodes(hook))
+                for position, (name, hook) in enumerate(hooks.items())
+            ]
+
+        gcode_handlers = {}
+        command_phase_handlers = {}
+        for attr in dir(self):
+            match = _gcode_handler_regex.match(attr)
+            if match:
+                gcode_handlers[(match.group("phase"), match.group("gcode"))] = getattr(
+                    self, attr
+                )
+                continue
+
+            match = _command_phase_handler_regex.match(attr)
+            if match:
+                command_phase_handlers[match.group("phase")] = getattr(self, attr)
+
+        self._gcode_hooks = gcode_hooks
+        self._command_phase_hooks = command_phase_hooks
+        self._gcode_handlers = gcode_handlers
+        self._command_phase_handlers = command_phase_handlers
+        self._command_phase_dispatch = {}
+        self._command_phase_revision = self._pluginManager.hooks_revision
+
+    def _command_phase_pipeline(self, phase, gcode):
+        """
+        Looks up the plugin hooks interested in ``gcode``, the ``gcode`` specific handler and
+        the general handler to run for ``phase``, rebuilding the dispatch table if the registered
+        hooks changed since it was last built.
+
+        Returns:
+            tuple: the matching hook entries, the gcode handler or ``None`` and the command
+                phase handler or ``None``
+        """
+        if self._pluginManager.hooks_revision != self._command_phase_revision:
+            self._refresh_command_phase_dispatch()
+
+        key = (phase, gcode)
+        try:
+            return self._command_phase_dispatch[key]
+        except KeyError:
+            pass
+
+        pipeline = (
+            tuple(
+                entry
+                for entry in self._command_phase_hooks[phase]
+                if entry[3] is None or gcode in entry[3]
+            ),
+            self._gcode_handlers.get(key),
+            self._command_phase_handlers.get(phase),
+        )
+        self._command_phase_dispatch[key] = pipeline
+        return pipeline
+
     def _process_atcommand_phase(self, phase, command, tags=None):
         if (self.isStreaming() and self.isPrinting()) or phase not in (
             "queuing",
@@ -4794,7 +5023,7 @@ class MachineCom(object):
             return
 
         if log:
-            self._log("Send: " + cmd.decode("ascii"))
+            self._record_log(CommunicationLog.SEND, cmd)
 
         cmd += b"\n"
         written = 0
@@ -5314,7 +5543,7 @@ class MachineCom(object):
         self._logger.info(message)
 
         # use up an ok since we will get one back for this command and don't want to get out of sync
-        used_up_clear = self._use_up_clear(gcode)
+        used_up_clear = self._use_up_clear(gcode, command=cmd, wait=False)
         self._do_send(cmd, gcode=gcode)
         if not used_up_clear:
             self._continue_sending()
@@ -5429,6 +5658,19 @@ class MachineComPrintCallback(object):
     def on_comm_log(self, message):
         pass
 
+    def on_comm_log_available(self, comm_log):
+        """
+        Called when new entries were recorded in the communication log after it was
+        last read.
+
+        By default reads them right away and hands them to :func:`on_comm_log`
+        one by one. Callbacks that want to defer formatting can instead read the
+        :class:`CommunicationLog` whenever it suits them - this will only get
+        called again once they did.
+        """
+        for line in comm_log.read():
+            self.on_comm_log(line)
+
     def on_comm_temperature_update(self, temp, bedTemp, chamberTemp, customTemp):
         pass
 
@@ -5606,10 +5848,176 @@ class PrintingSdFileInformation(PrintingFileInformation):
         self._pos = value
 
 
+class ReadAheadLineReader(object):
+    """
+    Reads a file in large binary blocks on a background thread and hands out its lines
+    from a bounded prefetch buffer.
+
+    Lines are split on the raw bytes, so their size in the file is known without having
+    to re-encode them. Each block of raw lines is passed to ``preprocessor`` on the reader
+    thread, which must return a list of the same length containing the processed line or
+    ``None`` for lines to skip. The size of skipped lines is accounted to the next line
+    that is handed out.
+
+    Arguments:
+        path (str): The file to read.
+        preprocessor (callable): Processes a list of raw lines (bytes) into a list of lines
+            (str) or ``None``.
+        block_size (int): The number of bytes to read from the file at once.
+        prefetch_blocks (int): The maximum number of processed blocks to buffer.
+    """
+
+    BLOCK_SIZE = 64 * 1024
+    PREFETCH_BLOCKS = 16
+
+    def __init__(self, path, preprocessor, block_size=None, prefetch_blocks=None):
+        self._path = path
+        self._preprocessor = preprocessor
+        self._block_size = block_size if block_size else self.BLOCK_SIZE
+        self._prefetch_blocks = (
+            prefetch_blocks if prefetch_blocks else self.PREFETCH_BLOCKS
+        )
+
+        self._thread = None
+        self._stop = None
+        self._queue = None
+
+        self._current = iter(())
+        self._eof = False
+
+    def start(self, offset=0):
+        """
+        Starts reading from ``offset``, discarding anything read ahead so far.
+        """
+        self.stop()
+
+        self._current = iter(())
+        self._eof = False
+
+        self._stop = threading.Event()
+        self._queue = queue.Queue(maxsize=self._prefetch_blocks)
+        self._thread = threading.Thread(
+            target=self._read,
+            args=(offset, self._stop, self._queue),
+            name="comm.read_ahead",
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the reader thread and discards anything read ahead so far.
+        """
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+        self._thread.join()
+
+        self._thread = None
+        self._queue = None
+
+    def next(self):
+        """
+        Retrieves the next line.
+
+        Returns:
+            tuple: the line and the number of bytes consumed from the file for it,
+                including any skipped lines preceding it. At the end of the file the
+                line will be ``None``.
+        """
+        try:
+            return next(self._current)
+        except StopIteration:
+            pass
+
+        if self._eof or self._queue is None:
+            return None, 0
+
+        item = self._queue.get()
+        if isinstance(item, Exception):
+            self._eof = True
+            raise item
+
+        # blocks are never empty, the last one ends with the eof marker
+        self._eof = item[-1][0] is None
+        self._current = iter(item)
+        return next(self._current)
+
+    def _read(self, offset, stop, q):
+        def put(item):
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        try:
+            with io.open(self._path, "rb") as f:
+                skipped = 0
+                if offset > 0:
+                    f.seek(offset)
+                else:
+                    # an utf-8 bom is not part of the first line, but still counts
+                    # towards its position in the file
+                    bom = f.read(len(codecs.BOM_UTF8))
+                    if bom == codecs.BOM_UTF8:
+                        skipped = len(bom)
+                    else:
+                        f.seek(0)
+
+                remainder = b""
+                while not stop.is_set():
+                    data = f.read(self._block_size)
+                    if not data:
+                        break
+
+                    lines = (remainder + data).splitlines(True)
+
+                    # the last line might be incomplete, and a trailing \r might be
+                    # followed by a \n in the next block
+                    remainder = lines.pop()
+                    if remainder.endswith(b"\n"):
+                        lines.append(remainder)
+                        remainder = b""
+
+                    batch, skipped = self._prepare(lines, skipped)
+                    if batch and not put(batch):
+                        return
+
+                if stop.is_set():
+                    return
+
+                batch, skipped = self._prepare([remainder] if remainder else [], skipped)
+                batch.append((None, skipped))
+                put(batch)
+        except Exception as exc:
+            put(exc)
+
+    def _prepare(self, lines, skipped):
+        batch = []
+        for raw, line in zip(lines, self._preprocessor(lines)):
+            skipped += len(raw)
+            if line is not None:
+                batch.append((line, skipped))
+                skipped = 0
+        return batch, skipped
+
+
 class PrintingGcodeFileInformation(PrintingFileInformation):
     """
     Encapsulates information regarding an ongoing direct print. Takes care of the needed file handle and ensures
     that the file is closed in case of an error.
+
+    The file is read ahead on a background thread through a :class:`ReadAheadLineReader`, lines
+    are already stripped of comments and whitespace when they are requested through :meth:`getNext`.
     """
 
     def __init__(
@@ -5617,7 +6025,7 @@ class PrintingGcodeFileInformation(PrintingFileInformation):
     ):
         PrintingFileInformation.__init__(self, filename, user=user)
 
-        self._handle = None
+        self._reader = None
         self._handle_mutex = threading.RLock()
 
         self._offsets_callback = offsets_callback
@@ -5631,11 +6039,11 @@ class PrintingGcodeFileInformation(PrintingFileInformation):
 
     def seek(self, offset):
         with self._handle_mutex:
-            if self._handle is None:
+            if self._reader is None:
                 return
 
-            self._handle.seek(offset)
-            self._pos = self._handle.tell()
+            self._reader.start(offset=offset)
+            self._pos = offset
             self._read_lines = 0
 
     def start(self):
@@ -5644,18 +6052,11 @@ class PrintingGcodeFileInformation(PrintingFileInformation):
         """
         PrintingFileInformation.start(self)
         with self._handle_mutex:
-            self._handle = bom_aware_open(
-                self._filename, encoding="utf-8", errors="replace", newline=""
-            )
-            self._pos = self._handle.tell()
-            if self._handle.encoding.endswith("-sig"):
-                # Apparently we found an utf-8 bom in the file.
-                # We need to add its length to our pos because it will
-                # be stripped transparently and we'll have no chance
-                # catching that.
-                import codecs
-
-                self._pos += len(codecs.BOM_UTF8)
+            if self._reader is not None:
+                self._reader.stop()
+            self._reader = ReadAheadLineReader(self._filename, self._preprocess_block)
+            self._reader.start()
+            self._pos = 0
             self._read_lines = 0
 
     def close(self):
@@ -5664,64 +6065,68 @@ class PrintingGcodeFileInformation(PrintingFileInformation):
         """
         PrintingFileInformation.close(self)
         with self._handle_mutex:
-            if self._handle is not None:
+            if self._reader is not None:
                 try:
-                    self._handle.close()
+                    self._reader.stop()
                 except Exception:
                     pass
-            self._handle = None
+            self._reader = None
 
     def getNext(self):
         """
         Retrieves the next line for printing.
         """
         with self._handle_mutex:
-            if self._handle is None:
+            if self._reader is None:
                 self._logger.warning(
                     "File {} is not open for reading".format(self._filename)
                 )
                 return None, None, None
 
             try:
-                offsets = (
-                    self._offsets_callback()
-                    if self._offsets_callback is not None
-                    else None
-                )
-                current_tool = (
-                    self._current_tool_callback()
-                    if self._current_tool_callback is not None
-                    else None
-                )
+                line, size = self._reader.next()
+                self._pos += size
+
+                while line is not None:
+                    processed = self._process(line)
+                    if processed is not None:
+                        self._read_lines += 1
+                        return processed, self._pos, self._read_lines
+
+                    line, size = self._reader.next()
+                    self._pos += size
 
-                processed = None
-                while processed is None:
-                    if self._handle is None:
-                        # file got closed just now
-                        self._pos = self._size
-                        self._done = True
-                        self._report_stats()
-                        return None, None, None
-
-                    # we need to manually keep track of our pos here since
-                    # codecs' readline will make our handle's tell not
-                    # return the actual number of bytes read, but also the
-                    # already buffered bytes (for detecting the newlines)
-                    line = self._handle.readline()
-                    self._pos += len(line.encode("utf-8"))
-
-                    if not line:
-                        self.close()
-                    processed = self._process(line, offsets, current_tool)
-                self._read_lines += 1
-                return processed, self._pos, self._read_lines
+                self.close()
+                self._pos = self._size
+                self._done = True
+                self._report_stats()
+                return None, None, None
             except Exception as e:
                 self.close()
                 self._logger.exception("Exception while processing line")
                 raise e
 
-    def _process(self, line, offsets, current_tool):
-        return process_gcode_line(line, offsets=offsets, current_tool=current_tool)
+    def _preprocess_block(self, lines):
+        """
+        Processes a block of raw lines on the reader thread, see :class:`ReadAheadLineReader`.
+        """
+        return preprocess_gcode_lines(lines)
+
+    def _process(self, line):
+        """
+        Processes a preprocessed line right before it's handed out for sending. Returning ``None``
+        skips the line.
+        """
+        if self._offsets_callback is None or not line.startswith(_temp_command_prefixes):
+            return line
+
+        offsets = self._offsets_callback()
+        current_tool = (
+            self._current_tool_callback()
+            if self._current_tool_callback is not None
+            else None
+        )
+        return apply_temperature_offsets(line, offsets, current_tool=current_tool)
 
     def _report_stats(self):
         duration = monotonic_time() - self._start_time
@@ -5745,8 +6150,8 @@ class StreamingGcodeFileInformation(PrintingGcodeFileInformation):
     def getRemoteFilename(self):
         return self._remoteFilename
 
-    def _process(self, line, offsets, current_tool):
-        return process_gcode_line(line)
+    def _process(self, line):
+        return line
 
     def _report_stats(self):
         duration = monotonic_time() - self._start_time
@@ -5775,11 +6180,12 @@ class SpecialStreamingGcodeFileInformation(StreamingGcodeFileInformation):
 
     checksum = False
 
-    def _process(self, line, offsets, current_tool):
-        line = line.rstrip()
-        if not len(line):
-            return None
-        return line
+    def _preprocess_block(self, lines):
+        result = []
+        for raw in lines:
+            line = raw.decode("utf-8", "replace").rstrip()
+            result.append(line if line else None)
+        return result
 
 
 class JobQueue(PrependableQueue):
@@ -5943,13 +6349,94 @@ class SendQueue(PrependableQueue):
             return self._resend_queue.qsize() + self._send_queue.qsize()
 
 
+class ReceiveBufferWindow(object):
+    """
+    Tracks how many bytes of sent lines are still waiting in the firmware's receive
+    buffer.
+
+    Every line that will be acknowledged by the firmware reserves its size in the
+    window before it's written, every ``ok`` releases the oldest reservation. As long
+    as the reservations fit into the buffer, lines can be streamed without waiting for
+    the ``ok`` of the previous one ("character counting").
+    """
+
+    def __init__(self, size):
+        self._size = size
+        self._lines = deque()
+        self._outstanding = 0
+        self._condition = threading.Condition()
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def outstanding(self):
+        with self._condition:
+            return self._outstanding
+
+    @property
+    def lines(self):
+        with self._condition:
+            return len(self._lines)
+
+    def reserve(self, length, wait=True, timeout=None):
+        """
+        Reserves ``length`` bytes in the window.
+
+        If ``wait`` is True, blocks until the line fits. A line larger than the whole
+        buffer is let through once nothing else is outstanding.
+
+        Returns ``True`` if the bytes were reserved, ``False`` on timeout.
+        """
+        with self._condition:
+            if wait:
+                endtime = None if timeout is None else monotonic_time() + timeout
+                while self._lines and self._outstanding + length > self._size:
+                    if endtime is None:
+                        self._condition.wait()
+                    else:
+                        remaining = endtime - monotonic_time()
+                        if remaining <= 0:
+                            return False
+                        self._condition.wait(remaining)
+
+            self._lines.append(length)
+            self._outstanding += length
+            return True
+
+    def cancel(self):
+        """Cancels the newest reservation, for a line that ended up not being sent."""
+        with self._condition:
+            if self._lines:
+                self._outstanding -= self._lines.pop()
+                self._condition.notify_all()
+
+    def release(self):
+        """Releases the oldest reservation, to be called for every received ``ok``."""
+        with self._condition:
+            if self._lines:
+                self._outstanding -= self._lines.popleft()
+                self._condition.notify_all()
+
+    def reset(self):
+        """Releases all reservations, e.g. after a communication timeout."""
+        with self._condition:
+            self._lines.clear()
+            self._outstanding = 0
+            self._condition.notify_all()
+
+
 _temp_command_regex = re.compile(
     r"^M(?P<command>104|109|140|190)(\s+T(?P<tool>\d+)|\s+S(?P<temperature>[-+]?\d*\.?\d*))+"
 )
 
+_temp_command_prefixes = ("M104", "M109", "M140", "M190")
+"""Prefixes of all lines that can match ``_temp_command_regex``."""
+
 
 def apply_temperature_offsets(line, offsets, current_tool=None):
-    if offsets is None:
+    if offsets is None or not line.startswith(_temp_command_prefixes):
         return line
 
     match = _temp_command_regex.match(line)
@@ -5990,19 +6477,20 @@ def apply_temperature_offsets(line, offsets, current_tool=None):
     )
 
 
+_comment_prefix_regex = re.compile(r"(?:[^;\\]|\\.?)*", re.DOTALL)
+"""Matches everything up to the first unescaped ``;``."""
+
+
 def strip_comment(line):
     if ";" not in line:
         # shortcut
         return line
 
-    escaped = False
-    result = []
-    for c in line:
-        if c == ";" and not escaped:
-            break
-        result += c
-        escaped = (c == "\\") and not escaped
-    return "".join(result)
+    if "\\" not in line:
+        # nothing escaped, cut at the first ;
+        return line[: line.index(";")]
+
+    return _comment_prefix_regex.match(line).group(0)
 
 
 def process_gcode_line(line, offsets=None, current_tool=None):
@@ -6016,6 +6504,37 @@ def process_gcode_line(line, offsets=None, current_tool=None):
     return line
 
 
+def preprocess_gcode_lines(lines):
+    """
+    Strips comments and whitespace from a block of raw lines as read from a file.
+
+    The block is decoded and split in one go. Unless it contains a ``\\`` somewhere,
+    comments are cut at the first ``;`` of each line, otherwise lines go through
+    :func:`strip_comment` to honor escaped ``;``.
+
+    Arguments:
+        lines (list): The raw lines (bytes) to process.
+
+    Returns:
+        list: The processed lines, with ``None`` for lines that are empty after processing.
+
+    Example::
+
+        >>> preprocess_gcode_lines([b"G28 ; home\\n", b"; comment\\r\\n", b"M117 \\\\; Hi"])
+        ['G28', None, 'M117 \\\\; Hi']
+    """
+    text = b"".join(lines).decode("utf-8", "replace")
+
+    split = text.splitlines()
+    if len(split) != len(lines):
+        # str.splitlines knows more line boundaries than bytes.splitlines
+        split = [raw.decode("utf-8", "replace") for raw in lines]
+
+    if "\\" in text:
+        return [strip_comment(line).strip() or None for line in split]
+    return [line.partition(";")[0].strip() or None for line in split]
+
+
 def convert_pause_triggers(configured_triggers):
     if not configured_triggers:
         return {}
@@ -6355,6 +6874,38 @@ def parse_position_line(line):
     return None
 
 
+def handles_gcodes(*gcodes):
+    """
+    Decorator for ``octoprint.comm.protocol.gcode.<phase>`` hook handlers to declare which GCODE
+    commands they are interested in. Decorated handlers will only be called for commands with a
+    matching ``gcode``, include ``None`` to also receive commands that aren't GCODE (e.g. ``@``
+    commands).
+
+    Example::
+
+        @handles_gcodes("M104", "M109")
+        def rewrite_hotend_temperature(comm_instance, phase, cmd, cmd_type, gcode, *args, **kwargs):
+            ...
+
+    Arguments:
+        gcodes (one or more str): The GCODE commands to handle, e.g. ``G28`` or ``M104``.
+    """
+
+    def decorator(f):
+        f.handled_gcodes = frozenset(gcodes)
+        return f
+
+    return decorator
+
+
+def _handled_gcodes(hook):
+    """Returns the GCODE commands declared through :func:`handles_gcodes` on ``hook`` or ``None``."""
+    handled_gcodes = getattr(hook, "handled_gcodes", None)
+    if isinstance(handled_gcodes, (frozenset, set, list, tuple)):
+        return frozenset(handled_gcodes)
+    return None
+
+
 def gcode_command_for_cmd(cmd):
     """
     Tries to parse the provided ``cmd`` and extract the GCODE command identifier from it (e.g. "G0" for "G0 X10.0").
@@ -6370,30 +6921,118 @@ def gcode_command_for_cmd(cmd):
     return gcode
 
 
+_command_head_fast_path = {
+    "G0": ("G0", None),
+    "G1": ("G1", None),
+    "G2": ("G2", None),
+    "G3": ("G3", None),
+}
+"""Parse results for the most common commands, which don't need any further parsing."""
+
+_command_head_continuation = frozenset("0123456789.")
+"""Characters after ``G0`` to ``G3`` that make it another command or add a subcode."""
+
+_command_head_key = re.compile(r"[GMTF]\d*(\.\d+)?")
+"""The part of a command that determines its parse result, used as key of the cache."""
+
+_command_head_cache = pylru.lrucache(1024)
+_command_head_cache_mutex = threading.Lock()
+_command_head_interned = {}
+_command_head_stats = {"hits": 0, "misses": 0, "uncached": 0}
+
+# next() on a count is atomic, so the fast path doesn't need to take the lock to be counted
+_command_head_fast_count = itertools.count()
+
+
 def gcode_and_subcode_for_cmd(cmd):
+    """
+    Tries to parse the provided ``cmd`` and extract the GCODE command identifier and subcode from it
+    (e.g. "M80" and "1" for "M80.1").
+
+    Only the command's head (the GCODE and subcode) is relevant. Parse results for ``G0``, ``G1``,
+    ``G2`` and ``G3`` and for commands that can't be a GCODE are returned right away, the results for
+    all other heads are kept in a LRU cache, with the parsed GCODEs interned. Usage statistics of both
+    are available through :func:`command_parser_stats`.
+
+    Arguments:
+        cmd (str): The command to try to parse.
+
+    Returns:
+        tuple: The GCODE command identifier and the subcode, both of which might be None.
+    """
     if not cmd:
         return None, None
 
-    match = regex_command.search(cmd)
+    result = _command_head_fast_path.get(cmd[:2])
+    if result is not None and cmd[2:3] not in _command_head_continuation:
+        next(_command_head_fast_count)
+        return result
+
+    match = _command_head_key.match(cmd)
+    if match is None:
+        if not cmd[0].isspace():
+            # doesn't start with a GCODE, no need to parse anything
+            next(_command_head_fast_count)
+            return None, None
+
+        # leading whitespace, don't pollute the cache with this
+        with _command_head_cache_mutex:
+            _command_head_stats["uncached"] += 1
+        result, _ = _parse_command_head(cmd)
+        return result
+
+    head = match.group(0)
+    with _command_head_cache_mutex:
+        result = _command_head_cache.get(head)
+        if result is not None:
+            _command_head_stats["hits"] += 1
+            return result
+        _command_head_stats["misses"] += 1
+
+    result, cacheable = _parse_command_head(head)
+    if cacheable:
+        with _command_head_cache_mutex:
+            _command_head_cache[head] = result
+    return result
+
+
+def command_parser_stats():
+    """
+    Returns:
+        dict: number of ``fast`` path results, ``hits`` and ``misses`` of the command head cache
+            of :func:`gcode_and_subcode_for_cmd` and ``uncached`` commands with leading whitespace,
+            as well as the current cache ``size``
+    """
+    with _command_head_cache_mutex:
+        result = dict(_command_head_stats)
+        result["size"] = len(_command_head_cache)
+
+    # count objects don't expose their value other than through their representation
+    result["fast"] = int(repr(_command_head_fast_count)[len("count(") : -1])
+    return result
+
+
+def _parse_command_head(head):
+    match = regex_command.search(head)
     if not match:
-        return None, None
+        return (None, None), True
 
     values = match.groupdict()
     if "codeGM" in values and values["codeGM"]:
         gcode = values["codeGM"]
     elif "codeT" in values and values["codeT"]:
         gcode = values["codeT"]
-    elif (
-        settings().getBoolean(["serial", "supportFAsCommand"])
-        and "codeF" in values
-        and values["codeF"]
-    ):
-        gcode = values["codeF"]
+    elif "codeF" in values and values["codeF"]:
+        # depends on the current settings, so not cacheable
+        if settings().getBoolean(["serial", "supportFAsCommand"]):
+            return (values["codeF"], None), False
+        return (None, None), False
     else:
         # this should never happen
-        return None, None
+        return (None, None), True
 
-    return gcode, values.get("subcode", None)
+    gcode = _command_head_interned.setdefault(gcode, gcode)
+    return (gcode, values.get("subcode", None)), True
 
 
 def _normalize_command_handler_result(
@@ -6563,6 +7202,83 @@ def _normalize_command_handler_result(
     return result
 
 
+class CommunicationLog(object):
+    """
+    Fixed size ring buffer of the communication log.
+
+    Entries are recorded as ``(timestamp, direction, data)`` tuples, with sent lines
+    as the raw bytes that went over the line. They only get formatted into log lines
+    once somebody actually reads them.
+    """
+
+    INFO = "info"
+    SEND = "send"
+    RECV = "recv"
+
+    def __init__(self, size):
+        self._entries = deque([], size)
+        self._unread = 0
+        self._lock = threading.Lock()
+
+    def record(self, direction, data):
+        """
+        Records a new entry.
+
+        Returns the entry and whether it's the first one since the last :func:`read`,
+        in which case readers should be notified.
+        """
+        entry = (time.time(), direction, data)
+        with self._lock:
+            self._entries.append(entry)
+            self._unread += 1
+            return entry, self._unread == 1
+
+    def read(self):
+        """
+        Returns the formatted lines of all entries recorded since the last read.
+
+        If more entries were recorded than the buffer holds, the oldest of them are lost
+        and a ``[... N lines skipped]`` line takes their place.
+        """
+        with self._lock:
+            count = min(self._unread, len(self._entries))
+            skipped = self._unread - count
+            entries = [self._entries[-i] for i in range(count, 0, -1)]
+            self._unread = 0
+
+        lines = [format_communication_log_entry(entry) for entry in entries]
+        if skipped:
+            lines.insert(0, "[... {} lines skipped]".format(skipped))
+        return lines
+
+    def tail(self, count):
+        """Returns the formatted lines of the last ``count`` entries."""
+        with self._lock:
+            entries = list(self._entries)[-count:] if count > 0 else []
+        return [format_communication_log_entry(entry) for entry in entries]
+
+
+def format_communication_log_entry(entry):
+    """
+    Formats a :class:`CommunicationLog` entry into a log line.
+
+    Examples:
+
+        >>> format_communication_log_entry((0, CommunicationLog.SEND, b"N1 G28*18"))
+        'Send: N1 G28*18'
+        >>> format_communication_log_entry((0, CommunicationLog.RECV, "ok T:21.3\\n"))
+        'Recv: ok T:21.3'
+        >>> format_communication_log_entry((0, CommunicationLog.INFO, "Changing state"))
+        'Changing state'
+    """
+    _, direction, data = entry
+    if direction == CommunicationLog.SEND:
+        return "Send: " + data.decode("ascii", errors="replace")
+    elif direction == CommunicationLog.RECV:
+        return "Recv: " + sanitize_ascii(data)
+    return data
+
+
 class QueueMarker(object):
     def __init__(self, callback):
         self.callback = callback
@@ -6580,36 +7296,66 @@ class SendQueueMarker(QueueMarker):
 
 
 class BufferedReadlineWrapper(wrapt.ObjectProxy):
+    """
+    Wraps a serial object to read lines in bulk.
+
+    Everything waiting in the serial input buffer is drained with a single ``read``
+    call and only the newly received bytes are scanned for line terminators. All
+    complete lines found are kept, so a burst of lines from the printer costs one
+    read instead of one per line (or even one per byte).
+    """
+
     def __init__(self, obj):
         wrapt.ObjectProxy.__init__(self, obj)
         self._buffered = bytearray()
+        self._scanned = 0
+        self._lines = deque()
 
     def readline(self, terminator=serial.LF):
-        termlen = len(terminator)
-        timeout = serial.Timeout(self._timeout)
+        if not self._lines:
+            self._fill_lines(terminator)
 
-        while not timeout.expired():
-            self._buffered += self.read(self.in_waiting)
+        if self._lines:
+            return self._lines.popleft()
+        return b""
 
-            # check for terminator, if it's there we have found our line
-            termpos = self._buffered.find(terminator)
-            if termpos >= 0:
-                # line: everything up to and incl. the terminator, buffered: rest
-                line = self._buffered[: termpos + termlen]
-                del self._buffered[: termpos + termlen]
-                return bytes(line)
+    def _fill_lines(self, terminator):
+        timeout = serial.Timeout(self._timeout)
 
-            if timeout.expired():
+        while True:
+            # read everything that's waiting, or block for the next byte if nothing is
+            data = self.read(max(1, self.in_waiting))
+            if not data:
+                # timeout or EOF
                 break
 
-            c = self.read(1)
-            if not c:
-                # EOF
+            self._buffered += data
+            if self._split_lines(terminator) or timeout.expired():
                 break
 
-            self._buffered += c
+    def _split_lines(self, terminator):
+        termlen = len(terminator)
+        buffered = self._buffered
 
-        return b""
+        # everything before _scanned has already been searched, but a terminator might
+        # have been split across two reads
+        termpos = buffered.find(terminator, max(0, self._scanned - termlen + 1))
+        if termpos < 0:
+            self._scanned = len(buffered)
+            return False
+
+        view = memoryview(buffered)
+        start = 0
+        while termpos >= 0:
+            end = termpos + termlen
+            self._lines.append(view[start:end].tobytes())
+            start = end
+            termpos = buffered.find(terminator, start)
+        del view
+
+        del buffered[:start]
+        self._scanned = len(buffered)
+        return True
 
 
 # --- Test code for speed testing the comm layer via command line follows
@@ -15,6 +15,14 @@ import os
 import re
 import zlib
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ANALYSIS_VERSION = 1
+"""Version of the analysis results, to be increased with every change of the interpreter that affects them."""
+
 
 class Vector3D(object):
     """
@@ -204,6 +212,42 @@ class AnalysisAborted(Exception):
         Exception.__init__(self, *args, **kwargs)
 
 
+class _LoadState(object):
+    """
+    Modal state of a running analysis, handed over between the line by line and the
+    vectorized engine.
+    """
+
+    def __init__(self, speedx, speedy):
+        self.lineNo = 0
+        self.readBytes = 0
+        self.pos = Vector3D(0.0, 0.0, 0.0)
+        self.currentE = [0.0]
+        self.totalExtrusion = [0.0]
+        self.maxExtrusion = [0.0]
+        self.currentExtruder = 0
+        self.totalMoveTimeMinute = 0.0
+        self.relativeE = False
+        self.relativeMode = False
+        self.duplicationMode = False
+        self.scale = 1.0
+        self.fwretractTime = 0
+        self.fwretractDist = 0
+        self.fwrecoverTime = 0
+        self.feedrate = min(speedx, speedy)
+        if self.feedrate == 0:
+            # some somewhat sane default if axes speeds are insane...
+            self.feedrate = 2000
+
+
+def _extruder_offsets(offsets, max_extruders):
+    if offsets is None or not isinstance(offsets, (list, tuple)):
+        offsets = []
+    if len(offsets) < max_extruders:
+        offsets += [(0, 0)] * (max_extruders - len(offsets))
+    return offsets
+
+
 regex_command = re.compile(
     r"^\s*((?P<codeGM>[GM]\d+)(\.(?P<subcode>\d+))?|(?P<codeT>T)(?P<tool>\d+))"
 )
@@ -211,7 +255,19 @@ regex_command = re.compile(
 
 
 class gcode(object):
-    def __init__(self, incl_layers=False, progress_callback=None):
+    VECTORIZED_BLOCK_SIZE = 1024 * 1024
+    """Number of bytes the vectorized engine processes at once."""
+
+    VECTORIZED_MIN_RUN = 16
+    """Runs of fewer moves than this are cheaper to process line by line."""
+
+    ESTIMATE_SAMPLES = 16
+    """Number of evenly spaced byte ranges :meth:`estimate` interprets."""
+
+    ESTIMATE_SAMPLE_SIZE = 32 * 1024
+    """Size in bytes of every range :meth:`estimate` interprets."""
+
+    def __init__(self, incl_layers=False, progress_callback=None, vectorize=True):
         self._logger = logging.getLogger(__name__)
         self.extrusionAmount = [0]
         self.extrusionVolume = [0]
@@ -222,6 +278,7 @@ class gcode(object):
         self._filamentDiameter = 0
         self._minMax = MinMax3D()
         self._progress_callback = progress_callback
+        self._vectorize = vectorize
 
         self._incl_layers = incl_layers
         self._layers = []
@@ -299,6 +356,19 @@ class gcode(object):
             self.filename = filename
             self._fileSize = os.stat(filename).st_size
 
+            if self.vectorized:
+                with io.open(filename, "rb") as f:
+                    self._load_vectorized(
+                        f,
+                        throttle=throttle,
+                        speedx=speedx,
+                        speedy=speedy,
+                        offsets=offsets,
+                        max_extruders=max_extruders,
+                        g90_extruder=g90_extruder,
+                    )
+                return
+
             with codecs.open(filename, encoding="utf-8", errors="replace") as f:
                 self._load(
                     f,
@@ -310,6 +380,126 @@ class gcode(object):
                     g90_extruder=g90_extruder,
                 )
 
+    def estimate(
+        self,
+        filename,
+        speedx=6000,
+        speedy=6000,
+        offsets=None,
+        max_extruders=10,
+        g90_extruder=False,
+        bed_z=0.0,
+    ):
+        """
+        Quickly estimates the result of :meth:`load` without reading the whole file.
+
+        Only :attr:`ESTIMATE_SAMPLES` evenly spaced ranges of :attr:`ESTIMATE_SAMPLE_SIZE`
+        bytes are interpreted, always including the start and the end of the file. Print
+        time and filament usage are extrapolated from them by file size, the printing area
+        only covers the sampled moves. Where the slicer left its own estimates in comments
+        (Cura, PrusaSlicer/Slic3r, Simplify3D) those are used instead.
+
+        The estimate is available through :meth:`get_result` afterwards.
+        """
+        self._minMax.min.z = bed_z
+        if not os.path.isfile(filename):
+            return
+
+        self.filename = filename
+        self._fileSize = size = os.stat(filename).st_size
+
+        state = _LoadState(speedx, speedy)
+        offsets = _extruder_offsets(offsets, max_extruders)
+
+        samples = self.ESTIMATE_SAMPLES
+        sample_size = self.ESTIMATE_SAMPLE_SIZE
+        if size <= samples * sample_size:
+            samples, sample_size = 1, size
+
+        slicer = {}
+        with io.open(filename, "rb") as f:
+            for index in range(samples):
+                offset = (size - sample_size) * index // max(samples - 1, 1)
+                f.seek(offset)
+                data = f.read(sample_size)
+
+                # only complete lines
+                start = data.find(b"\n") + 1 if offset > 0 else 0
+                end = len(data) if offset + len(data) >= size else data.rfind(b"\n") + 1
+                lines = data[start:end].decode("utf-8", "replace").splitlines(True)
+
+                _slicer_estimates(lines, slicer)
+                if index > 0:
+                    lines = self._resync(lines, state)
+
+                self._load_lines(
+                    lines,
+                    state,
+                    offsets=offsets,
+                    max_extruders=max_extruders,
+                    g90_extruder=g90_extruder,
+                    progress=False,
+                )
+
+        factor = size / state.readBytes if state.readBytes else 0
+        state.totalMoveTimeMinute *= factor
+        state.maxExtrusion = [value * factor for value in state.maxExtrusion]
+
+        if "time" in slicer:
+            state.totalMoveTimeMinute = slicer["time"] / 60
+        if "filament" in slicer:
+            state.maxExtrusion = slicer["filament"]
+        if "area" in slicer:
+            area = slicer["area"]
+            self._minMax.record(Vector3D(area["minX"], area["minY"], area["minZ"]))
+            self._minMax.record(Vector3D(area["maxX"], area["maxY"], area["maxZ"]))
+
+        self._finish_load(state)
+
+    def _resync(self, lines, state):
+        """
+        Skips the lines at the start of a sample up to the first move that fully determines
+        the position (and in absolute extrusion mode the extruder position), and sets
+        ``state`` to it. That way the jump from the end of the previous sample is neither
+        counted as move nor as extrusion.
+        """
+        if state.relativeMode:
+            return lines
+
+        absoluteE = not state.relativeE
+        x = y = z = e = None
+        for index, line in enumerate(lines):
+            line = line.split(";", 1)[0]
+            match = regex_command.search(line)
+            if not match or match.group("codeGM") not in ("G0", "G1", "G2", "G3", "G92"):
+                continue
+
+            x = _first_not_none(getCodeFloat(line, "X"), x)
+            y = _first_not_none(getCodeFloat(line, "Y"), y)
+            z = _first_not_none(getCodeFloat(line, "Z"), z)
+            e = _first_not_none(getCodeFloat(line, "E"), e)
+
+            if x is None or y is None or (absoluteE and e is None):
+                continue
+
+            scale = state.scale
+            state.pos = Vector3D(
+                x * scale, y * scale, z * scale if z is not None else state.pos.z
+            )
+            if absoluteE and state.currentExtruder < len(state.currentE):
+                state.currentE[state.currentExtruder] = e
+            return lines[index + 1 :]
+
+        return []
+
+    @property
+    def vectorized(self):
+        """
+        Whether files are analysed with the vectorized engine. That needs NumPy and isn't
+        used when layers are tracked.
+        """
+        return self._vectorize and numpy is not None and not self._incl_layers
+
     def abort(self, reenqueue=True):
         self._abort = True
         self._reenqueue = reenqueue
@@ -324,30 +514,48 @@ class gcode(object):
         max_extruders=10,
         g90_extruder=False,
     ):
-        lineNo = 0
-        readBytes = 0
-        pos = Vector3D(0.0, 0.0, 0.0)
-        currentE = [0.0]
-        totalExtrusion = [0.0]
-        maxExtrusion = [0.0]
-        currentExtruder = 0
-        totalMoveTimeMinute = 0.0
-        relativeE = False
-        relativeMode = False
-        duplicationMode = False
-        scale = 1.0
-        fwretractTime = 0
-        fwretractDist = 0
-        fwrecoverTime = 0
-        feedrate = min(speedx, speedy)
-        if feedrate == 0:
-            # some somewhat sane default if axes speeds are insane...
-            feedrate = 2000
+        state = _LoadState(speedx, speedy)
+        offsets = _extruder_offsets(offsets, max_extruders)
+
+        self._load_lines(
+            gcodeFile,
+            state,
+            throttle=throttle,
+            offsets=offsets,
+            max_extruders=max_extruders,
+            g90_extruder=g90_extruder,
+        )
+        if self._progress_callback is not None:
+            self._progress_callback(100.0)
+
+        self._finish_load(state)
 
-        if offsets is None or not isinstance(offsets, (list, tuple)):
-            offsets = []
-        if len(offsets) < max_extruders:
-            offsets += [(0, 0)] * (max_extruders - len(offsets))
+    def _load_lines(
+        self,
+        gcodeFile,
+        state,
+        throttle=None,
+        offsets=None,
+        max_extruders=10,
+        g90_extruder=False,
+        progress=True,
+    ):
+        lineNo = state.lineNo
+        readBytes = state.readBytes
+        pos = state.pos
+        currentE = state.currentE
+        totalExtrusion = state.totalExtrusion
+        maxExtrusion = state.maxExtrusion
+        currentExtruder = state.currentExtruder
+        totalMoveTimeMinute = state.totalMoveTimeMinute
+        relativeE = state.relativeE
+        relativeMode = state.relativeMode
+        duplicationMode = state.duplicationMode
+        scale = state.scale
+        fwretractTime = state.fwretractTime
+        fwretractDist = state.fwretractDist
+        fwrecoverTime = state.fwrecoverTime
+        feedrate = state.feedrate
 
         for line in gcodeFile:
             if self._abort:
@@ -355,7 +563,9 @@ class gcode(object):
             lineNo += 1
             readBytes += len(line.encode("utf-8"))
 
-            if isinstance(gcodeFile, (io.IOBase, codecs.StreamReaderWriter)):
+            if not progress:
+                percentage = None
+            elif isinstance(gcodeFile, (io.IOBase, codecs.StreamReaderWriter)):
                 percentage = readBytes / self._fileSize
             elif isinstance(gcodeFile, (list)):
                 percentage = lineNo / len(gcodeFile)
@@ -375,43 +585,7 @@ class gcode(object):
                 )
 
             if ";" in line:
-                comment = line[line.find(";") + 1 :].strip()
-                if comment.startswith("filament_diameter"):
-                    # Slic3r
-                    filamentValue = comment.split("=", 1)[1].strip()
-                    try:
-                        self._filamentDiameter = float(filamentValue)
-                    except ValueError:
-                        try:
-                            self._filamentDiameter = float(
-                                filamentValue.split(",")[0].strip()
-                            )
-                        except ValueError:
-                            self._filamentDiameter = 0.0
-                elif comment.startswith("CURA_PROFILE_STRING") or comment.startswith(
-                    "CURA_OCTO_PROFILE_STRING"
-                ):
-                    # Cura 15.04.* & OctoPrint Cura plugin
-                    if comment.startswith("CURA_PROFILE_STRING"):
-                        prefix = "CURA_PROFILE_STRING:"
-                    else:
-                        prefix = "CURA_OCTO_PROFILE_STRING:"
-
-                    curaOptions = self._parseCuraProfileString(comment, prefix)
-                    if "filament_diameter" in curaOptions:
-                        try:
-                            self._filamentDiameter = float(
-                                curaOptions["filament_diameter"]
-                            )
-                        except ValueError:
-                            self._filamentDiameter = 0.0
-                elif comment.startswith("filamentDiameter,"):
-                    # Simplify3D
-                    filamentValue = comment.split(",", 1)[1].strip()
-                    try:
-                        self._filamentDiameter = float(filamentValue)
-                    except ValueError:
-                        self._filamentDiameter = 0.0
+                self._process_comment(line[line.find(";") + 1 :].strip())
                 line = line[0 : line.find(";")]
 
             match = regex_command.search(line)
@@ -743,9 +917,268 @@ class gcode(object):
 
             if throttle is not None:
                 throttle(lineNo, readBytes)
+
+        state.lineNo = lineNo
+        state.readBytes = readBytes
+        state.pos = pos
+        state.currentExtruder = currentExtruder
+        state.totalMoveTimeMinute = totalMoveTimeMinute
+        state.relativeE = relativeE
+        state.relativeMode = relativeMode
+        state.duplicationMode = duplicationMode
+        state.scale = scale
+        state.fwretractTime = fwretractTime
+        state.fwretractDist = fwretractDist
+        state.fwrecoverTime = fwrecoverTime
+        state.feedrate = feedrate
+
+    def _load_vectorized(
+        self,
+        gcodeFile,
+        throttle=None,
+        speedx=6000,
+        speedy=6000,
+        offsets=None,
+        max_extruders=10,
+        g90_extruder=False,
+    ):
+        """
+        Same as :meth:`_load`, but for a binary file: tokenizes blocks of lines into NumPy
+        arrays and processes runs of ``G0``/``G1`` moves in one go, everything else (arcs,
+        mode changes, tool changes, unusual formatting) line by line.
+        """
+        state = _LoadState(speedx, speedy)
+        offsets = _extruder_offsets(offsets, max_extruders)
+
+        remainder = b""
+        while True:
+            if self._abort:
+                raise AnalysisAborted(reenqueue=self._reenqueue)
+
+            data = gcodeFile.read(self.VECTORIZED_BLOCK_SIZE)
+            if data:
+                data = remainder + data
+                end = data.rfind(b"\n") + 1
+                if not end:
+                    remainder = data
+                    continue
+                block, remainder = data[:end], data[end:]
+            elif remainder:
+                block, remainder = remainder + b"\n", b""
+            else:
+                break
+
+            self._load_block(
+                block,
+                state,
+                throttle=throttle,
+                offsets=offsets,
+                max_extruders=max_extruders,
+                g90_extruder=g90_extruder,
+            )
+
+            if self._progress_callback is not None:
+                try:
+                    self._progress_callback(min(state.readBytes / self._fileSize, 1.0))
+                except Exception as exc:
+                    self._logger.debug(
+                        "Progress callback %r error: %s", self._progress_callback, exc
+                    )
+
         if self._progress_callback is not None:
             self._progress_callback(100.0)
 
+        self._finish_load(state)
+
+    def _load_block(
+        self,
+        block,
+        state,
+        throttle=None,
+        offsets=None,
+        max_extruders=10,
+        g90_extruder=False,
+    ):
+        data = numpy.frombuffer(block, dtype=numpy.uint8)
+        ends = numpy.flatnonzero(data == 0x0A)
+        starts = numpy.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+
+        # content of a line is everything up to the first ; or the line break
+        content_ends = ends.copy()
+        semicolons = numpy.flatnonzero(data == 0x3B)
+        if len(semicolons):
+            lines, first = numpy.unique(
+                numpy.searchsorted(ends, semicolons), return_index=True
+            )
+            content_ends[lines] = semicolons[first]
+        crlf = (content_ends == ends) & (content_ends > starts)
+        crlf[crlf] = data[content_ends[crlf] - 1] == 0x0D
+        content_ends[crlf] -= 1
+
+        # line breaks other than \n or \r\n and non-ASCII content are left to the
+        # line by line processing, as is anything that isn't a plain G0/G1
+        unusual = (
+            ((data < 0x20) & (data != 0x09) & (data != 0x0A) & (data != 0x0D))
+            | (data >= 0x80)
+            | ((data == 0x0D) & (numpy.append(data[1:], 0x0A) != 0x0A))
+        )
+        scalar = numpy.zeros(len(ends), dtype=bool)
+        scalar[numpy.searchsorted(ends, numpy.flatnonzero(unusual))] = True
+
+        padded = numpy.append(data, numpy.zeros(2, dtype=numpy.uint8))
+        lengths = content_ends - starts
+        c1 = padded[starts + 1]
+        c2 = padded[starts + 2]
+        moves = (
+            (lengths >= 2)
+            & (padded[starts] == 0x47)  # G
+            & ((c1 == 0x30) | (c1 == 0x31))  # 0 or 1
+            & ~((lengths >= 3) & (c2 >= 0x30) & (c2 <= 0x39))  # but not G10 etc
+            & ~scalar
+        )
+        scalar |= ~moves & (lengths > 0)
+
+        parameters = {}
+        spaces = numpy.flatnonzero(data == 0x20)
+        for axis in "XYZEF":
+            parameters[axis] = _vectorized_code_float(
+                block, data, axis, ends, content_ends, moves, spaces
+            )
+
+        comments = numpy.zeros(len(ends), dtype=bool)
+        for match in _regex_comment_marker.finditer(block):
+            comments[numpy.searchsorted(ends, match.start())] = True
+
+        # split into alternating runs of lines for the vectorized and the line by line
+        # processing
+        boundaries = numpy.flatnonzero(scalar[1:] != scalar[:-1]) + 1
+        run_starts = [0] + boundaries.tolist()
+        run_ends = boundaries.tolist() + [len(ends)]
+        for start, end in zip(run_starts, run_ends):
+            if self._abort:
+                raise AnalysisAborted(reenqueue=self._reenqueue)
+
+            run_moves = numpy.flatnonzero(moves[start:end]) + start
+            if (
+                not scalar[start]
+                and len(run_moves) >= self.VECTORIZED_MIN_RUN
+                and not (
+                    state.duplicationMode
+                    and state.currentExtruder == 0
+                    and len(state.currentE) > 1
+                )
+            ):
+                for line in numpy.flatnonzero(comments[start:end]) + start:
+                    text = block[starts[line] : ends[line]].decode("utf-8", "replace")
+                    if ";" in text:
+                        self._process_comment(text[text.find(";") + 1 :].strip())
+
+                self._process_moves(
+                    state, *[parameters[axis][run_moves] for axis in "XYZEF"]
+                )
+
+                first_line = state.lineNo + 1
+                state.lineNo += end - start
+                state.readBytes += int(ends[end - 1] + 1 - starts[start])
+                if throttle is not None:
+                    for lineNo in range(first_line, state.lineNo + 1):
+                        if self._abort:
+                            raise AnalysisAborted(reenqueue=self._reenqueue)
+                        throttle(lineNo, state.readBytes)
+            else:
+                text = block[starts[start] : ends[end - 1] + 1].decode("utf-8", "replace")
+                self._load_lines(
+                    text.splitlines(True),
+                    state,
+                    throttle=throttle,
+                    offsets=offsets,
+                    max_extruders=max_extruders,
+                    g90_extruder=g90_extruder,
+                    progress=False,
+                )
+
+    def _process_moves(self, state, x, y, z, e, f):
+        """
+        Applies a run of ``G0``/``G1`` moves with the given parameters (``NaN`` if not
+        provided) to ``state``, the vectorized equivalent of the ``G0``/``G1`` handling
+        in :meth:`_load_lines`.
+        """
+        hasX = ~numpy.isnan(x)
+        hasY = ~numpy.isnan(y)
+        hasZ = ~numpy.isnan(z)
+        hasE = ~numpy.isnan(e)
+        move = hasX | hasY | hasZ
+
+        pos = state.pos
+        if state.relativeMode:
+            posX = _cumsum(pos.x, numpy.where(hasX, x * state.scale, 0.0))
+            posY = _cumsum(pos.y, numpy.where(hasY, y * state.scale, 0.0))
+            posZ = _cumsum(pos.z, numpy.where(hasZ, z * state.scale, 0.0))
+        else:
+            posX = _forward_fill(x * state.scale, hasX, pos.x)
+            posY = _forward_fill(y * state.scale, hasY, pos.y)
+            posZ = _forward_fill(z * state.scale, hasZ, pos.z)
+        oldX = numpy.append(pos.x, posX[:-1])
+        oldY = numpy.append(pos.y, posY[:-1])
+        oldZ = numpy.append(pos.z, posZ[:-1])
+
+        feedrate = _forward_fill(f, ~numpy.isnan(f) & (f != 0), state.feedrate)
+
+        currentExtruder = state.currentExtruder
+        currentE = state.currentE[currentExtruder]
+        if state.relativeMode or state.relativeE:
+            e = numpy.where(hasE, e, 0.0)
+            currentE = _cumsum(currentE, e)[-1]
+        else:
+            absoluteE = _forward_fill(e, hasE, currentE)
+            e = numpy.where(hasE, e - numpy.append(currentE, absoluteE[:-1]), 0.0)
+            currentE = absoluteE[-1]
+
+        totalExtrusion = _cumsum(state.totalExtrusion[currentExtruder], e)
+        state.currentE[currentExtruder] = float(currentE)
+        state.totalExtrusion[currentExtruder] = float(totalExtrusion[-1])
+        state.maxExtrusion[currentExtruder] = max(
+            state.maxExtrusion[currentExtruder], float(totalExtrusion.max())
+        )
+
+        # extrusion and move -> old & new position relevant for print area & dimensions
+        extruding = move & (e > 0)
+        if extruding.any():
+            minMax = self._minMax
+            for axis, old, new in (
+                ("x", oldX, posX),
+                ("y", oldY, posY),
+                ("z", oldZ, posZ),
+            ):
+                old = old[extruding]
+                new = new[extruding]
+                setattr(
+                    minMax.min,
+                    axis,
+                    min(getattr(minMax.min, axis), float(old.min()), float(new.min())),
+                )
+                setattr(
+                    minMax.max,
+                    axis,
+                    max(getattr(minMax.max, axis), float(old.max()), float(new.max())),
+                )
+
+        # time to add is maximum of move time in x, y, z and time needed for extruding
+        moveTimeXYZ = numpy.abs(
+            numpy.sqrt((oldX - posX) ** 2 + (oldY - posY) ** 2 + (oldZ - posZ) ** 2)
+            / feedrate
+        )
+        extrudeTime = numpy.abs(e / feedrate)
+        state.totalMoveTimeMinute += float(numpy.maximum(moveTimeXYZ, extrudeTime).sum())
+
+        state.pos = Vector3D(float(posX[-1]), float(posY[-1]), float(posZ[-1]))
+        state.feedrate = float(feedrate[-1])
+
+    def _finish_load(self, state):
+        maxExtrusion = state.maxExtrusion
+
         self.extrusionAmount = maxExtrusion
         self.extrusionVolume = [0] * len(maxExtrusion)
         for i in range(len(maxExtrusion)):
@@ -753,7 +1186,41 @@ class gcode(object):
             self.extrusionVolume[i] = (
                 self.extrusionAmount[i] * (math.pi * radius * radius)
             ) / 1000
-        self.totalMoveTimeMinute = totalMoveTimeMinute
+        self.totalMoveTimeMinute = state.totalMoveTimeMinute
+
+    def _process_comment(self, comment):
+        if comment.startswith("filament_diameter"):
+            # Slic3r
+            filamentValue = comment.split("=", 1)[1].strip()
+            try:
+                self._filamentDiameter = float(filamentValue)
+            except ValueError:
+                try:
+                    self._filamentDiameter = float(filamentValue.split(",")[0].strip())
+                except ValueError:
+                    self._filamentDiameter = 0.0
+        elif comment.startswith("CURA_PROFILE_STRING") or comment.startswith(
+            "CURA_OCTO_PROFILE_STRING"
+        ):
+            # Cura 15.04.* & OctoPrint Cura plugin
+            if comment.startswith("CURA_PROFILE_STRING"):
+                prefix = "CURA_PROFILE_STRING:"
+            else:
+                prefix = "CURA_OCTO_PROFILE_STRING:"
+
+            curaOptions = self._parseCuraProfileString(comment, prefix)
+            if "filament_diameter" in curaOptions:
+                try:
+                    self._filamentDiameter = float(curaOptions["filament_diameter"])
+                except ValueError:
+                    self._filamentDiameter = 0.0
+        elif comment.startswith("filamentDiameter,"):
+            # Simplify3D
+            filamentValue = comment.split(",", 1)[1].strip()
+            try:
+                self._filamentDiameter = float(filamentValue)
+            except ValueError:
+                self._filamentDiameter = 0.0
 
     def _parseCuraProfileString(self, comment, prefix):
         return {
@@ -802,6 +1269,167 @@ class gcode(object):
         return result
 
 
+_regex_comment_marker = re.compile(
+    br"filament_diameter|CURA_PROFILE_STRING|CURA_OCTO_PROFILE_STRING|filamentDiameter,"
+)
+"""Regex for comments :meth:`gcode._process_comment` is interested in."""
+
+_regex_slicer_time = (
+    # Cura
+    re.compile(r"^;TIME:(?P<seconds>\d+(\.\d+)?)\s*$"),
+    # PrusaSlicer, Slic3r PE, SuperSlicer
+    re.compile(
+        r"^;\s*estimated printing time( \(normal mode\))?\s*=\s*(?P<duration>.+)$"
+    ),
+    # Simplify3D
+    re.compile(r"^;\s*Build time:\s*(?P<duration>.+)$"),
+)
+"""Regexes for print time estimates slicers leave in comments."""
+
+_regex_slicer_filament = (
+    # Cura, in meters
+    (re.compile(r"^;Filament used:\s*(?P<values>.+)$"), 1000.0),
+    # PrusaSlicer, Slic3r PE, SuperSlicer, in millimeters
+    (re.compile(r"^;\s*filament used \[mm\]\s*=\s*(?P<values>.+)$"), 1.0),
+    # Simplify3D, in millimeters
+    (re.compile(r"^;\s*Filament length:\s*(?P<values>[\d.]+)\s*mm"), 1.0),
+)
+"""Regexes for filament usage estimates slicers leave in comments, with their unit in mm."""
+
+_regex_slicer_area = re.compile(
+    r"^;(?P<bound>MIN|MAX)(?P<axis>[XYZ]):\s*(?P<value>-?\d+(\.\d+)?)\s*$"
+)
+"""Regex for the bounding box Cura leaves in comments."""
+
+_regex_duration = re.compile(r"(?P<value>\d+(\.\d+)?)\s*(?P<unit>[dhms])", re.I)
+"""Regex for the parts of a duration like ``1d 2h 3m 4s`` or ``1 hour 2 minutes``."""
+
+_duration_units = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+def _first_not_none(*values):
+    for value in values:
+        if value is not None:
+            return value
+    return None
+
+
+def _slicer_estimates(lines, result):
+    """
+    Collects the print time (in seconds), filament usage (in mm, per tool) and bounding box
+    estimates slicers leave in comments in ``lines`` into ``result``.
+    """
+    area = {}
+    for line in lines:
+        if not line.startswith(";"):
+            continue
+        line = line.strip()
+
+        for regex in _regex_slicer_time:
+            match = regex.match(line)
+            if not match:
+                continue
+            groups = match.groupdict()
+            if groups.get("seconds") is not None:
+                result["time"] = float(groups["seconds"])
+            else:
+                parts = _regex_duration.findall(groups["duration"])
+                if parts:
+                    result["time"] = sum(
+                        float(value) * _duration_units[unit.lower()]
+                        for value, _, unit in parts
+                    )
+
+        for regex, unit in _regex_slicer_filament:
+            match = regex.match(line)
+            if not match:
+                continue
+            try:
+                result["filament"] = [
+                    float(value.strip().rstrip("m")) * unit
+                    for value in match.group("values").split(",")
+                ]
+            except ValueError:
+                pass
+
+        match = _regex_slicer_area.match(line)
+        if match:
+            key = match.group("bound").lower() + match.group("axis")
+            area[key] = float(match.group("value"))
+
+    if len(area) == 6:
+        result["area"] = area
+
+
+def _forward_fill(values, valid, initial):
+    """
+    Replaces all entries of ``values`` that aren't ``valid`` with the last valid one
+    before them, or ``initial`` if there is none.
+    """
+    index = numpy.where(valid, numpy.arange(len(values)), -1)
+    numpy.maximum.accumulate(index, out=index)
+    result = values[index]
+    result[index < 0] = initial
+    return result
+
+
+def _cumsum(initial, values):
+    """
+    Running total of ``values`` starting at ``initial``, summed up in the same order
+    as the line by line processing does.
+    """
+    return numpy.cumsum(numpy.append(initial, values))[1:]
+
+
+def _vectorized_code_float(block, data, code, ends, content_ends, lines, spaces):
+    """
+    Vectorized :func:`getCodeFloat`: Returns an array with the value of parameter
+    ``code`` for each line, ``NaN`` for lines that aren't in ``lines`` or don't have a
+    valid value.
+    """
+    result = numpy.full(len(ends), numpy.nan)
+
+    positions = numpy.flatnonzero(data == ord(code))
+    if not len(positions):
+        return result
+
+    # first occurrence in the content of one of the requested lines
+    line_numbers = numpy.searchsorted(ends, positions)
+    valid = lines[line_numbers] & (positions < content_ends[line_numbers])
+    line_numbers, first = numpy.unique(line_numbers[valid], return_index=True)
+    if not len(line_numbers):
+        return result
+    value_starts = positions[valid][first] + 1
+
+    # value goes up to the next space or the end of the content
+    value_ends = content_ends[line_numbers]
+    if len(spaces):
+        next_spaces = numpy.searchsorted(spaces, value_starts)
+        candidates = spaces[numpy.minimum(next_spaces, len(spaces) - 1)]
+        space = (next_spaces < len(spaces)) & (candidates < value_ends)
+        value_ends[space] = candidates[space]
+
+    tokens = [
+        block[start:end] for start, end in zip(value_starts.tolist(), value_ends.tolist())
+    ]
+    try:
+        values = list(map(float, tokens))
+    except ValueError:
+        values = list(map(_to_float, tokens))
+
+    values = numpy.array(values, dtype=float)
+    values[~numpy.isfinite(values)] = numpy.nan
+    result[line_numbers] = values
+    return result
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except ValueError:
+        return float("nan")
+
+
 def getCodeInt(line, code):
     return getCode(line, code, int)
 
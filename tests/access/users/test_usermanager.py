@@ -8,9 +8,13 @@ Unit tests for octoprint.access.users.UserManager
 __license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
 __copyright__ = "Copyright (C) 2017 The OctoPrint Project - Released under terms of the AGPLv3 License"
 
+import os
+import shutil
+import tempfile
 import unittest
 
 import ddt
+import mock
 
 import octoprint.access.users
 
@@ -25,3 +29,43 @@ class UserManagerTest(unittest.TestCase):
 
         # should not throw an exception
         octoprint.access.users.UserManager.create_password_hash(password, salt=salt)
+
+
+class FilebasedUserManagerApiKeyTest(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+
+        settings = mock.MagicMock()
+        settings.get.return_value = "salt"
+
+        self.manager = octoprint.access.users.FilebasedUserManager(
+            mock.MagicMock(), path=os.path.join(folder, "users.yaml"), settings=settings
+        )
+        self.manager.add_user("first", "password", active=True, apikey="FIRSTKEY")
+        self.manager.add_user("second", "password", active=True)
+
+    def test_find_by_apikey(self):
+        self.assertEqual("first", self.manager.find_user(apikey="FIRSTKEY").get_id())
+        self.assertIsNone(self.manager.find_user(apikey="FIRSTKEX"))
+        self.assertIsNone(self.manager.find_user(apikey="ümläut"))
+
+    def test_index_maintained(self):
+        key = self.manager.generate_api_key("second")
+        self.assertEqual("second", self.manager.find_user(apikey=key).get_id())
+
+        self.manager.delete_api_key("second")
+        self.assertIsNone(self.manager.find_user(apikey=key))
+
+        self.manager.remove_user("first")
+        self.assertIsNone(self.manager.find_user(apikey="FIRSTKEY"))
+
+    def test_changes_clear_validated_apikeys(self):
+        with mock.patch(
+            "octoprint.access.users.clear_validated_apikeys"
+        ) as clear_validated_apikeys:
+            self.manager.change_user_activation("second", False)
+            self.assertEqual(1, clear_validated_apikeys.call_count)
+
+            self.manager.remove_user("second")
+            self.assertEqual(2, clear_validated_apikeys.call_count)
@@ -11,6 +11,8 @@ __copyright__ = "Copyright (C) 2017 The OctoPrint Project - Released under terms
 import unittest
 
 import octoprint.access.users
+from octoprint.access.groups import Group
+from octoprint.access.permissions import Permissions
 
 
 class SessionUserTestCase(unittest.TestCase):
@@ -67,3 +69,42 @@ class SessionUserTestCase(unittest.TestCase):
 
         # but wrapped user should NOT be detected as SessionUser instance of course
         self.assertFalse(isinstance(self.user, octoprint.access.users.SessionUser))
+
+
+class NeedsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.subgroup = Group("sub", "Sub", permissions=[Permissions.STATUS])
+        self.group = Group("group", "Group", subgroups=[self.subgroup])
+        self.user = octoprint.access.users.User(
+            "username", "passwordHash", True, groups=[self.group]
+        )
+
+    def test_cached(self):
+        needs = self.user.needs
+        self.assertIsInstance(needs, frozenset)
+        self.assertIs(needs, self.user.needs)
+        self.assertIs(self.group.needs, self.group.needs)
+        self.assertTrue(self.user.has_permission(Permissions.STATUS))
+
+    def test_invalidated_by_subgroup_change(self):
+        self.assertFalse(self.user.has_permission(Permissions.CONNECTION))
+
+        self.subgroup.add_permissions_to_group([Permissions.CONNECTION])
+        self.assertTrue(self.user.has_permission(Permissions.CONNECTION))
+
+        self.group.remove_subgroups_from_group([self.subgroup])
+        self.assertFalse(self.user.has_permission(Permissions.STATUS))
+
+    def test_invalidated_by_user_change(self):
+        self.user.add_permissions_to_user([Permissions.CONNECTION])
+        self.assertTrue(self.user.has_permission(Permissions.CONNECTION))
+
+        self.user.remove_groups_from_user([self.group])
+        self.assertFalse(self.user.has_permission(Permissions.STATUS))
+        self.assertTrue(self.user.has_permission(Permissions.CONNECTION))
+
+    def test_invalidate(self):
+        needs = self.user.needs
+        Permissions.invalidate()
+        self.assertIsNot(needs, self.user.needs)
+        self.assertEqual(needs, self.user.needs)
@@ -0,0 +1,577 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import collections
+import io
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import mock
+
+from octoprint.events import Events
+from octoprint.filemanager.analysis import (
+    AbstractAnalysisQueue,
+    AnalysisAborted,
+    AnalysisCache,
+    AnalysisQueue,
+    GcodeAnalysisQueue,
+    GcodeAnalysisWorkerPool,
+    QueueEntry,
+    _analysis_result,
+)
+
+
+def _job(path, throttle=None):
+    return {
+        "path": path,
+        "throttle": throttle,
+        "throttle_lines": 10,
+        "speedx": 6000,
+        "speedy": 6000,
+        "offsets": [(0, 0)] * 10,
+        "max_extruders": 10,
+        "g90_extruder": False,
+        "bed_z": 0.0,
+    }
+
+
+class TestGcodeAnalysisWorkerPool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.mkdtemp()
+
+        cls.cube = os.path.join(cls.folder, "cube.gcode")
+        with io.open(cls.cube, "wt", encoding="utf-8") as f:
+            f.write(
+                "G21\nG90\nM82\nG92 E0\n"
+                "G1 Z0.2 F300\n"
+                "G1 X10 Y10 F6000\n"
+                "G1 X20 Y10 E1.0 F1200\n"
+                "G1 X20 Y20 E2.0\n"
+                "G1 X10 Y20 E3.0\n"
+                "G1 X10 Y10 E4.0\n"
+            )
+
+        cls.empty = os.path.join(cls.folder, "empty.gcode")
+        with io.open(cls.empty, "wt", encoding="utf-8") as f:
+            f.write("G21\nG90\nG1 X10 Y10 F6000\n")
+
+        cls.large = os.path.join(cls.folder, "large.gcode")
+        with io.open(cls.large, "wt", encoding="utf-8") as f:
+            for i in range(100000):
+                f.write("G1 X{} Y{} E{}\n".format(i % 100, i % 50, i))
+
+        cls.pool = GcodeAnalysisWorkerPool(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+        shutil.rmtree(cls.folder)
+
+    def _analyze(self, job, progress_callback=None):
+        worker = self.pool.acquire()
+        try:
+            return worker.pid, worker.analyze(job, progress_callback=progress_callback)
+        finally:
+            self.pool.release(worker)
+
+    def test_result(self):
+        progress = []
+        _, (kind, result) = self._analyze(
+            _job(self.cube), progress_callback=progress.append
+        )
+
+        self.assertEqual("result", kind)
+        self.assertEqual(
+            {"width": 10.0, "depth": 10.0, "height": 0.2}, result["dimensions"]
+        )
+        self.assertEqual(20.0, result["printingArea"]["maxX"])
+        self.assertEqual(4.0, result["filament"]["tool0"]["length"])
+        self.assertTrue(result["estimatedPrintTime"] > 0)
+        self.assertEqual(100.0, progress[-1])
+
+    def test_empty(self):
+        _, (kind, result) = self._analyze(_job(self.empty))
+        self.assertEqual("empty", kind)
+        self.assertIsNone(result)
+
+    def test_error(self):
+        _, (kind, result) = self._analyze(_job(self.cube, throttle="invalid"))
+        self.assertEqual("error", kind)
+        self.assertIn("TypeError", result)
+
+    def test_worker_reused(self):
+        first, _ = self._analyze(_job(self.cube))
+        second, _ = self._analyze(_job(self.cube))
+        self.assertEqual(first, second)
+
+    def test_abort(self):
+        worker = self.pool.acquire()
+        try:
+            timer = threading.Timer(1.0, worker.abort)
+            timer.start()
+
+            kind, result = worker.analyze(_job(self.large, throttle=0.01))
+            timer.join()
+
+            self.assertEqual("aborted", kind)
+            self.assertTrue(worker.alive)
+
+            # still usable after the abort
+            kind, _ = worker.analyze(_job(self.cube))
+            self.assertEqual("result", kind)
+        finally:
+            self.pool.release(worker)
+
+    def test_dead_worker_replaced(self):
+        worker = self.pool.acquire()
+        pid = worker.pid
+        worker.terminate()
+        self.pool.release(worker)
+
+        replacement, (kind, _) = self._analyze(_job(self.cube))
+        self.assertNotEqual(pid, replacement)
+        self.assertEqual("result", kind)
+
+
+class TestAnalysisResult(unittest.TestCase):
+    def test_analysis_result(self):
+        analysis = {
+            "printing_area": {"minX": 0.0},
+            "dimensions": {"width": 1.0},
+            "total_time": 2.0,
+            "extrusion_length": [3.0, 4.0],
+            "extrusion_volume": [5.0, 6.0],
+        }
+        self.assertEqual(
+            {
+                "printingArea": {"minX": 0.0},
+                "dimensions": {"width": 1.0},
+                "estimatedPrintTime": 120.0,
+                "filament": {
+                    "tool0": {"length": 3.0, "volume": 5.0},
+                    "tool1": {"length": 4.0, "volume": 6.0},
+                },
+            },
+            _analysis_result(analysis),
+        )
+
+
+class TestAnalysisCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache_folder = os.path.join(self.folder, "analysis_cache")
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_key(self):
+        key = AnalysisCache.key("gcode", "abc", {"a": 1, "b": [1, 2]})
+        self.assertEqual(key, AnalysisCache.key("gcode", "abc", {"b": [1, 2], "a": 1}))
+        self.assertNotEqual(key, AnalysisCache.key("gcode", "abd", {"a": 1, "b": [1, 2]}))
+        self.assertNotEqual(key, AnalysisCache.key("gcode", "abc", {"a": 2, "b": [1, 2]}))
+
+        with mock.patch(
+            "octoprint.filemanager.analysis.get_octoprint_version_string",
+            return_value="0.0.0",
+        ):
+            self.assertNotEqual(
+                key, AnalysisCache.key("gcode", "abc", {"a": 1, "b": [1, 2]})
+            )
+
+    def test_get_put(self):
+        cache = AnalysisCache(self.cache_folder, 10)
+        self.assertIsNone(cache.get("key"))
+
+        cache.put("key", {"dimensions": {"width": 1.0}})
+        self.assertEqual({"dimensions": {"width": 1.0}}, cache.get("key"))
+        self.assertIn("key", cache)
+        self.assertEqual(1, len(cache))
+
+    def test_persistent(self):
+        cache = AnalysisCache(self.cache_folder, 10)
+        cache.put("key", {"dimensions": {"width": 1.0}})
+
+        cache = AnalysisCache(self.cache_folder, 10)
+        self.assertEqual({"dimensions": {"width": 1.0}}, cache.get("key"))
+
+    def test_lru_eviction(self):
+        cache = AnalysisCache(self.cache_folder, 2)
+        cache.put("a", {"a": 1})
+        cache.put("b", {"b": 1})
+        cache.get("a")
+        cache.put("c", {"c": 1})
+
+        self.assertEqual(
+            ["a", "c"],
+            sorted(os.path.splitext(x)[0] for x in os.listdir(self.cache_folder)),
+        )
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual({"a": 1}, cache.get("a"))
+
+    def test_lru_eviction_on_load(self):
+        cache = AnalysisCache(self.cache_folder, 3)
+        now = time.time()
+        for i, key in enumerate(("a", "b", "c")):
+            cache.put(key, {key: 1})
+            os.utime(os.path.join(self.cache_folder, key + ".json"), (now + i, now + i))
+
+        cache = AnalysisCache(self.cache_folder, 2)
+        self.assertEqual(2, len(cache))
+        self.assertNotIn("a", cache)
+
+    def test_unserializable(self):
+        cache = AnalysisCache(self.cache_folder, 2)
+        cache.put("key", {"value": float("nan")})
+        self.assertNotIn("key", cache)
+
+
+class TestAnalysisQueueCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = AnalysisCache(self.folder, 10)
+
+        self.queue = mock.MagicMock()
+        self.queue.cache_key_data.return_value = {"speed": 6000}
+
+        self.analysis_queue = AnalysisQueue(
+            {"gcode": lambda callback: self.queue}, cache=self.cache
+        )
+        self.callback = mock.MagicMock()
+        self.analysis_queue.register_finish_callback(self.callback)
+
+        patcher = mock.patch("octoprint.filemanager.analysis.eventManager")
+        self.event_manager = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _entry(self, hash="abc", analysis=None):
+        return QueueEntry(
+            "test.gcode",
+            "test.gcode",
+            "gcode",
+            "local",
+            "/test.gcode",
+            {},
+            analysis,
+            hash,
+        )
+
+    def test_miss_and_hit(self):
+        entry = self._entry()
+        self.assertTrue(self.analysis_queue.enqueue(entry, high_priority=True))
+        self.queue.enqueue.assert_called_once_with(entry, high_priority=True)
+        self.callback.assert_not_called()
+
+        result = {"dimensions": {"width": 1.0}}
+        self.analysis_queue._analysis_finished(entry, result)
+        self.callback.assert_called_once_with(entry, result)
+        self.callback.reset_mock()
+        self.queue.enqueue.reset_mock()
+
+        copied = entry._replace(path="folder/test.gcode")
+        self.assertTrue(self.analysis_queue.enqueue(copied))
+        self.queue.enqueue.assert_not_called()
+        self.callback.assert_called_once_with(copied, result)
+
+    def test_different_key_data(self):
+        entry = self._entry()
+        self.analysis_queue._analysis_finished(entry, {"dimensions": {"width": 1.0}})
+
+        self.queue.cache_key_data.return_value = {"speed": 3000}
+        self.analysis_queue.enqueue(entry)
+        self.queue.enqueue.assert_called_once_with(entry, high_priority=False)
+
+    def test_merged_with_prior_analysis(self):
+        self.analysis_queue._analysis_finished(
+            self._entry(), {"dimensions": {"width": 1.0}, "estimatedPrintTime": 10}
+        )
+
+        entry = self._entry(analysis={"estimatedPrintTime": 20})
+        self.analysis_queue.enqueue(entry)
+        self.callback.assert_called_with(
+            entry, {"dimensions": {"width": 1.0}, "estimatedPrintTime": 20}
+        )
+
+    def test_merged_results_not_cached(self):
+        entry = self._entry(analysis={"estimatedPrintTime": 20})
+        self.analysis_queue._analysis_finished(entry, {"estimatedPrintTime": 20})
+        self.assertEqual(0, len(self.cache))
+
+    def test_no_hash(self):
+        entry = self._entry(hash=None)
+        self.analysis_queue._analysis_finished(entry, {"dimensions": {"width": 1.0}})
+        self.assertEqual(0, len(self.cache))
+
+        self.analysis_queue.enqueue(entry)
+        self.queue.enqueue.assert_called_once_with(entry, high_priority=False)
+
+    def test_provisional(self):
+        self.queue.set_provisional_callback.assert_called_once_with(
+            self.analysis_queue._analysis_provisional
+        )
+
+        provisional_callback = mock.MagicMock()
+        self.analysis_queue.register_provisional_callback(provisional_callback)
+
+        entry = self._entry()
+        result = {"estimatedPrintTime": 20}
+        self.analysis_queue._analysis_provisional(entry, result)
+
+        provisional_callback.assert_called_once_with(entry, result)
+        self.callback.assert_not_called()
+        self.event_manager.return_value.fire.assert_called_once_with(
+            Events.METADATA_ANALYSIS_PROVISIONAL,
+            {
+                "name": "test.gcode",
+                "path": "test.gcode",
+                "origin": "local",
+                "result": result,
+            },
+        )
+        self.assertEqual(0, len(self.cache))
+
+
+class _BlockingAnalysisQueue(AbstractAnalysisQueue):
+    CONCURRENT = True
+
+    def __init__(self, finished_callback, concurrency=1):
+        self.started = queue.Queue()
+        self.release = collections.defaultdict(threading.Event)
+        AbstractAnalysisQueue.__init__(self, finished_callback, concurrency=concurrency)
+
+    def _do_analysis(self, high_priority=False):
+        entry = self._current
+        self.started.put(entry.path)
+        for progress in (10.0, 10.5, 50.0):
+            self._current_progress = progress
+
+        job = self._current_job
+        while not self.release[entry.path].wait(0.01):
+            if job.aborted:
+                raise AnalysisAborted(reenqueue=job.reenqueue)
+        return {"path": entry.path}
+
+    def _abort_job(self, job, reenqueue=True):
+        job.aborted = True
+        job.reenqueue = reenqueue
+
+
+class _SequentialAnalysisQueue(_BlockingAnalysisQueue):
+    CONCURRENT = False
+
+
+class TestConcurrentAnalysisQueue(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+        patcher = mock.patch("octoprint.filemanager.analysis.settings")
+        patcher.start().return_value.get.return_value = "idle"
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch("octoprint.filemanager.analysis.eventManager")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.finished = queue.Queue()
+        self.progress = []
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _queue(self, concurrency, cls=_BlockingAnalysisQueue):
+        analysis_queue = cls(
+            lambda entry, result: self.finished.put(entry.path),
+            concurrency=concurrency,
+        )
+        analysis_queue.set_progress_callback(
+            lambda entry, progress: self.progress.append((entry.path, progress))
+        )
+        return analysis_queue
+
+    def _entry(self, path):
+        absolute_path = os.path.join(self.folder, path.replace("/", "_"))
+        with io.open(absolute_path, "wb") as f:
+            f.write(b"G1 X10\n")
+        return QueueEntry(
+            os.path.basename(path), path, "gcode", "local", absolute_path, {}, None
+        )
+
+    def _started(self, analysis_queue, count):
+        return sorted(analysis_queue.started.get(timeout=10) for _ in range(count))
+
+    def test_concurrent(self):
+        analysis_queue = self._queue(2)
+        self.assertEqual(2, analysis_queue.concurrency)
+
+        for path in ("a.gcode", "b.gcode", "c.gcode"):
+            analysis_queue.enqueue(self._entry(path))
+        self.assertEqual(["a.gcode", "b.gcode"], self._started(analysis_queue, 2))
+        self.assertTrue(analysis_queue.started.empty())
+
+        analysis_queue.release["b.gcode"].set()
+        self.assertEqual("b.gcode", self.finished.get(timeout=10))
+        self.assertEqual(["c.gcode"], self._started(analysis_queue, 1))
+
+        analysis_queue.release["a.gcode"].set()
+        analysis_queue.release["c.gcode"].set()
+        self.assertEqual(
+            ["a.gcode", "c.gcode"],
+            sorted(self.finished.get(timeout=10) for _ in range(2)),
+        )
+
+    def test_not_concurrent(self):
+        analysis_queue = self._queue(4, cls=_SequentialAnalysisQueue)
+        self.assertEqual(1, analysis_queue.concurrency)
+
+    def test_progress(self):
+        analysis_queue = self._queue(1)
+        analysis_queue.enqueue(self._entry("a.gcode"))
+        analysis_queue.release["a.gcode"].set()
+        self.finished.get(timeout=10)
+
+        self.assertEqual(
+            [("a.gcode", 0), ("a.gcode", 10), ("a.gcode", 50)], self.progress
+        )
+
+    def test_high_priority_preempts_when_busy(self):
+        analysis_queue = self._queue(2)
+        analysis_queue.enqueue(self._entry("a.gcode"))
+        analysis_queue.enqueue(self._entry("b.gcode"), high_priority=True)
+        self.assertEqual(["a.gcode", "b.gcode"], self._started(analysis_queue, 2))
+
+        analysis_queue.enqueue(self._entry("c.gcode"), high_priority=True)
+        analysis_queue.release["c.gcode"].set()
+        self.assertEqual(["c.gcode"], self._started(analysis_queue, 1))
+        self.assertEqual("c.gcode", self.finished.get(timeout=10))
+
+        # the aborted low priority entry gets analyzed again
+        self.assertEqual(["a.gcode"], self._started(analysis_queue, 1))
+
+    def test_pause_aborts_all(self):
+        analysis_queue = self._queue(2)
+        analysis_queue.enqueue(self._entry("a.gcode"))
+        analysis_queue.enqueue(self._entry("b.gcode"))
+        self._started(analysis_queue, 2)
+
+        analysis_queue.pause()
+        time.sleep(0.2)
+        self.assertTrue(self.finished.empty())
+
+        analysis_queue.release["a.gcode"].set()
+        analysis_queue.release["b.gcode"].set()
+        analysis_queue.resume()
+        self.assertEqual(["a.gcode", "b.gcode"], self._started(analysis_queue, 2))
+        self.assertEqual(
+            ["a.gcode", "b.gcode"],
+            sorted(self.finished.get(timeout=10) for _ in range(2)),
+        )
+
+    def test_dequeue_folder(self):
+        analysis_queue = self._queue(2)
+        analysis_queue.enqueue(self._entry("folder/a.gcode"))
+        analysis_queue.enqueue(self._entry("b.gcode"))
+        self._started(analysis_queue, 2)
+
+        analysis_queue.dequeue_folder("local", "folder")
+        analysis_queue.release["b.gcode"].set()
+        self.assertEqual("b.gcode", self.finished.get(timeout=10))
+
+        time.sleep(0.2)
+        self.assertTrue(analysis_queue.started.empty())
+        self.assertTrue(self.finished.empty())
+
+
+class TestGcodeAnalysisQueue(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+        config = {
+            ("gcodeAnalysis", "concurrency"): 1,
+            ("gcodeAnalysis", "workers"): 1,
+            ("gcodeAnalysis", "throttle_lines"): 100,
+            ("gcodeAnalysis", "maxExtruders"): 10,
+            ("gcodeAnalysis", "fastEstimateMinSize"): 0,
+            ("gcodeAnalysis", "throttle_normalprio"): 0.0,
+            ("gcodeAnalysis", "throttle_highprio"): 0.0,
+            ("gcodeAnalysis", "bedZ"): 0.0,
+            ("gcodeAnalysis", "runAt"): "idle",
+            ("feature", "g90InfluencesExtruder"): False,
+        }
+
+        def get(path, *args, **kwargs):
+            return config.get(tuple(path))
+
+        patcher = mock.patch("octoprint.filemanager.analysis.settings")
+        settings = patcher.start().return_value
+        settings.get.side_effect = settings.getInt.side_effect = get
+        settings.getFloat.side_effect = settings.getBoolean.side_effect = get
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch("octoprint.filemanager.analysis.eventManager")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_progress(self):
+        path = os.path.join(self.folder, "large.gcode")
+        with io.open(path, "wt", encoding="utf-8") as f:
+            for i in range(300000):
+                f.write("G1 X{} Y{} E{}\n".format(i % 100, i % 50, i))
+
+        finished = queue.Queue()
+        progress = []
+        analysis_queue = GcodeAnalysisQueue(lambda entry, result: finished.put(result))
+        self.addCleanup(analysis_queue._worker_pool.shutdown)
+        analysis_queue.set_progress_callback(lambda entry, value: progress.append(value))
+
+        profile = {
+            "axes": {"x": {"speed": 6000}, "y": {"speed": 6000}},
+            "extruder": {"offsets": [(0, 0)]},
+        }
+        analysis_queue.enqueue(
+            QueueEntry(
+                "large.gcode", "large.gcode", "gcode", "local", path, profile, None
+            )
+        )
+        self.assertIsNotNone(finished.get(timeout=60))
+
+        # percentages in steps of about one block read, not fractions of the whole file
+        self.assertEqual(0, progress[0])
+        self.assertEqual(100, progress[-1])
+        self.assertTrue(len(progress) >= 5)
+        self.assertEqual(sorted(set(progress)), progress)
+        self.assertTrue(max(b - a for a, b in zip(progress, progress[1:])) <= 25)
+
+    def test_cache_key_data_engine(self):
+        analysis_queue = GcodeAnalysisQueue(lambda entry, result: None)
+        self.addCleanup(analysis_queue._worker_pool.shutdown)
+
+        profile = {
+            "axes": {"x": {"speed": 6000}, "y": {"speed": 6000}},
+            "extruder": {"offsets": [(0, 0)]},
+        }
+        entry = QueueEntry("a.gcode", "a.gcode", "gcode", "local", None, profile, None)
+
+        key_data = analysis_queue.cache_key_data(entry)
+        with mock.patch("octoprint.util.gcodeInterpreter.ANALYSIS_VERSION", 0):
+            self.assertNotEqual(key_data, analysis_queue.cache_key_data(entry))
+        with mock.patch(
+            "octoprint.util.gcodeInterpreter.gcode.vectorized",
+            not key_data["vectorized"],
+        ):
+            self.assertNotEqual(key_data, analysis_queue.cache_key_data(entry))
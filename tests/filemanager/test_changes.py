@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import io
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+from ddt import data, ddt
+
+from octoprint.filemanager.changes import ChangeTracker
+from octoprint.filemanager.storage import LocalFileStorage
+
+
+def _wait_for(condition, timeout=10.0):
+    start = time.time()
+    while not condition():
+        if time.time() - start > timeout:
+            return False
+        time.sleep(0.05)
+    return True
+
+
+def _touch(path):
+    with io.open(path, "wb") as f:
+        f.write(b"G1 X10\n")
+
+
+@ddt
+class ChangeTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.basefolder = os.path.realpath(tempfile.mkdtemp())
+        self.sub = os.path.join(self.basefolder, "sub")
+        self.other = os.path.join(self.basefolder, "other")
+        os.mkdir(self.sub)
+        os.mkdir(self.other)
+
+        self.callback = mock.MagicMock()
+
+    def tearDown(self):
+        shutil.rmtree(self.basefolder)
+
+    def _tracker(self, polling):
+        tracker = ChangeTracker(
+            self.basefolder, polling=polling, interval=0.1, callback=self.callback
+        )
+        tracker.start()
+        self.addCleanup(tracker.stop)
+        self.assertTrue(tracker.active)
+        return tracker
+
+    def test_changed(self):
+        tracker = ChangeTracker(self.basefolder)
+
+        tracker.changed(os.path.join(self.sub, "file.gcode"), is_directory=False)
+        self.assertEqual(1, tracker.generation())
+        self.assertEqual(1, tracker.generation(self.sub))
+        self.assertEqual(0, tracker.generation(self.other))
+
+        tracker.changed(self.other)
+        self.assertEqual(2, tracker.generation())
+        self.assertEqual(1, tracker.generation(self.sub))
+        self.assertEqual(2, tracker.generation(self.other))
+
+    @data(False, True)
+    def test_external_changes(self, polling):
+        tracker = self._tracker(polling)
+        self.assertEqual(polling, tracker.polling)
+
+        _touch(os.path.join(self.sub, "file.gcode"))
+
+        self.assertTrue(_wait_for(lambda: tracker.generation(self.sub) > 0))
+        self.assertTrue(tracker.generation() >= tracker.generation(self.sub))
+        self.assertEqual(0, tracker.generation(self.other))
+        self.callback.assert_called()
+
+        generation = tracker.generation()
+        os.mkdir(os.path.join(self.other, "new"))
+        self.assertTrue(_wait_for(lambda: tracker.generation() > generation))
+        self.assertTrue(tracker.generation(self.other) > generation)
+
+    def test_fallback_to_polling(self):
+        with mock.patch("watchdog.observers.Observer") as observer:
+            observer.return_value.start.side_effect = OSError("inotify watch limit")
+            tracker = self._tracker(False)
+        self.assertTrue(tracker.polling)
+
+    def test_stop(self):
+        tracker = self._tracker(True)
+        tracker.stop()
+        self.assertFalse(tracker.active)
+
+
+class LocalStorageChangeTrackingTest(unittest.TestCase):
+    def setUp(self):
+        self.basefolder = os.path.realpath(tempfile.mkdtemp())
+        self.storage = LocalFileStorage(self.basefolder)
+        self.storage.track_changes(polling=True)
+
+        patcher = mock.patch("octoprint.filemanager.valid_file_type")
+        patcher.start().return_value = True
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.storage.stop_tracking_changes()
+        shutil.rmtree(self.basefolder)
+
+    def test_last_modified_cached(self):
+        self.storage.add_folder("folder")
+        last_modified = self.storage.last_modified(recursive=True)
+
+        with mock.patch("octoprint.filemanager.storage.walk") as walk:
+            self.assertEqual(last_modified, self.storage.last_modified(recursive=True))
+            walk.assert_not_called()
+
+    def test_last_modified_after_storage_change(self):
+        self.storage.add_folder("folder")
+        last_modified = self.storage.last_modified(recursive=True)
+        folder_modified = self.storage.last_modified("folder", recursive=True)
+
+        # make sure the change is visible in the timestamps
+        time.sleep(0.01)
+        self.storage.add_folder("folder/sub")
+
+        self.assertTrue(self.storage.last_modified(recursive=True) > last_modified)
+        self.assertTrue(
+            self.storage.last_modified("folder", recursive=True) > folder_modified
+        )
+
+    def test_untracked(self):
+        self.storage.last_modified(recursive=True)
+        self.storage.stop_tracking_changes()
+
+        with mock.patch("octoprint.filemanager.storage.walk") as walk:
+            walk.return_value = iter([(self.basefolder, [], [])])
+            self.storage.last_modified(recursive=True)
+            walk.assert_called()
+
+    def test_index_picks_up_external_changes(self):
+        index_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, index_folder)
+
+        storage = LocalFileStorage(
+            self.basefolder, index_path=os.path.join(index_folder, "file_index.db")
+        )
+        self.addCleanup(storage._index.close)
+        storage.track_changes(polling=True)
+        self.addCleanup(storage.stop_tracking_changes)
+
+        with mock.patch("octoprint.filemanager.get_file_type") as get_file_type:
+            get_file_type.return_value = ["machinecode", "gcode"]
+
+            self.assertEqual({}, storage.list_files())
+            _touch(os.path.join(self.basefolder, "external.gcode"))
+            self.assertTrue(_wait_for(lambda: "external.gcode" in storage.list_files()))
@@ -529,6 +529,22 @@ class FileManagerTest(unittest.TestCase):
         self.assertEqual(metadata, expected)
         self.local_storage.get_metadata.assert_called_once_with("test.file")
 
+    def test_query_files(self):
+        expected = [{"path": "test.gcode"}]
+        self.local_storage.query_files.return_value = expected
+
+        files = self.file_manager.query_files(
+            octoprint.filemanager.FileDestinations.LOCAL,
+            types=["machinecode"],
+            order_by="date",
+            limit=10,
+        )
+
+        self.assertEqual(expected, files)
+        self.local_storage.query_files.assert_called_once_with(
+            path=None, recursive=True, types=["machinecode"], order_by="date", limit=10
+        )
+
     @mock.patch("octoprint.filemanager.util.atomic_write")
     @mock.patch("io.FileIO")
     @mock.patch("shutil.copyfileobj")
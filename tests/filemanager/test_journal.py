@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import mock
+
+from octoprint.filemanager.journal import JOURNAL_FILE, SNAPSHOT_FILE, MetadataJournal
+from octoprint.filemanager.storage import LocalFileStorage
+
+
+def _read_lines(path):
+    with io.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class MetadataJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.snapshot = os.path.join(self.folder, SNAPSHOT_FILE)
+        self.journal = os.path.join(self.folder, JOURNAL_FILE)
+
+        self.metadata = {
+            "a.gcode": {"hash": "a" * 40, "notes": "x" * 1000},
+            "b.gcode": {"hash": "b" * 40},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_first_write_creates_snapshot(self):
+        journal = MetadataJournal()
+        journal.write(self.folder, self.metadata, changed=["a.gcode"])
+
+        self.assertTrue(os.path.exists(self.snapshot))
+        self.assertFalse(os.path.exists(self.journal))
+        self.assertEqual(self.metadata, journal.load(self.folder))
+
+    def test_entry_changes_are_journaled(self):
+        journal = MetadataJournal()
+        journal.write(self.folder, self.metadata)
+        with io.open(self.snapshot, "rb") as f:
+            snapshot = f.read()
+
+        metadata = dict(self.metadata)
+        metadata["b.gcode"] = {"hash": "b" * 40, "history": [{"success": True}]}
+        journal.write(self.folder, metadata, changed=["b.gcode"])
+        del metadata["a.gcode"]
+        journal.write(self.folder, metadata, changed=["a.gcode"])
+
+        with io.open(self.snapshot, "rb") as f:
+            self.assertEqual(snapshot, f.read())
+        lines = _read_lines(self.journal)
+        self.assertEqual(3, len(lines))
+        self.assertEqual({"name": "a.gcode", "deleted": True}, lines[2])
+
+        self.assertEqual(metadata, MetadataJournal().load(self.folder))
+
+    def test_compaction(self):
+        journal = MetadataJournal()
+        journal.COMPACT_MIN_SIZE = 0
+        journal.write(self.folder, self.metadata)
+
+        metadata = self.metadata
+        compacted = 0
+        for i in range(10):
+            metadata = dict(metadata)
+            metadata["b.gcode"] = {"hash": "b" * 40, "notes": "y" * 100 * i}
+            journal.write(self.folder, metadata, changed=["b.gcode"])
+            if os.path.exists(self.journal):
+                self.assertTrue(
+                    os.stat(self.journal).st_size <= os.stat(self.snapshot).st_size
+                )
+            else:
+                compacted += 1
+
+        self.assertTrue(compacted > 0)
+
+        self.assertEqual(metadata, MetadataJournal().load(self.folder))
+
+    def test_journal_of_other_snapshot_ignored(self):
+        journal = MetadataJournal()
+        journal.write(self.folder, self.metadata)
+        metadata = dict(self.metadata)
+        metadata["b.gcode"] = {"hash": "c" * 40}
+        journal.write(self.folder, metadata, changed=["b.gcode"])
+
+        # snapshot replaced behind our back
+        with io.open(self.snapshot, "wb") as f:
+            f.write(json.dumps({"c.gcode": {}}).encode("utf-8"))
+
+        self.assertEqual({"c.gcode": {}}, MetadataJournal().load(self.folder))
+
+    def test_incomplete_line_skipped(self):
+        journal = MetadataJournal()
+        journal.write(self.folder, self.metadata)
+        metadata = dict(self.metadata)
+        metadata["b.gcode"] = {"hash": "c" * 40}
+        journal.write(self.folder, metadata, changed=["b.gcode"])
+
+        with io.open(self.journal, "ab") as f:
+            f.write(b'{"name": "a.gcode", "da')
+
+        self.assertEqual(metadata, MetadataJournal().load(self.folder))
+
+    def test_interval_coalesces_writes(self):
+        journal = MetadataJournal(interval=60)
+        self.addCleanup(journal.stop)
+
+        with mock.patch.object(journal, "_write") as write:
+            journal.write(self.folder, {"a.gcode": {}}, changed=["a.gcode"])
+            journal.write(self.folder, self.metadata, changed=["b.gcode"])
+            write.assert_not_called()
+            self.assertEqual({self.folder}, journal.pending)
+
+            journal.flush()
+            write.assert_called_once_with(
+                self.folder, self.metadata, {"a.gcode", "b.gcode"}
+            )
+            self.assertEqual(set(), journal.pending)
+
+    def test_failed_write_retried(self):
+        journal = MetadataJournal(interval=60)
+        self.addCleanup(journal.stop)
+
+        journal.write(self.folder, self.metadata, changed=["a.gcode"])
+        with mock.patch.object(journal, "_write", side_effect=IOError("disk full")):
+            journal.flush()
+        self.assertEqual({self.folder}, journal.pending)
+
+        # merged with what got queued since
+        metadata = dict(self.metadata)
+        metadata["b.gcode"] = {"hash": "c" * 40}
+        journal.write(self.folder, metadata, changed=["b.gcode"])
+
+        with mock.patch.object(journal, "_write") as write:
+            journal.flush()
+        write.assert_called_once_with(self.folder, metadata, {"a.gcode", "b.gcode"})
+        self.assertEqual(set(), journal.pending)
+
+    def test_interval_flushes_in_background(self):
+        journal = MetadataJournal(interval=0.05)
+        self.addCleanup(journal.stop)
+
+        journal.write(self.folder, self.metadata)
+
+        start = time.time()
+        while not os.path.exists(self.snapshot) and time.time() - start < 10:
+            time.sleep(0.01)
+        self.assertEqual(self.metadata, journal.load(self.folder))
+
+    def test_discard(self):
+        journal = MetadataJournal(interval=60)
+        self.addCleanup(journal.stop)
+
+        sub = os.path.join(self.folder, "sub")
+        os.mkdir(sub)
+        journal.write(self.folder, self.metadata)
+        journal.write(sub, self.metadata)
+
+        journal.discard(sub)
+        self.assertEqual({self.folder}, journal.pending)
+
+    def test_stop_compacts(self):
+        journal = MetadataJournal(interval=60)
+        journal.write(self.folder, self.metadata)
+        journal.flush()
+
+        metadata = dict(self.metadata)
+        metadata["b.gcode"] = {"hash": "c" * 40}
+        journal.write(self.folder, metadata, changed=["b.gcode"])
+        journal.stop()
+
+        self.assertFalse(os.path.exists(self.journal))
+        with io.open(self.snapshot, "rt", encoding="utf-8") as f:
+            self.assertEqual(metadata, json.load(f))
+
+
+class LocalStorageMetadataJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.basefolder = os.path.realpath(tempfile.mkdtemp())
+        with io.open(os.path.join(self.basefolder, "test.gcode"), "wb") as f:
+            f.write(b"G1 X10\n")
+
+        patcher = mock.patch("octoprint.filemanager.valid_file_type")
+        patcher.start().return_value = True
+        self.addCleanup(patcher.stop)
+
+        patcher = mock.patch("octoprint.filemanager.get_file_type")
+        patcher.start().return_value = ["machinecode", "gcode"]
+        self.addCleanup(patcher.stop)
+
+        self.storage = LocalFileStorage(self.basefolder, metadata_flush_interval=60)
+        self.assertEqual({self.basefolder}, self.storage._metadata_journal.pending)
+        self.storage._metadata_journal.flush()
+
+    def tearDown(self):
+        self.storage.flush_metadata()
+        shutil.rmtree(self.basefolder)
+
+    def test_history_journaled(self):
+        self.storage.add_history("test.gcode", {"success": True, "timestamp": 1})
+        self.storage.add_history("test.gcode", {"success": False, "timestamp": 2})
+        self.assertFalse(os.path.exists(os.path.join(self.basefolder, JOURNAL_FILE)))
+
+        self.storage._metadata_journal.flush()
+        self.assertTrue(os.path.exists(os.path.join(self.basefolder, JOURNAL_FILE)))
+
+        storage = LocalFileStorage(self.basefolder)
+        history = storage.get_metadata("test.gcode")["history"]
+        self.assertEqual([1, 2], [entry["timestamp"] for entry in history])
+
+    def test_flush_metadata(self):
+        self.storage.add_history("test.gcode", {"success": True, "timestamp": 1})
+        self.storage.flush_metadata()
+
+        self.assertFalse(os.path.exists(os.path.join(self.basefolder, JOURNAL_FILE)))
+        with io.open(
+            os.path.join(self.basefolder, SNAPSHOT_FILE), "rt", encoding="utf-8"
+        ) as f:
+            metadata = json.load(f)
+        self.assertEqual(1, len(metadata["test.gcode"]["history"]))
+
+    def test_move_folder_with_pending_changes(self):
+        self.storage.add_folder("source")
+        self.storage.add_file(
+            "source/test.gcode", _FileWrapper(os.path.join(self.basefolder, "test.gcode"))
+        )
+        self.storage.add_history("source/test.gcode", {"success": True, "timestamp": 1})
+
+        self.storage.move_folder("source", "destination")
+
+        storage = LocalFileStorage(self.basefolder)
+        self.assertEqual(
+            1, len(storage.get_metadata("destination/test.gcode")["history"])
+        )
+
+
+class _FileWrapper(object):
+    def __init__(self, path):
+        self.path = path
+
+    def save(self, destination):
+        shutil.copy(self.path, destination)
@@ -148,6 +148,31 @@ class LocalStorageTest(unittest.TestCase):
         self.assertTrue("retrieved" in link)
         self.assertEqual(retrieved, link["retrieved"])
 
+    def test_add_file_with_digest(self):
+        with mock.patch.object(self.storage, "_create_hash") as create_hash:
+            self.storage.add_file(
+                "bp_case.stl", FILE_BP_CASE_STL, digest=FILE_BP_CASE_STL.hash
+            )
+            create_hash.assert_not_called()
+
+        metadata = self.storage.get_metadata("bp_case.stl")
+        self.assertEqual(FILE_BP_CASE_STL.hash, metadata["hash"])
+
+    def test_add_file_from_stream(self):
+        from octoprint.filemanager.util import StreamWrapper
+
+        with io.open(FILE_BP_CASE_STL.path, "rb") as f:
+            wrapper = StreamWrapper("bp_case.stl", f)
+            wrapper.CHUNK_SIZE = 1024
+
+            with mock.patch.object(self.storage, "_create_hash") as create_hash:
+                self.storage.add_file("bp_case.stl", wrapper)
+                create_hash.assert_not_called()
+
+        self.assertEqual(FILE_BP_CASE_STL.hash, wrapper.digest)
+        metadata = self.storage.get_metadata("bp_case.stl")
+        self.assertEqual(FILE_BP_CASE_STL.hash, metadata["hash"])
+
     def test_add_file_with_association(self):
         stl_name = self._add_and_verify_file(
             "bp_case.stl", "bp_case.stl", FILE_BP_CASE_STL
@@ -622,6 +647,61 @@ class LocalStorageTest(unittest.TestCase):
         self.assertEqual("folder", file_list["empty"]["type"])
         self.assertEqual(0, len(file_list["empty"]["children"]))
 
+    def test_query_files(self):
+        self._add_and_verify_file("bp_case.stl", "bp_case.stl", FILE_BP_CASE_STL)
+        self._add_and_verify_file(
+            "bp_case.gcode", "bp_case.gcode", FILE_BP_CASE_GCODE, display="Bp Cäse.gcode"
+        )
+        content_folder = self._add_and_verify_folder("content", "content")
+        self._add_and_verify_file(
+            (content_folder, "crazyradio.stl"),
+            content_folder + "/crazyradio.stl",
+            FILE_CRAZYRADIO_STL,
+        )
+
+        def paths(nodes):
+            return [node["path"] for node in nodes]
+
+        self.assertEqual(
+            ["bp_case.gcode", "bp_case.stl", "content/crazyradio.stl"],
+            paths(self.storage.query_files()),
+        )
+        self.assertEqual(
+            ["bp_case.gcode", "bp_case.stl"],
+            paths(self.storage.query_files(recursive=False)),
+        )
+        self.assertEqual(
+            ["content/crazyradio.stl"], paths(self.storage.query_files(path="content"))
+        )
+        self.assertEqual(
+            ["bp_case.stl", "content/crazyradio.stl"],
+            paths(self.storage.query_files(types=["model"])),
+        )
+        self.assertEqual(
+            ["bp_case.gcode"], paths(self.storage.query_files(search="CÄSE"))
+        )
+
+        by_size = sorted(
+            [FILE_BP_CASE_STL, FILE_BP_CASE_GCODE, FILE_CRAZYRADIO_STL],
+            key=lambda f: os.stat(f.path).st_size,
+            reverse=True,
+        )
+        self.assertEqual(
+            [os.stat(f.path).st_size for f in by_size[1:]],
+            [
+                node["size"]
+                for node in self.storage.query_files(
+                    order_by="size", reverse=True, limit=2, offset=1
+                )
+            ],
+        )
+
+        query = self.storage.query_files(types=["machinecode"])[0]
+        self.assertEqual(FILE_BP_CASE_GCODE.hash, query["hash"])
+        self.assertEqual("Bp Cäse.gcode", query["display"])
+
+        self.assertRaises(ValueError, self.storage.query_files, order_by="invalid")
+
     def test_add_link_model(self):
         stl_name = self._add_and_verify_file(
             "bp_case.stl", "bp_case.stl", FILE_BP_CASE_STL
@@ -927,3 +1007,152 @@ class LocalStorageTest(unittest.TestCase):
             )
         )
         return sanitized_path
+
+
+class IndexedLocalStorageTest(LocalStorageTest):
+    """Runs the storage tests against a storage using a file index, plus index specific ones."""
+
+    def setUp(self):
+        super(IndexedLocalStorageTest, self).setUp()
+
+        import tempfile
+
+        self.index_folder = tempfile.mkdtemp()
+        self.index_path = os.path.join(self.index_folder, "file_index.db")
+        self.storage = self._create_storage()
+
+    def tearDown(self):
+        import shutil
+
+        self.storage._index.close()
+        shutil.rmtree(self.index_folder)
+
+        super(IndexedLocalStorageTest, self).tearDown()
+
+    def _create_storage(self):
+        return LocalFileStorage(self.basefolder, index_path=self.index_path)
+
+    def _populate(self):
+        self._add_and_verify_file("bp_case.stl", "bp_case.stl", FILE_BP_CASE_STL)
+        content_folder = self._add_and_verify_folder("content", "content")
+        sub_folder = self._add_and_verify_folder(
+            (content_folder, "sub"), content_folder + "/sub"
+        )
+        self._add_and_verify_file(
+            (sub_folder, "crazyradio.stl"),
+            sub_folder + "/crazyradio.stl",
+            FILE_CRAZYRADIO_STL,
+        )
+
+    def test_index_used(self):
+        self._populate()
+        self.storage.list_files()
+
+        with mock.patch.object(
+            self.storage, "_scan_folder", wraps=self.storage._scan_folder
+        ) as scan:
+            file_list = self.storage.list_files()
+            scan.assert_not_called()
+
+        self.assertEqual(
+            os.stat(FILE_CRAZYRADIO_STL.path).st_size, file_list["content"]["size"]
+        )
+        self.assertIn(
+            "crazyradio.stl", file_list["content"]["children"]["sub"]["children"]
+        )
+
+    def test_index_updated_on_metadata_change(self):
+        self._populate()
+        self.storage.list_files()
+
+        self.storage.set_additional_metadata(
+            "content/sub/crazyradio.stl", "analysis", {"dimensions": {"width": 1.0}}
+        )
+        self.storage.add_history("bp_case.stl", {"success": True, "timestamp": 1})
+
+        file_list = self.storage.list_files()
+        self.assertEqual(
+            {"dimensions": {"width": 1.0}},
+            file_list["content"]["children"]["sub"]["children"]["crazyradio.stl"][
+                "analysis"
+            ],
+        )
+        self.assertEqual(1, len(file_list["bp_case.stl"]["history"]))
+
+    def test_index_move_folder(self):
+        self._populate()
+        self.storage.list_files()
+
+        self.storage.move_folder("content", "moved")
+
+        file_list = self.storage.list_files()
+        self.assertNotIn("content", file_list)
+        self.assertEqual(
+            "moved/sub/crazyradio.stl",
+            file_list["moved"]["children"]["sub"]["children"]["crazyradio.stl"]["path"],
+        )
+        self.assertEqual(
+            ["bp_case.stl", "moved/sub/crazyradio.stl"],
+            [node["path"] for node in self.storage.query_files()],
+        )
+
+    def test_index_persistent(self):
+        self._populate()
+        expected = self.storage.list_files()
+        self.storage._index.close()
+
+        with mock.patch.object(LocalFileStorage, "_scan_folder") as scan:
+            self.storage = self._create_storage()
+            scan.assert_not_called()
+
+        self.assertEqual(expected, self.storage.list_files())
+
+    def test_index_reconcile(self):
+        self._populate()
+        self.storage.list_files()
+
+        FILE_BP_CASE_GCODE.save(
+            os.path.join(self.basefolder, "content", "sub", "bp_case.gcode")
+        )
+        os.remove(os.path.join(self.basefolder, "bp_case.stl"))
+        # make sure the folders' mtimes differ from the indexed ones
+        import time
+
+        later = time.time() + 10
+        os.utime(os.path.join(self.basefolder, "content", "sub"), (later, later))
+        os.utime(self.basefolder, (later, later))
+
+        # only storage operations update the index by themselves...
+        self.assertIn("bp_case.stl", self.storage.list_files())
+
+        # ... external changes need a reconcile
+        self.storage.reconcile()
+
+        file_list = self.storage.list_files()
+        self.assertNotIn("bp_case.stl", file_list)
+        sub = file_list["content"]["children"]["sub"]["children"]
+        self.assertIn("bp_case.gcode", sub)
+        self.assertEqual(FILE_BP_CASE_GCODE.hash, sub["bp_case.gcode"]["hash"])
+
+    def test_index_force_refresh(self):
+        self._populate()
+        self.storage.list_files()
+
+        FILE_BP_CASE_GCODE.save(os.path.join(self.basefolder, "bp_case.gcode"))
+        self.assertIn("bp_case.gcode", self.storage.list_files(force_refresh=True))
+
+    def test_index_last_modified(self):
+        self._populate()
+        last_modified = self.storage.last_modified(recursive=True)
+
+        expected = max(
+            self.storage._folder_modified(os.path.join(self.basefolder, *folder))
+            for folder in ((), ("content",), ("content", "sub"))
+        )
+        self.assertEqual(expected, last_modified)
+        self.assertEqual(
+            self.storage._folder_modified(
+                os.path.join(self.basefolder, "content", "sub")
+            ),
+            self.storage.last_modified(path="content/sub", recursive=True),
+        )
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Benchmark for creating backups.
+
+Usage: python tests/manual_tests/benchmark_backup.py [<size of timelapses in MB>] [<size of uploads in MB>]
+
+Creates a base folder with 100 (or the given number of) MB of timelapses and 50 (or the given
+number of) MB of uploads in a temporary folder and compares the time needed for
+
+  * the previous backup (a full recursive scan for the size, every file deflated)
+  * a full backup (already compressed files stored, files read ahead on worker threads)
+  * an incremental backup after changing one of the uploads
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+import mock
+
+
+def legacy_backup(path, basedir, datafolder):
+    def disk_size(folder):
+        total = 0
+        for root, _, files in os.walk(folder):
+            if root.startswith(datafolder):
+                continue
+            total += sum(os.stat(os.path.join(root, f)).st_size for f in files)
+        return total
+
+    disk_size(basedir)
+    with zipfile.ZipFile(
+        path, mode="w", compression=zipfile.ZIP_DEFLATED, allowZip64=True
+    ) as zip:
+        for root, _, files in os.walk(basedir):
+            if root.startswith(datafolder):
+                continue
+            for f in files:
+                source = os.path.join(root, f)
+                zip.write(source, arcname=os.path.relpath(source, basedir))
+
+
+def create_files(basedir, timelapse_size, upload_size):
+    for i in range(timelapse_size // 10):
+        folder = os.path.join(basedir, "timelapse")
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        with io.open(os.path.join(folder, "print{}.mp4".format(i)), "wb") as f:
+            f.write(os.urandom(10 * 1024 * 1024))
+
+    line = b"G1 X10.123 Y20.456 E0.789 F1800\n"
+    for i in range(upload_size // 5):
+        folder = os.path.join(basedir, "uploads")
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        with io.open(os.path.join(folder, "part{}.gcode".format(i)), "wb") as f:
+            f.write(line * (5 * 1024 * 1024 // len(line)))
+
+    for name in ("config.yaml", "users.yaml"):
+        with io.open(os.path.join(basedir, name), "wb") as f:
+            f.write(b"{}\n")
+
+
+def run(name, fn, path):
+    start = time.time()
+    fn()
+    duration = time.time() - start
+    print(
+        "{:<40} {:>7.3f}s, {:>8.1f}MB".format(
+            name, duration, os.stat(path).st_size / 1024 / 1024
+        )
+    )
+
+
+def main():
+    from octoprint.plugins.backup import BackupPlugin
+
+    timelapse_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    upload_size = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    root = tempfile.mkdtemp()
+    try:
+        basedir = os.path.join(root, "octoprint")
+        datafolder = os.path.join(basedir, "data", "backup")
+        os.makedirs(datafolder)
+        create_files(basedir, timelapse_size, upload_size)
+
+        settings = mock.MagicMock()
+        settings._basedir = basedir
+        settings._configfile = os.path.join(basedir, "config.yaml")
+        settings.global_get_basefolder.side_effect = lambda folder: os.path.join(
+            basedir, folder
+        )
+        plugin_manager = mock.MagicMock()
+        plugin_manager.get_hooks.return_value = {}
+        plugin_manager.get_helpers.return_value = {}
+
+        def backup(name, incremental):
+            return lambda: BackupPlugin._create_backup(
+                name,
+                settings=settings,
+                plugin_manager=plugin_manager,
+                datafolder=datafolder,
+                incremental=incremental,
+            )
+
+        print("{}MB of timelapses, {}MB of uploads".format(timelapse_size, upload_size))
+        legacy = os.path.join(root, "legacy.zip")
+        run(
+            "  before: full, everything deflated",
+            lambda: legacy_backup(legacy, basedir, datafolder),
+            legacy,
+        )
+        run(
+            "  after: full",
+            backup("full.zip", True),
+            os.path.join(datafolder, "full.zip"),
+        )
+
+        with io.open(os.path.join(basedir, "uploads", "part0.gcode"), "ab") as f:
+            f.write(b"M84\n")
+        run(
+            "  after: incremental, one file changed",
+            backup("incremental.zip", True),
+            os.path.join(datafolder, "incremental.zip"),
+        )
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
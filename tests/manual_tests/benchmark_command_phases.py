@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Micro benchmark for the command phase processing of the communication layer.
+
+Usage: python tests/manual_tests/benchmark_command_phases.py [<number of commands>]
+
+Runs ``G1`` moves through all four command phases (queuing, queued, sending, sent)
+the way ``_sendCommand`` and ``_send_loop`` do and compares commands/s of
+
+  * the previous processing (handler lookup via string concatenation and
+    ``hasattr``/``getattr``, every plugin hook called for every command)
+  * the dispatch table based processing with unfiltered hooks
+  * the dispatch table based processing with hooks declaring their GCODEs
+    through ``handles_gcodes``
+
+for no plugin hooks and five no-op plugin hooks per phase.
+"""
+
+import collections
+import logging
+import sys
+import time
+
+PHASES = ("queuing", "queued", "sending", "sent")
+
+
+def create_comm(hooks):
+    import mock
+
+    from octoprint.util.comm import MachineCom
+
+    plugin_manager = mock.Mock()
+    plugin_manager.hooks_revision = 0
+    plugin_manager.get_hooks.side_effect = lambda hook: collections.OrderedDict(
+        hooks.get(hook, [])
+    )
+
+    comm = MachineCom.__new__(MachineCom)
+    comm._logger = logging.getLogger("benchmark")
+    comm._phaseLogger = logging.getLogger("benchmark.command_phases")
+    comm._pluginManager = plugin_manager
+    comm._state = MachineCom.STATE_PRINTING
+    comm._currentFile = None
+    comm._connection_closing = True
+    comm._callback = mock.Mock()
+    comm._currentZ = None
+    comm._currentF = None
+    comm._emergency_commands = []
+    comm._pausing_commands = []
+    comm._blocked_commands = []
+    comm._ignored_commands = []
+    comm._long_running_commands = []
+    comm._refresh_command_phase_dispatch()
+    return comm
+
+
+def create_hooks(count, gcodes=None):
+    from octoprint.util.comm import handles_gcodes
+
+    hooks = {}
+    for phase in PHASES:
+        entries = []
+        for i in range(count):
+
+            def hook(*args, **kwargs):
+                return None
+
+            if gcodes is not None:
+                hook = handles_gcodes(*gcodes)(hook)
+            entries.append(("plugin{}".format(i), hook))
+        hooks["octoprint.comm.protocol.gcode." + phase] = entries
+    return hooks
+
+
+def legacy_process_command_phase(
+    comm, phase, command, command_type=None, gcode=None, subcode=None, tags=None
+):
+    from octoprint.util.comm import _normalize_command_handler_result
+
+    results = [(command, command_type, gcode, subcode, tags)]
+
+    comm._log_command_phase(
+        phase,
+        command,
+        command_type=command_type,
+        gcode=gcode,
+        subcode=subcode,
+        tags=tags,
+    )
+
+    if (comm.isStreaming() and comm.isPrinting()) or phase not in PHASES:
+        return results
+
+    for name, hook in comm._gcode_hooks[phase].items():
+        new_results = []
+        for command, command_type, gcode, subcode, tags in results:
+            try:
+                hook_results = hook(
+                    comm, phase, command, command_type, gcode, subcode=subcode, tags=tags
+                )
+            except Exception:
+                comm._logger.exception("Error while processing hook {}".format(name))
+            else:
+                normalized = _normalize_command_handler_result(
+                    command,
+                    command_type,
+                    gcode,
+                    subcode,
+                    tags,
+                    hook_results,
+                    tags_to_add={
+                        "source:rewrite",
+                        "phase:{}".format(phase),
+                        "plugin:{}".format(name),
+                    },
+                )
+                if phase not in ("queuing",) and len(normalized) > 1:
+                    new_results.append((command, command_type, gcode, subcode, tags))
+                else:
+                    new_results += normalized
+        if not new_results:
+            return []
+        results = new_results
+
+    new_results = []
+    modified = False
+    for command, command_type, gcode, subcode, tags in results:
+        if gcode is not None:
+            gcode_handler = "_gcode_" + gcode + "_" + phase
+            if hasattr(comm, gcode_handler):
+                handler_results = getattr(comm, gcode_handler)(
+                    command, cmd_type=command_type, subcode=subcode, tags=tags
+                )
+                new_results += _normalize_command_handler_result(
+                    command, command_type, gcode, subcode, tags, handler_results
+                )
+                modified = True
+            else:
+                new_results.append((command, command_type, gcode, subcode, tags))
+        else:
+            new_results.append((command, command_type, gcode, subcode, tags))
+
+    if modified:
+        if not new_results:
+            return []
+        else:
+            results = new_results
+
+    command_phase_handler = "_command_phase_" + phase
+    if hasattr(comm, command_phase_handler):
+        new_results = []
+        for command, command_type, gcode, subcode, tags in results:
+            handler_results = getattr(comm, command_phase_handler)(
+                command,
+                cmd_type=command_type,
+                gcode=gcode,
+                subcode=subcode,
+                tags=tags,
+            )
+            new_results += _normalize_command_handler_result(
+                command, command_type, gcode, subcode, tags, handler_results
+            )
+        results = new_results
+
+    return results
+
+
+def run(name, process, comm, count):
+    tags = {"source:file"}
+    start = time.time()
+    for i in range(count):
+        command = "G1 X{} Y{}".format(i % 300, i % 200)
+        for phase in PHASES:
+            process(comm, phase, command, gcode="G1", tags=tags)
+    duration = time.time() - start
+    print(
+        "{:<50} {:>8} commands in {:>7.3f}s, {:>10.0f} commands/s".format(
+            name, count, duration, count / duration
+        )
+    )
+
+
+def main():
+    from octoprint.util.comm import MachineCom
+
+    logging.basicConfig(level=logging.WARNING)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    current = MachineCom._process_command_phase
+
+    for hook_count in (0, 5):
+        unfiltered = create_comm(create_hooks(hook_count))
+        filtered = create_comm(create_hooks(hook_count, gcodes=("M104", "M109")))
+
+        print("{} hooks per phase".format(hook_count))
+        run(
+            "  before: string built handler lookup",
+            legacy_process_command_phase,
+            unfiltered,
+            count,
+        )
+        run("  after: dispatch table, unfiltered hooks", current, unfiltered, count)
+        run("  after: dispatch table, hooks for M104/M109", current, filtered, count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Micro benchmark for emitting push messages to connected clients.
+
+Usage: python tests/manual_tests/benchmark_emit.py [<number of messages>] [<number of clients>]
+
+Broadcasts events and current state updates to 20 (or the given number of) connected
+clients, each logged in as a user of a group with a subgroup, and compares messages/s of
+
+  * the previous permission checks (needs of users and groups recomputed through
+    repeated ``set.union`` on every ``has_permission`` call)
+  * the cached permission checks (frozen needs, invalidated on changes)
+
+Sending is a no-op, so the numbers show the cost of permission checks, hooks and encoding.
+"""
+
+import logging
+import sys
+import time
+
+
+def legacy_user_needs(self):
+    needs = set()
+
+    for permission in self.permissions:
+        if permission is not None:
+            needs = needs.union(permission.needs)
+
+    for group in self.groups:
+        if group is not None:
+            needs = needs.union(legacy_group_needs(group))
+
+    return needs
+
+
+def legacy_group_needs(self):
+    from octoprint.access.groups import GroupNeed
+
+    needs = set()
+    needs.add(GroupNeed(self.key))
+    for p in self.permissions:
+        needs = needs.union(p.needs)
+    for g in self.subgroups:
+        needs = needs.union(legacy_group_needs(g))
+
+    return needs
+
+
+def legacy_has_permission(self, permission):
+    return set(permission.needs).issubset(legacy_user_needs(self))
+
+
+def create_broadcaster(clients):
+    import mock
+
+    from octoprint.access.groups import Group
+    from octoprint.access.permissions import Permissions
+    from octoprint.access.users import SessionUser, User
+    from octoprint.server.util.sockjs import (
+        PrinterStateBroadcaster,
+        PrinterStateConnection,
+    )
+
+    readonly = Group(
+        "readonly",
+        "Read-only Access",
+        permissions=[p for p in Permissions.all() if not p.dangerous][:10],
+    )
+    users = Group(
+        "users",
+        "Operator",
+        permissions=[p for p in Permissions.all() if not p.dangerous],
+        subgroups=[readonly],
+    )
+
+    plugin_manager = mock.MagicMock()
+    plugin_manager.get_hooks.return_value = {}
+    broadcaster = PrinterStateBroadcaster(
+        mock.MagicMock(), mock.MagicMock(), plugin_manager
+    )
+
+    for i in range(clients):
+        session = mock.MagicMock()
+        session.is_closed = False
+        session.send_expects_json = True
+        session.send_jsonified = lambda *args, **kwargs: None
+
+        connection = PrinterStateConnection(
+            mock.MagicMock(),
+            mock.MagicMock(),
+            mock.MagicMock(),
+            mock.MagicMock(),
+            mock.MagicMock(),
+            mock.MagicMock(),
+            plugin_manager,
+            mock.MagicMock(),
+            session,
+            broadcaster=broadcaster,
+        )
+        connection._user = SessionUser(User("user{}".format(i), "", True, groups=[users]))
+        connection._fileManager.get_busy_files.return_value = []
+        connection._base_rate_limit = 0
+
+        broadcaster.open(connection)
+        broadcaster.register(connection)
+
+    return broadcaster
+
+
+def run(name, broadcaster, count):
+    data = {
+        "state": {"text": "Printing", "flags": {"printing": True}},
+        "job": {"file": {"name": "test.gcode"}},
+        "progress": {"completion": 42.0},
+    }
+
+    start = time.time()
+    for i in range(count):
+        broadcaster._on_event("ZChange", {"new": i, "old": i - 1})
+        broadcaster.on_printer_add_temperature({"tool0": {"actual": 200.0 + i % 10}})
+        broadcaster.on_printer_send_current_data(data)
+    duration = time.time() - start
+    print(
+        "{:<50} {:>8} messages in {:>7.3f}s, {:>10.0f} messages/s".format(
+            name, 2 * count, duration, 2 * count / duration
+        )
+    )
+
+
+def main():
+    import mock
+
+    from octoprint.access.users import User
+
+    logging.basicConfig(level=logging.WARNING)
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    clients = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    print("{} connected clients".format(clients))
+    with mock.patch.object(User, "has_permission", legacy_has_permission):
+        run("  before: needs recomputed per check", create_broadcaster(clients), count)
+    run("  after: cached frozen needs", create_broadcaster(clients), count)
+
+
+if __name__ == "__main__":
+    main()
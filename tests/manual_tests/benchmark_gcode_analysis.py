@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Micro benchmark for the GCODE analysis of ``octoprint.util.gcodeInterpreter``.
+
+Usage: python tests/manual_tests/benchmark_gcode_analysis.py [<size in MB>] [<file>]
+
+Analyses a slicer like GCODE file (generated unless one is provided) and compares
+lines/s of
+
+  * the line by line engine (``gcode(vectorize=False)``)
+  * the vectorized engine processing blocks of lines with NumPy (needs ``numpy``)
+
+and the difference between the two results.
+"""
+
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def create_file(path, size):
+    written = 0
+    i = 0
+    e = 0.0
+    layer = 0
+    with io.open(path, "wt", encoding="utf-8", newline="") as f:
+        f.write("; filament_diameter = 1.75\nG21\nG90\nM82\nG28\n")
+        while written < size:
+            if i % 500 == 0:
+                layer += 1
+                lines = [
+                    ";LAYER:{}\n".format(layer),
+                    "G92 E0\n",
+                    "M106 S255\n",
+                    "G0 F9000 Z{:.2f}\n".format(layer * 0.2),
+                ]
+                e = 0.0
+            elif i % 50 == 0:
+                lines = ["G1 F1800 E{:.5f}\n".format(e - 5), ";TYPE:WALL-OUTER\n"]
+            else:
+                e += 0.04
+                lines = [
+                    "G1 X{:.3f} Y{:.3f} E{:.5f}\n".format(
+                        (i % 3000) / 15.0, (i % 2000) / 10.0, e
+                    )
+                ]
+            for line in lines:
+                f.write(line)
+                written += len(line)
+            i += 1
+
+
+def run(name, path, vectorize):
+    from octoprint.util.gcodeInterpreter import gcode
+
+    interpreter = gcode(vectorize=vectorize)
+    start = time.time()
+    interpreter.load(path)
+    duration = time.time() - start
+
+    with io.open(path, "rb") as f:
+        count = sum(1 for _ in f)
+    print(
+        "{:<40} {:>10} lines in {:>7.3f}s, {:>12.0f} lines/s".format(
+            name, count, duration, count / duration
+        )
+    )
+    return interpreter.get_result()
+
+
+def main():
+    import logging
+
+    logging.basicConfig(level=logging.WARNING)
+
+    size = float(sys.argv[1]) if len(sys.argv) > 1 else 16.0
+    path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    folder = tempfile.mkdtemp()
+    try:
+        if path is None:
+            path = os.path.join(folder, "benchmark.gcode")
+            create_file(path, int(size * 1024 * 1024))
+            print("Generated {:.1f}MB test file".format(size))
+
+        before = run("before: line by line", path, False)
+
+        from octoprint.util.gcodeInterpreter import gcode
+
+        if not gcode().vectorized:
+            print("numpy is not installed, can't run the vectorized engine")
+            return
+
+        after = run("after: vectorized", path, True)
+
+        print(
+            "total time: {!r} vs {!r}\nextrusion: {!r} vs {!r}\nprinting area: {!r} vs {!r}".format(
+                before["total_time"],
+                after["total_time"],
+                before["extrusion_length"],
+                after["extrusion_length"],
+                before["printing_area"],
+                after["printing_area"],
+            )
+        )
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Micro benchmark for the line processing of printed GCODE files.
+
+Usage: python tests/manual_tests/benchmark_gcode_processing.py [<size in MB>]
+
+Generates a laser job like GCODE file with lots of short commented vector moves and
+compares lines/s of
+
+  * the previous line by line processing (codecs readline, re-encoding each line
+    to track the file position, char by char comment stripping, temperature offset
+    regex on every line)
+  * the block wise preprocessing through ``preprocess_gcode_lines``
+  * reading the whole file through ``PrintingGcodeFileInformation.getNext``
+"""
+
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+
+def create_file(path, size):
+    moves = [
+        "G1 X{x:.3f} Y{y:.3f} S{s}\n",
+        "G1 X{x:.3f} Y{y:.3f} ; vector {i}\n",
+        "G0 X{x:.3f} Y{y:.3f}\n",
+        "; layer {i}\n",
+        "M3 S{s}\n",
+    ]
+    written = 0
+    i = 0
+    with io.open(path, "wt", encoding="utf-8", newline="") as f:
+        while written < size:
+            line = moves[i % len(moves)].format(
+                x=(i % 3000) / 10.0, y=(i % 2000) / 10.0, s=i % 1000, i=i
+            )
+            f.write(line)
+            written += len(line)
+            i += 1
+
+
+def legacy_strip_comment(line):
+    if ";" not in line:
+        return line
+
+    escaped = False
+    result = []
+    for c in line:
+        if c == ";" and not escaped:
+            break
+        result += c
+        escaped = (c == "\\") and not escaped
+    return "".join(result)
+
+
+legacy_temp_command_regex = re.compile(
+    r"^M(?P<command>104|109|140|190)(\s+T(?P<tool>\d+)|\s+S(?P<temperature>[-+]?\d*\.?\d*))+"
+)
+
+
+def legacy_read(path):
+    from octoprint.util import bom_aware_open
+
+    count = 0
+    pos = 0
+    with bom_aware_open(path, encoding="utf-8", errors="replace", newline="") as f:
+        while True:
+            line = f.readline()
+            pos += len(line.encode("utf-8"))
+            if not line:
+                break
+            line = legacy_strip_comment(line).strip()
+            if not line:
+                continue
+            legacy_temp_command_regex.match(line)
+            count += 1
+    assert pos == os.stat(path).st_size
+    return count
+
+
+def preprocess_blocks(path):
+    from octoprint.util.comm import preprocess_gcode_lines
+
+    count = 0
+    remainder = b""
+    with io.open(path, "rb") as f:
+        while True:
+            data = f.read(64 * 1024)
+            if not data:
+                break
+            lines = (remainder + data).splitlines(True)
+            remainder = lines.pop()
+            count += sum(1 for line in preprocess_gcode_lines(lines) if line)
+    count += sum(1 for line in preprocess_gcode_lines([remainder]) if line)
+    return count
+
+
+def print_file(path):
+    from octoprint.util.comm import PrintingGcodeFileInformation
+
+    file_information = PrintingGcodeFileInformation(
+        path,
+        offsets_callback=lambda: {"tool0": 0, "bed": 0},
+        current_tool_callback=lambda: 0,
+    )
+    file_information.start()
+
+    count = 0
+    while True:
+        line, _, _ = file_information.getNext()
+        if line is None:
+            break
+        count += 1
+    return count
+
+
+def run(name, func, path):
+    start = time.time()
+    count = func(path)
+    duration = time.time() - start
+    print(
+        "{:<40} {:>10} lines in {:>7.3f}s, {:>12.0f} lines/s".format(
+            name, count, duration, count / duration
+        )
+    )
+
+
+def main():
+    import logging
+
+    logging.basicConfig(level=logging.WARNING)
+
+    size = float(sys.argv[1]) if len(sys.argv) > 1 else 16.0
+
+    folder = tempfile.mkdtemp()
+    try:
+        path = os.path.join(folder, "benchmark.gcode")
+        create_file(path, int(size * 1024 * 1024))
+        print("Generated {:.1f}MB test file".format(size))
+
+        run("before: readline + per line processing", legacy_read, path)
+        run("after: preprocess_gcode_lines", preprocess_blocks, path)
+        run("after: PrintingGcodeFileInformation", print_file, path)
+    finally:
+        shutil.rmtree(folder)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Micro benchmark for the cache of rendered views.
+
+Usage: python tests/manual_tests/benchmark_view_cache.py [<number of hits>] [<size of the page in KB>]
+
+Serves a rendered page of 300 (or the given number of) KB from the view cache 2000 (or the
+given number of) times and compares hits/s of
+
+  * the previous cache (responses pickled on every set, unpickled on every hit)
+  * the LRU cache (responses stored as encoded body, status and headers)
+"""
+
+import pickle
+import sys
+import time
+
+
+class LegacyCache(object):
+    def __init__(self):
+        self._cache = {}
+
+    def get(self, key):
+        expires, value = self._cache.get(key, (0, None))
+        if expires is None or expires > time.time():
+            return pickle.loads(value)
+
+    def set(self, key, value, timeout=None):
+        self._cache[key] = (None, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+
+
+def run(name, cache, response, count):
+    cache.set("view:/", response, timeout=-1)
+
+    start = time.time()
+    for _ in range(count):
+        rv = cache.get("view:/")
+        rv.headers["X-From-Cache"] = "true"
+    duration = time.time() - start
+    print(
+        "{:<50} {:>6} hits in {:>7.3f}s, {:>10.0f} hits/s".format(
+            name, count, duration, count / duration
+        )
+    )
+
+
+def main():
+    from octoprint.server.util.flask import LessSimpleCache, OctoPrintFlaskResponse
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    response = OctoPrintFlaskResponse(
+        "<html>" + "x" * (size * 1024) + "</html>",
+        headers={"ETag": '"abcdef"', "Last-Modified": "Thu, 01 Jan 1970 00:00:00 GMT"},
+    )
+
+    print("{}KB page".format(size))
+    run("  before: pickled", LegacyCache(), response, count)
+    run("  after: LRU, encoded response", LessSimpleCache(), response, count)
+
+
+if __name__ == "__main__":
+    main()
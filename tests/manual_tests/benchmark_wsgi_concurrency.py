@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Concurrency benchmark for the WSGI container serving OctoPrint's Flask app.
+
+Usage: python tests/manual_tests/benchmark_wsgi_concurrency.py [<slow requests>] [<threads>]
+
+Serves a WSGI app with a slow endpoint (200ms per request) and a fast one through
+``WsgiInputContainer`` next to a websocket pushing a message every 10ms, the way
+SockJS pushes state updates. While firing 10 (or the given number of) concurrent
+requests against the slow endpoint it measures
+
+  * the latency of a request against the fast endpoint
+  * the largest gap between two messages received over the websocket
+
+once with requests handled on the IOLoop and once on 4 (or the given number of)
+worker threads.
+"""
+
+import sys
+import time
+
+import tornado.gen
+import tornado.httpclient
+import tornado.ioloop
+import tornado.web
+import tornado.websocket
+
+SLOW = 0.2
+PUSH_INTERVAL = 0.01
+
+
+def wsgi_app(environ, start_response):
+    if environ["PATH_INFO"] == "/slow":
+        time.sleep(SLOW)
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"ok"]
+
+
+class PushHandler(tornado.websocket.WebSocketHandler):
+    def open(self):
+        self._callback = tornado.ioloop.PeriodicCallback(
+            lambda: self.write_message("push"), PUSH_INTERVAL * 1000
+        )
+        self._callback.start()
+
+    def on_close(self):
+        self._callback.stop()
+
+
+def create_app(threads):
+    from octoprint.server.util.tornado import (
+        UploadStorageFallbackHandler,
+        WsgiInputContainer,
+    )
+
+    executor = None
+    if threads:
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=threads)
+
+    container = WsgiInputContainer(wsgi_app, executor=executor)
+    return tornado.web.Application(
+        [
+            (r"/push", PushHandler),
+            (r".*", UploadStorageFallbackHandler, {"fallback": container}),
+        ]
+    )
+
+
+@tornado.gen.coroutine
+def run(name, threads, slow_requests, port):
+    server = create_app(threads).listen(port)
+    base = "http://127.0.0.1:{}".format(port)
+    client = tornado.httpclient.AsyncHTTPClient(max_clients=slow_requests + 2)
+
+    websocket = yield tornado.websocket.websocket_connect(
+        "ws://127.0.0.1:{}/push".format(port)
+    )
+    gaps = []
+    done = []
+
+    @tornado.gen.coroutine
+    def receive():
+        last = time.time()
+        while not done:
+            message = yield websocket.read_message()
+            if message is None:
+                break
+            now = time.time()
+            gaps.append(now - last)
+            last = now
+
+    @tornado.gen.coroutine
+    def fast():
+        # let the slow requests get going first
+        yield tornado.gen.sleep(SLOW / 2)
+        start = time.time()
+        yield client.fetch(base + "/fast")
+        raise tornado.gen.Return(time.time() - start)
+
+    receiver = receive()
+    start = time.time()
+    results = yield [fast()] + [
+        client.fetch(base + "/slow", request_timeout=600) for _ in range(slow_requests)
+    ]
+    duration = time.time() - start
+    done.append(True)
+    websocket.close()
+    yield receiver
+    server.stop()
+
+    print(
+        "{:<30} {:>7.3f}s total, fast request {:>7.3f}s, max push gap {:>7.3f}s".format(
+            name, duration, results[0], max(gaps) if gaps else float("nan")
+        )
+    )
+
+
+@tornado.gen.coroutine
+def main():
+    slow_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    print(
+        "{} concurrent requests taking {}s each, push every {}s".format(
+            slow_requests, SLOW, PUSH_INTERVAL
+        )
+    )
+    yield run("  before: on the IOLoop", 0, slow_requests, 58123)
+    yield run("  after: {} worker threads".format(threads), threads, slow_requests, 58124)
+
+
+if __name__ == "__main__":
+    tornado.ioloop.IOLoop.current().run_sync(main)
@@ -290,6 +290,71 @@ class PluginTestCase(unittest.TestCase):
             list(map(lambda x: x._identifier, implementations)),
         )
 
+    def test_sorted_implementations_cached(self):
+        with mock.patch.object(
+            self.plugin_manager,
+            "_sort_implementations",
+            wraps=self.plugin_manager._sort_implementations,
+        ) as sort_implementations:
+            first = self.plugin_manager.get_implementations(
+                octoprint.plugin.StartupPlugin, sorting_context="sorting_test"
+            )
+            second = self.plugin_manager.get_implementations(
+                octoprint.plugin.StartupPlugin, sorting_context="sorting_test"
+            )
+            self.assertEqual(first, second)
+            self.assertEqual(1, sort_implementations.call_count)
+
+            self.plugin_manager.get_implementations(octoprint.plugin.StartupPlugin)
+            self.assertEqual(2, sort_implementations.call_count)
+
+    def test_sorted_implementations_invalidated(self):
+        self.plugin_manager.get_implementations(octoprint.plugin.StartupPlugin)
+        revision = self.plugin_manager.implementations_revision
+
+        plugin = self.plugin_manager.get_plugin_info("startup_plugin")
+        self.plugin_manager._deactivate_plugin("startup_plugin", plugin)
+        self.assertTrue(self.plugin_manager.implementations_revision > revision)
+        self.assertListEqual(
+            ["mixed_plugin"],
+            [
+                x._identifier
+                for x in self.plugin_manager.get_implementations(
+                    octoprint.plugin.StartupPlugin
+                )
+            ],
+        )
+
+        self.plugin_manager._activate_plugin("startup_plugin", plugin)
+        self.assertListEqual(
+            ["mixed_plugin", "startup_plugin"],
+            [
+                x._identifier
+                for x in self.plugin_manager.get_implementations(
+                    octoprint.plugin.StartupPlugin
+                )
+            ],
+        )
+
+    def test_dispatch_counts(self):
+        with mock.patch("octoprint.plugin.plugin_manager") as plugin_manager:
+            plugin_manager.return_value = self.plugin_manager
+            octoprint.plugin.call_plugin(
+                octoprint.plugin.StartupPlugin, "on_after_startup"
+            )
+            octoprint.plugin.call_plugin(
+                [octoprint.plugin.StartupPlugin, octoprint.plugin.SettingsPlugin],
+                "on_after_startup",
+            )
+
+        self.assertDictEqual(
+            {
+                "StartupPlugin": {"dispatches": 2, "calls": 3},
+                "SettingsPlugin": {"dispatches": 1, "calls": 1},
+            },
+            self.plugin_manager.dispatch_counts,
+        )
+
     def test_client_registration(self):
         def test_client(*args, **kwargs):
             pass
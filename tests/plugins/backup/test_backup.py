@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Unit tests for ``octoprint.plugins.backup``.
+"""
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+
+import mock
+
+from octoprint.plugins.backup import MANIFEST_FILE, BackupInUse, BackupPlugin
+
+
+class BackupTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+        self.basedir = os.path.join(self.root, "octoprint")
+        self.datafolder = os.path.join(self.basedir, "data", "backup")
+        os.makedirs(self.datafolder)
+
+        self._write("config.yaml", "appearance:\n  name: test\n")
+        self._write("users.yaml", "{}\n")
+        self._write("uploads/part.gcode", "G28\n" * 1000)
+        self._write("uploads/large.gcode", "G1 X10\n" * 10000)
+        self._write("timelapse/print.mp4", "not really a video")
+
+        self.settings = mock.MagicMock()
+        self.settings._basedir = self.basedir
+        self.settings._configfile = os.path.join(self.basedir, "config.yaml")
+        self.settings.global_get_basefolder.side_effect = lambda folder: os.path.join(
+            self.basedir, folder
+        )
+        self.settings.global_get.return_value = None
+
+        self.plugin_manager = mock.MagicMock()
+        self.plugin_manager.get_hooks.return_value = {}
+        self.plugin_manager.get_helpers.return_value = {}
+        self.plugin_manager.plugins = {}
+
+        # exercise both reading files ahead and streaming them
+        patcher = mock.patch("octoprint.plugins.backup.PREFETCH_SIZE", 8 * 1024)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _write(self, path, content, mtime=None):
+        path = os.path.join(self.basedir, path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with io.open(path, "wt", encoding="utf-8") as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    def _backup(self, name, incremental=False, mtime=None):
+        BackupPlugin._create_backup(
+            name,
+            settings=self.settings,
+            plugin_manager=self.plugin_manager,
+            datafolder=self.datafolder,
+            incremental=incremental,
+        )
+        path = os.path.join(self.datafolder, name)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return zipfile.ZipFile(path)
+
+    def _restore(self, name):
+        path = os.path.join(self.root, "restore.zip")
+        shutil.copy(os.path.join(self.datafolder, name), path)
+
+        with mock.patch.object(
+            BackupPlugin, "_get_plugin_repository_data", return_value={}
+        ), mock.patch.object(BackupPlugin, "_restore_supported", return_value=True):
+            return BackupPlugin._restore_backup(
+                path,
+                settings=self.settings,
+                plugin_manager=self.plugin_manager,
+                datafolder=self.datafolder,
+            )
+
+    def _read(self, path):
+        with io.open(os.path.join(self.basedir, path), "rt", encoding="utf-8") as f:
+            return f.read()
+
+    def test_full(self):
+        with self._backup("full.zip") as zip:
+            infos = {info.filename: info for info in zip.infolist()}
+            metadata = json.loads(zip.read("metadata.json"))
+            manifest = json.loads(zip.read(MANIFEST_FILE))["files"]
+
+        self.assertEqual(
+            zipfile.ZIP_DEFLATED, infos["basedir/uploads/large.gcode"].compress_type
+        )
+        self.assertEqual(
+            zipfile.ZIP_STORED, infos["basedir/timelapse/print.mp4"].compress_type
+        )
+        self.assertNotIn("basedir/data/backup/full.zip", infos)
+
+        self.assertEqual([], metadata["requires"])
+        self.assertEqual(
+            {
+                "basedir/config.yaml",
+                "basedir/users.yaml",
+                "basedir/uploads/part.gcode",
+                "basedir/uploads/large.gcode",
+                "basedir/timelapse/print.mp4",
+            },
+            set(manifest.keys()),
+        )
+        self.assertEqual(
+            os.stat(os.path.join(self.basedir, "uploads/large.gcode")).st_size,
+            manifest["basedir/uploads/large.gcode"]["size"],
+        )
+
+    def test_full_keeps_duplicates(self):
+        self._write("uploads/a.gcode", "")
+        self._write("uploads/b.gcode", "")
+        self._write("uploads/c.gcode", "G28\n")
+        self._write("uploads/d.gcode", "G28\n")
+
+        with self._backup("full.zip") as zip:
+            names = set(zip.namelist())
+            manifest = json.loads(zip.read(MANIFEST_FILE))["files"]
+
+        for path in ("a", "b", "c", "d"):
+            arcname = "basedir/uploads/{}.gcode".format(path)
+            self.assertIn(arcname, names)
+            self.assertNotIn("source", manifest[arcname])
+
+    def test_files_removed_while_backing_up(self):
+        collect = BackupPlugin._collect_files.__func__
+
+        def collect_and_remove(cls, source, target, files, ignored=None):
+            collect(cls, source, target, files, ignored=ignored)
+            if target == "basedir/uploads":
+                # one read ahead, one streamed
+                os.remove(os.path.join(self.basedir, "uploads/part.gcode"))
+                os.remove(os.path.join(self.basedir, "uploads/large.gcode"))
+
+        with mock.patch.object(
+            BackupPlugin, "_collect_files", classmethod(collect_and_remove)
+        ):
+            with self._backup("full.zip") as zip:
+                names = set(zip.namelist())
+                manifest = json.loads(zip.read(MANIFEST_FILE))["files"]
+
+        self.assertNotIn("basedir/uploads/part.gcode", names)
+        self.assertNotIn("basedir/uploads/large.gcode", names)
+        self.assertEqual(
+            {
+                "basedir/config.yaml",
+                "basedir/users.yaml",
+                "basedir/timelapse/print.mp4",
+            },
+            set(manifest.keys()),
+        )
+
+    def test_incremental(self):
+        self._backup("first.zip", incremental=True, mtime=1600000000)
+
+        self._write("uploads/part.gcode", "G28\nM84\n", mtime=1600001000)
+        shutil.copy(
+            os.path.join(self.basedir, "uploads/large.gcode"),
+            os.path.join(self.basedir, "uploads/copy.gcode"),
+        )
+        with self._backup("second.zip", incremental=True) as zip:
+            names = set(zip.namelist())
+            metadata = json.loads(zip.read("metadata.json"))
+            manifest = json.loads(zip.read(MANIFEST_FILE))["files"]
+
+        self.assertEqual(
+            {"metadata.json", MANIFEST_FILE, "basedir/uploads/part.gcode"}, names
+        )
+        self.assertEqual(["first.zip"], metadata["requires"])
+        self.assertEqual(
+            {"backup": "first.zip", "source": "basedir/uploads/large.gcode"},
+            {
+                key: value
+                for key, value in manifest["basedir/uploads/copy.gcode"].items()
+                if key in ("backup", "source")
+            },
+        )
+        self.assertNotIn("backup", manifest["basedir/uploads/part.gcode"])
+
+        self.assertEqual(
+            ["second.zip"],
+            BackupPlugin._get_dependent_backups(self.datafolder, "first.zip"),
+        )
+        plugin = BackupPlugin()
+        plugin.get_plugin_data_folder = lambda: self.datafolder
+        with self.assertRaises(BackupInUse):
+            plugin._delete_backup("first.zip")
+        self.assertTrue(os.path.exists(os.path.join(self.datafolder, "first.zip")))
+
+    def test_restore_incremental(self):
+        self._backup("first.zip", incremental=True, mtime=1600000000)
+        self._write("uploads/part.gcode", "G28\nM84\n", mtime=1600001000)
+        shutil.copy(
+            os.path.join(self.basedir, "uploads/large.gcode"),
+            os.path.join(self.basedir, "uploads/copy.gcode"),
+        )
+        self._backup("second.zip", incremental=True)
+        large = self._read("uploads/large.gcode")
+
+        self._write("uploads/part.gcode", "changed after the backup")
+        self.assertTrue(self._restore("second.zip"))
+
+        self.assertEqual("G28\nM84\n", self._read("uploads/part.gcode"))
+        self.assertEqual(large, self._read("uploads/copy.gcode"))
+        self.assertEqual(large, self._read("uploads/large.gcode"))
+        self.assertEqual(
+            1600001000, os.stat(os.path.join(self.basedir, "uploads/part.gcode")).st_mtime
+        )
+
+    def test_restore_missing_base(self):
+        self._backup("first.zip", incremental=True, mtime=1600000000)
+        self._write("uploads/part.gcode", "G28\nM84\n", mtime=1600001000)
+        self._backup("second.zip", incremental=True)
+        os.remove(os.path.join(self.datafolder, "first.zip"))
+
+        on_invalid_backup = mock.MagicMock()
+        with mock.patch.object(
+            BackupPlugin, "_get_plugin_repository_data", return_value={}
+        ), mock.patch.object(BackupPlugin, "_restore_supported", return_value=True):
+            path = os.path.join(self.root, "restore.zip")
+            shutil.copy(os.path.join(self.datafolder, "second.zip"), path)
+            self.assertFalse(
+                BackupPlugin._restore_backup(
+                    path,
+                    settings=self.settings,
+                    plugin_manager=self.plugin_manager,
+                    datafolder=self.datafolder,
+                    on_invalid_backup=on_invalid_backup,
+                )
+            )
+
+        self.assertIn("first.zip", on_invalid_backup.call_args[0][0])
+        self.assertEqual("G28\nM84\n", self._read("uploads/part.gcode"))
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Unit tests for the API key resolution in ``octoprint.server.util``.
+"""
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import unittest
+
+import mock
+
+import octoprint.server
+from octoprint.access.users import clear_validated_apikeys
+from octoprint.server.util import get_user_for_apikey
+
+
+class GetUserForApiKeyTest(unittest.TestCase):
+    def setUp(self):
+        self.ttl = 10.0
+
+        settings = mock.MagicMock()
+        settings.get.return_value = "MASTERKEY"
+        settings.getFloat.side_effect = lambda path: self.ttl
+        patcher = mock.patch("octoprint.server.util.settings")
+        patcher.start().return_value = settings
+        self.addCleanup(patcher.stop)
+
+        self.user = mock.MagicMock()
+        self.validator = mock.MagicMock(
+            side_effect=lambda key: self.user if key == "APPKEY" else None
+        )
+        patcher = mock.patch("octoprint.server.util.plugin_manager")
+        patcher.start().return_value.get_hooks.return_value = {
+            "validator": self.validator
+        }
+        self.addCleanup(patcher.stop)
+
+        self.user_manager = mock.MagicMock()
+        self.user_manager.find_user.return_value = None
+        patcher = mock.patch.object(octoprint.server, "userManager", self.user_manager)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        clear_validated_apikeys()
+        self.addCleanup(clear_validated_apikeys)
+
+    def test_master_key(self):
+        self.assertEqual(
+            self.user_manager.api_user_factory.return_value,
+            get_user_for_apikey("MASTERKEY"),
+        )
+        self.validator.assert_not_called()
+
+    def test_validator_results_cached(self):
+        for _ in range(3):
+            self.assertEqual(self.user, get_user_for_apikey("APPKEY"))
+            self.assertIsNone(get_user_for_apikey("UNKNOWN"))
+        self.assertEqual(2, self.validator.call_count)
+
+        clear_validated_apikeys()
+        get_user_for_apikey("APPKEY")
+        self.assertEqual(3, self.validator.call_count)
+
+    def test_cache_disabled(self):
+        self.ttl = 0
+        for _ in range(3):
+            get_user_for_apikey("APPKEY")
+        self.assertEqual(3, self.validator.call_count)
+
+    def test_cache_expires(self):
+        with mock.patch("octoprint.server.util.monotonic_time") as monotonic_time:
+            monotonic_time.return_value = 100
+            get_user_for_apikey("APPKEY")
+            monotonic_time.return_value = 111
+            get_user_for_apikey("APPKEY")
+        self.assertEqual(2, self.validator.call_count)
@@ -12,10 +12,12 @@ __copyright__ = "Copyright (C) 2016 The OctoPrint Project - Released under terms
 
 import unittest
 
+import flask
 import mock
 from ddt import data, ddt, unpack
 
 from octoprint.server.util.flask import (
+    LessSimpleCache,
     OctoPrintFlaskRequest,
     OctoPrintFlaskResponse,
     ReverseProxiedEnvironment,
@@ -582,3 +584,91 @@ class OctoPrintFlaskResponseTest(unittest.TestCase):
                             path=expected_path_delete,
                             domain=None,
                         )
+
+
+class LessSimpleCacheTest(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = LessSimpleCache(threshold=2)
+        cache.set("a", b"a")
+        cache.set("b", b"b")
+        self.assertEqual(b"a", cache.get("a"))
+
+        cache.set("c", b"c")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(b"a", cache.get("a"))
+        self.assertEqual(b"c", cache.get("c"))
+
+        stats = cache.stats
+        self.assertEqual(2, stats["entries"])
+        self.assertEqual(2, stats["size"])
+        self.assertEqual(1, stats["evictions"])
+        self.assertEqual(3, stats["hits"])
+        self.assertEqual(1, stats["misses"])
+
+    def test_max_size(self):
+        cache = LessSimpleCache(threshold=None, max_size=10)
+        cache.set("a", b"x" * 4)
+        cache.set("b", b"x" * 4)
+        cache.set("c", b"x" * 4)
+
+        self.assertNotIn("a", cache)
+        self.assertIn("b", cache)
+        self.assertEqual(8, cache.stats["size"])
+
+        cache.delete("b")
+        self.assertEqual(4, cache.stats["size"])
+
+    def test_timeout(self):
+        cache = LessSimpleCache(default_timeout=10)
+        with mock.patch("time.time", return_value=100):
+            cache.set("expires", "value")
+            cache.set("never", "value", timeout=-1)
+            self.assertFalse(cache.add("expires", "other"))
+
+        with mock.patch("time.time", return_value=111):
+            self.assertIsNone(cache.get("expires"))
+            self.assertEqual("value", cache.get("never"))
+            self.assertTrue(cache.add("expires", "other"))
+
+        self.assertEqual(1, cache.stats["expirations"])
+
+    def test_response(self):
+        cache = LessSimpleCache()
+        response = OctoPrintFlaskResponse(
+            "<html></html>", status=200, headers={"ETag": '"abc"'}
+        )
+        cache.set("view", response)
+
+        with mock.patch("pickle.loads") as loads:
+            first = cache.get("view")
+            second = cache.get("view")
+        loads.assert_not_called()
+
+        self.assertIsInstance(first, OctoPrintFlaskResponse)
+        self.assertIsNot(first, second)
+        self.assertEqual(b"<html></html>", first.get_data())
+        self.assertEqual(200, first.status_code)
+        self.assertEqual(("abc", False), first.get_etag())
+
+        # modifying a response served from the cache doesn't modify the cached entry
+        first.headers["X-From-Cache"] = "true"
+        self.assertNotIn("X-From-Cache", second.headers)
+        self.assertNotIn("X-From-Cache", cache.get("view").headers)
+
+    def test_pickled(self):
+        cache = LessSimpleCache()
+        value = {"some": ["data"]}
+        cache.set("key", value)
+
+        cached = cache.get("key")
+        self.assertEqual(value, cached)
+        self.assertIsNot(value, cached)
+
+    def test_streamed_response(self):
+        cache = LessSimpleCache()
+        response = flask.Response(iter([b"streamed"]))
+        self.assertTrue(response.is_streamed)
+
+        with mock.patch("pickle.dumps", return_value=b"pickled") as dumps:
+            cache.set("view", response)
+        dumps.assert_called_once()
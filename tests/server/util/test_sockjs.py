@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+"""
+Unit tests for ``octoprint.server.util.sockjs``.
+"""
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import json
+import time
+import unittest
+
+import mock
+
+from octoprint.access.permissions import Permissions
+from octoprint.events import Events
+from octoprint.server.util.sockjs import PrinterStateBroadcaster, PrinterStateConnection
+
+
+def _user(*permissions):
+    user = mock.MagicMock()
+    user.has_permission.side_effect = lambda p: p in permissions
+    return user
+
+
+class PrinterStateBroadcasterTest(unittest.TestCase):
+    def setUp(self):
+        self.printer = mock.MagicMock()
+        self.event_manager = mock.MagicMock()
+        self.plugin_manager = mock.MagicMock()
+        self.plugin_manager.get_hooks.return_value = {}
+
+        self.broadcaster = PrinterStateBroadcaster(
+            self.printer, self.event_manager, self.plugin_manager
+        )
+
+    def _connection(self, user, emit_hook=None):
+        session = mock.MagicMock()
+        session.is_closed = False
+        session.send_expects_json = True
+
+        connection = PrinterStateConnection(
+            self.printer,
+            mock.MagicMock(),
+            mock.MagicMock(),
+            mock.MagicMock(),
+            mock.MagicMock(),
+            self.event_manager,
+            self.plugin_manager,
+            mock.MagicMock(),
+            session,
+            broadcaster=self.broadcaster,
+        )
+        connection._user = user
+        if emit_hook is not None:
+            connection._emit_hooks = {"test": emit_hook}
+
+        self.broadcaster.open(connection)
+        self.broadcaster.register(connection)
+        return connection
+
+    def _frames(self, connection):
+        return [
+            json.loads(c[0][0]) for c in connection.session.send_jsonified.call_args_list
+        ]
+
+    def test_current_encoded_once(self):
+        connections = [self._connection(_user(Permissions.STATUS)) for _ in range(3)]
+
+        self.broadcaster.on_printer_add_temperature({"tool0": {"actual": 200.0}})
+        self.broadcaster.on_printer_add_log("Recv: ok")
+        data = {"state": {"text": "Operational"}}
+        self.broadcaster.on_printer_send_current_data(data)
+
+        frames = [c.session.send_jsonified.call_args[0][0] for c in connections]
+        self.assertEqual(1, len(set(frames)))
+
+        current = json.loads(frames[0])["current"]
+        self.assertEqual([{"tool0": {"actual": 200.0}}], current["temps"])
+        self.assertEqual(["Recv: ok"], current["logs"])
+        self.assertEqual({"state": {"text": "Operational"}}, data)
+
+        self.assertEqual(
+            {"broadcasts": 1, "encoded": 1, "shared": 2}, self.broadcaster.stats
+        )
+        for connection in connections:
+            connection.session.send_message.assert_not_called()
+
+    def test_current_backlogs_differ(self):
+        first = self._connection(_user(Permissions.STATUS))
+        second = self._connection(_user(Permissions.STATUS))
+        first.on_printer_add_log("Send: M105")
+
+        self.broadcaster.on_printer_send_current_data({})
+
+        self.assertEqual(["Send: M105"], self._frames(first)[0]["current"]["logs"])
+        self.assertEqual([], self._frames(second)[0]["current"]["logs"])
+        self.assertEqual(2, self.broadcaster.stats["encoded"])
+
+    def test_per_client_permissions_and_hooks(self):
+        admin = self._connection(_user(Permissions.STATUS, Permissions.ADMIN))
+        status = self._connection(_user(Permissions.STATUS))
+        hook = mock.MagicMock(return_value=False)
+        blocked = self._connection(_user(Permissions.STATUS), emit_hook=hook)
+        unauthed = self._connection(_user())
+
+        self.broadcaster._on_event(Events.CLIENT_OPENED, {"remoteAddress": "1.2.3.4"})
+
+        self.assertEqual(
+            [
+                {
+                    "event": {
+                        "type": "ClientOpened",
+                        "payload": {"remoteAddress": "1.2.3.4"},
+                    }
+                }
+            ],
+            self._frames(admin),
+        )
+        self.assertEqual(
+            [{"event": {"type": "ClientOpened", "payload": {}}}], self._frames(status)
+        )
+        hook.assert_called_once_with(
+            blocked, blocked._user, "event", {"type": "ClientOpened", "payload": {}}
+        )
+        blocked.session.send_jsonified.assert_not_called()
+        unauthed.session.send_jsonified.assert_not_called()
+        self.assertEqual(1, len(unauthed._unauthed_backlog))
+
+        self.broadcaster.on_plugin_message("test", {"some": "data"})
+        self.assertEqual(
+            {"plugin": {"plugin": "test", "data": {"some": "data"}}},
+            self._frames(status)[-1],
+        )
+        self.assertEqual(self._frames(admin)[-1], self._frames(status)[-1])
+        self.assertEqual(2, len(unauthed._unauthed_backlog))
+
+    def test_registrations(self):
+        first = self._connection(_user(Permissions.STATUS))
+        second = self._connection(_user(Permissions.STATUS))
+
+        self.printer.register_callback.assert_called_once_with(self.broadcaster)
+        self.plugin_manager.register_message_receiver.assert_called_once_with(
+            self.broadcaster.on_plugin_message
+        )
+
+        self.printer.send_initial_callback.side_effect = (
+            lambda callback: callback.on_printer_send_initial_data({"state": {}})
+        )
+        self.broadcaster.send_initial(first)
+        self.assertEqual(
+            ["history"], list(first.session.send_message.call_args[0][0].keys())
+        )
+        second.session.send_message.assert_not_called()
+
+        # only routed during send_initial
+        self.broadcaster.on_printer_send_initial_data({"state": {}})
+        self.assertEqual(1, first.session.send_message.call_count)
+
+        for connection in (first, second):
+            self.broadcaster.unregister(connection)
+            self.broadcaster.close(connection)
+        self.printer.unregister_callback.assert_called_once_with(self.broadcaster)
+        self.plugin_manager.unregister_message_receiver.assert_called_once_with(
+            self.broadcaster.on_plugin_message
+        )
+
+    def test_throttled_current_coalesced(self):
+        connection = self._connection(_user(Permissions.STATUS))
+        connection._ioloop = mock.MagicMock()
+        connection._last_current = time.time()
+
+        for i in range(3):
+            self.broadcaster.on_printer_send_current_data({"sequence": i})
+        connection.session.send_jsonified.assert_not_called()
+
+        # a single flush is scheduled on the IOLoop, no threads are created
+        connection._ioloop.add_callback.assert_called_once()
+        call_later, delay, flush = connection._ioloop.add_callback.call_args[0]
+        self.assertEqual(connection._ioloop.call_later, call_later)
+        self.assertTrue(0 < delay <= connection._base_rate_limit)
+
+        connection._last_current = 0
+        flush()
+        self.assertEqual(
+            [2], [frame["current"]["sequence"] for frame in self._frames(connection)]
+        )
+
+        # nothing left to flush
+        flush()
+        self.assertEqual(1, connection.session.send_jsonified.call_count)
+
+    def test_throttled_current_superseded(self):
+        connection = self._connection(_user(Permissions.STATUS))
+        connection._ioloop = mock.MagicMock()
+        connection._last_current = time.time()
+
+        self.broadcaster.on_printer_send_current_data({"sequence": 0})
+        flush = connection._ioloop.add_callback.call_args[0][2]
+
+        # sent right away once the throttle interval is over, the held back update is dropped
+        connection._last_current = 0
+        self.broadcaster.on_printer_send_current_data({"sequence": 1})
+        flush()
+        self.assertEqual(
+            [1], [frame["current"]["sequence"] for frame in self._frames(connection)]
+        )
@@ -13,6 +13,7 @@ __copyright__ = "Copyright (C) 2016 The OctoPrint Project - Released under terms
 import unittest
 
 from ddt import data, ddt, unpack
+from tornado.testing import AsyncHTTPTestCase, gen_test
 
 ##~~ _parse_header
 
@@ -105,3 +106,177 @@ class ExtendedHeaderValueTest(unittest.TestCase):
         actual = _extended_header_value(value)
 
         self.assertEqual(expected, actual)
+
+
+##~~ UploadStorageFallbackHandler
+
+
+class UploadStorageFallbackHandlerTest(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+
+        shutil.rmtree(self.folder)
+
+    def _process(self, body, chunk_size=7):
+        from octoprint.server.util.tornado import UploadStorageFallbackHandler
+
+        handler = UploadStorageFallbackHandler.__new__(UploadStorageFallbackHandler)
+        handler.initialize(None, path=self.folder)
+        handler._content_type = "multipart/form-data; boundary=boundary"
+        handler._multipart_boundary = b"boundary"
+
+        for i in range(0, len(body), chunk_size):
+            handler.data_received(body[i : i + chunk_size])
+        return handler
+
+    def test_sha1(self):
+        import hashlib
+
+        content = b"G28\r\nG1 X10 Y10\r\n" * 100
+        body = (
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="test.gcode"\r\n'
+            b"Content-Type: application/octet-stream\r\n"
+            b"\r\n" + content + b"\r\n"
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="file.sha1"\r\n'
+            b"\r\n"
+            b"0000000000000000000000000000000000000000\r\n"
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="select"\r\n'
+            b"\r\n"
+            b"true\r\n"
+            b"--boundary--\r\n"
+        )
+
+        handler = self._process(body)
+
+        part = handler._parts[b"file"]
+        with open(part["path"], "rb") as f:
+            self.assertEqual(content, f.read())
+
+        digest = hashlib.sha1(content).hexdigest().encode("ascii")
+        self.assertIn(
+            b'name="file.sha1"\r\n'
+            b"Content-Type: text/plain; charset=utf-8\r\n"
+            b"\r\n" + digest + b"\r\n",
+            handler._new_body,
+        )
+        self.assertNotIn(b"0000000000000000000000000000000000000000", handler._new_body)
+        self.assertIn(b'name="select"\r\n\r\ntrue\r\n', handler._new_body)
+
+    def test_generated_fields_without_file(self):
+        body = (
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="file.sha1"\r\n'
+            b"\r\n"
+            b"0000000000000000000000000000000000000000\r\n"
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="file.path"\r\n'
+            b"\r\n"
+            b"/some/path\r\n"
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="select"\r\n'
+            b"\r\n"
+            b"true\r\n"
+            b"--boundary--\r\n"
+        )
+
+        handler = self._process(body)
+
+        self.assertNotIn(b"file.sha1", handler._new_body)
+        self.assertNotIn(b"file.path", handler._new_body)
+        self.assertIn(b'name="select"\r\n\r\ntrue\r\n', handler._new_body)
+
+
+##~~ WsgiInputContainer
+
+
+def _wsgi_app(environ, start_response):
+    import time
+
+    path = environ["PATH_INFO"]
+    if path == "/slow":
+        time.sleep(0.5)
+    elif path == "/large":
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return (b"x" * 1000 for _ in range(100))
+    elif path == "/post":
+        body = environ["wsgi.input"].read()
+        start_response("200 OK", [])
+        return [body]
+
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [path.encode("ascii")]
+
+
+class WsgiInputContainerTest(AsyncHTTPTestCase):
+    executor = True
+
+    def get_app(self):
+        import tornado.web
+
+        from octoprint.server.util.tornado import (
+            UploadStorageFallbackHandler,
+            WsgiInputContainer,
+        )
+
+        executor = None
+        if self.executor:
+            from concurrent.futures import ThreadPoolExecutor
+
+            executor = ThreadPoolExecutor(max_workers=2)
+            self.addCleanup(executor.shutdown)
+
+        container = WsgiInputContainer(
+            _wsgi_app, executor=executor, stream_threshold=16 * 1024
+        )
+        return tornado.web.Application(
+            [(r".*", UploadStorageFallbackHandler, {"fallback": container})]
+        )
+
+    def test_small_response(self):
+        response = self.fetch("/small")
+        self.assertEqual(200, response.code)
+        self.assertEqual(b"/small", response.body)
+        self.assertEqual("6", response.headers["Content-Length"])
+
+    def test_request_body(self):
+        response = self.fetch("/post", method="POST", body=b"some data")
+        self.assertEqual(b"some data", response.body)
+
+    def test_large_response(self):
+        response = self.fetch("/large")
+        self.assertEqual(200, response.code)
+        self.assertEqual(b"x" * 100000, response.body)
+        if self.executor:
+            self.assertNotIn("Content-Length", response.headers)
+            self.assertEqual("chunked", response.headers["Transfer-Encoding"])
+        else:
+            self.assertEqual("100000", response.headers["Content-Length"])
+
+    @gen_test
+    def test_slow_request_doesnt_block(self):
+        if not self.executor:
+            self.skipTest("requests are handled on the IOLoop")
+
+        import tornado.gen
+
+        finished = []
+
+        @tornado.gen.coroutine
+        def fetch(path):
+            yield self.http_client.fetch(self.get_url(path))
+            finished.append(path)
+
+        yield [fetch("/slow"), fetch("/small")]
+        self.assertEqual(["/small", "/slow"], finished)
+
+
+class WsgiInputContainerOnIOLoopTest(WsgiInputContainerTest):
+    executor = False
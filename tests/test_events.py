@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import threading
+import unittest
+
+import mock
+
+import octoprint.plugin
+from octoprint.events import EventLane, EventManager, Events
+
+
+class _Recorder(object):
+    def __init__(self, block=False):
+        self.events = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not block:
+            self.release.set()
+
+    def __call__(self, event, payload):
+        self.started.set()
+        self.release.wait(10)
+        self.events.append((event, payload))
+
+
+class _Plugin(octoprint.plugin.EventHandlerPlugin):
+    def __init__(self, identifier, events=None, lane=None):
+        self._identifier = identifier
+        self.events = events
+        self.lane = lane
+        self.recorder = _Recorder()
+
+    def get_subscribed_events(self):
+        return self.events
+
+    def get_event_lane(self):
+        return self.lane
+
+    def on_event(self, event, payload):
+        self.recorder(event, payload)
+
+
+class EventLaneTest(unittest.TestCase):
+    def _blocked_lane(self, policy, size=2):
+        recorder = _Recorder(block=True)
+        lane = EventLane("test", recorder, size=size, policy=policy)
+        self.addCleanup(lane.join, 10)
+        self.addCleanup(lane.stop)
+        self.addCleanup(recorder.release.set)
+
+        # the first event is taken off the queue and blocks the lane
+        lane.put("Blocking", None)
+        self.assertTrue(recorder.started.wait(10))
+        return lane, recorder
+
+    def _drain(self, lane, recorder):
+        recorder.release.set()
+        lane.stop()
+        self.assertFalse(lane.join(10))
+        return recorder.events[1:]
+
+    def test_drop_oldest(self):
+        lane, recorder = self._blocked_lane(EventLane.DROP_OLDEST)
+        for i in range(4):
+            lane.put("Event", i)
+        self.assertEqual(2, lane.depth)
+
+        self.assertEqual([("Event", 2), ("Event", 3)], self._drain(lane, recorder))
+        self.assertEqual(2, lane.stats.dropped)
+        self.assertEqual(3, lane.stats.delivered)
+
+    def test_drop_newest(self):
+        lane, recorder = self._blocked_lane(EventLane.DROP_NEWEST)
+        for i in range(4):
+            lane.put("Event", i)
+
+        self.assertEqual([("Event", 0), ("Event", 1)], self._drain(lane, recorder))
+        self.assertEqual(2, lane.stats.dropped)
+
+    def test_coalesce(self):
+        lane, recorder = self._blocked_lane(EventLane.COALESCE)
+        lane.put("ZChange", 1)
+        lane.put("Other", "a")
+        lane.put("ZChange", 2)
+        lane.put("ZChange", 3)
+        self.assertEqual(2, lane.depth)
+
+        # drops the queued ZChange, so the next one doesn't coalesce with it
+        lane.put("Third", "b")
+        lane.put("ZChange", 4)
+
+        self.assertEqual([("Third", "b"), ("ZChange", 4)], self._drain(lane, recorder))
+        self.assertEqual(2, lane.stats.coalesced)
+        self.assertEqual(2, lane.stats.dropped)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            EventLane("test", None, policy="unknown")
+
+
+class EventManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.plugins = [
+            _Plugin("all"),
+            _Plugin("filtered", events=["PrintStarted"]),
+            _Plugin("laned", lane={"size": 10, "policy": "coalesce"}),
+            _Plugin("defaults", events=["ZChange"], lane={}),
+        ]
+
+        self.plugin_manager = mock.MagicMock()
+        self.plugin_manager.implementations_revision = 1
+        self.plugin_manager.get_implementations.return_value = self.plugins
+
+        patcher = mock.patch("octoprint.plugin.plugin_manager")
+        patcher.start().return_value = self.plugin_manager
+        self.addCleanup(patcher.stop)
+
+        self.event_manager = EventManager()
+        self.event_manager.fire(Events.STARTUP)
+
+    def _shutdown(self):
+        self.event_manager.fire(Events.SHUTDOWN)
+        self.assertFalse(self.event_manager.join(10))
+
+    def _received(self, plugin):
+        return [event for event, _ in plugin.recorder.events if event != Events.SHUTDOWN]
+
+    def test_plugin_subscriptions(self):
+        self.event_manager.fire("PrintStarted", {})
+        self.event_manager.fire("ZChange", {})
+        self._shutdown()
+
+        all_events, filtered, laned, defaults = self.plugins
+        self.assertEqual(
+            [Events.STARTUP, "PrintStarted", "ZChange"], self._received(all_events)
+        )
+        self.assertEqual(["PrintStarted"], self._received(filtered))
+        self.assertEqual(
+            [Events.STARTUP, "PrintStarted", "ZChange"], self._received(laned)
+        )
+        self.assertEqual(["ZChange"], self._received(defaults))
+
+        # evaluated once per revision of the plugin implementations
+        self.assertEqual(1, self.plugin_manager.get_implementations.call_count)
+
+    def test_plugin_subscriptions_reevaluated(self):
+        self.event_manager.fire("PrintStarted", {})
+
+        plugin = _Plugin("added", events=["ZChange"])
+        self.plugins.append(plugin)
+        self.plugin_manager.implementations_revision = 2
+        self.event_manager.fire("ZChange", {})
+        self._shutdown()
+
+        self.assertEqual(["ZChange"], self._received(plugin))
+
+    def test_listener_lane_and_metrics(self):
+        recorder = _Recorder(block=True)
+        self.event_manager.subscribe(
+            "ZChange", recorder, lane={"size": 1, "policy": "coalesce"}
+        )
+        inline = _Recorder()
+        self.event_manager.subscribe("ZChange", inline)
+
+        self.event_manager.fire("ZChange", 1)
+        self.assertTrue(recorder.started.wait(10))
+        for i in range(2, 5):
+            self.event_manager.fire("ZChange", i)
+        self.event_manager.fire("PrintStarted", {})
+
+        # the blocked lane doesn't hold up anyone else
+        all_events = self.plugins[0]
+        for _ in range(100):
+            if "PrintStarted" in self._received(all_events):
+                break
+            threading.Event().wait(0.05)
+        self.assertIn("PrintStarted", self._received(all_events))
+        self.assertEqual([("ZChange", i) for i in range(1, 5)], inline.events)
+
+        recorder.release.set()
+        self._shutdown()
+        self.assertEqual([("ZChange", 1), ("ZChange", 4)], recorder.events)
+
+        metrics = self.event_manager.subscriber_metrics()
+        lane = [
+            value
+            for key, value in metrics.items()
+            if value["lane"] and "_Recorder" in key
+        ]
+        self.assertEqual(1, len(lane))
+        self.assertEqual(2, lane[0]["delivered"])
+        self.assertEqual(2, lane[0]["coalesced"])
+        self.assertEqual(0, lane[0]["depth"])
+
+        # Startup, 4 x ZChange, PrintStarted, Shutdown
+        self.assertEqual(7, metrics["plugin:all"]["delivered"])
+        self.assertFalse(metrics["plugin:all"]["lane"])
+        self.assertTrue(metrics["plugin:laned"]["lane"])
+        self.assertTrue(metrics["plugin:defaults"]["lane"])
+        self.assertTrue(metrics["plugin:all"]["latency"]["max"] >= 0)
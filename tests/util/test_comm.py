@@ -1,6 +1,10 @@
 # -*- coding: utf-8 -*-
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+import io
+import os
+import shutil
+import tempfile
 import unittest
 
 import ddt
@@ -289,3 +293,415 @@ class TestCommErrorHandling(unittest.TestCase):
         self.assert_not_disconnected()
         self.assert_not_print_cancelled()
         self.assert_not_cleared_to_send()
+
+
+@ddt.ddt
+class TestPrintingGcodeFileInformation(unittest.TestCase):
+    def setUp(self):
+        self.basefolder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.basefolder)
+
+    def _create_file(self, content):
+        path = os.path.join(self.basefolder, "test.gcode")
+        with io.open(path, "wb") as f:
+            f.write(content)
+        return path
+
+    def _read_all(self, file_information):
+        result = []
+        while True:
+            line, pos, lineno = file_information.getNext()
+            if line is None:
+                break
+            result.append((line, pos, lineno))
+        return result
+
+    @ddt.data(None, 1, 3, 7)
+    def test_get_next(self, block_size):
+        content = (
+            b"; header comment\n"
+            b"G28\r\n"
+            b"\n"
+            b"G1 X10 ; move\r"
+            b"M117 H\xc3\xa4ll\xc3\xb6 \\; escaped ; comment\n"
+            b"   \t\n"
+            b"M104 S200"
+        )
+        path = self._create_file(content)
+
+        with mock.patch.object(
+            octoprint.util.comm.ReadAheadLineReader, "BLOCK_SIZE", block_size
+        ):
+            file_information = octoprint.util.comm.PrintingGcodeFileInformation(path)
+            file_information.start()
+            result = self._read_all(file_information)
+
+        self.assertEqual(
+            [
+                ("G28", 22, 1),
+                ("G1 X10", 37, 2),
+                ("M117 H\u00e4ll\u00f6 \\; escaped", 71, 3),
+                ("M104 S200", len(content), 4),
+            ],
+            result,
+        )
+        self.assertTrue(file_information.done)
+        self.assertEqual(len(content), file_information.getFilepos())
+
+    def test_get_next_bom(self):
+        content = b"\xef\xbb\xbfG28\nG1 X10\n"
+        path = self._create_file(content)
+
+        file_information = octoprint.util.comm.PrintingGcodeFileInformation(path)
+        file_information.start()
+        result = self._read_all(file_information)
+
+        self.assertEqual([("G28", 7, 1), ("G1 X10", 14, 2)], result)
+
+    def test_seek(self):
+        content = b"G28\nG1 X10\nG1 X20\nG1 X30\n"
+        path = self._create_file(content)
+
+        file_information = octoprint.util.comm.PrintingGcodeFileInformation(path)
+        file_information.start()
+        self.assertEqual(("G28", 4, 1), file_information.getNext())
+
+        file_information.seek(11)
+        self.assertEqual(11, file_information.getFilepos())
+        self.assertEqual(
+            [("G1 X20", 18, 1), ("G1 X30", 25, 2)], self._read_all(file_information)
+        )
+
+    def test_temperature_offsets(self):
+        content = b"M104 S200\nG1 X10\nM140 S60\n"
+        path = self._create_file(content)
+
+        offsets_callback = mock.Mock(return_value={"tool0": 10, "bed": 5})
+        current_tool_callback = mock.Mock(return_value=0)
+
+        file_information = octoprint.util.comm.PrintingGcodeFileInformation(
+            path,
+            offsets_callback=offsets_callback,
+            current_tool_callback=current_tool_callback,
+        )
+        file_information.start()
+        result = [line for line, _, _ in self._read_all(file_information)]
+
+        self.assertEqual(["M104 S210.000000", "G1 X10", "M140 S65.000000"], result)
+        self.assertEqual(2, offsets_callback.call_count)
+
+    def test_close(self):
+        path = self._create_file(b"G28\n" * 100000)
+
+        file_information = octoprint.util.comm.PrintingGcodeFileInformation(path)
+        file_information.start()
+        self.assertEqual(("G28", 4, 1), file_information.getNext())
+
+        file_information.close()
+        self.assertEqual((None, None, None), file_information.getNext())
+
+
+class TestCommandPhaseDispatch(unittest.TestCase):
+    def setUp(self):
+        import collections
+        import logging
+
+        self._hooks = {}
+
+        self._plugin_manager = mock.Mock()
+        self._plugin_manager.hooks_revision = 0
+        self._plugin_manager.get_hooks.side_effect = lambda hook: collections.OrderedDict(
+            self._hooks.get(hook, [])
+        )
+
+        comm = octoprint.util.comm.MachineCom.__new__(octoprint.util.comm.MachineCom)
+        comm._logger = logging.getLogger(__name__)
+        comm._phaseLogger = logging.getLogger(__name__ + ".command_phases")
+        comm._pluginManager = self._plugin_manager
+        comm._state = octoprint.util.comm.MachineCom.STATE_OPERATIONAL
+        comm._currentFile = None
+        comm._connection_closing = True  # nothing to close on __del__
+        comm._refresh_command_phase_dispatch()
+        self._comm = comm
+
+    def _register(self, phase, *hooks):
+        self._hooks["octoprint.comm.protocol.gcode." + phase] = list(hooks)
+        self._plugin_manager.hooks_revision += 1
+
+    def test_unfiltered_hook(self):
+        hook = mock.Mock(return_value=None)
+        self._register("queued", ("plugin", hook))
+
+        result = self._comm._process_command_phase("queued", "M117 Test")
+
+        self.assertEqual([("M117 Test", None, "M117", None, None)], result)
+        hook.assert_called_once_with(
+            self._comm, "queued", "M117 Test", None, "M117", subcode=None, tags=None
+        )
+
+    def test_filtered_hook(self):
+        hook = octoprint.util.comm.handles_gcodes("M104")(mock.Mock(return_value=None))
+        self._register("queued", ("plugin", hook))
+
+        self._comm._process_command_phase("queued", "M117 Test")
+        hook.assert_not_called()
+
+        self._comm._process_command_phase("queued", "M104 S200")
+        hook.assert_called_once_with(
+            self._comm, "queued", "M104 S200", None, "M104", subcode=None, tags=None
+        )
+
+    def test_filtered_hook_after_rewrite(self):
+        rewrite = mock.Mock(return_value=("M118 Test",))
+        hook = octoprint.util.comm.handles_gcodes("M118")(mock.Mock(return_value=None))
+        self._register("queued", ("rewrite", rewrite), ("plugin", hook))
+
+        result = self._comm._process_command_phase("queued", "M117 Test")
+
+        self.assertEqual(1, len(result))
+        self.assertEqual("M118 Test", result[0][0])
+        self.assertEqual("M118", result[0][2])
+        hook.assert_called_once()
+
+    def test_refresh_on_hook_changes(self):
+        self._comm._process_command_phase("queued", "M117 Test")
+
+        hook = mock.Mock(return_value=None)
+        self._register("queued", ("plugin", hook))
+
+        self._comm._process_command_phase("queued", "M117 Test")
+        hook.assert_called_once()
+
+    def test_gcode_handler(self):
+        self._comm._callback = mock.Mock()
+        self._comm._currentZ = None
+        self._comm._currentF = None
+
+        self._comm._process_command_phase("sent", "G1 Z10 F3000")
+
+        self.assertEqual(10.0, self._comm._currentZ)
+        self.assertEqual(3000.0, self._comm._currentF)
+        self._comm._callback.on_comm_z_change.assert_called_once_with(10.0)
+
+
+class FakeSerial(object):
+    def __init__(self, chunks):
+        self._timeout = 0.01
+        self._chunks = list(chunks)
+        self._pending = b""
+        self.reads = 0
+
+    @property
+    def in_waiting(self):
+        if not self._pending and self._chunks:
+            self._pending = self._chunks.pop(0)
+        return len(self._pending)
+
+    def read(self, size=1):
+        self.reads += 1
+        if not self._pending and self._chunks:
+            self._pending = self._chunks.pop(0)
+        data, self._pending = self._pending[:size], self._pending[size:]
+        return data
+
+
+class TestBufferedReadlineWrapper(unittest.TestCase):
+    def test_readline(self):
+        serial_obj = FakeSerial([b"ok\nT:21.0 /0.0\nok", b" T:21.0\n"])
+        wrapper = octoprint.util.comm.BufferedReadlineWrapper(serial_obj)
+
+        self.assertEqual(b"ok\n", wrapper.readline())
+        self.assertEqual(b"T:21.0 /0.0\n", wrapper.readline())
+        self.assertEqual(b"ok T:21.0\n", wrapper.readline())
+        self.assertEqual(b"", wrapper.readline())
+        self.assertEqual(3, serial_obj.reads)
+
+    def test_burst(self):
+        serial_obj = FakeSerial([b"ok\nok\nok\nbusy:", b" processing\n"])
+        wrapper = octoprint.util.comm.BufferedReadlineWrapper(serial_obj)
+
+        for _ in range(3):
+            self.assertEqual(b"ok\n", wrapper.readline())
+        self.assertEqual(1, serial_obj.reads)
+        self.assertEqual(b"busy: processing\n", wrapper.readline())
+        self.assertEqual(2, serial_obj.reads)
+
+    def test_split_terminator(self):
+        serial_obj = FakeSerial([b"ok\r", b"\nok\r\n"])
+        wrapper = octoprint.util.comm.BufferedReadlineWrapper(serial_obj)
+
+        self.assertEqual(b"ok\r\n", wrapper.readline(terminator=b"\r\n"))
+        self.assertEqual(b"ok\r\n", wrapper.readline(terminator=b"\r\n"))
+
+
+class TestReceiveBufferWindow(unittest.TestCase):
+    def test_reserve_and_release(self):
+        window = octoprint.util.comm.ReceiveBufferWindow(16)
+
+        self.assertTrue(window.reserve(10))
+        self.assertTrue(window.reserve(6))
+        self.assertEqual(16, window.outstanding)
+        self.assertEqual(2, window.lines)
+
+        # doesn't fit
+        self.assertFalse(window.reserve(1, timeout=0.01))
+
+        window.release()
+        self.assertEqual(6, window.outstanding)
+        self.assertTrue(window.reserve(10, timeout=0.01))
+        self.assertEqual(16, window.outstanding)
+
+    def test_reserve_without_waiting(self):
+        window = octoprint.util.comm.ReceiveBufferWindow(16)
+        window.reserve(16)
+
+        self.assertTrue(window.reserve(4, wait=False))
+        self.assertEqual(20, window.outstanding)
+
+    def test_oversized_line(self):
+        window = octoprint.util.comm.ReceiveBufferWindow(16)
+
+        self.assertTrue(window.reserve(32, timeout=0.01))
+        self.assertFalse(window.reserve(1, timeout=0.01))
+
+    def test_reset(self):
+        window = octoprint.util.comm.ReceiveBufferWindow(16)
+        window.reserve(10)
+        window.reserve(6)
+
+        window.reset()
+        self.assertEqual(0, window.outstanding)
+        self.assertEqual(0, window.lines)
+
+        # nothing left to release
+        window.release()
+        self.assertEqual(0, window.outstanding)
+
+    def test_cancel(self):
+        window = octoprint.util.comm.ReceiveBufferWindow(16)
+        window.reserve(10)
+        window.reserve(6)
+
+        window.cancel()
+        self.assertEqual(10, window.outstanding)
+        self.assertEqual(1, window.lines)
+
+    def test_release_wakes_up_waiting_reserve(self):
+        import threading
+
+        window = octoprint.util.comm.ReceiveBufferWindow(16)
+        window.reserve(16)
+
+        result = []
+        thread = threading.Thread(target=lambda: result.append(window.reserve(8)))
+        thread.daemon = True
+        thread.start()
+
+        window.release()
+        thread.join(1.0)
+
+        self.assertEqual([True], result)
+        self.assertEqual(8, window.outstanding)
+
+
+@ddt.ddt
+class TestWindowedSending(unittest.TestCase):
+    def setUp(self):
+        comm = octoprint.util.comm.MachineCom.__new__(octoprint.util.comm.MachineCom)
+        comm._rx_window = octoprint.util.comm.ReceiveBufferWindow(32)
+        comm._clear_to_send = octoprint.util.CountedEvent(minimum=None, maximum=1)
+        comm._clear_to_send.set()
+        comm._unknownCommandsNeedAck = False
+        comm._checksum_requiring_commands = ["M110"]
+        comm._sendChecksumWithUnknownCommands = False
+        comm._neverSendChecksum = True
+        comm._current_line = 123
+        comm._connection_closing = True  # nothing to close on __del__
+        self._comm = comm
+
+    @ddt.data(
+        ("G1 X10", "G1", None, 7),
+        ("M110 N0", "M110", None, 8 + 3 + 6),
+        ("G1 X10", "G1", 99, 7 + 2 + 6),
+    )
+    @ddt.unpack
+    def test_use_up_clear(self, command, gcode, linenumber, expected):
+        result = self._comm._use_up_clear(gcode, command=command, linenumber=linenumber)
+
+        self.assertFalse(result)
+        self.assertEqual(expected, self._comm._rx_window.outstanding)
+        self.assertFalse(self._comm._clear_to_send.blocked())
+
+    def test_use_up_clear_unacknowledged(self):
+        result = self._comm._use_up_clear(None, command="@pause")
+
+        self.assertFalse(result)
+        self.assertEqual(0, self._comm._rx_window.outstanding)
+
+    def test_use_up_clear_not_windowed(self):
+        self._comm._rx_window = None
+
+        result = self._comm._use_up_clear("G1", command="G1 X10")
+
+        self.assertTrue(result)
+        self.assertTrue(self._comm._clear_to_send.blocked())
+
+
+class TestCommunicationLog(unittest.TestCase):
+    def test_read(self):
+        log = octoprint.util.comm.CommunicationLog(10)
+
+        _, notify = log.record(log.SEND, b"N1 M110 N0*125")
+        self.assertTrue(notify)
+        _, notify = log.record(log.RECV, "ok\n")
+        self.assertFalse(notify)
+        log.record(log.INFO, "Changing monitoring state")
+
+        self.assertEqual(
+            ["Send: N1 M110 N0*125", "Recv: ok", "Changing monitoring state"],
+            log.read(),
+        )
+        self.assertEqual([], log.read())
+
+        _, notify = log.record(log.RECV, "wait\n")
+        self.assertTrue(notify)
+        self.assertEqual(["Recv: wait"], log.read())
+
+    def test_read_overflow(self):
+        log = octoprint.util.comm.CommunicationLog(3)
+        for i in range(5):
+            log.record(log.INFO, "line {}".format(i))
+
+        self.assertEqual(
+            ["[... 2 lines skipped]", "line 2", "line 3", "line 4"], log.read()
+        )
+
+        # only what got lost since the last read counts
+        log.record(log.INFO, "line 5")
+        self.assertEqual(["line 5"], log.read())
+
+    def test_tail(self):
+        log = octoprint.util.comm.CommunicationLog(10)
+        for i in range(5):
+            log.record(log.INFO, "line {}".format(i))
+
+        self.assertEqual(["line 3", "line 4"], log.tail(2))
+        self.assertEqual([], log.tail(0))
+
+        # tail doesn't count as read
+        self.assertEqual(5, len(log.read()))
+
+    def test_callback_default(self):
+        log = octoprint.util.comm.CommunicationLog(10)
+        log.record(log.SEND, b"M105")
+        log.record(log.RECV, "ok T:21.3\n")
+
+        callback = octoprint.util.comm.MachineComPrintCallback()
+        with mock.patch.object(callback, "on_comm_log") as on_comm_log:
+            callback.on_comm_log_available(log)
+
+        on_comm_log.assert_has_calls(
+            [mock.call("Send: M105"), mock.call("Recv: ok T:21.3")]
+        )
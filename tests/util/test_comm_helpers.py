@@ -19,6 +19,9 @@ class TestCommHelpers(unittest.TestCase):
         ("M117 Test \\\\; foo", "M117 Test \\\\"),
         ("M117 Test \\\\\\; foo", "M117 Test \\\\\\; foo"),
         ("; foo", ""),
+        ("M117 \\;Test ; foo \\", "M117 \\;Test "),
+        ("M117 Test\\", "M117 Test\\"),
+        ("M117 Test ; foo ; bar", "M117 Test "),
     )
     @unpack
     def test_strip_comment(self, input, expected):
@@ -26,6 +29,22 @@ class TestCommHelpers(unittest.TestCase):
 
         self.assertEqual(expected, comm.strip_comment(input))
 
+    @data(
+        ([], []),
+        ([b"G28\n", b"G1 X10 ; move\r\n", b"; comment\n"], ["G28", "G1 X10", None]),
+        ([b"M117 \\; Test ; foo\n", b"  \t \r"], ["M117 \\; Test", None]),
+        ([b"M117 Test\x0cFoo\n", b"G28"], ["M117 Test\x0cFoo", "G28"]),
+        (
+            [b"M117 H\xc3\xa4ll\xc3\xb6\n", b"M117 \xff\n"],
+            ["M117 H\u00e4ll\u00f6", "M117 \ufffd"],
+        ),
+    )
+    @unpack
+    def test_preprocess_gcode_lines(self, input, expected):
+        from octoprint.util import comm
+
+        self.assertEqual(expected, comm.preprocess_gcode_lines(input))
+
     @data(
         ("M117 Test", None, None, "M117 Test"),
         ("", None, None, None),
@@ -242,6 +261,14 @@ class TestCommHelpers(unittest.TestCase):
         ("M80.nosubcode", "M80", None),
         (None, None, None),
         ("No match", None, None),
+        ("G1X10 Y10", "G1", None),
+        ("G1", "G1", None),
+        ("G1.", "G1", None),
+        ("G10X1", "G10", None),
+        ("M104S200", "M104", None),
+        ("g1 X10", None, None),
+        ("  G28 X", "G28", None),
+        ("\tM80.1 foo", "M80", "1"),
     )
     @unpack
     def test_gcode_and_subcode_for_cmd(self, cmd, expected_gcode, expected_subcode):
@@ -251,6 +278,56 @@ class TestCommHelpers(unittest.TestCase):
         self.assertEqual(expected_gcode, actual_gcode)
         self.assertEqual(expected_subcode, actual_subcode)
 
+        # second time from the cache
+        actual_gcode, actual_subcode = gcode_and_subcode_for_cmd(cmd)
+        self.assertEqual(expected_gcode, actual_gcode)
+        self.assertEqual(expected_subcode, actual_subcode)
+
+    def test_gcode_and_subcode_for_cmd_stats(self):
+        from octoprint.util.comm import command_parser_stats, gcode_and_subcode_for_cmd
+
+        before = command_parser_stats()
+        gcode_and_subcode_for_cmd("G1 X10")
+        gcode_and_subcode_for_cmd("M4711 S1")
+        gcode_and_subcode_for_cmd("M4711 S2")
+        after = command_parser_stats()
+
+        self.assertEqual(before["fast"] + 1, after["fast"])
+        self.assertEqual(before["misses"] + 1, after["misses"])
+        self.assertEqual(before["hits"] + 1, after["hits"])
+
+        gcode_and_subcode_for_cmd("  M4711 S1")
+        self.assertEqual(after["uncached"] + 1, command_parser_stats()["uncached"])
+
+    def test_gcode_and_subcode_for_cmd_without_spaces(self):
+        from octoprint.util.comm import command_parser_stats, gcode_and_subcode_for_cmd
+
+        before = command_parser_stats()
+        for i in range(2000):
+            self.assertEqual(
+                ("G1", None), gcode_and_subcode_for_cmd("G1X{}Y20E0.1".format(i))
+            )
+            self.assertEqual(
+                ("M4712", None), gcode_and_subcode_for_cmd("M4712S{}".format(i))
+            )
+        after = command_parser_stats()
+
+        self.assertEqual(before["fast"] + 2000, after["fast"])
+        self.assertEqual(before["misses"] + 1, after["misses"])
+        self.assertEqual(before["hits"] + 1999, after["hits"])
+        self.assertTrue(after["size"] <= before["size"] + 1)
+
+    @data((True, "F"), (False, None))
+    @unpack
+    def test_gcode_and_subcode_for_cmd_f(self, support_f, expected_gcode):
+        import mock
+
+        from octoprint.util.comm import gcode_and_subcode_for_cmd
+
+        with mock.patch("octoprint.util.comm.settings") as settings_mock:
+            settings_mock.return_value.getBoolean.return_value = support_f
+            self.assertEqual((expected_gcode, None), gcode_and_subcode_for_cmd("F3000"))
+
     @data(
         ("T:23.0 B:60.0", 0, {"T0": (23.0, None), "B": (60.0, None)}, 0),
         ("T:23.0 B:60.0", 1, {"T1": (23.0, None), "B": (60.0, None)}, 1),
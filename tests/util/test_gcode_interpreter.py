@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import, division, print_function, unicode_literals
+
+__license__ = "GNU Affero General Public License http://www.gnu.org/licenses/agpl.html"
+__copyright__ = "Copyright (C) 2022 The OctoPrint Project - Released under terms of the AGPLv3 License"
+
+import io
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import pytest
+from ddt import data, ddt
+
+from octoprint.util.gcodeInterpreter import AnalysisAborted, gcode
+
+numpy_available_only = pytest.mark.skipif(
+    not gcode().vectorized, reason="numpy unavailable"
+)
+
+FIXTURE = os.path.join(
+    os.path.dirname(os.path.realpath(__file__)),
+    "..",
+    "filemanager",
+    "_files",
+    "bp_case.gcode",
+)
+
+
+def _moves(count, seed, relative=False, e_start=0.0):
+    rng = random.Random(seed)
+    lines = []
+    e = e_start
+    for _ in range(count):
+        params = []
+        if rng.random() < 0.9:
+            params.append(
+                "X{:.3f}".format(rng.uniform(-5, 5) if relative else rng.uniform(0, 200))
+            )
+        if rng.random() < 0.9:
+            params.append(
+                "Y{:.3f}".format(rng.uniform(-5, 5) if relative else rng.uniform(0, 200))
+            )
+        if rng.random() < 0.1:
+            params.append(
+                "Z{:.2f}".format(rng.uniform(0, 1) if relative else rng.uniform(0, 50))
+            )
+        if rng.random() < 0.7:
+            delta = rng.uniform(-0.5, 2.0)
+            e = delta if relative else e + delta
+            params.append("E{:.5f}".format(e))
+        if rng.random() < 0.2:
+            params.append("F{}".format(rng.choice([0, 600, 1800, 9000])))
+        rng.shuffle(params)
+        lines.append("G{} {}".format(rng.choice([0, 1]), " ".join(params)))
+    return lines
+
+
+CASES = {
+    "absolute": ["G21", "G90", "M82", "G92 E0"] + _moves(200, 1),
+    "relative": ["G91", "M83"] + _moves(200, 2, relative=True),
+    "relative_e": ["G90", "M83"] + _moves(100, 3) + ["M82", "G92 E0"] + _moves(100, 4),
+    "inches": ["G20"] + _moves(50, 5) + ["G21"] + _moves(50, 6, e_start=10000),
+    "resets": sum((["G92 E0", "M106 S255"] + _moves(30, 100 + i) for i in range(10)), []),
+    "tools": ["T0"]
+    + _moves(40, 7)
+    + ["T1", "G92 E0"]
+    + _moves(40, 8)
+    + ["T0", "G92 E0"]
+    + _moves(40, 9),
+    "duplication": ["T1", "T0", "M605 S2"]
+    + _moves(60, 10)
+    + ["M605 S0"]
+    + _moves(60, 11),
+    "arcs": _moves(40, 12)
+    + ["G2 X50 Y50 I10 J0 E200", "G3 X60 Y40 R10 E210"]
+    + _moves(40, 13, e_start=210),
+    "homing_and_misc": _moves(30, 14)
+    + ["G28 X", "G4 P500", "G4 S1", "M207 S2 F1800", "M208 S0.5 F1200", "G10", "G11"]
+    + _moves(30, 15)
+    + ["G28", "G92 X10 Y10 E5", "G92"]
+    + _moves(30, 16),
+    "comments": ["; filament_diameter = 1.75", "G1 X0 Y0 ; start"]
+    + [line + " ; comment X99 E9999" for line in _moves(40, 17)]
+    + [";TYPE:WALL", ""]
+    + _moves(40, 18, e_start=10000)
+    + ["; filamentDiameter,2.85"],
+    "odd_formatting": [
+        "G1X10Y10E1",
+        "G1 X E2",
+        "G1 Xnan Y1e500 E3",
+        "G1 X10\tY20 E4",
+        "  G1 X30 Y30 E5",
+        "g1 X40 Y40 E6",
+        "G01 X50 Y50 E7",
+        "G1.5 X5 Y5 E8",
+        "G1 X20 Y20 E9 ; °C",
+        "G1 X21 Y21 E10\x0bG1 X50 Y50 E11",
+        "G1 X22 Y22 E12\rG1 X60 Y60 E13",
+        "G1 X1_0 Y2_0 E14",
+    ]
+    + _moves(40, 19, e_start=100),
+}
+
+
+def _layers(count, size=100, segments=200, resets=True):
+    lines = ["G21", "G90", "M82", "G92 E0", "G1 X5 Y5 Z0.3 F6000", "G1 X90 Y5 E5 F1200"]
+    e = 5.0
+    for layer in range(count):
+        lines.append("G1 Z{:.2f} F600".format(0.3 + layer * 0.2))
+        if resets:
+            lines.append("G92 E0")
+            e = 0.0
+        for segment in range(segments):
+            e += 0.1
+            lines.append(
+                "G1 X{:.3f} Y{:.3f} E{:.5f} F1800".format(
+                    10 + (segment * 7) % size, 10 + (segment * 13) % size, e
+                )
+            )
+    return lines
+
+
+class _CountingGcode(gcode):
+    def __init__(self, *args, **kwargs):
+        gcode.__init__(self, *args, **kwargs)
+        self.interpreted = 0
+
+    def _load_lines(self, gcodeFile, *args, **kwargs):
+        self.interpreted += len(gcodeFile)
+        return gcode._load_lines(self, gcodeFile, *args, **kwargs)
+
+
+@ddt
+class GcodeInterpreterTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self, lines, newline="\n", trailing=True):
+        path = os.path.join(self.folder, "test.gcode")
+        with io.open(path, "wt", encoding="utf-8", newline="") as f:
+            f.write(newline.join(lines) + (newline if trailing else ""))
+        return path
+
+    def _analyse(self, path, vectorize, block_size=None, min_run=None, **kwargs):
+        interpreter = gcode(vectorize=vectorize)
+        if block_size is not None:
+            interpreter.VECTORIZED_BLOCK_SIZE = block_size
+        if min_run is not None:
+            interpreter.VECTORIZED_MIN_RUN = min_run
+        interpreter.load(path, **kwargs)
+        return interpreter.get_result()
+
+    def _assert_results_match(self, path, block_size=None, min_run=None, **kwargs):
+        scalar = self._analyse(path, False, **kwargs)
+        vectorized = self._analyse(
+            path, True, block_size=block_size, min_run=min_run, **kwargs
+        )
+        self.assertEqual(scalar.keys(), vectorized.keys())
+        self.assertEqual(pytest.approx(scalar["total_time"]), vectorized["total_time"])
+        for key in ("extrusion_length", "extrusion_volume"):
+            self.assertEqual(pytest.approx(scalar[key]), vectorized[key])
+        for key in ("dimensions", "printing_area"):
+            self.assertEqual(pytest.approx(scalar[key]), vectorized[key])
+        return scalar, vectorized
+
+    def test_scalar(self):
+        path = self._write(
+            ["G21", "G90", "M82", "G92 E0", "G1 Z0.2 F300"]
+            + ["G1 X10 Y10 F6000", "G1 X20 Y10 E1.0 F1200", "G1 X20 Y20 E2.0"]
+        )
+        result = self._analyse(path, False)
+        self.assertEqual([2.0], result["extrusion_length"])
+        self.assertEqual(
+            {"width": 10.0, "depth": 10.0, "height": 0.2}, result["dimensions"]
+        )
+
+    def test_abort(self):
+        path = self._write(_moves(100, 0))
+
+        interpreter = gcode(vectorize=False)
+        interpreter.abort(reenqueue=False)
+        with self.assertRaises(AnalysisAborted):
+            interpreter.load(path)
+
+    @numpy_available_only
+    def test_vectorized_fixture(self):
+        self.assertTrue(gcode().vectorized)
+        self._assert_results_match(FIXTURE)
+
+    @numpy_available_only
+    def test_vectorized_fixture_small_blocks(self):
+        self._assert_results_match(FIXTURE, block_size=4096)
+
+    @numpy_available_only
+    @data(*sorted(CASES.keys()))
+    def test_vectorized(self, case):
+        path = self._write(CASES[case])
+        self._assert_results_match(
+            path,
+            min_run=1,
+            offsets=[(0, 0), (20, 10)],
+            g90_extruder=True,
+        )
+
+    @numpy_available_only
+    @data(*sorted(CASES.keys()))
+    def test_vectorized_crlf_small_blocks(self, case):
+        path = self._write(CASES[case], newline="\r\n", trailing=False)
+        self._assert_results_match(path, block_size=256, offsets=[(0, 0), (20, 10)])
+
+    @numpy_available_only
+    def test_vectorized_filament_diameter(self):
+        path = self._write(CASES["comments"])
+        scalar, vectorized = self._assert_results_match(path)
+        self.assertNotEqual([0.0], vectorized["extrusion_volume"])
+
+    @numpy_available_only
+    def test_vectorized_layers(self):
+        self.assertFalse(gcode(incl_layers=True).vectorized)
+
+    @numpy_available_only
+    def test_vectorized_progress_and_throttle(self):
+        path = self._write(_moves(1000, 20))
+        progress = []
+        throttled = []
+
+        interpreter = gcode(progress_callback=progress.append)
+        interpreter.VECTORIZED_BLOCK_SIZE = 4096
+        interpreter.load(path, throttle=lambda line, read: throttled.append(line))
+
+        self.assertEqual(list(range(1, 1001)), throttled)
+        self.assertEqual(sorted(progress[:-1]), progress[:-1])
+        self.assertEqual(1.0, progress[-2])
+        self.assertEqual(100.0, progress[-1])
+
+    @numpy_available_only
+    def test_vectorized_abort(self):
+        path = self._write(_moves(100, 0))
+
+        interpreter = gcode()
+        interpreter.abort(reenqueue=False)
+        with self.assertRaises(AnalysisAborted) as context:
+            interpreter.load(path)
+        self.assertFalse(context.exception.reenqueue)
+
+    def test_estimate_small_file(self):
+        path = self._write(CASES["absolute"])
+
+        interpreter = gcode()
+        interpreter.estimate(path)
+        self.assertEqual(self._analyse(path, False), interpreter.get_result())
+
+    @data(True, False)
+    def test_estimate(self, resets):
+        lines = _layers(150, resets=resets)
+        path = self._write(lines)
+        full = self._analyse(path, False)
+
+        interpreter = _CountingGcode()
+        interpreter.ESTIMATE_SAMPLES = 8
+        interpreter.ESTIMATE_SAMPLE_SIZE = 16 * 1024
+        interpreter.estimate(path)
+        estimate = interpreter.get_result()
+
+        self.assertTrue(interpreter.interpreted < len(lines) / 4)
+        self.assertEqual(
+            pytest.approx(full["total_time"], rel=0.1), estimate["total_time"]
+        )
+        self.assertEqual(
+            pytest.approx(full["extrusion_length"], rel=0.1),
+            estimate["extrusion_length"],
+        )
+        self.assertEqual(full["printing_area"], estimate["printing_area"])
+
+    @data(
+        (
+            [";FLAVOR:Marlin", ";TIME:5400", ";Filament used: 2.5m, 0.5m"]
+            + [
+                ";MINX:1.5",
+                ";MINY:2",
+                ";MINZ:0.3",
+                ";MAXX:150",
+                ";MAXY:160",
+                ";MAXZ:120",
+            ],
+            [],
+            90.0,
+            [2500.0, 500.0],
+            {"minX": 1.5, "minY": 2.0, "maxX": 150.0, "maxY": 160.0, "maxZ": 120.0},
+        ),
+        (
+            [],
+            [
+                "; filament used [mm] = 1234.5",
+                "; estimated printing time (normal mode) = 1d 2h 3m 4s",
+                "; estimated printing time (silent mode) = 2d 2h 3m 4s",
+            ],
+            (86400 + 2 * 3600 + 3 * 60 + 4) / 60,
+            [1234.5],
+            {},
+        ),
+        (
+            [],
+            [
+                ";   Build time: 1 hour 30 minutes",
+                ";   Filament length: 4321.0 mm (4.32 m)",
+            ],
+            90.0,
+            [4321.0],
+            {},
+        ),
+    )
+    def test_estimate_slicer_comments(self, case):
+        header, footer, total_time, extrusion, area = case
+        path = self._write(header + _layers(150) + footer)
+
+        interpreter = gcode()
+        interpreter.estimate(path)
+        result = interpreter.get_result()
+
+        self.assertEqual(pytest.approx(total_time), result["total_time"])
+        self.assertEqual(pytest.approx(extrusion), result["extrusion_length"])
+        for key, value in area.items():
+            self.assertEqual(value, result["printing_area"][key])